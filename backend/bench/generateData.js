@@ -0,0 +1,158 @@
+/**
+ * Synthetic dataset for load tests: scales the demo seed to 10^5-10^6 rows.
+ *
+ *   npm run bench:data
+ *   BENCH_RECIPES=1000000 BENCH_USERS=100000 BENCH_MEDIA=50000 npm run bench:data
+ *   npm run bench:data -- --reset
+ *
+ * Rows are generated inside PostgreSQL (INSERT ... SELECT generate_series)
+ * in batches of BENCH_BATCH, so nothing crosses the wire and the triggers
+ * maintaining search vectors and stat counters run once per batch. Values
+ * are derived from the row number only, so two runs with the same sizes
+ * produce the same dataset.
+ *
+ * Synthetic rows are tagged (bench-N@bench.test users, "Bench media N"
+ * titles) and the sizes are targets: rerunning tops the tables up to
+ * them, --reset deletes the synthetic rows first. Every synthetic user
+ * logs in with BENCH_PASSWORD (password123 by default). Run the demo
+ * seeder first so categories exist.
+ */
+
+import argon2 from 'argon2';
+import pg from 'pg';
+import config from '../src/config/config.js';
+import { buildHashOptions } from '../src/services/passwordHasher.js';
+
+const env = process.env.NODE_ENV || 'development';
+const dbConfig = config[env];
+
+const readInt = (name, fallback) => Number.parseInt(process.env[name], 10) || fallback;
+const TARGETS = {
+    users: readInt('BENCH_USERS', 10000),
+    media: readInt('BENCH_MEDIA', 5000),
+    recipes: readInt('BENCH_RECIPES', 100000)
+};
+const BATCH = readInt('BENCH_BATCH', 50000);
+const PASSWORD = process.env.BENCH_PASSWORD || 'password123';
+
+const USER_TAG = "email LIKE 'bench-%@bench.test'";
+const MEDIA_TAG = "title LIKE 'Bench media %'";
+
+const DISHES = ['gratin', 'tart', 'risotto', 'stew', 'salad', 'soup', 'pie', 'curry', 'cake', 'tagine', 'omelette', 'crumble'];
+const INGREDIENTS = [
+    'flour', 'butter', 'eggs', 'milk', 'sugar', 'olive oil', 'garlic', 'onion', 'tomatoes', 'basil',
+    'thyme', 'rice', 'parmesan', 'chicken', 'beef', 'mushrooms', 'potatoes', 'carrots', 'lemon', 'cream',
+    'chocolate', 'honey', 'cinnamon', 'zucchini', 'eggplant', 'bell pepper', 'shallots', 'white wine', 'ginger', 'coconut milk'
+];
+
+/**
+ * SQL picking an element of array: the hash spreads row numbers over it
+ * and squaring skews the pick toward the first elements
+ */
+const skewed = (array, hash) => {
+    const index = `(${hash}) % cardinality(${array})`;
+    return `${array}[1 + (${index}) * (${index}) / cardinality(${array})]`;
+};
+
+/**
+ * Fill table up to target with the rows produced by insertSql for the
+ * row numbers $1..$2 (bind parameters), one statement per batch
+ */
+async function fill(client, table, tag, target, insertSql, extraParams = []) {
+    const { rows: [{ count }] } = await client.query(`SELECT count(*)::int AS count FROM ${table} WHERE ${tag}`);
+    if (count >= target) {
+        console.log(`${table}: ${count} synthetic rows, nothing to add`);
+        return;
+    }
+
+    const started = performance.now();
+    for (let from = count + 1; from <= target; from += BATCH) {
+        const to = Math.min(target, from + BATCH - 1);
+        await client.query(insertSql, [from, to, ...extraParams]);
+        process.stdout.write(`\r${table}: ${to}/${target}`);
+    }
+    const seconds = (performance.now() - started) / 1000;
+    console.log(`\r${table}: ${target - count} rows added in ${seconds.toFixed(1)}s`);
+}
+
+async function reset(client) {
+    const { rowCount: recipes } = await client.query(
+        `DELETE FROM recipes WHERE user_id IN (SELECT id FROM users WHERE ${USER_TAG})`
+    );
+    const { rowCount: users } = await client.query(`DELETE FROM users WHERE ${USER_TAG}`);
+    const { rowCount: media } = await client.query(`DELETE FROM media WHERE ${MEDIA_TAG}`);
+    console.log(`reset: removed ${recipes} recipes, ${users} users, ${media} media`);
+}
+
+const client = new pg.Client({
+    connectionString: dbConfig.url,
+    ssl: dbConfig.dialectOptions?.ssl
+});
+await client.connect();
+
+try {
+    if (process.argv.includes('--reset')) {
+        await reset(client);
+    }
+
+    const { rows: [{ categories }] } = await client.query('SELECT count(*)::int AS categories FROM categories');
+    if (categories === 0) {
+        throw new Error('No categories: run `npm run db:seed` first');
+    }
+
+    // One hash shared by every synthetic user, with the server's cost
+    // parameters so logins do not trigger rehashing
+    const passwordHash = await argon2.hash(PASSWORD, { type: argon2.argon2id, ...buildHashOptions(env) });
+
+    await fill(client, 'users', USER_TAG, TARGETS.users, `
+        INSERT INTO users (email, password_hash, username, role, bio, created_at, updated_at)
+        SELECT 'bench-' || i || '@bench.test', $3, 'bench_user_' || i, 'user',
+               CASE WHEN i % 4 = 0 THEN 'Home cook #' || i END,
+               now() - make_interval(mins => ((i::bigint * 7919) % 525600)::int), now()
+        FROM generate_series($1::int, $2::int) AS i
+    `, [passwordHash]);
+
+    await fill(client, 'media', MEDIA_TAG, TARGETS.media, `
+        INSERT INTO media (title, type, release_year, created_at, updated_at)
+        SELECT 'Bench media ' || i, (CASE WHEN i % 3 = 0 THEN 'serie' ELSE 'film' END)::enum_media_type,
+               1950 + i % 75, now(), now()
+        FROM generate_series($1::int, $2::int) AS i
+    `);
+
+    // A few authors and media get most recipes, as in real traffic
+    await fill(client, 'recipes', `user_id IN (SELECT id FROM users WHERE ${USER_TAG})`, TARGETS.recipes, `
+        WITH refs AS (
+            SELECT (SELECT array_agg(id ORDER BY id) FROM users WHERE ${USER_TAG}) AS users,
+                   (SELECT array_agg(id ORDER BY id) FROM categories) AS categories,
+                   (SELECT array_agg(id ORDER BY id) FROM media) AS media,
+                   $3::text[] AS dishes,
+                   $4::text[] AS ingredients
+        )
+        INSERT INTO recipes (
+            title, description, ingredients, instructions, difficulty, prep_time, cook_time,
+            user_id, category_id, media_id, created_at, updated_at
+        )
+        SELECT
+            initcap(ingredients[1 + i % 30]) || ' ' || dishes[1 + (i / 30) % 12] || ' #' || i,
+            'A ' || dishes[1 + (i / 30) % 12] || ' with ' || ingredients[1 + i % 30]
+                || ' and ' || ingredients[1 + (i * 7) % 30] || '.',
+            '- ' || ingredients[1 + i % 30] || E'\\n- ' || ingredients[1 + (i * 7) % 30]
+                || E'\\n- ' || ingredients[1 + (i * 13) % 30] || E'\\n- ' || ingredients[1 + (i * 17) % 30],
+            E'1. Prepare the ingredients.\\n2. Cook for ' || (10 + i % 50) || E' minutes.\\n3. Serve.',
+            (ARRAY['facile', 'moyen', 'difficile'])[1 + i % 3]::enum_recipes_difficulty,
+            5 + i % 40,
+            10 + (i * 3) % 90,
+            ${skewed('users', 'i::bigint * 2654435761')},
+            categories[1 + (i * 31) % cardinality(categories)],
+            CASE WHEN i % 5 <> 0
+                THEN ${skewed('media', 'i::bigint * 40503')}
+            END,
+            now() - make_interval(mins => ((i::bigint * 104729) % 525600)::int),
+            now()
+        FROM generate_series($1::int, $2::int) AS i, refs
+    `, [DISHES, INGREDIENTS]);
+
+    await client.query('ANALYZE users, media, recipes');
+} finally {
+    await client.end();
+}
@@ -0,0 +1,104 @@
+/**
+ * Helpers shared by the bench scripts: latency summaries and baseline
+ * comparison. Kept free of I/O so they can be unit tested.
+ */
+
+/**
+ * Nearest-rank percentile
+ * @param {number[]} sorted - Values in ascending order
+ * @param {number} p - 0-100
+ * @returns {number}
+ */
+export const percentile = (sorted, p) => {
+    if (sorted.length === 0) {
+        return 0;
+    }
+    return sorted[Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1)];
+};
+
+const round = (value, digits = 2) => Number(value.toFixed(digits));
+
+/**
+ * Summary of one scenario run
+ * @param {Object} run
+ * @param {number[]} run.latencies - Milliseconds, one per completed request
+ * @param {number} run.durationMs - Wall time of the run
+ * @param {number} run.errors - Network errors and unexpected statuses
+ * @param {Object} run.statuses - Count per HTTP status
+ * @param {number|null} run.dbQueries - SQL statements issued, null when unknown
+ * @returns {Object}
+ */
+export function summarize({ latencies, durationMs, errors, statuses, dbQueries }) {
+    const sorted = Float64Array.from(latencies).sort();
+    const requests = sorted.length;
+    return {
+        requests,
+        rps: round(requests / (durationMs / 1000), 1),
+        errors,
+        statuses,
+        latency_ms: {
+            p50: round(percentile(sorted, 50)),
+            p95: round(percentile(sorted, 95)),
+            p99: round(percentile(sorted, 99)),
+            max: round(requests ? sorted[requests - 1] : 0)
+        },
+        db_queries: dbQueries,
+        db_queries_per_request: dbQueries === null || requests === 0 ? null : round(dbQueries / requests)
+    };
+}
+
+// Metric, direction a regression goes, and the absolute change ignored as noise
+const CHECKS = [
+    { path: ['rps'], worse: 'lower', slack: 0 },
+    { path: ['latency_ms', 'p50'], worse: 'higher', slack: 1 },
+    { path: ['latency_ms', 'p95'], worse: 'higher', slack: 2 },
+    { path: ['latency_ms', 'p99'], worse: 'higher', slack: 5 },
+    { path: ['db_queries_per_request'], worse: 'higher', slack: 0.05 }
+];
+
+const read = (object, path) => path.reduce((value, key) => value?.[key], object);
+
+/**
+ * Compare scenario summaries against a stored baseline
+ * @param {Object} current - { scenarios: { name: summary } }
+ * @param {Object} baseline - Same shape, from an earlier run
+ * @param {number} tolerance - Allowed relative change, e.g. 0.1 for 10%
+ * @returns {{ rows: Object[], regressions: Object[] }}
+ */
+export function compareToBaseline(current, baseline, tolerance = 0.1) {
+    const rows = [];
+    for (const [scenario, summary] of Object.entries(current.scenarios)) {
+        const previous = baseline.scenarios?.[scenario];
+        if (!previous) {
+            continue;
+        }
+        for (const { path, worse, slack } of CHECKS) {
+            const before = read(previous, path);
+            const after = read(summary, path);
+            if (typeof before !== 'number' || typeof after !== 'number') {
+                continue;
+            }
+            const change = before === 0 ? 0 : (after - before) / before;
+            const delta = worse === 'higher' ? after - before : before - after;
+            rows.push({
+                scenario,
+                metric: path.join('.'),
+                baseline: before,
+                current: after,
+                change: `${change >= 0 ? '+' : ''}${(change * 100).toFixed(1)}%`,
+                regression: delta > slack && delta > Math.abs(before) * tolerance
+            });
+        }
+        if (summary.errors > previous.errors) {
+            rows.push({
+                scenario,
+                metric: 'errors',
+                baseline: previous.errors,
+                current: summary.errors,
+                change: '',
+                regression: true
+            });
+        }
+    }
+    return { rows, regressions: rows.filter(row => row.regression) };
+}
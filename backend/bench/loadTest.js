@@ -0,0 +1,348 @@
+/**
+ * HTTP load test: fixed-concurrency scenarios against a running server,
+ * with latency percentiles, throughput and SQL statements per request.
+ *
+ *   npm run bench:load
+ *   npm run bench:load -- browse detail
+ *   npm run bench:load -- --save-baseline
+ *   npm run bench:load -- --baseline
+ *   BENCH_CONCURRENCY=64 BENCH_DURATION_MS=30000 npm run bench:load
+ *
+ * Scenarios: browse (anonymous listings, filters, search, TMDB search),
+ * detail (recipe pages), login (bursts of logins by synthetic users),
+ * admin (dashboard stats) and writes (create, edit, delete). Each runs
+ * BENCH_CONCURRENCY virtual users for BENCH_WARMUP_MS (not measured) then
+ * BENCH_DURATION_MS.
+ *
+ * Results are written to bench/results/<timestamp>.json. --save-baseline
+ * also stores them as bench/baseline.json; --baseline compares the run
+ * with it and exits 1 when a metric got worse by more than
+ * BENCH_TOLERANCE (default 0.1, i.e. 10%).
+ *
+ * Start the server with CLUSTER_WORKERS=1 (query counts are read from the
+ * /metrics of the process that answers), rate limits raised
+ * (RATE_LIMIT_MAX, RATE_LIMIT_AUTH_MAX), the stubs from bench/stubs.js and
+ * the dataset from bench/generateData.js.
+ */
+
+import fs from 'fs/promises';
+import http from 'http';
+import https from 'https';
+import os from 'os';
+import path from 'path';
+import { fileURLToPath } from 'url';
+import { summarize, compareToBaseline } from './lib.js';
+
+const BASE_URL = process.env.BENCH_URL || 'http://localhost:3000';
+const CONCURRENCY = Number.parseInt(process.env.BENCH_CONCURRENCY, 10) || 16;
+const DURATION_MS = Number.parseInt(process.env.BENCH_DURATION_MS, 10) || 15000;
+const WARMUP_MS = Number.parseInt(process.env.BENCH_WARMUP_MS, 10) || 3000;
+const TOLERANCE = Number.parseFloat(process.env.BENCH_TOLERANCE) || 0.1;
+const BENCH_USERS = Number.parseInt(process.env.BENCH_USERS, 10) || 10000;
+const PASSWORD = process.env.BENCH_PASSWORD || 'password123';
+const ADMIN = {
+    email: process.env.BENCH_ADMIN_EMAIL || 'admin@cinedelices.com',
+    password: process.env.BENCH_ADMIN_PASSWORD || 'password123'
+};
+
+const benchDir = path.dirname(fileURLToPath(import.meta.url));
+const BASELINE_FILE = path.join(benchDir, 'baseline.json');
+const RESULTS_DIR = path.join(benchDir, 'results');
+
+const SEARCH_TERMS = ['tomatoes', 'chocolate cake', 'risotto', 'garlic', 'lemon tart', 'curry', 'mushrooms', 'honey'];
+const TMDB_QUERIES = ['Ratatouille', 'Chef', 'Julie', 'Burnt', 'Big Night', 'The Menu', 'Tampopo', 'Soul Kitchen'];
+
+const pick = list => list[Math.floor(Math.random() * list.length)];
+
+const agent = new (BASE_URL.startsWith('https:') ? https : http).Agent({ keepAlive: true, maxSockets: CONCURRENCY + 2 });
+
+/**
+ * One HTTP request; the body is read fully and parsed when JSON
+ * @returns {Promise<{ status: number, headers: Object, body: any }>}
+ */
+function send(method, url, { body, token, headers = {} } = {}) {
+    const target = new URL(url, BASE_URL);
+    const payload = body === undefined ? undefined : JSON.stringify(body);
+    const transport = target.protocol === 'https:' ? https : http;
+
+    return new Promise((resolve, reject) => {
+        const req = transport.request(target, {
+            method,
+            agent,
+            headers: {
+                Accept: 'application/json',
+                ...(payload ? { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) } : {}),
+                ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                ...headers
+            }
+        }, (res) => {
+            const chunks = [];
+            res.on('data', chunk => chunks.push(chunk));
+            res.on('error', reject);
+            res.on('end', () => {
+                const text = Buffer.concat(chunks).toString();
+                let parsed = text;
+                if (String(res.headers['content-type']).includes('json') && text) {
+                    try {
+                        parsed = JSON.parse(text);
+                    } catch {
+                        // Keep the text
+                    }
+                }
+                resolve({ status: res.statusCode, headers: res.headers, body: parsed });
+            });
+        });
+        req.on('error', reject);
+        req.end(payload);
+    });
+}
+
+async function login(credentials) {
+    const response = await send('POST', '/api/v1/auth/login', { body: credentials });
+    if (response.status !== 200) {
+        throw new Error(`Login as ${credentials.email} failed with ${response.status}`);
+    }
+    return response.body.token;
+}
+
+const benchUser = () => ({ email: `bench-${1 + Math.floor(Math.random() * BENCH_USERS)}@bench.test`, password: PASSWORD });
+
+/**
+ * Sum of db_query_duration_seconds_count over all labels, or null when
+ * /metrics is not reachable
+ */
+async function countQueries() {
+    const token = process.env.METRICS_TOKEN;
+    try {
+        const response = await send('GET', '/metrics', {
+            headers: { Accept: 'text/plain', ...(token ? { Authorization: `Bearer ${token}` } : {}) }
+        });
+        if (response.status !== 200) {
+            return null;
+        }
+        return String(response.body)
+            .split('\n')
+            .filter(line => line.startsWith('db_query_duration_seconds_count'))
+            .reduce((sum, line) => sum + Number(line.slice(line.lastIndexOf(' ') + 1)), 0);
+    } catch {
+        return null;
+    }
+}
+
+/**
+ * Each scenario prepares shared state once, then every virtual user runs
+ * iteration() in a loop. Requests go through the recorder passed in
+ * (hit), which times them and checks the status.
+ */
+const SCENARIOS = {
+    browse: {
+        description: 'Anonymous listings, filters, full-text and TMDB search',
+        async setup() {
+            const { body: categories } = await send('GET', '/api/v1/categories');
+            return { categories: categories.map(category => category.id) };
+        },
+        async iteration(hit, { categories }) {
+            const first = await hit('GET', '/api/v1/recipes?limit=20');
+            if (first.body?.next_cursor && Math.random() < 0.5) {
+                await hit('GET', `/api/v1/recipes?limit=20&cursor=${encodeURIComponent(first.body.next_cursor)}`);
+            }
+            await hit('GET', `/api/v1/recipes?limit=20&category_id=${pick(categories)}&difficulty=${pick(['facile', 'moyen', 'difficile'])}`);
+            await hit('GET', `/api/v1/recipes/search?q=${encodeURIComponent(pick(SEARCH_TERMS))}`);
+            await hit('GET', '/api/v1/categories');
+            if (Math.random() < 0.1) {
+                await hit('GET', `/api/v1/tmdb/search?query=${encodeURIComponent(pick(TMDB_QUERIES))}&type=${pick(['movie', 'tv'])}`);
+            }
+        }
+    },
+
+    detail: {
+        description: 'Recipe pages picked across the first few listing pages',
+        async setup() {
+            const ids = [];
+            let cursor = null;
+            for (let page = 0; page < 10; page++) {
+                const query = `limit=100${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`;
+                const { body } = await send('GET', `/api/v1/recipes?${query}`);
+                ids.push(...body.data.map(recipe => recipe.id));
+                cursor = body.next_cursor;
+                if (!cursor) {
+                    break;
+                }
+            }
+            if (ids.length === 0) {
+                throw new Error('No recipes: run `npm run bench:data` first');
+            }
+            return { ids };
+        },
+        async iteration(hit, { ids }) {
+            await hit('GET', `/api/v1/recipes/${pick(ids)}`);
+        }
+    },
+
+    login: {
+        description: 'Logins by random synthetic users (argon2 verify)',
+        async iteration(hit) {
+            await hit('POST', '/api/v1/auth/login', { body: benchUser() });
+        }
+    },
+
+    admin: {
+        description: 'Admin dashboard over several date ranges',
+        async setup() {
+            return { token: await login(ADMIN) };
+        },
+        async iteration(hit, { token }) {
+            await hit('GET', `/api/v1/admin/stats?days=${pick([7, 30, 90, 365])}&bucket=${pick(['day', 'week'])}`, { token });
+            await hit('GET', '/api/v1/admin/categories', { token });
+        }
+    },
+
+    writes: {
+        description: 'Create, edit and delete a recipe, between listing reads',
+        async setup() {
+            // A handful of authors, as rate-limited logins would dominate otherwise
+            const tokens = [];
+            for (let index = 0; index < Math.min(CONCURRENCY, 16); index++) {
+                tokens.push(await login(benchUser()));
+            }
+            return { tokens };
+        },
+        async iteration(hit, { tokens }) {
+            const token = pick(tokens);
+            const created = await hit('POST', '/api/v1/recipes', {
+                token,
+                expect: 201,
+                body: {
+                    title: `Load test gratin ${Math.random().toString(36).slice(2, 8)}`,
+                    ingredients: '- potatoes\n- cream\n- garlic',
+                    instructions: '1. Slice.\n2. Bake for 45 minutes.',
+                    difficulty: 'facile',
+                    prep_time: 15,
+                    cook_time: 45
+                }
+            });
+            await hit('GET', '/api/v1/recipes?limit=20');
+            if (created.status !== 201) {
+                return;
+            }
+            await hit('PUT', `/api/v1/recipes/${created.body.id}`, { token, body: { cook_time: 50 } });
+            await hit('DELETE', `/api/v1/recipes/${created.body.id}`, { token, expect: 204 });
+        }
+    }
+};
+
+async function runScenario(name) {
+    const scenario = SCENARIOS[name];
+    const state = scenario.setup ? await scenario.setup() : {};
+
+    const latencies = [];
+    const statuses = {};
+    let errors = 0;
+    let recording = false;
+
+    const hit = async (method, url, { expect = 200, ...options } = {}) => {
+        const started = performance.now();
+        let response;
+        try {
+            response = await send(method, url, options);
+        } catch {
+            if (recording) {
+                errors++;
+            }
+            return { status: 0, body: null };
+        }
+        if (recording) {
+            latencies.push(performance.now() - started);
+            statuses[response.status] = (statuses[response.status] || 0) + 1;
+            if (response.status !== expect) {
+                errors++;
+            }
+        }
+        return response;
+    };
+
+    const warmupEnd = Date.now() + WARMUP_MS;
+    const deadline = warmupEnd + DURATION_MS;
+    let queriesBefore = null;
+    let started = 0;
+
+    const startRecording = setTimeout(async () => {
+        queriesBefore = await countQueries();
+        started = performance.now();
+        recording = true;
+    }, WARMUP_MS);
+
+    const virtualUser = async () => {
+        while (Date.now() < deadline) {
+            await scenario.iteration(hit, state);
+        }
+    };
+    await Promise.all(Array.from({ length: CONCURRENCY }, virtualUser));
+    clearTimeout(startRecording);
+
+    const durationMs = performance.now() - started;
+    recording = false;
+    const queriesAfter = await countQueries();
+    // The /metrics scrapes themselves issue no SQL
+    const dbQueries = queriesBefore === null || queriesAfter === null ? null : queriesAfter - queriesBefore;
+
+    return summarize({ latencies, durationMs, errors, statuses, dbQueries });
+}
+
+const args = process.argv.slice(2);
+const selected = args.filter(arg => !arg.startsWith('--'));
+const names = selected.length > 0 ? selected : Object.keys(SCENARIOS);
+const unknown = names.filter(name => !SCENARIOS[name]);
+if (unknown.length > 0) {
+    console.error(`Unknown scenario(s): ${unknown.join(', ')}. Available: ${Object.keys(SCENARIOS).join(', ')}`);
+    process.exit(2);
+}
+
+const result = {
+    started_at: new Date().toISOString(),
+    target: BASE_URL,
+    config: { concurrency: CONCURRENCY, duration_ms: DURATION_MS, warmup_ms: WARMUP_MS },
+    host: { cpus: os.cpus().length, node: process.version },
+    scenarios: {}
+};
+
+for (const name of names) {
+    console.log(`${name}: ${SCENARIOS[name].description} (${CONCURRENCY} users, ${DURATION_MS}ms)`);
+    result.scenarios[name] = await runScenario(name);
+}
+agent.destroy();
+
+console.table(Object.fromEntries(Object.entries(result.scenarios).map(([name, summary]) => [name, {
+    rps: summary.rps,
+    p50_ms: summary.latency_ms.p50,
+    p95_ms: summary.latency_ms.p95,
+    p99_ms: summary.latency_ms.p99,
+    errors: summary.errors,
+    queries_per_req: summary.db_queries_per_request
+}])));
+
+await fs.mkdir(RESULTS_DIR, { recursive: true });
+const resultFile = path.join(RESULTS_DIR, `${result.started_at.replace(/[:.]/g, '-')}.json`);
+await fs.writeFile(resultFile, `${JSON.stringify(result, null, 2)}\n`);
+console.log(`Results written to ${path.relative(process.cwd(), resultFile)}`);
+
+if (args.includes('--save-baseline')) {
+    await fs.writeFile(BASELINE_FILE, `${JSON.stringify(result, null, 2)}\n`);
+    console.log(`Baseline saved to ${path.relative(process.cwd(), BASELINE_FILE)}`);
+}
+
+if (args.includes('--baseline')) {
+    let baseline;
+    try {
+        baseline = JSON.parse(await fs.readFile(BASELINE_FILE, 'utf8'));
+    } catch {
+        console.error('No baseline: run with --save-baseline first');
+        process.exit(2);
+    }
+    const { rows, regressions } = compareToBaseline(result, baseline, TOLERANCE);
+    console.table(rows);
+    if (regressions.length > 0) {
+        console.error(`${regressions.length} regression(s) beyond ${TOLERANCE * 100}% of the baseline`);
+        process.exitCode = 1;
+    }
+}
@@ -0,0 +1,87 @@
+/**
+ * Microbenchmark: logins/sec (argon2 verify) for several hashing pool sizes.
+ *
+ *   npm run bench:hashing
+ *   POOL_SIZES=1,2,4 CLIENTS=64 DURATION_MS=5000 npm run bench:hashing
+ *
+ * For each pool size, CLIENTS concurrent "logins" verify a password for
+ * DURATION_MS. Alongside, a probe times small fs.readFile calls to show
+ * how much the hashing load delays other threadpool work.
+ * UV_THREADPOOL_SIZE must be at least the largest pool size + 1 (the npm
+ * script sets 16).
+ */
+
+import { readFile } from 'fs/promises';
+import { fileURLToPath } from 'url';
+import { PasswordHasher, HashingOverloadedError, buildHashOptions } from '../src/services/passwordHasher.js';
+
+const POOL_SIZES = (process.env.POOL_SIZES || '1,2,4,8').split(',').map(Number);
+const CLIENTS = Number.parseInt(process.env.CLIENTS, 10) || 32;
+const DURATION_MS = Number.parseInt(process.env.DURATION_MS, 10) || 3000;
+const hashOptions = buildHashOptions(process.env.BENCH_COST_ENV || 'production');
+
+const percentile = (values, p) => {
+    if (values.length === 0) {
+        return 0;
+    }
+    const sorted = [...values].sort((a, b) => a - b);
+    return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+};
+
+const timed = async (fn) => {
+    const start = performance.now();
+    await fn();
+    return performance.now() - start;
+};
+
+async function runScenario(poolSize, digest) {
+    const hasher = new PasswordHasher({ poolSize, maxQueue: CLIENTS, queueTimeoutMs: 10000, hashOptions });
+    const latencies = [];
+    const ioLatencies = [];
+    let rejected = 0;
+    const deadline = Date.now() + DURATION_MS;
+
+    const client = async () => {
+        while (Date.now() < deadline) {
+            try {
+                latencies.push(await timed(() => hasher.verify(digest, 'correct horse battery staple')));
+            } catch (error) {
+                if (!(error instanceof HashingOverloadedError)) {
+                    throw error;
+                }
+                rejected++;
+            }
+        }
+    };
+
+    const ioProbe = async () => {
+        const self = fileURLToPath(import.meta.url);
+        while (Date.now() < deadline) {
+            ioLatencies.push(await timed(() => readFile(self)));
+            await new Promise(resolve => setTimeout(resolve, 20));
+        }
+    };
+
+    await Promise.all([...Array.from({ length: CLIENTS }, client), ioProbe()]);
+
+    return {
+        pool_size: poolSize,
+        logins_per_sec: Math.round(latencies.length / (DURATION_MS / 1000)),
+        p50_ms: Math.round(percentile(latencies, 50)),
+        p95_ms: Math.round(percentile(latencies, 95)),
+        rejected,
+        fs_read_p95_ms: Number(percentile(ioLatencies, 95).toFixed(2))
+    };
+}
+
+const setup = new PasswordHasher({ poolSize: 1, hashOptions });
+const digest = await setup.hash('correct horse battery staple');
+
+console.log(`argon2id m=${hashOptions.memoryCost} t=${hashOptions.timeCost} p=${hashOptions.parallelism}, ` +
+    `${CLIENTS} clients, ${DURATION_MS}ms per run, UV_THREADPOOL_SIZE=${process.env.UV_THREADPOOL_SIZE || 4}`);
+
+const results = [];
+for (const poolSize of POOL_SIZES) {
+    results.push(await runScenario(poolSize, digest));
+}
+console.table(results);
@@ -0,0 +1,94 @@
+/**
+ * Serialization microbenchmark: one page of hydrated recipes turned into
+ * a response body three ways, for a fixed time each:
+ *   - instances: model instances through toJSON() and JSON.stringify, as
+ *     res.json() did for non-raw queries
+ *   - stringify: raw rows through JSON.stringify
+ *   - compiled: raw rows through the schema-compiled serializer
+ *
+ *   npm run bench:serialization
+ *   BENCH_ROWS=100 BENCH_DURATION_MS=3000 npm run bench:serialization
+ *
+ * No database is needed: rows are synthetic, instances come from build().
+ */
+
+import { isDeepStrictEqual } from 'util';
+import db from '../src/models/index.js';
+import { serializeRecipeList } from '../src/serializers/schemas.js';
+
+const ROWS = Number.parseInt(process.env.BENCH_ROWS, 10) || 20;
+const DURATION_MS = Number.parseInt(process.env.BENCH_DURATION_MS, 10) || 2000;
+
+const { Recipe, User, Category, Media } = db;
+
+const category = { id: 3, name: 'Dessert', description: null, created_at: new Date(), updated_at: new Date() };
+const media = {
+    id: 7, title: 'Ratatouille', type: 'film', image_url: 'https://image.tmdb.org/t/p/w500/ratatouille.jpg',
+    release_year: 2007, tmdb_id: 2062, tmdb_synced_at: new Date(), created_at: new Date(), updated_at: new Date()
+};
+
+const rows = Array.from({ length: ROWS }, (_, index) => ({
+    id: index + 1,
+    title: `Ratatouille de Rémy n°${index}`,
+    description: 'Un plat mijoté de légumes du soleil, servi en fines tranches comme dans le film.',
+    difficulty: 'moyen',
+    prep_time: 30,
+    cook_time: 45,
+    image_url: `https://images.example.com/recipes/${index}.jpg`,
+    user_id: 2,
+    category_id: category.id,
+    media_id: media.id,
+    version: 1,
+    created_at: new Date(Date.UTC(2024, 0, 1, 0, index)),
+    updated_at: new Date(Date.UTC(2024, 0, 2, 0, index)),
+    author: { id: 2, username: 'remy' },
+    category,
+    media
+}));
+
+// The rows as findAll({ include }) materializes them without raw: true
+const include = [
+    { model: User, as: 'author' },
+    { model: Category, as: 'category' },
+    { model: Media, as: 'media' }
+];
+const instances = rows.map(row => Recipe.build(row, { include, isNewRecord: false, raw: true }));
+
+const variants = {
+    instances: () => JSON.stringify({ data: instances, next_cursor: 'WyIyMDI0LTAxLTAxIiwxXQ' }),
+    stringify: () => JSON.stringify({ data: rows, next_cursor: 'WyIyMDI0LTAxLTAxIiwxXQ' }),
+    compiled: () => serializeRecipeList({ data: rows, next_cursor: 'WyIyMDI0LTAxLTAxIiwxXQ' })
+};
+
+const run = (serialize) => {
+    // Warm up so the JIT has optimized each variant before timing it
+    for (let index = 0; index < 2000; index++) {
+        serialize();
+    }
+    let operations = 0;
+    let bytes = 0;
+    const started = performance.now();
+    while (performance.now() - started < DURATION_MS) {
+        bytes += serialize().length;
+        operations++;
+    }
+    const seconds = (performance.now() - started) / 1000;
+    return { ops_per_sec: Math.round(operations / seconds), mb_per_sec: Math.round(bytes / seconds / 1e5) / 10 };
+};
+
+try {
+    // The compiled body must describe the same data
+    if (!isDeepStrictEqual(JSON.parse(variants.compiled()), JSON.parse(variants.stringify()))) {
+        throw new Error('Compiled serializer output differs from JSON.stringify');
+    }
+
+    const results = Object.fromEntries(Object.entries(variants).map(([name, serialize]) => [name, run(serialize)]));
+    const baseline = results.instances.ops_per_sec;
+    for (const result of Object.values(results)) {
+        result.speedup = Math.round((result.ops_per_sec / baseline) * 100) / 100;
+    }
+    console.log(`${ROWS} recipes per page, ${DURATION_MS} ms per variant`);
+    console.table(results);
+} finally {
+    await db.sequelize.close();
+}
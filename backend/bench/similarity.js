@@ -0,0 +1,70 @@
+/**
+ * Similar-recipe benchmark: full rebuild time per phase, then read and
+ * incremental update latency, on whatever the database holds (10^5
+ * recipes after a default `npm run bench:data`).
+ *
+ *   npm run bench:similarity
+ *   BENCH_SAMPLES=500 SIMILARITY_REBUILD_CONCURRENCY=4 npm run bench:similarity
+ *   npm run bench:similarity -- --skip-rebuild
+ *
+ * Reads go through the same query as GET /recipes/:id/similar; updates
+ * call refresh_recipe_neighbors exactly as the background queue does,
+ * one at a time.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../src/models/index.js';
+import { getSimilarRecipes, rebuildSimilarity, SIMILAR_K } from '../src/services/similarityService.js';
+import { percentile } from './lib.js';
+
+const SAMPLES = Number.parseInt(process.env.BENCH_SAMPLES, 10) || 200;
+
+const latencies = async (ids, fn) => {
+    const timings = [];
+    for (const id of ids) {
+        const started = performance.now();
+        await fn(id);
+        timings.push(performance.now() - started);
+    }
+    timings.sort((a, b) => a - b);
+    const round = value => Math.round(value * 100) / 100;
+    return {
+        samples: timings.length,
+        p50_ms: round(percentile(timings, 50)),
+        p95_ms: round(percentile(timings, 95)),
+        p99_ms: round(percentile(timings, 99)),
+        max_ms: round(timings.at(-1) ?? 0)
+    };
+};
+
+try {
+    if (!process.argv.includes('--skip-rebuild')) {
+        console.log('Rebuilding vectors and neighbour lists...');
+        const rebuild = await rebuildSimilarity();
+        console.table({ rebuild });
+    }
+
+    const sizes = await db.sequelize.query(`
+        SELECT (SELECT count(*) FROM recipe_features)::int AS features,
+               (SELECT count(*) FROM feature_stats WHERE df > 0)::int AS distinct_features,
+               (SELECT count(*) FROM recipe_neighbors)::int AS neighbor_rows,
+               (SELECT round(avg(n), 1) FROM (SELECT count(*) AS n FROM recipe_neighbors GROUP BY recipe_id) lists)::float AS avg_list`,
+    { type: QueryTypes.SELECT });
+    console.table(sizes);
+
+    const ids = (await db.sequelize.query(
+        'SELECT id FROM recipes ORDER BY random() LIMIT :limit',
+        { replacements: { limit: SAMPLES }, type: QueryTypes.SELECT }
+    )).map(row => row.id);
+
+    const fields = ['id', 'title', 'image_url', 'user_id', 'category_id', 'media_id', 'created_at'];
+    console.table({
+        similar_read: await latencies(ids, id => getSimilarRecipes(id, { fields })),
+        incremental_update: await latencies(ids, id => db.sequelize.query(
+            'SELECT refresh_recipe_neighbors(:id, :k)',
+            { replacements: { id, k: SIMILAR_K } }
+        ))
+    });
+} finally {
+    await db.sequelize.close();
+}
@@ -0,0 +1,128 @@
+/**
+ * Local stand-ins for TMDB and Mistral, so load tests never call (or pay
+ * for) the real APIs and upstream latency is fixed and known.
+ *
+ *   npm run bench:stubs
+ *   STUB_PORT=4100 STUB_LATENCY_MS=50 npm run bench:stubs
+ *
+ * Point the server at them with:
+ *   TMDB_API_KEY=stub TMDB_API_URL=http://127.0.0.1:4100/tmdb/3
+ *   MISTRAL_API_KEY=stub MISTRAL_API_URL=http://127.0.0.1:4100/mistral/v1/chat/completions
+ *
+ * TMDB answers search/{movie,tv} and {movie,tv}/:id with generated
+ * results; Mistral answers a fixed recipe, as JSON or as a server-sent
+ * event stream (STUB_TOKEN_DELAY_MS between tokens) when "stream": true.
+ */
+
+import http from 'http';
+import { fileURLToPath } from 'url';
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+const RECIPE = {
+    title: 'Bench stub stew',
+    description: 'A stew generated by the Mistral stub.',
+    ingredients: ['2 onions', '500g beef', '1 bottle of red wine', '3 carrots'],
+    instructions: ['Brown the beef.', 'Add onions and carrots.', 'Pour the wine and simmer for 2 hours.'],
+    difficulty: 'moyen',
+    prep_time: 20,
+    cook_time: 120
+};
+
+function tmdbItem(id, type, query = 'Bench') {
+    const date = `${1950 + id % 75}-01-01`;
+    return type === 'tv'
+        ? { id, name: `${query} series ${id}`, first_air_date: date, poster_path: `/stub-${id}.jpg`, overview: 'Stub series.' }
+        : { id, title: `${query} film ${id}`, release_date: date, poster_path: `/stub-${id}.jpg`, overview: 'Stub film.' };
+}
+
+function tmdb(url, res) {
+    const match = /^\/tmdb\/3\/(?:search\/(movie|tv)|(movie|tv)\/(\d+))$/.exec(url.pathname);
+    if (!match) {
+        return sendJson(res, 404, { status_message: 'The resource you requested could not be found.' });
+    }
+    if (match[1]) {
+        const query = url.searchParams.get('query') || 'Bench';
+        const seed = [...query].reduce((sum, char) => sum + char.charCodeAt(0), 0);
+        const results = Array.from({ length: 12 }, (_, index) => tmdbItem(seed * 100 + index, match[1], query));
+        return sendJson(res, 200, { page: 1, results, total_results: results.length });
+    }
+    const id = Number(match[3]);
+    return sendJson(res, 200, { ...tmdbItem(id, match[2]), imdb_id: `tt${String(id).padStart(7, '0')}` });
+}
+
+async function mistral(req, res, tokenDelayMs) {
+    let body = '';
+    for await (const chunk of req) {
+        body += chunk;
+    }
+    const { stream } = JSON.parse(body || '{}');
+    const content = JSON.stringify(RECIPE);
+
+    if (!stream) {
+        return sendJson(res, 200, { choices: [{ index: 0, message: { role: 'assistant', content } }] });
+    }
+
+    res.writeHead(200, { 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' });
+    // Roughly word-sized tokens, like the real API
+    for (const token of content.match(/.{1,12}/g)) {
+        if (res.destroyed) {
+            return;
+        }
+        res.write(`data: ${JSON.stringify({ choices: [{ index: 0, delta: { content: token } }] })}\n\n`);
+        await sleep(tokenDelayMs);
+    }
+    res.end('data: [DONE]\n\n');
+}
+
+function sendJson(res, status, payload) {
+    const body = JSON.stringify(payload);
+    res.writeHead(status, { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) });
+    res.end(body);
+}
+
+/**
+ * Start both stubs on one port
+ * @param {Object} [options]
+ * @param {number} [options.port] - 0 picks a free port
+ * @param {number} [options.latencyMs] - Delay before each response
+ * @param {number} [options.tokenDelayMs] - Delay between streamed tokens
+ * @returns {Promise<{ url: string, counts: Object, close: Function }>}
+ */
+export async function startStubs({ port = 0, latencyMs = 0, tokenDelayMs = 5 } = {}) {
+    const counts = { tmdb: 0, mistral: 0 };
+
+    const server = http.createServer(async (req, res) => {
+        const url = new URL(req.url, 'http://stub');
+        await sleep(latencyMs);
+        if (url.pathname.startsWith('/tmdb/')) {
+            counts.tmdb++;
+            return tmdb(url, res);
+        }
+        if (url.pathname === '/mistral/v1/chat/completions' && req.method === 'POST') {
+            counts.mistral++;
+            return mistral(req, res, tokenDelayMs).catch(() => sendJson(res, 400, { message: 'Invalid request' }));
+        }
+        sendJson(res, 404, { message: 'Not found' });
+    });
+
+    await new Promise(resolve => server.listen(port, '127.0.0.1', resolve));
+    return {
+        url: `http://127.0.0.1:${server.address().port}`,
+        counts,
+        close: () => new Promise((resolve) => {
+            server.close(resolve);
+            server.closeAllConnections();
+        })
+    };
+}
+
+if (process.argv[1] === fileURLToPath(import.meta.url)) {
+    const stubs = await startStubs({
+        port: Number.parseInt(process.env.STUB_PORT, 10) || 4100,
+        latencyMs: Number.parseInt(process.env.STUB_LATENCY_MS, 10) || 0,
+        tokenDelayMs: Number.parseInt(process.env.STUB_TOKEN_DELAY_MS, 10) || 5
+    });
+    console.log(`TMDB stub:    TMDB_API_URL=${stubs.url}/tmdb/3`);
+    console.log(`Mistral stub: MISTRAL_API_URL=${stubs.url}/mistral/v1/chat/completions`);
+}
@@ -0,0 +1,50 @@
+/**
+ * Regenerate src/models/registry.js, the static list of model modules
+ * loaded by models/index.js. Run after adding or removing a model:
+ *
+ *   npm run models:registry
+ *
+ * Static imports let the ESM loader fetch and compile every model in
+ * parallel, where scanning the directory and awaiting one dynamic import
+ * per file serialised them on each cold start.
+ */
+
+import { readdirSync, writeFileSync } from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+export const MODELS_DIR = fileURLToPath(new URL('../src/models/', import.meta.url));
+export const REGISTRY_FILE = path.join(MODELS_DIR, 'registry.js');
+
+const NOT_MODELS = new Set(['index.js', 'registry.js']);
+
+/**
+ * Model files of a directory, sorted
+ * @param {string} dir
+ * @returns {string[]}
+ */
+export const listModelFiles = (dir = MODELS_DIR) => readdirSync(dir)
+    .filter(file => !file.startsWith('.') && file.endsWith('.js') && !file.endsWith('.test.js') && !NOT_MODELS.has(file))
+    .sort();
+
+/**
+ * Source of the registry module for the given model files
+ * @param {string[]} files
+ * @returns {string}
+ */
+export function renderModelRegistry(files) {
+    const names = files.map(file => path.basename(file, '.js'));
+    return [
+        '// Generated by `npm run models:registry` (scripts/generateModelRegistry.js); do not edit.',
+        ...names.map(name => `import ${name} from './${name}.js';`),
+        '',
+        `export default [${names.join(', ')}];`,
+        ''
+    ].join('\n');
+}
+
+if (process.argv[1] === fileURLToPath(import.meta.url)) {
+    const files = listModelFiles();
+    writeFileSync(REGISTRY_FILE, renderModelRegistry(files));
+    console.log(`${path.relative(process.cwd(), REGISTRY_FILE)}: ${files.length} models`);
+}
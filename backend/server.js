@@ -1,7 +1,22 @@
-import app from './src/app.js';
+import cluster from 'cluster';
+import module from 'module';
+import os from 'os';
+import { markStartup } from './src/utils/startupProfile.js';
 
-const PORT = process.env.PORT || 3000;
+// Reuse V8 bytecode across cold starts (Node 22.1+, ignored by older
+// runtimes). Must run before the application modules are imported.
+if (process.env.COMPILE_CACHE_DIR) {
+    module.enableCompileCache?.(process.env.COMPILE_CACHE_DIR);
+}
+markStartup('bootstrap');
 
-app.listen(PORT, () => {
-    console.log(`🚀 Server is running on http://localhost:${PORT}`);
-});
+// One HTTP worker per core unless CLUSTER_WORKERS says otherwise; 1 runs without a primary
+const WORKERS = Number.parseInt(process.env.CLUSTER_WORKERS, 10) || os.availableParallelism();
+
+if (cluster.isPrimary && WORKERS > 1) {
+    const { startCluster } = await import('./src/cluster.js');
+    startCluster(WORKERS);
+} else {
+    const { startHttpServer } = await import('./src/httpServer.js');
+    startHttpServer();
+}
@@ -6,7 +6,14 @@ import cookieParser from 'cookie-parser';
 import helmet from 'helmet';
 import rateLimit from 'express-rate-limit';
 import router from './routes/index.js';
+import healthRoutes from './routes/healthRoutes.js';
+import imageRoutes from './routes/imageRoutes.js';
 import { verifyToken } from './utils/jwt.js';
+import { attachLoaders } from './middlewares/loaders.js';
+import { attachAbortSignal } from './middlewares/abortSignal.js';
+import { httpMetrics, countRejections } from './middlewares/metrics.js';
+import { PostgresRateLimitStore } from './services/rateLimitStore.js';
+import { markStartup } from './utils/startupProfile.js';
 
 dotenv.config();
 
@@ -16,6 +23,8 @@ if (process.env.NODE_ENV === 'production') {
     app.set('trust proxy', 1);
 }
 
+app.use(httpMetrics);
+
 // Middlewares
 app.use(cors({
     origin: process.env.FRONTEND_URL || 'http://localhost:5173',
@@ -25,18 +34,41 @@ app.use(helmet());
 app.use(express.json());
 app.use(cookieParser());
 
+// Counters shared through PostgreSQL so limits hold across cluster workers and
+// replicas; in-memory by default outside production
+const useSharedRateLimits = (process.env.RATE_LIMIT_STORE
+    || (process.env.NODE_ENV === 'production' ? 'postgres' : 'memory')) === 'postgres';
+
+const rateLimitStore = (prefix) => (useSharedRateLimits
+    ? { store: new PostgresRateLimitStore({ prefix }), passOnStoreError: true }
+    : {});
+
 const apiLimiter = rateLimit({
     windowMs: 15 * 60 * 1000,
     max: Number.parseInt(process.env.RATE_LIMIT_MAX, 10) || 200,
     standardHeaders: true,
-    legacyHeaders: false
+    legacyHeaders: false,
+    handler: countRejections('api'),
+    ...rateLimitStore('api')
 });
 
 const authLimiter = rateLimit({
     windowMs: 15 * 60 * 1000,
     max: Number.parseInt(process.env.RATE_LIMIT_AUTH_MAX, 10) || 20,
     standardHeaders: true,
-    legacyHeaders: false
+    legacyHeaders: false,
+    handler: countRejections('auth'),
+    ...rateLimitStore('auth')
+});
+
+// /img downloads on a cache miss; pages show dozens of images, so it gets its own budget
+const imageLimiter = rateLimit({
+    windowMs: 15 * 60 * 1000,
+    max: Number.parseInt(process.env.RATE_LIMIT_IMAGE_MAX, 10) || 1000,
+    standardHeaders: true,
+    legacyHeaders: false,
+    handler: countRejections('img'),
+    ...rateLimitStore('img')
 });
 
 if (process.env.DEBUG_405 === 'true') {
@@ -72,12 +104,14 @@ app.use('/api/v1/auth/login', authLimiter);
 app.use('/api/v1/auth/register', authLimiter);
 
 // API Routes
-app.use('/api/v1', apiLimiter, router);
+app.use('/api/v1', apiLimiter, attachAbortSignal, attachLoaders, router);
 
-// Health Check
-app.get('/health', (req, res) => {
-    res.status(200).json({ status: 'OK', message: 'CinéDélices API is running' });
-});
+// Health checks and Prometheus metrics
+app.use(healthRoutes);
+
+// Resized image variants, under their own limiter
+app.use('/img', imageLimiter);
+app.use(imageRoutes);
 
 // 404 Handler for API
 // API 404
@@ -101,4 +135,6 @@ if (process.env.NODE_ENV === 'production') {
     });
 }
 
+markStartup('app');
+
 export default app;
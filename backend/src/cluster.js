@@ -0,0 +1,107 @@
+/**
+ * Cluster primary: forks one HTTP worker per core (CLUSTER_WORKERS),
+ * replaces workers that crash, drains them all on SIGTERM/SIGINT and
+ * restarts them one at a time on SIGHUP without dropping connections.
+ *
+ * The primary never loads the app, so it holds no database connections.
+ */
+
+import cluster from 'cluster';
+
+const SHUTDOWN_TIMEOUT_MS = Number.parseInt(process.env.SHUTDOWN_TIMEOUT_MS, 10) || 25000;
+const RESPAWN_DELAY_MS = 1000;
+const MAX_RESPAWN_DELAY_MS = 30000;
+// A worker dying sooner than this after starting counts as a crash loop
+const MIN_UPTIME_MS = 5000;
+
+const retiring = new Set();
+let shuttingDown = false;
+let restarting = false;
+let respawnDelay = RESPAWN_DELAY_MS;
+
+const fork = () => {
+    const worker = cluster.fork();
+    worker.startedAt = Date.now();
+    return worker;
+};
+
+const waitForEvent = (worker, event) => new Promise(resolve => worker.once(event, resolve));
+
+/**
+ * Ask a worker to drain and wait for it to exit
+ * @param {import('cluster').Worker} worker
+ * @param {boolean} [grace] - Let load balancers see readiness fail first
+ */
+const retire = async (worker, grace = false) => {
+    retiring.add(worker.id);
+    const exited = waitForEvent(worker, 'exit');
+    const kill = setTimeout(() => worker.process.kill('SIGKILL'), SHUTDOWN_TIMEOUT_MS + 5000);
+    worker.send({ type: 'shutdown', grace });
+    await exited;
+    clearTimeout(kill);
+};
+
+const rollingRestart = async () => {
+    if (restarting || shuttingDown) {
+        return;
+    }
+    restarting = true;
+    console.log('[primary] SIGHUP: rolling restart');
+    try {
+        for (const worker of Object.values(cluster.workers)) {
+            // Bring the replacement up first so the port always has a listener
+            const replacement = fork();
+            await waitForEvent(replacement, 'listening');
+            await retire(worker);
+        }
+        console.log('[primary] rolling restart complete');
+    } finally {
+        restarting = false;
+    }
+};
+
+const shutdown = async (signal) => {
+    if (shuttingDown) {
+        return;
+    }
+    shuttingDown = true;
+    console.log(`[primary] ${signal}: draining ${Object.keys(cluster.workers).length} workers`);
+    await Promise.all(Object.values(cluster.workers).map(worker => retire(worker, signal === 'SIGTERM')));
+    process.exit(0);
+};
+
+/**
+ * Fork the workers and supervise them
+ * @param {number} workerCount
+ */
+export function startCluster(workerCount) {
+    console.log(`[primary ${process.pid}] starting ${workerCount} workers`);
+    for (let i = 0; i < workerCount; i++) {
+        fork();
+    }
+
+    cluster.on('exit', (worker, code, signal) => {
+        if (retiring.delete(worker.id) || shuttingDown) {
+            return;
+        }
+
+        const uptime = Date.now() - worker.startedAt;
+        respawnDelay = uptime < MIN_UPTIME_MS
+            ? Math.min(respawnDelay * 2, MAX_RESPAWN_DELAY_MS)
+            : RESPAWN_DELAY_MS;
+        console.error(`[primary] worker ${worker.id} died (${signal || code}), restarting in ${respawnDelay}ms`);
+        setTimeout(() => {
+            if (!shuttingDown) {
+                fork();
+            }
+        }, respawnDelay);
+    });
+
+    process.on('SIGTERM', () => shutdown('SIGTERM'));
+    process.on('SIGINT', () => shutdown('SIGINT'));
+    process.on('SIGHUP', () => {
+        rollingRestart().catch(error => console.error('[primary] rolling restart failed:', error.message));
+    });
+}
+
+export default startCluster;
@@ -1,45 +1,96 @@
 import 'dotenv/config';
 
-export const buildConfig = () => ({
-    development: {
-        url: process.env.DATABASE_URL,
-        dialect: 'postgres',
-        logging: false,
-        define: {
-            underscored: true,
-            timestamps: true,
-            createdAt: 'created_at',
-            updatedAt: 'updated_at'
-        }
-    },
-    test: {
-        url: process.env.DATABASE_URL_TEST || process.env.DATABASE_URL,
-        dialect: 'postgres',
-        logging: false,
-        define: {
-            underscored: true,
-            timestamps: true,
-            createdAt: 'created_at',
-            updatedAt: 'updated_at'
-        }
-    },
-    production: {
-        url: process.env.DATABASE_URL,
+const define = {
+    underscored: true,
+    timestamps: true,
+    createdAt: 'created_at',
+    updatedAt: 'updated_at'
+};
+
+// Per-environment defaults, each overridable through DB_POOL_* / DB_STATEMENT_TIMEOUT_MS
+const DEFAULTS = {
+    development: { pool: { max: 5, min: 0, acquire: 30000, idle: 10000, evict: 1000 }, statementTimeout: 15000 },
+    test: { pool: { max: 5, min: 0, acquire: 10000, idle: 1000, evict: 1000 }, statementTimeout: 15000 },
+    production: { pool: { max: 10, min: 2, acquire: 10000, idle: 10000, evict: 1000 }, statementTimeout: 10000 }
+};
+
+const readInt = (name, fallback) => {
+    const value = Number.parseInt(process.env[name], 10);
+    return Number.isNaN(value) ? fallback : value;
+};
+
+const buildPool = ({ pool }) => ({
+    max: readInt('DB_POOL_MAX', pool.max),
+    min: readInt('DB_POOL_MIN', pool.min),
+    acquire: readInt('DB_POOL_ACQUIRE_MS', pool.acquire),
+    idle: readInt('DB_POOL_IDLE_MS', pool.idle),
+    evict: readInt('DB_POOL_EVICT_MS', pool.evict)
+});
+
+/**
+ * Split a postgres:// URL into the fields Sequelize expects for a replica
+ * @param {string} url
+ * @returns {Object}
+ */
+export const parseDatabaseUrl = (url) => {
+    const parsed = new URL(url);
+    return {
+        host: parsed.hostname,
+        port: parsed.port ? Number(parsed.port) : 5432,
+        username: decodeURIComponent(parsed.username),
+        password: decodeURIComponent(parsed.password),
+        database: parsed.pathname.replace(/^\//, '')
+    };
+};
+
+/**
+ * Read replicas from DATABASE_READ_URLS (comma separated). Without any,
+ * every query goes to DATABASE_URL.
+ * @param {string} primaryUrl
+ * @returns {Object|undefined} - Sequelize `replication` option
+ */
+const buildReplication = (primaryUrl) => {
+    const readUrls = (process.env.DATABASE_READ_URLS || '')
+        .split(',')
+        .map(url => url.trim())
+        .filter(Boolean);
+    if (readUrls.length === 0 || !primaryUrl) {
+        return undefined;
+    }
+    return {
+        read: readUrls.map(parseDatabaseUrl),
+        write: parseDatabaseUrl(primaryUrl)
+    };
+};
+
+const buildEnvironment = (env, url, extraDialectOptions = {}) => {
+    const defaults = DEFAULTS[env];
+    return {
+        url,
         dialect: 'postgres',
         logging: false,
+        pool: buildPool(defaults),
+        replication: buildReplication(url),
+        // Queries use the primary unless they opt in with READ_REPLICA (src/utils/replica.js)
+        query: { useMaster: true },
         dialectOptions: {
-            ssl: {
-                require: true,
-                rejectUnauthorized: false
-            }
+            ...extraDialectOptions,
+            statement_timeout: readInt('DB_STATEMENT_TIMEOUT_MS', defaults.statementTimeout),
+            idle_in_transaction_session_timeout: readInt('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000)
         },
-        define: {
-            underscored: true,
-            timestamps: true,
-            createdAt: 'created_at',
-            updatedAt: 'updated_at'
+        define
+    };
+};
+
+export const buildConfig = () => ({
+    development: buildEnvironment('development', process.env.DATABASE_URL),
+    test: buildEnvironment('test', process.env.DATABASE_URL_TEST || process.env.DATABASE_URL),
+    production: buildEnvironment('production', process.env.DATABASE_URL, {
+        ssl: {
+            require: true,
+            rejectUnauthorized: false
         }
-    }
+    })
 });
 
 const config = buildConfig();
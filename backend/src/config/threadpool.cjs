@@ -0,0 +1,19 @@
+/**
+ * Size the libuv threadpool (fs, dns, crypto, argon2): password hashing
+ * takes up to HASH_POOL_SIZE threads and four more stay available for DNS
+ * and file I/O.
+ *
+ * libuv reads UV_THREADPOOL_SIZE once, when the pool first starts, and the
+ * ESM loader already uses it to read server.js and its imports. Setting
+ * the variable from an imported module is too late, so this file is a
+ * CommonJS preload: node --require ./src/config/threadpool.cjs server.js
+ * (npm start, npm run dev and the Dockerfiles do this). Cluster workers
+ * inherit the variable when forked.
+ */
+require('dotenv').config({ quiet: true });
+
+const hashPoolSize = Number.parseInt(process.env.HASH_POOL_SIZE, 10) || 2;
+
+if (!process.env.UV_THREADPOOL_SIZE) {
+    process.env.UV_THREADPOOL_SIZE = String(hashPoolSize + 4);
+}
@@ -1,8 +1,22 @@
-import argon2 from 'argon2';
 import db from '../models/index.js';
 import { generateToken } from '../utils/jwt.js';
-
-const { User, Recipe } = db;
+import { loadUserProfile } from '../services/loaders.js';
+import {
+    hashPassword,
+    verifyPassword,
+    needsRehash,
+    HashingOverloadedError
+} from '../services/passwordHasher.js';
+import { sendSerialized } from '../utils/serializer.js';
+import { serializeAuth, serializeUserProfile } from '../serializers/schemas.js';
+
+const { User } = db;
+
+const upgradePasswordHash = (user, password) => {
+    hashPassword(password)
+        .then(passwordHash => user.update({ password_hash: passwordHash }))
+        .catch(error => console.warn(`Password rehash skipped for user ${user.id}: ${error.message}`));
+};
 
 /**
  * Register a new user
@@ -12,13 +26,13 @@ export const register = async (req, res) => {
         const { username, email, password } = req.body;
 
         // Check if user already exists
-        const existingUser = await User.findOne({ where: { email } });
+        const existingUser = await User.findOne({ where: { email }, attributes: ['id'], raw: true });
         if (existingUser) {
             return res.status(400).json({ message: 'User with this email already exists' });
         }
 
         // Hash password
-        const hashedPassword = await argon2.hash(password);
+        const hashedPassword = await hashPassword(password);
 
         // Create user
         const user = await User.create({
@@ -38,12 +52,13 @@ export const register = async (req, res) => {
             maxAge: 24 * 60 * 60 * 1000 // 24 hours
         });
 
-        // Remove password from response
-        const userResponse = user.toJSON();
-        delete userResponse.password_hash;
-
-        res.status(201).json({ user: userResponse, token });
+        // The user schema has no password_hash
+        sendSerialized(res, 201, serializeAuth, { user, token });
     } catch (error) {
+        if (error instanceof HashingOverloadedError) {
+            res.set('Retry-After', String(error.retryAfter));
+            return res.status(503).json({ message: error.message });
+        }
         res.status(500).json({ error: error.message });
     }
 };
@@ -62,11 +77,16 @@ export const login = async (req, res) => {
         }
 
         // Verify password
-        const isPasswordValid = await argon2.verify(user.password_hash, password);
+        const isPasswordValid = await verifyPassword(user.password_hash, password);
         if (!isPasswordValid) {
             return res.status(401).json({ message: 'Invalid credentials' });
         }
 
+        // Upgrade hashes made with older cost parameters, without delaying the response
+        if (needsRehash(user.password_hash)) {
+            upgradePasswordHash(user, password);
+        }
+
         // Generate token
         const token = generateToken(user);
 
@@ -78,12 +98,12 @@ export const login = async (req, res) => {
             maxAge: 24 * 60 * 60 * 1000 // 24 hours
         });
 
-        // Remove password from response
-        const userResponse = user.toJSON();
-        delete userResponse.password_hash;
-
-        res.status(200).json({ user: userResponse, token });
+        sendSerialized(res, 200, serializeAuth, { user, token });
     } catch (error) {
+        if (error instanceof HashingOverloadedError) {
+            res.set('Retry-After', String(error.retryAfter));
+            return res.status(503).json({ message: error.message });
+        }
         res.status(500).json({ error: error.message });
     }
 };
@@ -93,16 +113,13 @@ export const login = async (req, res) => {
  */
 export const getMe = async (req, res) => {
     try {
-        const user = await User.findByPk(req.user.id, {
-            attributes: { exclude: ['password_hash'] },
-            include: [{ model: Recipe, as: 'recipes' }]
-        });
+        const user = await loadUserProfile(req.user.id, req.loaders);
 
         if (!user) {
             return res.status(404).json({ message: 'User not found' });
         }
 
-        res.status(200).json(user);
+        sendSerialized(res, 200, serializeUserProfile, user);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
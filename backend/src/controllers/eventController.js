@@ -0,0 +1,16 @@
+import { openEventStream, closeEventStream } from '../services/changeFeed.js';
+
+/**
+ * GET /events - Server-sent recipe, media and category changes. Browsers
+ * resume with the Last-Event-ID header; `?last_event_id=` does the same
+ * for clients that had to open a new EventSource.
+ */
+export const streamEvents = (req, res) => {
+    const client = openEventStream(res, req.get('Last-Event-ID') || req.query.last_event_id);
+    if (!client) {
+        return res.status(503)
+            .set('Retry-After', '10')
+            .json({ message: 'Too many open event streams, retry later' });
+    }
+    req.on('close', () => closeEventStream(client));
+};
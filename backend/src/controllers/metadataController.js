@@ -1,11 +1,16 @@
+import { QueryTypes } from 'sequelize';
 import db from '../models/index.js';
+import { getCategories, getMedia, invalidateReferenceData } from '../services/referenceData.js';
+import { publishChange, changedFields } from '../services/changeFeed.js';
+import { sendSerialized } from '../utils/serializer.js';
+import { serializeCategories, serializeMedia, serializeMediaList } from '../serializers/schemas.js';
 
-const { Category, Media } = db;
+const { Media } = db;
 
 export const getAllCategories = async (req, res) => {
     try {
-        const categories = await Category.findAll();
-        res.status(200).json(categories);
+        const categories = await getCategories();
+        sendSerialized(res, 200, serializeCategories, categories);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -13,8 +18,8 @@ export const getAllCategories = async (req, res) => {
 
 export const getAllMedia = async (req, res) => {
     try {
-        const media = await Media.findAll();
-        res.status(200).json(media);
+        const media = await getMedia();
+        sendSerialized(res, 200, serializeMediaList, media);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -23,17 +28,44 @@ export const getAllMedia = async (req, res) => {
 export const createMedia = async (req, res) => {
     try {
         const { title, type, release_year, tmdb_id, poster_url, image_url } = req.body;
-
-        // Simple validation or duplicate check could go here
-
-        const newMedia = await Media.create({
+        const values = {
             title,
             type,
             release_year,
             image_url: image_url || poster_url // Support both field names
-        });
+        };
+
+        if (!tmdb_id) {
+            const newMedia = await Media.create(values);
+            await invalidateReferenceData('media');
+            publishChange('media', 'created', [newMedia.id], changedFields('media', newMedia));
+            return sendSerialized(res, 201, serializeMedia, newMedia);
+        }
+
+        // Picking the same TMDB title twice returns the existing row
+        const [media] = await db.sequelize.query(
+            `INSERT INTO media (title, type, release_year, image_url, tmdb_id, created_at, updated_at)
+             VALUES (:title, :type, :release_year, :image_url, :tmdb_id, NOW(), NOW())
+             ON CONFLICT (type, tmdb_id) WHERE tmdb_id IS NOT NULL
+             DO UPDATE SET updated_at = media.updated_at
+             RETURNING *, (xmax = 0) AS inserted`,
+            {
+                replacements: {
+                    ...values,
+                    release_year: release_year ?? null,
+                    image_url: values.image_url ?? null,
+                    tmdb_id
+                },
+                type: QueryTypes.SELECT
+            }
+        );
+        const { inserted, ...row } = media;
+        if (inserted) {
+            await invalidateReferenceData('media');
+            publishChange('media', 'created', [row.id], changedFields('media', row));
+        }
 
-        res.status(201).json(newMedia);
+        sendSerialized(res, inserted ? 201 : 200, serializeMedia, row);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
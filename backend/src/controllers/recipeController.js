@@ -1,7 +1,56 @@
+import { Op, col, literal, where } from 'sequelize';
 import db from '../models/index.js';
-import { generateRecipeFromMovie } from '../services/mistralService.js';
+import { searchRecipes as searchRecipeIndex } from '../services/recipeSearchService.js';
+import {
+    findRecipesByIngredients,
+    parseIngredientTerms,
+    encodeCoverageCursor,
+    decodeCoverageCursor
+} from '../services/ingredientSearchService.js';
+import { getSimilarRecipes as findSimilarRecipes, SIMILAR_K } from '../services/similarityService.js';
+import {
+    updateRecipeChecked,
+    deleteRecipeChecked,
+    parseIfMatch,
+    versionEtag
+} from '../services/recipeWriteService.js';
+import { hydrateRecipes } from '../services/loaders.js';
+import { publishInBackground, recipeChangedFields } from '../services/changeFeed.js';
+import { READ_REPLICA } from '../utils/replica.js';
+import { RECIPE_FIELDS } from '../validations/recipeSchema.js';
+import { buildPage, decodeCursor, parseLimit, cursorTimestamp, CURSOR_TIMESTAMP } from '../utils/pagination.js';
+import { lazyModule } from '../utils/lazy.js';
+import { sendSerialized } from '../utils/serializer.js';
+import { serializeRecipe, serializeRecipeList } from '../serializers/schemas.js';
 
-const { Recipe, User, Category, Media } = db;
+const { Recipe, GenerationJob } = db;
+
+// Open job status streams, ended on shutdown like the change feed's
+const jobStreams = new Set();
+
+// AI generation is loaded on first use, off the cold-start path
+const loadGenerationQueue = lazyModule(() => import('../services/generationQueue.js'));
+const loadMistralService = lazyModule(() => import('../services/mistralService.js'));
+
+const TOTAL_TIME = literal('COALESCE("Recipe"."prep_time", 0) + COALESCE("Recipe"."cook_time", 0)');
+const CREATED_AT = col('Recipe.created_at');
+const CURSOR_ATTRIBUTE = [literal(cursorTimestamp('"Recipe"."created_at"')), CURSOR_TIMESTAMP];
+
+// Always selected: the page cursor and the keys used to attach related rows
+const REQUIRED_FIELDS = ['id', 'created_at', 'user_id', 'category_id', 'media_id'];
+
+/**
+ * Resolve the `fields` query parameter into Sequelize attributes.
+ */
+const parseFields = (fields) => {
+    if (!fields) {
+        return undefined;
+    }
+    const requested = fields.split(',').map(field => field.trim());
+    return RECIPE_FIELDS.filter(field =>
+        requested.includes(field) || REQUIRED_FIELDS.includes(field)
+    );
+};
 
 export const createRecipe = async (req, res) => {
     try {
@@ -9,22 +58,102 @@ export const createRecipe = async (req, res) => {
             ...req.body,
             user_id: req.user.id
         });
-        res.status(201).json(recipe);
+        sendSerialized(res, 201, serializeRecipe, recipe);
+        publishInBackground('recipe', 'created', [recipe.id], () => recipeChangedFields(recipe));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 };
 
+/**
+ * GET /recipes?ingredients=tomato,basil&match=all|any
+ * Ranked by coverage instead of date, with its own cursor format
+ */
+const getRecipesByIngredients = async (req, res) => {
+    const { cursor, fields, match } = req.query;
+    const limit = parseLimit(req.query.limit);
+    let after = null;
+    if (cursor) {
+        after = decodeCoverageCursor(cursor);
+        if (!after) {
+            return res.status(400).json({ message: 'Invalid cursor' });
+        }
+    }
+
+    const rows = await findRecipesByIngredients(parseIngredientTerms(req.query.ingredients), {
+        match,
+        fields: parseFields(fields) ?? RECIPE_FIELDS,
+        filters: req.query,
+        after,
+        limit: limit + 1
+    });
+    const hasMore = rows.length > limit;
+    const data = hasMore ? rows.slice(0, limit) : rows;
+    sendSerialized(res, 200, serializeRecipeList, {
+        data: await hydrateRecipes(data, req.loaders),
+        next_cursor: hasMore ? encodeCoverageCursor(data[data.length - 1]) : null
+    });
+};
+
 export const getAllRecipes = async (req, res) => {
     try {
+        if (req.query.ingredients !== undefined) {
+            return await getRecipesByIngredients(req, res);
+        }
+
+        const { cursor, fields, min_total_time, max_total_time } = req.query;
+        const limit = parseLimit(req.query.limit);
+        const conditions = [];
+
+        for (const key of ['category_id', 'media_id', 'user_id', 'difficulty']) {
+            if (req.query[key] !== undefined) {
+                conditions.push({ [key]: req.query[key] });
+            }
+        }
+        if (min_total_time !== undefined) {
+            conditions.push(where(TOTAL_TIME, { [Op.gte]: Number(min_total_time) }));
+        }
+        if (max_total_time !== undefined) {
+            conditions.push(where(TOTAL_TIME, { [Op.lte]: Number(max_total_time) }));
+        }
+        if (cursor) {
+            const after = decodeCursor(cursor);
+            if (!after) {
+                return res.status(400).json({ message: 'Invalid cursor' });
+            }
+            // Compared in SQL: Sequelize would format the value as a Date,
+            // cutting the microseconds off
+            const createdAt = literal(`${db.sequelize.escape(after.created_at)}::timestamptz`);
+            conditions.push({
+                [Op.or]: [
+                    where(CREATED_AT, { [Op.lt]: createdAt }),
+                    { [Op.and]: [where(CREATED_AT, { [Op.eq]: createdAt }), { id: { [Op.lt]: after.id } }] }
+                ]
+            });
+        }
+
+        // On the primary, where conditionalGet read the ETag versions
+        const attributes = parseFields(fields);
         const recipes = await Recipe.findAll({
-            include: [
-                { model: User, as: 'author', attributes: ['id', 'username'] },
-                { model: Category, as: 'category' },
-                { model: Media, as: 'media' }
-            ]
+            attributes: attributes ? [...attributes, CURSOR_ATTRIBUTE] : { include: [CURSOR_ATTRIBUTE] },
+            where: { [Op.and]: conditions },
+            order: [['created_at', 'DESC'], ['id', 'DESC']],
+            limit: limit + 1,
+            raw: true
         });
-        res.status(200).json(recipes);
+        const page = buildPage(recipes, limit);
+        page.data = await hydrateRecipes(page.data, req.loaders);
+        sendSerialized(res, 200, serializeRecipeList, page);
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+};
+
+export const searchRecipes = async (req, res) => {
+    try {
+        const limit = Number.parseInt(req.query.limit, 10) || 20;
+        const results = await searchRecipeIndex(req.query.q.trim(), limit);
+        sendSerialized(res, 200, serializeRecipeList, results);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -32,57 +161,97 @@ export const getAllRecipes = async (req, res) => {
 
 export const getRecipeById = async (req, res) => {
     try {
-        const recipe = await Recipe.findByPk(req.params.id, {
-            include: [
-                { model: User, as: 'author', attributes: ['id', 'username'] },
-                { model: Category, as: 'category' },
-                { model: Media, as: 'media' }
-            ]
-        });
+        let recipe = await Recipe.findByPk(req.params.id, { ...READ_REPLICA, raw: true });
+        // A replica behind the version in the ETag (or without the recipe
+        // yet) would have its body cached under that ETag
+        const expected = res.locals?.recipeVersion;
+        if (expected !== undefined && recipe?.version !== expected) {
+            recipe = await Recipe.findByPk(req.params.id, { raw: true });
+        }
 
         if (!recipe) {
             return res.status(404).json({ message: 'Recipe not found' });
         }
 
-        res.status(200).json(recipe);
+        const [hydrated] = await hydrateRecipes([recipe], req.loaders);
+        sendSerialized(res, 200, serializeRecipe, hydrated);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 };
 
-export const updateRecipe = async (req, res) => {
+/**
+ * GET /recipes/:id/similar?limit=&fields=
+ * Precomputed neighbours, best first, each with its cosine `score`
+ */
+export const getSimilarRecipes = async (req, res) => {
     try {
-        const recipe = await Recipe.findByPk(req.params.id);
-        if (!recipe) {
+        const id = Number.parseInt(req.params.id, 10);
+        const limit = Math.min(Number.parseInt(req.query.limit, 10) || SIMILAR_K, SIMILAR_K);
+        const rows = await findSimilarRecipes(id, {
+            fields: parseFields(req.query.fields) ?? RECIPE_FIELDS,
+            limit
+        });
+
+        if (rows.length === 0 && !(await Recipe.findByPk(id, { attributes: ['id'], raw: true }))) {
             return res.status(404).json({ message: 'Recipe not found' });
         }
-        // Only owner or admin can update
-        if (recipe.user_id !== req.user.id && req.user.role !== 'admin') {
-            return res.status(403).json({ message: 'Not authorized to update this recipe' });
-        }
-        await recipe.update(req.body);
-        res.status(200).json(recipe);
+
+        sendSerialized(res, 200, serializeRecipeList, { data: await hydrateRecipes(rows, req.loaders) });
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 };
 
-export const deleteRecipe = async (req, res) => {
+/**
+ * Answer a refused write: 404, 403, or 412 with the current version's ETag
+ */
+const sendWriteError = (res, error) => {
+    if (!error.current) {
+        return res.status(error.status).json({ message: error.message });
+    }
+    // The saved row, so the client can merge or overwrite without a read
+    res.set('ETag', versionEtag(error.current.version));
+    return res.status(error.status).json({ message: error.message, current: error.current });
+};
+
+/**
+ * PUT /recipes/:id, one UPDATE checking owner and If-Match version
+ */
+export const updateRecipe = async (req, res) => {
     try {
-        const recipe = await Recipe.findByPk(req.params.id);
-        if (!recipe) {
-            return res.status(404).json({ message: 'Recipe not found' });
-        }
-        // Only owner or admin can delete
-        if (recipe.user_id !== req.user.id && req.user.role !== 'admin') {
-            return res.status(403).json({ message: 'Not authorized to delete this recipe' });
+        const recipe = await updateRecipeChecked(Number(req.params.id), req.body, {
+            user: req.user,
+            expectedVersion: parseIfMatch(req.headers['if-match'])
+        });
+        res.set('ETag', versionEtag(recipe.version));
+        sendSerialized(res, 200, serializeRecipe, recipe);
+        publishInBackground('recipe', 'updated', [recipe.id], () => recipeChangedFields(recipe, Object.keys(req.body)));
+    } catch (error) {
+        if (error.name === 'RecipeWriteError') {
+            return sendWriteError(res, error);
         }
+        res.status(500).json({ error: error.message });
+    }
+};
 
-        // Delete related records (favorites, ratings, etc. are handled by DB cascade if they existed, but models are gone)
-
-        await recipe.destroy();
+/**
+ * DELETE /recipes/:id, one DELETE checking owner and If-Match version.
+ * Favorites, ratings, neighbour lists etc. go with it by DB cascade;
+ * the lists that held it are queued for recompute by a trigger.
+ */
+export const deleteRecipe = async (req, res) => {
+    try {
+        const { id } = await deleteRecipeChecked(Number(req.params.id), {
+            user: req.user,
+            expectedVersion: parseIfMatch(req.headers['if-match'])
+        });
         res.status(204).send();
+        publishInBackground('recipe', 'deleted', [id]);
     } catch (error) {
+        if (error.name === 'RecipeWriteError') {
+            return sendWriteError(res, error);
+        }
         res.status(500).json({ error: error.message });
     }
 };
@@ -94,9 +263,136 @@ export const generateRecipe = async (req, res) => {
             return res.status(400).json({ message: 'Movie title is required' });
         }
 
-        const recipe = await generateRecipeFromMovie(movie);
-        res.status(200).json(recipe);
+        if (req.query.stream === '1') {
+            return streamGeneratedRecipe(movie, req, res);
+        }
+
+        const { enqueueGeneration, toJobStatus } = await loadGenerationQueue();
+        const job = await enqueueGeneration(req.user.id, movie);
+        res.status(202)
+            .location(`${req.baseUrl}/generate/${job.id}`)
+            .json(toJobStatus(job));
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+};
+
+/**
+ * Find a generation job visible to the current user
+ */
+const findGenerationJob = async (req, res) => {
+    const job = await GenerationJob.findByPk(req.params.jobId);
+    if (!job) {
+        res.status(404).json({ message: 'Job not found' });
+        return null;
+    }
+    if (job.user_id !== req.user.id && req.user.role !== 'admin') {
+        res.status(403).json({ message: 'Not authorized to view this job' });
+        return null;
+    }
+    return job;
+};
+
+export const getGenerationJob = async (req, res) => {
+    try {
+        const { toJobStatus } = await loadGenerationQueue();
+        const job = await findGenerationJob(req, res);
+        if (job) {
+            res.status(200).json(toJobStatus(job));
+        }
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+};
+
+/**
+ * Push job status changes as server-sent events until the job finishes
+ */
+export const streamGenerationJob = async (req, res) => {
+    try {
+        const { toJobStatus } = await loadGenerationQueue();
+        let job = await findGenerationJob(req, res);
+        if (!job) {
+            return;
+        }
+
+        res.status(200).set({
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            Connection: 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        });
+        res.flushHeaders();
+
+        let lastUpdate = null;
+        const end = () => {
+            clearInterval(interval);
+            jobStreams.delete(end);
+            if (!res.writableEnded) {
+                res.end();
+            }
+        };
+        const push = () => {
+            const updatedAt = new Date(job.updated_at).getTime();
+            if (updatedAt !== lastUpdate) {
+                lastUpdate = updatedAt;
+                res.write(`event: status\ndata: ${JSON.stringify(toJobStatus(job))}\n\n`);
+            }
+            if (job.isFinished()) {
+                end();
+            }
+        };
+
+        const interval = setInterval(async () => {
+            try {
+                job = await job.reload();
+                push();
+            } catch (error) {
+                res.write(`event: error\ndata: ${JSON.stringify({ error: error.message })}\n\n`);
+                end();
+            }
+        }, 1000);
+        jobStreams.add(end);
+        req.on('close', end);
+        push();
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 };
+
+/**
+ * End every job status stream (shutdown); EventSource clients reconnect
+ * to another process, which resumes from the job row
+ */
+export function closeGenerationStreams() {
+    jobStreams.forEach(end => end());
+}
+
+/**
+ * Relay generation as server-sent events: `token` events while Mistral
+ * writes, then a single `recipe` (or `error`) event.
+ */
+const streamGeneratedRecipe = async (movie, req, res) => {
+    res.status(200).set({
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        Connection: 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    const send = (event, data) => {
+        if (!res.writableEnded) {
+            res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+        }
+    };
+
+    try {
+        const { streamRecipeFromMovie } = await loadMistralService();
+        const recipe = await streamRecipeFromMovie(movie, text => send('token', { text }), { signal: req.signal });
+        send('recipe', recipe);
+    } catch (error) {
+        send('error', { error: error.message });
+    }
+    res.end();
+};
@@ -1,23 +1,23 @@
-import argon2 from 'argon2';
 import db from '../models/index.js';
+import { loadUserProfile } from '../services/loaders.js';
+import { hashPassword, HashingOverloadedError } from '../services/passwordHasher.js';
+import { sendSerialized } from '../utils/serializer.js';
+import { serializeUser, serializeUsers, serializeUserProfile } from '../serializers/schemas.js';
 
-const { User, Recipe } = db;
+const { User } = db;
 
 /**
  * Get user profile by ID
  */
 export const getUserById = async (req, res) => {
     try {
-        const user = await User.findByPk(req.params.id, {
-            attributes: { exclude: ['password_hash'] },
-            include: [{ model: Recipe, as: 'recipes' }]
-        });
+        const user = await loadUserProfile(Number(req.params.id), req.loaders);
 
         if (!user) {
             return res.status(404).json({ message: 'User not found' });
         }
 
-        res.status(200).json(user);
+        sendSerialized(res, 200, serializeUserProfile, user);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -47,16 +47,17 @@ export const updateUser = async (req, res) => {
         if (bio !== undefined) updateData.bio = bio;
         if (avatar_url !== undefined) updateData.avatar_url = avatar_url;
         if (password) {
-            updateData.password_hash = await argon2.hash(password);
+            updateData.password_hash = await hashPassword(password);
         }
 
         await user.update(updateData);
 
-        const userResponse = user.toJSON();
-        delete userResponse.password_hash;
-
-        res.status(200).json(userResponse);
+        sendSerialized(res, 200, serializeUser, user);
     } catch (error) {
+        if (error instanceof HashingOverloadedError) {
+            res.set('Retry-After', String(error.retryAfter));
+            return res.status(503).json({ message: error.message });
+        }
         res.status(500).json({ error: error.message });
     }
 };
@@ -67,9 +68,10 @@ export const updateUser = async (req, res) => {
 export const getAllUsers = async (req, res) => {
     try {
         const users = await User.findAll({
-            attributes: { exclude: ['password_hash'] }
+            attributes: { exclude: ['password_hash'] },
+            raw: true
         });
-        res.status(200).json(users);
+        sendSerialized(res, 200, serializeUsers, users);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -0,0 +1,159 @@
+/**
+ * HTTP server lifecycle for one process (standalone or cluster worker):
+ * listen, start background services, and drain gracefully on SIGTERM or
+ * when the cluster primary asks this worker to retire.
+ */
+
+import cluster from 'cluster';
+import app from './app.js';
+import db from './models/index.js';
+import { startReferenceData } from './services/referenceData.js';
+import { startChangeFeed, stopChangeFeed } from './services/changeFeed.js';
+import { closeGenerationStreams } from './controllers/recipeController.js';
+import { startSimilarityUpdates, stopSimilarityUpdates } from './services/similarityService.js';
+import { startRuntimeMetrics, stopRuntimeMetrics } from './services/metrics.js';
+import { closeListener } from './services/pgNotifier.js';
+import { lazyModule, preloadLazyModules } from './utils/lazy.js';
+import { markStartup, printStartupReport } from './utils/startupProfile.js';
+
+const PORT = process.env.PORT || 3000;
+const SHUTDOWN_TIMEOUT_MS = Number.parseInt(process.env.SHUTDOWN_TIMEOUT_MS, 10) || 25000;
+// Time for load balancers to see readiness fail before the port closes (0 disables)
+const grace = Number.parseInt(process.env.SHUTDOWN_GRACE_MS, 10);
+const SHUTDOWN_GRACE_MS = Number.isNaN(grace) ? 5000 : grace;
+
+// Background workers start after listen, so their imports wait until then
+const loadGenerationQueue = lazyModule(() => import('./services/generationQueue.js'));
+const loadMediaSync = lazyModule(() => import('./services/mediaSync.js'));
+
+const label = cluster.isWorker ? `[worker ${cluster.worker.id}]` : '[server]';
+
+const waitFor = async (condition, deadline) => {
+    while (!condition() && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 200));
+    }
+};
+
+/**
+ * Start serving and install the shutdown handlers
+ * @returns {import('http').Server}
+ */
+export function startHttpServer() {
+    startRuntimeMetrics();
+
+    let draining = false;
+    // Background workers actually started, the only ones to stop
+    let generationQueue = null;
+    let mediaSync = null;
+
+    const server = app.listen(PORT, () => {
+        markStartup('listen');
+        console.log(`🚀 ${label} Server is running on http://localhost:${PORT}`);
+        printStartupReport(label);
+
+        startReferenceData().catch(error => {
+            console.warn('Reference data cache not warmed:', error.message);
+        });
+
+        startChangeFeed().catch(error => {
+            console.warn('Change feed not subscribed:', error.message);
+        });
+
+        startSimilarityUpdates().catch(error => {
+            console.warn('Similar-recipe updates not subscribed:', error.message);
+        });
+
+        if (process.env.GENERATION_WORKER !== 'false') {
+            loadGenerationQueue()
+                .then((queue) => {
+                    if (!draining) {
+                        queue.startGenerationWorker();
+                        generationQueue = queue;
+                    }
+                })
+                .catch(error => console.warn(`${label} generation worker not started:`, error.message));
+        }
+
+        if (process.env.MEDIA_SYNC_WORKER !== 'false' && process.env.TMDB_API_KEY) {
+            loadMediaSync()
+                .then((sync) => {
+                    if (!draining) {
+                        sync.startMediaSyncWorker();
+                        mediaSync = sync;
+                    }
+                })
+                .catch(error => console.warn(`${label} media sync worker not started:`, error.message));
+        }
+
+        // Admin routes, AI generation and argon2 load now, while the server
+        // is already answering, rather than on the first request needing them
+        setImmediate(() => {
+            preloadLazyModules()
+                .then(() => {
+                    markStartup('lazy modules');
+                    printStartupReport(label);
+                })
+                .catch(error => console.warn(`${label} lazy module preload failed:`, error.message));
+        });
+    });
+
+    /**
+     * @param {string} reason
+     * @param {Object} [options]
+     * @param {boolean} [options.grace] - Wait SHUTDOWN_GRACE_MS with readiness
+     *        failing first; not for a rolling restart, where other workers
+     *        keep the port open
+     */
+    const shutdown = async (reason, { grace = true } = {}) => {
+        if (draining) {
+            return;
+        }
+        draining = true;
+        const deadline = Date.now() + SHUTDOWN_TIMEOUT_MS;
+        console.log(`${label} ${reason}: draining connections`);
+
+        // Readiness fails from now on so load balancers stop routing here
+        app.locals.draining = true;
+        generationQueue?.stopGenerationWorker();
+        mediaSync?.stopMediaSyncWorker();
+
+        const forceExit = setTimeout(() => {
+            console.warn(`${label} drain timed out after ${SHUTDOWN_TIMEOUT_MS}ms, closing remaining connections`);
+            server.closeAllConnections();
+            process.exit(1);
+        }, SHUTDOWN_TIMEOUT_MS);
+        forceExit.unref();
+
+        if (grace && SHUTDOWN_GRACE_MS > 0) {
+            await new Promise(resolve => setTimeout(resolve, SHUTDOWN_GRACE_MS));
+        }
+
+        // Event streams never finish on their own; clients resume on another replica
+        stopChangeFeed();
+        closeGenerationStreams();
+
+        // Stop accepting, let in-flight requests finish; idle keep-alive sockets close now
+        await new Promise(resolve => server.close(resolve));
+        if (generationQueue) {
+            await waitFor(() => generationQueue.getGenerationWorkerStats().active === 0, deadline);
+        }
+        await stopSimilarityUpdates();
+
+        stopRuntimeMetrics();
+        await closeListener().catch(() => {});
+        await db.sequelize.close().catch(() => {});
+        process.exit(0);
+    };
+
+    process.once('SIGTERM', () => shutdown('SIGTERM'));
+    process.once('SIGINT', () => shutdown('SIGINT', { grace: false }));
+    process.on('message', (message) => {
+        if (message?.type === 'shutdown') {
+            shutdown('retired by primary', { grace: message.grace });
+        }
+    });
+
+    return server;
+}
+
+export default startHttpServer;
@@ -0,0 +1,16 @@
+/**
+ * Middleware exposing req.signal, aborted when the client disconnects
+ * before the response is complete, so upstream calls can be cancelled
+ */
+export const attachAbortSignal = (req, res, next) => {
+    const controller = new AbortController();
+    res.once('close', () => {
+        if (!res.writableFinished) {
+            const error = new Error('Client closed the request');
+            error.name = 'AbortError';
+            controller.abort(error);
+        }
+    });
+    req.signal = controller.signal;
+    next();
+};
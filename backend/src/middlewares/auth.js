@@ -1,7 +1,4 @@
 import { verifyToken } from '../utils/jwt.js';
-import db from '../models/index.js';
-
-const { Recipe } = db;
 
 /**
  * Middleware to check if user is authenticated via JWT (header or cookie)
@@ -42,25 +39,3 @@ export const isAdmin = (req, res, next) => {
     }
     next();
 };
-
-/**
- * Middleware to check if user is the author of the recipe
- */
-export const isRecipeAuthor = async (req, res, next) => {
-    try {
-        const recipe = await Recipe.findByPk(req.params.id);
-
-        if (!recipe) {
-            return res.status(404).json({ message: 'Recipe not found' });
-        }
-
-        if (recipe.user_id !== req.user.id && req.user.role !== 'admin') {
-            return res.status(403).json({ message: 'Not authorized' });
-        }
-
-        req.recipe = recipe;
-        next();
-    } catch {
-        return res.status(500).json({ message: 'Server error' });
-    }
-};
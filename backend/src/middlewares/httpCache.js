@@ -0,0 +1,134 @@
+import { createHash } from 'crypto';
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+/**
+ * Current write counters of the given tables (see table_versions migration)
+ * @param {Array<string>} tables
+ * @returns {Promise<string>} - e.g. "categories:3,media:12"
+ */
+export const getTableVersions = async (tables) => {
+    const rows = await db.sequelize.query(
+        'SELECT table_name, version FROM table_versions WHERE table_name IN (:tables) ORDER BY table_name',
+        {
+            replacements: { tables },
+            type: QueryTypes.SELECT
+        }
+    );
+    return rows.map(row => `${row.table_name}:${row.version}`).join(',');
+};
+
+/**
+ * Whether an If-None-Match header matches the ETag (weak comparison)
+ * @param {string} header
+ * @param {string} etag
+ * @returns {boolean}
+ */
+export const matchesEtag = (header, etag) => {
+    if (!header) {
+        return false;
+    }
+    return header.split(',').some(candidate => {
+        const tag = candidate.trim();
+        return tag === '*' || tag.replace(/^W\//, '') === etag;
+    });
+};
+
+/**
+ * Drop the validator and cache policy set ahead of the handler when it
+ * answers with an error, so a 404 or 500 is neither cached nor
+ * revalidated as 304. Checked in writeHead, which every response goes
+ * through before its headers are sent.
+ * @param {Object} res
+ */
+const keepOnSuccess = (res) => {
+    const writeHead = res.writeHead;
+    res.writeHead = function (statusCode, ...rest) {
+        if (statusCode >= 300 && statusCode !== 304) {
+            this.removeHeader('ETag');
+            this.setHeader('Cache-Control', 'no-store');
+        }
+        return writeHead.call(this, statusCode, ...rest);
+    };
+};
+
+/**
+ * Middleware answering conditional GETs before the route handler runs.
+ * The ETag is derived from the URL and the versions of the tables the
+ * response is built from, so a matching If-None-Match returns 304 without
+ * running the handler's queries. The versions come from the primary, so
+ * handlers behind it read there too: a lagging replica would have the
+ * old body cached and revalidated under the new ETag.
+ * @param {Array<string>} tables - Tables the response depends on
+ * @param {string} cacheControl - Cache-Control header value
+ */
+export const conditionalGet = (tables, cacheControl) => async (req, res, next) => {
+    let versions;
+    try {
+        versions = await getTableVersions(tables);
+    } catch {
+        // Without validators the request is simply served uncached
+        return next();
+    }
+
+    const hash = createHash('sha1').update(`${req.originalUrl}|${versions}`).digest('base64url');
+    const etag = `"${hash}"`;
+
+    res.set('ETag', etag);
+    res.set('Cache-Control', cacheControl);
+
+    if (matchesEtag(req.headers['if-none-match'], etag)) {
+        return res.status(304).end();
+    }
+    keepOnSuccess(res);
+    next();
+};
+
+/**
+ * conditionalGet for a single recipe: the ETag starts with the recipe's
+ * version ("4-<hash>"), so the same tag serves If-None-Match on reads and
+ * If-Match on writes. Edits to other recipes leave it valid. The version
+ * is left in res.locals.recipeVersion for the handler to check what it
+ * reads against.
+ * @param {Array<string>} tables - Other tables the response embeds
+ * @param {string} cacheControl - Cache-Control header value
+ */
+export const conditionalRecipeGet = (tables, cacheControl) => async (req, res, next) => {
+    const id = Number.parseInt(req.params.id, 10);
+    let row;
+    try {
+        [row] = await db.sequelize.query(`
+            SELECT r.version,
+                   (SELECT string_agg(table_name || ':' || version, ',' ORDER BY table_name)
+                    FROM table_versions WHERE table_name IN (:tables)) AS versions
+            FROM recipes r WHERE r.id = :id`, {
+            replacements: { tables, id },
+            type: QueryTypes.SELECT
+        });
+    } catch {
+        return next();
+    }
+    if (!row) {
+        // The handler answers 404
+        return next();
+    }
+
+    const hash = createHash('sha1').update(`${req.originalUrl}|${row.versions}`).digest('base64url');
+    const etag = `"${row.version}-${hash}"`;
+    res.locals.recipeVersion = row.version;
+
+    res.set('ETag', etag);
+    res.set('Cache-Control', cacheControl);
+
+    if (matchesEtag(req.headers['if-none-match'], etag)) {
+        return res.status(304).end();
+    }
+    keepOnSuccess(res);
+    next();
+};
+
+// Recipes can be edited by their authors, so caches revalidate quickly
+export const RECIPE_CACHE_CONTROL = 'public, max-age=5, stale-while-revalidate=30';
+
+// Reference data only changes through the back-office
+export const METADATA_CACHE_CONTROL = 'public, max-age=60, stale-while-revalidate=600';
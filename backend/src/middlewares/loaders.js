@@ -0,0 +1,9 @@
+import { createLoaders } from '../services/loaders.js';
+
+/**
+ * Middleware giving each request its own batch loaders (req.loaders)
+ */
+export const attachLoaders = (req, res, next) => {
+    req.loaders = createLoaders();
+    next();
+};
@@ -0,0 +1,39 @@
+import { httpRequestDuration, rateLimitRejections } from '../services/metrics.js';
+
+/**
+ * Route template of a request (e.g. /api/v1/recipes/:id), never the raw
+ * URL, so label cardinality stays bounded.
+ * @param {Object} req
+ * @returns {string}
+ */
+export const routeLabel = (req) => {
+    if (req.route) {
+        return `${req.baseUrl}${req.route.path}`;
+    }
+    // Answered by router-level middleware (auth, rate limiting) before a route matched
+    return req.baseUrl ? `${req.baseUrl}/*` : 'unmatched';
+};
+
+/**
+ * Middleware recording http_request_duration_seconds once the response ends.
+ * Requests closed by the client before completion are labelled 499.
+ */
+export const httpMetrics = (req, res, next) => {
+    const end = httpRequestDuration.startTimer({ method: req.method });
+    res.once('close', () => {
+        end({
+            route: routeLabel(req),
+            status_code: res.writableFinished ? res.statusCode : 499
+        });
+    });
+    next();
+};
+
+/**
+ * express-rate-limit handler counting rejections before answering 429
+ * @param {string} limiter - Label value, e.g. 'api'
+ */
+export const countRejections = (limiter) => (req, res, next, options) => {
+    rateLimitRejections.inc({ limiter });
+    res.status(options.statusCode).send(options.message);
+};
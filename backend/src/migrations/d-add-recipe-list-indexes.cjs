@@ -0,0 +1,34 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        // Keyset pagination on (created_at, id), newest first
+        await queryInterface.addIndex('recipes', [
+            { name: 'created_at', order: 'DESC' },
+            { name: 'id', order: 'DESC' }
+        ], { name: 'recipes_created_at_id' });
+
+        // Filtered listings keep the same sort order after the equality column
+        for (const column of ['category_id', 'media_id', 'user_id', 'difficulty']) {
+            await queryInterface.addIndex('recipes', [
+                column,
+                { name: 'created_at', order: 'DESC' },
+                { name: 'id', order: 'DESC' }
+            ], { name: `recipes_${column}_created_at_id` });
+        }
+
+        // Total time range filters (prep + cook)
+        await queryInterface.sequelize.query(
+            'CREATE INDEX recipes_total_time ON recipes ((COALESCE(prep_time, 0) + COALESCE(cook_time, 0)))'
+        );
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.sequelize.query('DROP INDEX IF EXISTS recipes_total_time');
+        for (const column of ['category_id', 'media_id', 'user_id', 'difficulty']) {
+            await queryInterface.removeIndex('recipes', `recipes_${column}_created_at_id`);
+        }
+        await queryInterface.removeIndex('recipes', 'recipes_created_at_id');
+    }
+};
@@ -0,0 +1,91 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('CREATE EXTENSION IF NOT EXISTS unaccent');
+        await sequelize.query('CREATE EXTENSION IF NOT EXISTS pg_trgm');
+
+        // French stemming on accent-folded words ("crème brûlée" matches "creme brulee")
+        await sequelize.query('CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french)');
+        await sequelize.query(`
+            ALTER TEXT SEARCH CONFIGURATION french_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem
+        `);
+
+        // unaccent() is only STABLE, index expressions need an IMMUTABLE wrapper
+        await sequelize.query(`
+            CREATE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+                SELECT public.unaccent('public.unaccent', $1)
+            $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        `);
+
+        // The vector includes media.title, which a generated column cannot
+        // reference, so it is kept up to date by triggers instead.
+        await queryInterface.addColumn('recipes', 'search_vector', {
+            type: Sequelize.TSVECTOR,
+            allowNull: true
+        });
+
+        await sequelize.query(`
+            CREATE FUNCTION recipes_search_vector_update() RETURNS trigger AS $$
+            DECLARE
+                media_title TEXT;
+            BEGIN
+                SELECT title INTO media_title FROM media WHERE id = NEW.media_id;
+                NEW.search_vector :=
+                    setweight(to_tsvector('french_unaccent', COALESCE(NEW.title, '')), 'A') ||
+                    setweight(to_tsvector('french_unaccent', COALESCE(media_title, '')), 'B') ||
+                    setweight(to_tsvector('french_unaccent', COALESCE(NEW.description, '')), 'C') ||
+                    setweight(to_tsvector('french_unaccent', COALESCE(NEW.ingredients, '')), 'D');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_search_vector
+            BEFORE INSERT OR UPDATE OF title, description, ingredients, media_id ON recipes
+            FOR EACH ROW EXECUTE FUNCTION recipes_search_vector_update()
+        `);
+
+        // Renaming a film/series re-indexes the recipes linked to it
+        await sequelize.query(`
+            CREATE FUNCTION media_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                UPDATE recipes SET media_id = media_id WHERE media_id = NEW.id;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER media_search_vector
+            AFTER UPDATE OF title ON media
+            FOR EACH ROW WHEN (OLD.title IS DISTINCT FROM NEW.title)
+            EXECUTE FUNCTION media_search_vector_update()
+        `);
+
+        // Backfill existing rows through the trigger
+        await sequelize.query('UPDATE recipes SET title = title');
+
+        await sequelize.query('CREATE INDEX recipes_search_vector ON recipes USING GIN (search_vector)');
+        await sequelize.query(
+            'CREATE INDEX recipes_title_trgm ON recipes USING GIN (immutable_unaccent(lower(title)) gin_trgm_ops)'
+        );
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('DROP INDEX IF EXISTS recipes_title_trgm');
+        await sequelize.query('DROP INDEX IF EXISTS recipes_search_vector');
+        await sequelize.query('DROP TRIGGER IF EXISTS media_search_vector ON media');
+        await sequelize.query('DROP FUNCTION IF EXISTS media_search_vector_update()');
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_search_vector ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_search_vector_update()');
+        await queryInterface.removeColumn('recipes', 'search_vector');
+        await sequelize.query('DROP FUNCTION IF EXISTS immutable_unaccent(text)');
+        await sequelize.query('DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent');
+    }
+};
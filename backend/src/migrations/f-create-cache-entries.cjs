@@ -0,0 +1,21 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        // Shared cache tier for upstream API responses. UNLOGGED: contents
+        // are disposable, so skip WAL writes.
+        await queryInterface.sequelize.query(`
+            CREATE UNLOGGED TABLE cache_entries (
+                key TEXT PRIMARY KEY,
+                value JSONB NOT NULL,
+                expires_at TIMESTAMPTZ NOT NULL
+            )
+        `);
+        await queryInterface.addIndex('cache_entries', ['expires_at']);
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.dropTable('cache_entries');
+    }
+};
@@ -0,0 +1,87 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        await queryInterface.createTable('generation_jobs', {
+            id: {
+                allowNull: false,
+                autoIncrement: true,
+                primaryKey: true,
+                type: Sequelize.INTEGER
+            },
+            user_id: {
+                type: Sequelize.INTEGER,
+                allowNull: false,
+                references: {
+                    model: 'users',
+                    key: 'id'
+                },
+                onUpdate: 'CASCADE',
+                onDelete: 'CASCADE'
+            },
+            status: {
+                type: Sequelize.ENUM('queued', 'running', 'succeeded', 'failed'),
+                allowNull: false,
+                defaultValue: 'queued'
+            },
+            payload: {
+                type: Sequelize.JSONB,
+                allowNull: false
+            },
+            result: {
+                type: Sequelize.JSONB,
+                allowNull: true
+            },
+            error: {
+                type: Sequelize.TEXT,
+                allowNull: true
+            },
+            attempts: {
+                type: Sequelize.INTEGER,
+                allowNull: false,
+                defaultValue: 0
+            },
+            max_attempts: {
+                type: Sequelize.INTEGER,
+                allowNull: false,
+                defaultValue: 5
+            },
+            run_at: {
+                allowNull: false,
+                type: Sequelize.DATE,
+                defaultValue: Sequelize.literal('CURRENT_TIMESTAMP')
+            },
+            locked_at: {
+                type: Sequelize.DATE,
+                allowNull: true
+            },
+            locked_by: {
+                type: Sequelize.STRING(100),
+                allowNull: true
+            },
+            created_at: {
+                allowNull: false,
+                type: Sequelize.DATE,
+                defaultValue: Sequelize.literal('CURRENT_TIMESTAMP')
+            },
+            updated_at: {
+                allowNull: false,
+                type: Sequelize.DATE,
+                defaultValue: Sequelize.literal('CURRENT_TIMESTAMP')
+            }
+        });
+
+        // Workers claim the oldest runnable job; keep only pending rows in the index
+        await queryInterface.addIndex('generation_jobs', ['run_at', 'id'], {
+            name: 'generation_jobs_pending',
+            where: { status: ['queued', 'running'] }
+        });
+        await queryInterface.addIndex('generation_jobs', ['user_id']);
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.dropTable('generation_jobs');
+        await queryInterface.sequelize.query('DROP TYPE IF EXISTS "enum_generation_jobs_status"');
+    }
+};
@@ -0,0 +1,54 @@
+'use strict';
+
+const VERSIONED_TABLES = ['recipes', 'categories', 'media', 'users'];
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        // One counter per table, bumped by any write. Read endpoints derive
+        // their ETags from it, so every replica sees the same validators.
+        await queryInterface.createTable('table_versions', {
+            table_name: {
+                type: Sequelize.STRING(100),
+                primaryKey: true
+            },
+            version: {
+                type: Sequelize.BIGINT,
+                allowNull: false,
+                defaultValue: 0
+            }
+        });
+        await queryInterface.bulkInsert('table_versions',
+            VERSIONED_TABLES.map(table => ({ table_name: table, version: 0 }))
+        );
+
+        await sequelize.query(`
+            CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        for (const table of VERSIONED_TABLES) {
+            await sequelize.query(`
+                CREATE TRIGGER ${table}_bump_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON ${table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+            `);
+        }
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        for (const table of VERSIONED_TABLES) {
+            await sequelize.query(`DROP TRIGGER IF EXISTS ${table}_bump_version ON ${table}`);
+        }
+        await sequelize.query('DROP FUNCTION IF EXISTS bump_table_version()');
+        await queryInterface.dropTable('table_versions');
+    }
+};
@@ -0,0 +1,23 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        // Fixed-window hit counters shared by every process; the store derives
+        // a sliding window from the current and previous window. UNLOGGED:
+        // losing counters on a crash only resets the limits.
+        await queryInterface.sequelize.query(`
+            CREATE UNLOGGED TABLE rate_limit_hits (
+                key TEXT NOT NULL,
+                window_start BIGINT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (key, window_start)
+            )
+        `);
+        await queryInterface.addIndex('rate_limit_hits', ['window_start']);
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.dropTable('rate_limit_hits');
+    }
+};
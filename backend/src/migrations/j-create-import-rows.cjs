@@ -0,0 +1,24 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        // Staging area of admin bulk imports: valid rows land here before the
+        // set-based upsert and are deleted right after. UNLOGGED: a crash
+        // only loses imports that had not finished anyway.
+        await queryInterface.sequelize.query(`
+            CREATE UNLOGGED TABLE import_rows (
+                import_id UUID NOT NULL,
+                row_num INTEGER NOT NULL,
+                data JSONB NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (import_id, row_num)
+            )
+        `);
+        await queryInterface.addIndex('import_rows', ['created_at']);
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.dropTable('import_rows');
+    }
+};
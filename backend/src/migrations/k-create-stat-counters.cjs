@@ -0,0 +1,168 @@
+'use strict';
+
+// Counters kept per source table: [metric, dimension expression] pairs read
+// from the changed rows, plus the column bucketed into stat_daily
+const STATS = {
+    recipes: {
+        counters: [
+            ['recipes', "'all'"],
+            ['recipes_by_category', "COALESCE(category_id::text, 'none')"],
+            ['recipes_by_media', "COALESCE(media_id::text, 'none')"],
+            ['recipes_by_difficulty', 'difficulty::text'],
+            ['recipes_by_author', 'user_id::text']
+        ],
+        daily: 'recipes_created'
+    },
+    users: {
+        counters: [
+            ['users', "'all'"],
+            ['users_by_role', 'role::text']
+        ],
+        daily: 'users_created'
+    },
+    media: {
+        counters: [
+            ['media', "'all'"],
+            ['media_by_type', 'type::text']
+        ]
+    },
+    categories: {
+        counters: [
+            ['categories', "'all'"]
+        ]
+    }
+};
+
+const counterDeltas = (table, source, sign) => STATS[table].counters
+    .map(([metric, dimension]) => `SELECT '${metric}' AS metric, ${dimension} AS dimension, ${sign} AS delta FROM ${source}`)
+    .join(' UNION ALL ');
+
+const dailyDeltas = (table, source, sign) => `SELECT '${STATS[table].daily}' AS metric, created_at::date AS day, ${sign} AS delta FROM ${source}`;
+
+// Deltas of one statement: +1 per inserted row, -1 per deleted row, both for updates
+const SOURCES = {
+    INSERT: [['new_rows', 1]],
+    DELETE: [['old_rows', -1]],
+    UPDATE: [['new_rows', 1], ['old_rows', -1]]
+};
+
+/**
+ * Statement-level trigger body: aggregate the transition table into one
+ * upsert per (metric, dimension). Rows are locked in key order so
+ * concurrent statements cannot deadlock on the counters.
+ */
+function triggerBody(table, event) {
+    const sources = SOURCES[event];
+    let body = `
+        INSERT INTO stat_counters (metric, dimension, value)
+        SELECT metric, dimension, SUM(delta)
+        FROM (${sources.map(([source, sign]) => counterDeltas(table, source, sign)).join(' UNION ALL ')}) deltas
+        GROUP BY metric, dimension
+        HAVING SUM(delta) <> 0
+        ORDER BY metric, dimension
+        ON CONFLICT (metric, dimension) DO UPDATE SET value = stat_counters.value + EXCLUDED.value;`;
+
+    if (STATS[table].daily) {
+        body += `
+        INSERT INTO stat_daily (metric, day, value)
+        SELECT metric, day, SUM(delta)
+        FROM (${sources.map(([source, sign]) => dailyDeltas(table, source, sign)).join(' UNION ALL ')}) deltas
+        GROUP BY metric, day
+        HAVING SUM(delta) <> 0
+        ORDER BY metric, day
+        ON CONFLICT (metric, day) DO UPDATE SET value = stat_daily.value + EXCLUDED.value;`;
+    }
+    return body;
+}
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        // Dashboard aggregates, maintained by statement-level triggers so
+        // reading them costs the same whatever the size of the tables
+        await sequelize.query(`
+            CREATE TABLE stat_counters (
+                metric TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, dimension)
+            )
+        `);
+        // Top-N lookups (top authors, busiest categories)
+        await sequelize.query('CREATE INDEX stat_counters_ranking ON stat_counters (metric, value DESC)');
+
+        await sequelize.query(`
+            CREATE TABLE stat_daily (
+                metric TEXT NOT NULL,
+                day DATE NOT NULL,
+                value BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, day)
+            )
+        `);
+
+        // Recomputes everything from the source tables (backfill, drift repair)
+        const rebuild = Object.keys(STATS).map(table => `
+                INSERT INTO stat_counters (metric, dimension, value)
+                SELECT metric, dimension, SUM(delta) FROM (${counterDeltas(table, table, 1)}) deltas
+                GROUP BY metric, dimension;
+                ${STATS[table].daily ? `
+                INSERT INTO stat_daily (metric, day, value)
+                SELECT metric, day, SUM(delta) FROM (${dailyDeltas(table, table, 1)}) deltas
+                GROUP BY metric, day;` : ''}`).join('');
+        await sequelize.query(`
+            CREATE FUNCTION rebuild_stat_counters() RETURNS void AS $$
+            BEGIN
+                LOCK TABLE stat_counters, stat_daily IN EXCLUSIVE MODE;
+                DELETE FROM stat_counters;
+                DELETE FROM stat_daily;
+                ${rebuild}
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Transition tables need one trigger per event
+        for (const table of Object.keys(STATS)) {
+            for (const event of Object.keys(SOURCES)) {
+                const name = `${table}_stats_${event.toLowerCase()}`;
+                const referencing = [
+                    event !== 'DELETE' ? 'NEW TABLE AS new_rows' : '',
+                    event !== 'INSERT' ? 'OLD TABLE AS old_rows' : ''
+                ].filter(Boolean).join(' ');
+
+                await sequelize.query(`
+                    CREATE FUNCTION ${name}() RETURNS trigger AS $$
+                    BEGIN
+                        ${triggerBody(table, event)}
+                        RETURN NULL;
+                    END
+                    $$ LANGUAGE plpgsql
+                `);
+                await sequelize.query(`
+                    CREATE TRIGGER ${name}
+                    AFTER ${event} ON ${table}
+                    REFERENCING ${referencing}
+                    FOR EACH STATEMENT EXECUTE FUNCTION ${name}()
+                `);
+            }
+        }
+
+        await sequelize.query('SELECT rebuild_stat_counters()');
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        for (const table of Object.keys(STATS)) {
+            for (const event of Object.keys(SOURCES)) {
+                const name = `${table}_stats_${event.toLowerCase()}`;
+                await sequelize.query(`DROP TRIGGER IF EXISTS ${name} ON ${table}`);
+                await sequelize.query(`DROP FUNCTION IF EXISTS ${name}()`);
+            }
+        }
+        await sequelize.query('DROP FUNCTION IF EXISTS rebuild_stat_counters()');
+        await queryInterface.dropTable('stat_daily');
+        await queryInterface.dropTable('stat_counters');
+    }
+};
@@ -0,0 +1,45 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        await queryInterface.addColumn('media', 'tmdb_id', {
+            type: Sequelize.INTEGER,
+            allowNull: true
+        });
+        // Last successful TMDB sync; NULL until the sync worker has seen the row
+        await queryInterface.addColumn('media', 'tmdb_synced_at', {
+            type: Sequelize.DATE,
+            allowNull: true
+        });
+
+        // Movie and TV ids are separate TMDB namespaces
+        await queryInterface.sequelize.query(`
+            CREATE UNIQUE INDEX media_type_tmdb_id_unique
+            ON media (type, tmdb_id)
+            WHERE tmdb_id IS NOT NULL
+        `);
+
+        // Resumable progress of long-running jobs; the lease columns keep a
+        // second replica from running the same job concurrently
+        await queryInterface.sequelize.query(`
+            CREATE TABLE sync_checkpoints (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                locked_by TEXT,
+                locked_at TIMESTAMPTZ,
+                started_at TIMESTAMPTZ,
+                completed_at TIMESTAMPTZ,
+                stats JSONB NOT NULL DEFAULT '{}',
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        `);
+    },
+
+    async down(queryInterface, Sequelize) {
+        await queryInterface.dropTable('sync_checkpoints');
+        await queryInterface.sequelize.query('DROP INDEX IF EXISTS media_type_tmdb_id_unique');
+        await queryInterface.removeColumn('media', 'tmdb_synced_at');
+        await queryInterface.removeColumn('media', 'tmdb_id');
+    }
+};
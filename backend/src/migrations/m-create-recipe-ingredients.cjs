@@ -0,0 +1,192 @@
+'use strict';
+
+// Units recognised after a quantity ("250g", "2 cups", "1 c. à soupe"),
+// matched case-insensitively and followed by a space or the end of the line
+const UNITS = [
+    'kg', 'g', 'gr', 'mg', 'grams?', 'grammes?', 'l', 'dl', 'cl', 'ml', 'lit(?:er|re)s?',
+    'lbs?', 'oz', 'tbsps?', 'tsps?', 'tablespoons?', 'teaspoons?', 'cups?',
+    'pinch(?:es)?', 'cloves?', 'slices?', 'cans?', 'bottles?', 'bunch(?:es)?', 'sprigs?', 'sticks?',
+    'pincées?', 'gousses?', 'tranches?', 'bouteilles?', 'boîtes?', 'sachets?', 'bottes?', 'brins?', 'verres?',
+    'c\\. ?à ?(?:s|c|soupe|café)\\.?', 'cuill[eè]res? à (?:soupe|café)'
+].join('|');
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query(`
+            CREATE TABLE ingredients (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(100) NOT NULL UNIQUE,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        `);
+        // Word lookups from "find by ingredients" ("tomato" finds "cherry tomato")
+        await sequelize.query('CREATE INDEX ingredients_name_trgm ON ingredients USING GIN (name gin_trgm_ops)');
+
+        // One row per line of recipes.ingredients, derived by triggers below
+        await sequelize.query(`
+            CREATE TABLE recipe_ingredients (
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                ingredient_id INTEGER NOT NULL REFERENCES ingredients (id),
+                quantity NUMERIC(12, 3),
+                unit VARCHAR(32),
+                raw TEXT NOT NULL,
+                PRIMARY KEY (recipe_id, position)
+            )
+        `);
+        await sequelize.query(
+            'CREATE INDEX recipe_ingredients_ingredient ON recipe_ingredients (ingredient_id, recipe_id)'
+        );
+
+        // Canonical ingredient name: accent-folded, lower case, punctuation
+        // dropped and plural words singularised ("Tomatoes" -> "tomato").
+        // Search terms go through the same function.
+        await sequelize.query(`
+            CREATE FUNCTION normalize_ingredient(text) RETURNS text AS $$
+                SELECT left(btrim(
+                    regexp_replace(
+                        regexp_replace(
+                            regexp_replace(lower(immutable_unaccent($1)), '[^a-z0-9]+', ' ', 'g'),
+                            '\\m([a-z]+(?:o|x|z|ch|sh|ss))es\\M', '\\1', 'g'),
+                        '\\m([a-z]{2,}[a-rt-z])s\\M', '\\1', 'g')
+                ), 100)
+            $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        `);
+
+        // "- 1 1/2 cups of heavy cream, whipped" -> (1.5, 'cup', 'heavy cream')
+        await sequelize.query(`
+            CREATE FUNCTION parse_ingredient(line text, OUT quantity numeric, OUT unit text, OUT name text) AS $$
+            DECLARE
+                rest text;
+                parts text[];
+            BEGIN
+                -- List markers: "- ", "* ", "• ", "1. ", "2) "
+                rest := btrim(regexp_replace(line, '^\\s*(?:[-*•·]|\\d+[.)]\\s)\\s*', ''));
+
+                parts := regexp_match(rest, '^(\\d+\\s+\\d+/\\d+|\\d+/\\d+|\\d+(?:[.,]\\d+)?|[½¼¾⅓⅔])\\s*(.*)$');
+                IF parts IS NOT NULL THEN
+                    rest := parts[2];
+                    quantity := CASE
+                        WHEN parts[1] = '½' THEN 0.5
+                        WHEN parts[1] = '¼' THEN 0.25
+                        WHEN parts[1] = '¾' THEN 0.75
+                        WHEN parts[1] = '⅓' THEN 0.333
+                        WHEN parts[1] = '⅔' THEN 0.667
+                        WHEN parts[1] ~ '^\\d+\\s+\\d+/\\d+$' THEN
+                            split_part(parts[1], ' ', 1)::numeric
+                            + split_part(btrim(substr(parts[1], strpos(parts[1], ' '))), '/', 1)::numeric
+                              / NULLIF(split_part(parts[1], '/', 2)::numeric, 0)
+                        WHEN parts[1] ~ '/' THEN
+                            split_part(parts[1], '/', 1)::numeric / NULLIF(split_part(parts[1], '/', 2)::numeric, 0)
+                        ELSE replace(parts[1], ',', '.')::numeric
+                    END;
+                    -- Out of range for the column: a typo, not a quantity
+                    quantity := CASE WHEN quantity < 1000000000 THEN round(quantity, 3) END;
+
+                    parts := regexp_match(rest, '^(${UNITS})(?:\\s+|$)(.*)$', 'i');
+                    IF parts IS NOT NULL THEN
+                        unit := regexp_replace(regexp_replace(lower(parts[1]), '(ch)es$', '\\1'), '([a-zé]{2})s$', '\\1');
+                        rest := regexp_replace(parts[2], '^(?:of|de|du|des|d'')\\s*', '', 'i');
+                    END IF;
+                END IF;
+
+                -- Preparation notes: "1 chicken, cut up", "cream (35%)"
+                name := normalize_ingredient(regexp_replace(rest, '\\s*[,(].*$', ''));
+            END
+            $$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE STRICT
+        `);
+
+        // Parsed lines of the given recipes, blank and unparseable lines skipped
+        await sequelize.query(`
+            CREATE FUNCTION recipe_ingredient_lines(recipe_ids integer[])
+            RETURNS TABLE (recipe_id integer, "position" integer, quantity numeric, unit text, name text, raw text) AS $$
+                SELECT r.id, l.position::int, p.quantity, left(p.unit, 32), p.name, btrim(l.line)
+                FROM recipes r
+                CROSS JOIN LATERAL regexp_split_to_table(r.ingredients, '\\r?\\n') WITH ORDINALITY AS l(line, position)
+                CROSS JOIN LATERAL parse_ingredient(l.line) AS p
+                WHERE r.id = ANY(recipe_ids) AND p.name <> ''
+            $$ LANGUAGE sql STABLE
+        `);
+
+        // Two statements on purpose: the second sees ingredient names that a
+        // concurrent transaction committed while the first waited on them
+        await sequelize.query(`
+            CREATE FUNCTION refresh_recipe_ingredients(recipe_ids integer[]) RETURNS void AS $$
+            BEGIN
+                DELETE FROM recipe_ingredients WHERE recipe_id = ANY(recipe_ids);
+
+                INSERT INTO ingredients (name)
+                SELECT DISTINCT name FROM recipe_ingredient_lines(recipe_ids)
+                ORDER BY name
+                ON CONFLICT (name) DO NOTHING;
+
+                INSERT INTO recipe_ingredients (recipe_id, position, ingredient_id, quantity, unit, raw)
+                SELECT l.recipe_id, l.position, i.id, l.quantity, l.unit, l.raw
+                FROM recipe_ingredient_lines(recipe_ids) l
+                JOIN ingredients i ON i.name = l.name;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Statement-level, like the stat counters: a bulk import parses its
+        // rows in one pass. Transition tables rule out UPDATE OF ingredients,
+        // so updates compare old and new text instead.
+        await sequelize.query(`
+            CREATE FUNCTION recipes_ingredients_insert() RETURNS trigger AS $$
+            BEGIN
+                PERFORM refresh_recipe_ingredients(ARRAY(SELECT id FROM new_rows));
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_ingredients_insert
+            AFTER INSERT ON recipes
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipes_ingredients_insert()
+        `);
+
+        await sequelize.query(`
+            CREATE FUNCTION recipes_ingredients_update() RETURNS trigger AS $$
+            DECLARE
+                changed integer[];
+            BEGIN
+                changed := ARRAY(
+                    SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+                    WHERE n.ingredients IS DISTINCT FROM o.ingredients
+                );
+                IF cardinality(changed) > 0 THEN
+                    PERFORM refresh_recipe_ingredients(changed);
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_ingredients_update
+            AFTER UPDATE ON recipes
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipes_ingredients_update()
+        `);
+
+        await sequelize.query('SELECT refresh_recipe_ingredients(ARRAY(SELECT id FROM recipes))');
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_ingredients_update ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_ingredients_update()');
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_ingredients_insert ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_ingredients_insert()');
+        await sequelize.query('DROP FUNCTION IF EXISTS refresh_recipe_ingredients(integer[])');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipe_ingredient_lines(integer[])');
+        await sequelize.query('DROP FUNCTION IF EXISTS parse_ingredient(text)');
+        await sequelize.query('DROP FUNCTION IF EXISTS normalize_ingredient(text)');
+        await queryInterface.dropTable('recipe_ingredients');
+        await queryInterface.dropTable('ingredients');
+    }
+};
@@ -0,0 +1,287 @@
+'use strict';
+
+// Postings read to pick candidates: features are taken rarest first until
+// their recipe lists add up to this, so common words cost nothing
+const CANDIDATE_POSTINGS = 5000;
+// Candidates kept after the first, rare-features-only scoring pass
+const CANDIDATES = 200;
+// List length, as configured for the server (similarityService)
+const K = Number.parseInt(process.env.SIMILAR_RECIPES_K, 10) || 12;
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        // TF-IDF vectors. Features are words of the title (weight 3), media
+        // title (2) and description (1) taken from search_vector, plus the
+        // structured ingredients ("i:12"), category ("c:3") and media ("m:7").
+        await sequelize.query(`
+            CREATE TABLE recipe_features (
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                feature TEXT NOT NULL,
+                tf REAL NOT NULL,
+                PRIMARY KEY (recipe_id, feature)
+            )
+        `);
+        await sequelize.query('CREATE INDEX recipe_features_feature ON recipe_features (feature, recipe_id)');
+
+        // Document frequency per feature, kept by triggers on recipe_features
+        await sequelize.query(`
+            CREATE TABLE feature_stats (
+                feature TEXT PRIMARY KEY,
+                df INTEGER NOT NULL DEFAULT 0
+            )
+        `);
+
+        await sequelize.query(`
+            CREATE TABLE recipe_vectors (
+                recipe_id INTEGER PRIMARY KEY REFERENCES recipes (id) ON DELETE CASCADE,
+                norm REAL NOT NULL
+            )
+        `);
+
+        // Top-K most similar recipes of each recipe
+        await sequelize.query(`
+            CREATE TABLE recipe_neighbors (
+                recipe_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                neighbor_id INTEGER NOT NULL REFERENCES recipes (id) ON DELETE CASCADE,
+                score REAL NOT NULL,
+                PRIMARY KEY (recipe_id, neighbor_id)
+            )
+        `);
+        await sequelize.query('CREATE INDEX recipe_neighbors_neighbor ON recipe_neighbors (neighbor_id)');
+
+        // Similar-recipe responses are cached by ETag like the other recipe reads
+        await queryInterface.bulkInsert('table_versions', [{ table_name: 'recipe_neighbors', version: 0 }]);
+        await sequelize.query(`
+            CREATE TRIGGER recipe_neighbors_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON recipe_neighbors
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        `);
+
+        await sequelize.query(`
+            CREATE FUNCTION recipe_features_df_insert() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO feature_stats (feature, df)
+                SELECT feature, count(*) FROM new_rows GROUP BY feature ORDER BY feature
+                ON CONFLICT (feature) DO UPDATE SET df = feature_stats.df + EXCLUDED.df;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipe_features_df_insert
+            AFTER INSERT ON recipe_features
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipe_features_df_insert()
+        `);
+        await sequelize.query(`
+            CREATE FUNCTION recipe_features_df_delete() RETURNS trigger AS $$
+            BEGIN
+                UPDATE feature_stats s SET df = s.df - d.count
+                FROM (SELECT feature, count(*) AS count FROM old_rows GROUP BY feature ORDER BY feature) d
+                WHERE s.feature = d.feature;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipe_features_df_delete
+            AFTER DELETE ON recipe_features
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipe_features_df_delete()
+        `);
+
+        // Corpus size from the trigger-maintained counters (k-create-stat-counters)
+        await sequelize.query(`
+            CREATE FUNCTION recipe_idf(df integer) RETURNS double precision AS $$
+                SELECT ln((1 + COALESCE((SELECT value FROM stat_counters
+                                         WHERE metric = 'recipes' AND dimension = 'all'), 0))::float8
+                          / (1 + greatest(df, 0)))
+            $$ LANGUAGE sql STABLE
+        `);
+
+        await sequelize.query(`
+            CREATE FUNCTION refresh_recipe_features(recipe_ids integer[]) RETURNS void AS $$
+            BEGIN
+                DELETE FROM recipe_features WHERE recipe_id = ANY(recipe_ids);
+
+                INSERT INTO recipe_features (recipe_id, feature, tf)
+                SELECT recipe_id, feature, 1 + ln(sum(weight))
+                FROM (
+                    SELECT r.id AS recipe_id, 'w:' || t.lexeme AS feature,
+                           (SELECT sum(CASE w WHEN 'A' THEN 3 WHEN 'B' THEN 2 WHEN 'C' THEN 1 ELSE 0 END)
+                            FROM unnest(t.weights) AS w) AS weight
+                    FROM recipes r
+                    CROSS JOIN LATERAL unnest(r.search_vector) AS t
+                    WHERE r.id = ANY(recipe_ids)
+                    UNION ALL
+                    SELECT recipe_id, 'i:' || ingredient_id, 2
+                    FROM recipe_ingredients WHERE recipe_id = ANY(recipe_ids)
+                    UNION ALL
+                    SELECT id, 'c:' || category_id, 1
+                    FROM recipes WHERE id = ANY(recipe_ids) AND category_id IS NOT NULL
+                    UNION ALL
+                    SELECT id, 'm:' || media_id, 3
+                    FROM recipes WHERE id = ANY(recipe_ids) AND media_id IS NOT NULL
+                ) weighted
+                GROUP BY recipe_id, feature
+                HAVING sum(weight) > 0
+                ORDER BY feature;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Norms use the document frequencies of the moment: those of other
+        // recipes drift slightly as the corpus grows, until the next rebuild
+        await sequelize.query(`
+            CREATE FUNCTION refresh_recipe_norms(recipe_ids integer[]) RETURNS void AS $$
+            BEGIN
+                DELETE FROM recipe_vectors WHERE recipe_id = ANY(recipe_ids);
+                INSERT INTO recipe_vectors (recipe_id, norm)
+                SELECT f.recipe_id, sqrt(sum((f.tf * recipe_idf(s.df)) ^ 2))
+                FROM recipe_features f
+                JOIN feature_stats s ON s.feature = f.feature
+                WHERE f.recipe_id = ANY(recipe_ids)
+                GROUP BY f.recipe_id;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Cosine similarity of one recipe with its likely neighbours.
+        // Candidates share one of its rarest features; the best ones by
+        // those features alone are then scored on every shared feature.
+        await sequelize.query(`
+            CREATE FUNCTION recipe_similarities(source_id integer)
+            RETURNS TABLE (neighbor_id integer, score real) AS $$
+                WITH vec AS MATERIALIZED (
+                    SELECT f.feature, s.df, f.tf * recipe_idf(s.df) AS weight, recipe_idf(s.df) AS idf
+                    FROM recipe_features f
+                    JOIN feature_stats s ON s.feature = f.feature
+                    WHERE f.recipe_id = source_id
+                ),
+                rare AS (
+                    SELECT * FROM (
+                        SELECT vec.*, sum(df) OVER (ORDER BY df, feature) - df AS postings_before
+                        FROM vec
+                    ) ranked
+                    WHERE postings_before < ${CANDIDATE_POSTINGS}
+                ),
+                candidates AS (
+                    SELECT o.recipe_id
+                    FROM rare
+                    JOIN recipe_features o ON o.feature = rare.feature
+                    WHERE o.recipe_id <> source_id
+                    GROUP BY o.recipe_id
+                    ORDER BY sum(rare.weight * o.tf * rare.idf) DESC
+                    LIMIT ${CANDIDATES}
+                ),
+                dots AS (
+                    SELECT o.recipe_id, sum(vec.weight * o.tf * vec.idf) AS dot
+                    FROM candidates c
+                    JOIN recipe_features o ON o.recipe_id = c.recipe_id
+                    JOIN vec ON vec.feature = o.feature
+                    GROUP BY o.recipe_id
+                )
+                SELECT d.recipe_id, (d.dot / (v.norm * q.norm))::real
+                FROM dots d
+                JOIN recipe_vectors v ON v.recipe_id = d.recipe_id
+                CROSS JOIN (SELECT sqrt(sum(weight ^ 2)) AS norm FROM vec) q
+                WHERE v.norm > 0 AND q.norm > 0
+            $$ LANGUAGE sql STABLE
+        `);
+
+        // Full top-K lists of the given recipes (rebuilds, repairs)
+        await sequelize.query(`
+            CREATE FUNCTION recompute_recipe_neighbors(recipe_ids integer[], k integer) RETURNS void AS $$
+            BEGIN
+                DELETE FROM recipe_neighbors WHERE recipe_id = ANY(recipe_ids);
+                INSERT INTO recipe_neighbors (recipe_id, neighbor_id, score)
+                SELECT source.id, top.neighbor_id, top.score
+                FROM unnest(recipe_ids) AS source(id)
+                CROSS JOIN LATERAL (
+                    SELECT * FROM recipe_similarities(source.id) ORDER BY score DESC, neighbor_id LIMIT k
+                ) top;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Incremental update after a recipe changed: new features, its own
+        // list, and its place in the lists of its candidates. Lists it drops
+        // out of are recomputed so they keep K entries.
+        await sequelize.query(`
+            CREATE FUNCTION refresh_recipe_neighbors(source_id integer, k integer) RETURNS void AS $$
+            DECLARE
+                previous integer[];
+                touched integer[];
+            BEGIN
+                PERFORM refresh_recipe_features(ARRAY[source_id]);
+                PERFORM refresh_recipe_norms(ARRAY[source_id]);
+
+                previous := ARRAY(SELECT recipe_id FROM recipe_neighbors WHERE neighbor_id = source_id);
+                DELETE FROM recipe_neighbors WHERE recipe_id = source_id OR neighbor_id = source_id;
+
+                WITH scored AS MATERIALIZED (
+                    SELECT * FROM recipe_similarities(source_id)
+                ),
+                own AS (
+                    INSERT INTO recipe_neighbors (recipe_id, neighbor_id, score)
+                    SELECT source_id, neighbor_id, score FROM scored ORDER BY score DESC, neighbor_id LIMIT k
+                ),
+                entered AS (
+                    INSERT INTO recipe_neighbors (recipe_id, neighbor_id, score)
+                    SELECT s.neighbor_id, source_id, s.score
+                    FROM scored s
+                    WHERE s.score > COALESCE((
+                        SELECT min(n.score) FROM (
+                            SELECT score FROM recipe_neighbors
+                            WHERE recipe_id = s.neighbor_id ORDER BY score DESC LIMIT k
+                        ) n
+                        HAVING count(*) >= k
+                    ), 0)
+                    RETURNING recipe_id
+                )
+                SELECT COALESCE(array_agg(recipe_id), '{}') INTO touched FROM entered;
+
+                -- Lists that gained this recipe drop their K+1th entry
+                DELETE FROM recipe_neighbors n
+                USING (
+                    SELECT recipe_id, neighbor_id,
+                           row_number() OVER (PARTITION BY recipe_id ORDER BY score DESC, neighbor_id) AS rank
+                    FROM recipe_neighbors
+                    WHERE recipe_id = ANY(touched)
+                ) ranked
+                WHERE n.recipe_id = ranked.recipe_id AND n.neighbor_id = ranked.neighbor_id AND ranked.rank > k;
+
+                PERFORM recompute_recipe_neighbors(
+                    ARRAY(SELECT unnest(previous) EXCEPT SELECT unnest(touched)), k
+                );
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // All features before any norm: norms need the final frequencies
+        await sequelize.query('SELECT refresh_recipe_features(ARRAY(SELECT id FROM recipes))');
+        await sequelize.query('SELECT refresh_recipe_norms(ARRAY(SELECT id FROM recipes))');
+        await sequelize.query(`SELECT recompute_recipe_neighbors(ARRAY(SELECT id FROM recipes), ${K})`);
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('DROP FUNCTION IF EXISTS refresh_recipe_neighbors(integer, integer)');
+        await sequelize.query('DROP FUNCTION IF EXISTS recompute_recipe_neighbors(integer[], integer)');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipe_similarities(integer)');
+        await sequelize.query('DROP FUNCTION IF EXISTS refresh_recipe_norms(integer[])');
+        await sequelize.query('DROP FUNCTION IF EXISTS refresh_recipe_features(integer[])');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipe_idf(integer)');
+        await queryInterface.dropTable('recipe_neighbors');
+        await queryInterface.dropTable('recipe_vectors');
+        await queryInterface.dropTable('feature_stats');
+        await queryInterface.dropTable('recipe_features');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipe_features_df_delete()');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipe_features_df_insert()');
+        await queryInterface.bulkDelete('table_versions', { table_name: 'recipe_neighbors' });
+    }
+};
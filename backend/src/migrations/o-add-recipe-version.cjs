@@ -0,0 +1,51 @@
+'use strict';
+
+// Columns an edit can change: search_vector and the re-indexing that a
+// media rename triggers (UPDATE recipes SET media_id = media_id) do not
+// count as a new version
+const EDITABLE = [
+    'title', 'description', 'ingredients', 'instructions', 'anecdote',
+    'difficulty', 'prep_time', 'cook_time', 'image_url', 'user_id', 'category_id', 'media_id'
+];
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        // Optimistic locking: If-Match on recipe writes names this number
+        await queryInterface.addColumn('recipes', 'version', {
+            type: Sequelize.INTEGER,
+            allowNull: false,
+            defaultValue: 1
+        });
+
+        // Bumped here rather than by each write path (API, admin, bulk,
+        // import), and never taken from the client
+        const row = prefix => `(${EDITABLE.map(column => `${prefix}.${column}`).join(', ')})`;
+        await sequelize.query(`
+            CREATE FUNCTION recipes_version_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.version := OLD.version;
+                IF ${row('NEW')} IS DISTINCT FROM ${row('OLD')} THEN
+                    NEW.version := OLD.version + 1;
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_version
+            BEFORE UPDATE ON recipes
+            FOR EACH ROW EXECUTE FUNCTION recipes_version_update()
+        `);
+    },
+
+    async down(queryInterface, Sequelize) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_version ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_version_update()');
+        await queryInterface.removeColumn('recipes', 'version');
+    }
+};
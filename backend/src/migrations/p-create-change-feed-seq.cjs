@@ -0,0 +1,15 @@
+'use strict';
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface) {
+        // Ids of /events messages: taken in the NOTIFY statement itself, so
+        // every replica numbers an event the same way and Last-Event-ID can
+        // resume on any of them
+        await queryInterface.sequelize.query('CREATE SEQUENCE change_feed_seq');
+    },
+
+    async down(queryInterface) {
+        await queryInterface.sequelize.query('DROP SEQUENCE IF EXISTS change_feed_seq');
+    }
+};
@@ -0,0 +1,122 @@
+'use strict';
+
+// Inputs of a recipe's TF-IDF vector (refresh_recipe_features); a media
+// rename reaches search_vector through the media_search_vector trigger
+const FEATURE_COLUMNS = ['search_vector', 'ingredients', 'category_id', 'media_id'];
+
+/** @type {import('sequelize-cli').Migration} */
+module.exports = {
+    async up(queryInterface) {
+        const { sequelize } = queryInterface;
+
+        // Similar-list work left to similarityService, queued by triggers so
+        // that every write path is covered: the API, bulk import and edits,
+        // and the cascade of a user deletion. 'refresh' after a recipe
+        // changed, 'recompute' for the lists that held a deleted recipe.
+        await sequelize.query(`
+            CREATE TABLE similarity_queue (
+                recipe_id INTEGER PRIMARY KEY,
+                action TEXT NOT NULL CHECK (action IN ('refresh', 'recompute')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                queued_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        `);
+        await sequelize.query('CREATE INDEX similarity_queue_queued_at ON similarity_queue (queued_at)');
+
+        // A refresh rebuilds the recipe's own list as well, so it absorbs a
+        // pending recompute. Workers wake up on the notification (sent at
+        // commit, once per transaction).
+        await sequelize.query(`
+            CREATE FUNCTION enqueue_similarity(recipe_ids integer[], queued_action text) RETURNS void AS $$
+            BEGIN
+                IF cardinality(recipe_ids) = 0 THEN
+                    RETURN;
+                END IF;
+                INSERT INTO similarity_queue (recipe_id, action)
+                SELECT DISTINCT id, queued_action FROM unnest(recipe_ids) AS id
+                ORDER BY id
+                ON CONFLICT (recipe_id) DO UPDATE
+                SET action = CASE WHEN EXCLUDED.action = 'refresh' THEN 'refresh' ELSE similarity_queue.action END,
+                    attempts = 0;
+                PERFORM pg_notify('similarity_queue', '');
+            END
+            $$ LANGUAGE plpgsql
+        `);
+
+        // Statement-level for inserts and updates, like the ingredients and
+        // stat counters: a bulk import queues its rows in one statement
+        await sequelize.query(`
+            CREATE FUNCTION recipes_similarity_insert() RETURNS trigger AS $$
+            BEGIN
+                PERFORM enqueue_similarity(ARRAY(SELECT id FROM new_rows), 'refresh');
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_similarity_insert
+            AFTER INSERT ON recipes
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipes_similarity_insert()
+        `);
+
+        const row = prefix => `(${FEATURE_COLUMNS.map(column => `${prefix}.${column}`).join(', ')})`;
+        await sequelize.query(`
+            CREATE FUNCTION recipes_similarity_update() RETURNS trigger AS $$
+            BEGIN
+                PERFORM enqueue_similarity(ARRAY(
+                    SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+                    WHERE ${row('n')} IS DISTINCT FROM ${row('o')}
+                ), 'refresh');
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_similarity_update
+            AFTER UPDATE ON recipes
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION recipes_similarity_update()
+        `);
+
+        // Row-level and BEFORE: by the time statement-level triggers run,
+        // the cascade has already removed the recipe from the lists
+        await sequelize.query(`
+            CREATE FUNCTION recipes_similarity_delete() RETURNS trigger AS $$
+            BEGIN
+                DELETE FROM similarity_queue WHERE recipe_id = OLD.id;
+                PERFORM enqueue_similarity(ARRAY(
+                    SELECT recipe_id FROM recipe_neighbors WHERE neighbor_id = OLD.id AND recipe_id <> OLD.id
+                ), 'recompute');
+                RETURN OLD;
+            END
+            $$ LANGUAGE plpgsql
+        `);
+        await sequelize.query(`
+            CREATE TRIGGER recipes_similarity_delete
+            BEFORE DELETE ON recipes
+            FOR EACH ROW EXECUTE FUNCTION recipes_similarity_delete()
+        `);
+
+        // Catch up on writes the in-process queue never saw (bulk paths)
+        await sequelize.query(`
+            SELECT enqueue_similarity(ARRAY(
+                SELECT r.id FROM recipes r
+                WHERE NOT EXISTS (SELECT 1 FROM recipe_vectors v WHERE v.recipe_id = r.id)
+            ), 'refresh')
+        `);
+    },
+
+    async down(queryInterface) {
+        const { sequelize } = queryInterface;
+
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_similarity_delete ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_similarity_delete()');
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_similarity_update ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_similarity_update()');
+        await sequelize.query('DROP TRIGGER IF EXISTS recipes_similarity_insert ON recipes');
+        await sequelize.query('DROP FUNCTION IF EXISTS recipes_similarity_insert()');
+        await sequelize.query('DROP FUNCTION IF EXISTS enqueue_similarity(integer[], text)');
+        await queryInterface.dropTable('similarity_queue');
+    }
+};
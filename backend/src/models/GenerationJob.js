@@ -0,0 +1,92 @@
+import { Model } from 'sequelize';
+
+export default (sequelize, DataTypes) => {
+    class GenerationJob extends Model {
+        /**
+         * Helper method for defining associations.
+         */
+        static associate(models) {
+            // Job belongs to the User who requested it
+            GenerationJob.belongsTo(models.User, {
+                foreignKey: 'user_id',
+                as: 'user',
+                onDelete: 'CASCADE'
+            });
+        }
+
+        /**
+         * Check if the job will not change anymore
+         */
+        isFinished() {
+            return this.status === 'succeeded' || this.status === 'failed';
+        }
+    }
+
+    GenerationJob.init({
+        id: {
+            type: DataTypes.INTEGER,
+            primaryKey: true,
+            autoIncrement: true
+        },
+        user_id: {
+            type: DataTypes.INTEGER,
+            allowNull: false,
+            references: {
+                model: 'users',
+                key: 'id'
+            }
+        },
+        status: {
+            type: DataTypes.ENUM('queued', 'running', 'succeeded', 'failed'),
+            allowNull: false,
+            defaultValue: 'queued'
+        },
+        payload: {
+            type: DataTypes.JSONB,
+            allowNull: false,
+            comment: 'Movie the recipe is generated from'
+        },
+        result: {
+            type: DataTypes.JSONB,
+            allowNull: true
+        },
+        error: {
+            type: DataTypes.TEXT,
+            allowNull: true
+        },
+        attempts: {
+            type: DataTypes.INTEGER,
+            allowNull: false,
+            defaultValue: 0
+        },
+        max_attempts: {
+            type: DataTypes.INTEGER,
+            allowNull: false,
+            defaultValue: 5
+        },
+        run_at: {
+            type: DataTypes.DATE,
+            allowNull: false,
+            defaultValue: DataTypes.NOW,
+            comment: 'Earliest time a worker may pick the job (retry backoff)'
+        },
+        locked_at: {
+            type: DataTypes.DATE,
+            allowNull: true
+        },
+        locked_by: {
+            type: DataTypes.STRING(100),
+            allowNull: true
+        }
+    }, {
+        sequelize,
+        modelName: 'GenerationJob',
+        tableName: 'generation_jobs',
+        underscored: true,
+        timestamps: true,
+        createdAt: 'created_at',
+        updatedAt: 'updated_at'
+    });
+
+    return GenerationJob;
+};
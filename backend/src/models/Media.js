@@ -40,6 +40,14 @@ export default (sequelize, DataTypes) => {
                 min: 1900,
                 max: 2100
             }
+        },
+        tmdb_id: {
+            type: DataTypes.INTEGER,
+            allowNull: true
+        },
+        tmdb_synced_at: {
+            type: DataTypes.DATE,
+            allowNull: true
         }
     }, {
         sequelize,
@@ -109,6 +109,12 @@ export default (sequelize, DataTypes) => {
                 model: 'media',
                 key: 'id'
             }
+        },
+        version: {
+            type: DataTypes.INTEGER,
+            allowNull: false,
+            defaultValue: 1,
+            comment: 'Bumped by a trigger on each edit; compared with If-Match'
         }
     }, {
         sequelize,
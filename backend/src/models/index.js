@@ -1,37 +1,37 @@
-import { readdirSync } from 'fs';
-import { basename as _basename, join, dirname } from 'path';
 import { Sequelize, DataTypes } from 'sequelize';
-import { fileURLToPath } from 'url';
 import config from '../config/config.js';
+import { instrumentPool } from '../services/dbPool.js';
+import { observeQuery } from '../services/metrics.js';
+import { markStartup } from '../utils/startupProfile.js';
+import modelDefinitions from './registry.js';
 
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = dirname(__filename);
-const basename = _basename(__filename);
 const env = process.env.NODE_ENV || 'development';
-const dbConfig = config[env];
 const db = {};
 
+// Every query is timed (benchmark) and recorded in db_query_duration_seconds
+const baseConfig = config[env];
+const dbConfig = {
+    ...baseConfig,
+    benchmark: true,
+    logging: (sql, durationMs) => {
+        observeQuery(sql, durationMs);
+        if (typeof baseConfig.logging === 'function') {
+            baseConfig.logging(sql, durationMs);
+        }
+    }
+};
+
 let sequelize;
 if (dbConfig.url) {
     sequelize = new Sequelize(dbConfig.url, dbConfig);
 } else {
     sequelize = new Sequelize(dbConfig.database, dbConfig.username, dbConfig.password, dbConfig);
 }
+instrumentPool(sequelize);
 
-// Dynamically import all model files
-const modelFiles = readdirSync(__dirname)
-    .filter(file => {
-        return (
-            file.indexOf('.') !== 0 &&
-            file !== basename &&
-            file.slice(-3) === '.js' &&
-            file.indexOf('.test.js') === -1
-        );
-    });
-
-for (const file of modelFiles) {
-    const modelModule = await import(join(__dirname, file));
-    const model = modelModule.default(sequelize, DataTypes);
+// Model files are listed in registry.js (npm run models:registry)
+for (const define of modelDefinitions) {
+    const model = define(sequelize, DataTypes);
     db[model.name] = model;
 }
 
@@ -45,4 +45,6 @@ Object.keys(db).forEach(modelName => {
 db.sequelize = sequelize;
 db.Sequelize = Sequelize;
 
+markStartup('models');
+
 export default db;
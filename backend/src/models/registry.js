@@ -0,0 +1,8 @@
+// Generated by `npm run models:registry` (scripts/generateModelRegistry.js); do not edit.
+import Category from './Category.js';
+import GenerationJob from './GenerationJob.js';
+import Media from './Media.js';
+import Recipe from './Recipe.js';
+import User from './User.js';
+
+export default [Category, GenerationJob, Media, Recipe, User];
@@ -1,8 +1,41 @@
 import { Router } from 'express';
+import { once } from 'events';
 import { isAuthenticated, isAdmin } from '../middlewares/auth.js';
 import { validate } from '../middlewares/validator.js';
-import { body } from 'express-validator';
+import { body, query } from 'express-validator';
 import db from '../models/index.js';
+import { getCacheStats } from '../utils/cache.js';
+import { invalidateReferenceData } from '../services/referenceData.js';
+import { hydrateRecipes } from '../services/loaders.js';
+import { publishChange, publishInBackground, changedFields, recipeChangedFields, getChangeFeedStats } from '../services/changeFeed.js';
+import { getPoolStats } from '../services/dbPool.js';
+import { getHttpClientStats } from '../services/httpClient.js';
+import { ENTITIES, exportBatches, importRows } from '../services/bulkTransfer.js';
+import { runBulkOperation } from '../services/bulkOperations.js';
+import { getDashboardStats, rebuildStats, SERIES_BUCKETS, MAX_SERIES_DAYS } from '../services/statsService.js';
+import { runMediaSync, getSyncCheckpoint, getMediaSyncStats } from '../services/mediaSync.js';
+import { rebuildSimilarity, getSimilarityStats } from '../services/similarityService.js';
+import {
+    updateRecipeChecked,
+    deleteRecipeChecked,
+    parseIfMatch,
+    versionEtag
+} from '../services/recipeWriteService.js';
+import { bulkOperationSchema } from '../validations/bulkSchema.js';
+import { updateRecipeSchema, deleteRecipeSchema } from '../validations/recipeSchema.js';
+import { READ_REPLICA } from '../utils/replica.js';
+import { formatCsvRow } from '../utils/csv.js';
+import { sendSerialized } from '../utils/serializer.js';
+import {
+    serializeRecipe,
+    serializeRecipes,
+    serializeCategory,
+    serializeCategories,
+    serializeMedia,
+    serializeMediaList,
+    serializeUser,
+    serializeUsers
+} from '../serializers/schemas.js';
 
 const { Recipe, Category, Media, User } = db;
 
@@ -11,47 +44,87 @@ const router = Router();
 // All admin routes require authentication and admin role
 router.use(isAuthenticated, isAdmin);
 
+// Change feed entity of each table; users are not broadcast
+const FEED_ENTITIES = { recipes: 'recipe', media: 'media', categories: 'category' };
+
+/**
+ * POST /:entity/bulk handler: { ids, operation, changes } applied with one
+ * statement; answers the affected ids
+ */
+const bulkHandler = (entity, referenceKind = null) => [bulkOperationSchema, validate, async (req, res) => {
+    try {
+        const result = await runBulkOperation(entity, req.body, { actorId: req.user.id });
+        if (referenceKind && result.affected > 0) {
+            await invalidateReferenceData(referenceKind);
+        }
+        res.status(200).json(result);
+        const feedEntity = FEED_ENTITIES[entity];
+        if (feedEntity && result.affected > 0) {
+            const { operation, changes = {} } = req.body;
+            publishInBackground(feedEntity, operation === 'delete' ? 'deleted' : 'updated', result.ids,
+                operation === 'delete' ? null : () => changedFields(feedEntity, changes, Object.keys(changes)));
+        }
+    } catch (error) {
+        if (error.name === 'BulkOperationError') {
+            return res.status(400).json({ message: error.message });
+        }
+        res.status(500).json({ error: error.message });
+    }
+}];
+
 // ============ RECIPES ============
 router.get('/recipes', async (req, res) => {
     try {
-        const recipes = await Recipe.findAll({
-            include: [
-                { model: User, as: 'author', attributes: ['id', 'username'] },
-                { model: Category, as: 'category' },
-                { model: Media, as: 'media' }
-            ]
-        });
-        res.status(200).json(recipes);
+        const recipes = await Recipe.findAll({ ...READ_REPLICA, raw: true });
+        sendSerialized(res, 200, serializeRecipes, await hydrateRecipes(recipes, req.loaders));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
-router.put('/recipes/:id', async (req, res) => {
+router.post('/recipes/bulk', bulkHandler('recipes'));
+
+/**
+ * Refused recipe write: 404, or 412 with the current version's ETag
+ */
+const sendRecipeWriteError = (res, error) => {
+    if (!error.current) {
+        return res.status(error.status).json({ message: error.message });
+    }
+    res.set('ETag', versionEtag(error.current.version));
+    return res.status(error.status).json({ message: error.message, current: error.current });
+};
+
+// Same single-statement writes as the public routes, If-Match included
+router.put('/recipes/:id', updateRecipeSchema, validate, async (req, res) => {
     try {
-        const recipe = await Recipe.findByPk(req.params.id);
-        if (!recipe) {
-            return res.status(404).json({ message: 'Recipe not found' });
-        }
-        await recipe.update(req.body);
-        res.status(200).json(recipe);
+        const recipe = await updateRecipeChecked(Number(req.params.id), req.body, {
+            user: req.user,
+            expectedVersion: parseIfMatch(req.headers['if-match'])
+        });
+        res.set('ETag', versionEtag(recipe.version));
+        sendSerialized(res, 200, serializeRecipe, recipe);
+        publishInBackground('recipe', 'updated', [recipe.id], () => recipeChangedFields(recipe, Object.keys(req.body)));
     } catch (error) {
+        if (error.name === 'RecipeWriteError') {
+            return sendRecipeWriteError(res, error);
+        }
         res.status(500).json({ error: error.message });
     }
 });
 
-router.delete('/recipes/:id', async (req, res) => {
+router.delete('/recipes/:id', deleteRecipeSchema, validate, async (req, res) => {
     try {
-        const recipe = await Recipe.findByPk(req.params.id);
-        if (!recipe) {
-            return res.status(404).json({ message: 'Recipe not found' });
-        }
-
-
-
-        await recipe.destroy();
+        const { id } = await deleteRecipeChecked(Number(req.params.id), {
+            user: req.user,
+            expectedVersion: parseIfMatch(req.headers['if-match'])
+        });
         res.status(204).send();
+        publishInBackground('recipe', 'deleted', [id]);
     } catch (error) {
+        if (error.name === 'RecipeWriteError') {
+            return sendRecipeWriteError(res, error);
+        }
         res.status(500).json({ error: error.message });
     }
 });
@@ -59,8 +132,8 @@ router.delete('/recipes/:id', async (req, res) => {
 // ============ CATEGORIES ============
 router.get('/categories', async (req, res) => {
     try {
-        const categories = await Category.findAll();
-        res.status(200).json(categories);
+        const categories = await Category.findAll({ ...READ_REPLICA, raw: true });
+        sendSerialized(res, 200, serializeCategories, categories);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -71,12 +144,16 @@ router.post('/categories', [
 ], validate, async (req, res) => {
     try {
         const category = await Category.create(req.body);
-        res.status(201).json(category);
+        await invalidateReferenceData('categories');
+        sendSerialized(res, 201, serializeCategory, category);
+        publishInBackground('category', 'created', [category.id], () => changedFields('category', category));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+router.post('/categories/bulk', bulkHandler('categories', 'categories'));
+
 router.put('/categories/:id', async (req, res) => {
     try {
         const category = await Category.findByPk(req.params.id);
@@ -84,7 +161,9 @@ router.put('/categories/:id', async (req, res) => {
             return res.status(404).json({ message: 'Category not found' });
         }
         await category.update(req.body);
-        res.status(200).json(category);
+        await invalidateReferenceData('categories');
+        sendSerialized(res, 200, serializeCategory, category);
+        publishInBackground('category', 'updated', [category.id], () => changedFields('category', category, Object.keys(req.body)));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -97,7 +176,9 @@ router.delete('/categories/:id', async (req, res) => {
             return res.status(404).json({ message: 'Category not found' });
         }
         await category.destroy();
+        await invalidateReferenceData('categories');
         res.status(204).send();
+        publishInBackground('category', 'deleted', [category.id]);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -106,8 +187,8 @@ router.delete('/categories/:id', async (req, res) => {
 // ============ MEDIA ============
 router.get('/media', async (req, res) => {
     try {
-        const media = await Media.findAll();
-        res.status(200).json(media);
+        const media = await Media.findAll({ ...READ_REPLICA, raw: true });
+        sendSerialized(res, 200, serializeMediaList, media);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -119,12 +200,58 @@ router.post('/media', [
 ], validate, async (req, res) => {
     try {
         const media = await Media.create(req.body);
-        res.status(201).json(media);
+        await invalidateReferenceData('media');
+        sendSerialized(res, 201, serializeMedia, media);
+        publishInBackground('media', 'created', [media.id], () => changedFields('media', media));
+    } catch (error) {
+        if (error.name === 'SequelizeUniqueConstraintError') {
+            return res.status(409).json({ message: 'A media with this TMDB id already exists' });
+        }
+        res.status(500).json({ error: error.message });
+    }
+});
+
+router.post('/media/bulk', bulkHandler('media', 'media'));
+
+/**
+ * TMDB sync progress and worker state
+ * GET /api/v1/admin/media/sync
+ */
+router.get('/media/sync', async (req, res) => {
+    try {
+        res.status(200).json({ checkpoint: await getSyncCheckpoint(), worker: getMediaSyncStats() });
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+/**
+ * Sync up to `limit` media rows from the checkpoint now; with dry_run the
+ * report lists the changes without writing them
+ * POST /api/v1/admin/media/sync { dry_run, limit }
+ */
+router.post('/media/sync', [
+    body('dry_run').optional().isBoolean().toBoolean(),
+    body('limit').optional().isInt({ min: 1, max: 1000 }).toInt()
+], validate, async (req, res) => {
+    try {
+        const report = await runMediaSync({
+            dryRun: req.body.dry_run ?? false,
+            limit: req.body.limit ?? 200,
+            signal: req.signal
+        });
+        res.status(200).json(report);
+    } catch (error) {
+        if (error.name === 'SyncLockedError') {
+            return res.status(409).json({ message: error.message });
+        }
+        if (req.signal.aborted) {
+            return;
+        }
+        res.status(500).json({ error: error.message });
+    }
+});
+
 router.put('/media/:id', async (req, res) => {
     try {
         const media = await Media.findByPk(req.params.id);
@@ -132,7 +259,9 @@ router.put('/media/:id', async (req, res) => {
             return res.status(404).json({ message: 'Media not found' });
         }
         await media.update(req.body);
-        res.status(200).json(media);
+        await invalidateReferenceData('media');
+        sendSerialized(res, 200, serializeMedia, media);
+        publishInBackground('media', 'updated', [media.id], () => changedFields('media', media, Object.keys(req.body)));
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -145,7 +274,9 @@ router.delete('/media/:id', async (req, res) => {
             return res.status(404).json({ message: 'Media not found' });
         }
         await media.destroy();
+        await invalidateReferenceData('media');
         res.status(204).send();
+        publishInBackground('media', 'deleted', [media.id]);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -155,14 +286,18 @@ router.delete('/media/:id', async (req, res) => {
 router.get('/users', async (req, res) => {
     try {
         const users = await User.findAll({
-            attributes: { exclude: ['password_hash'] }
+            ...READ_REPLICA,
+            attributes: { exclude: ['password_hash'] },
+            raw: true
         });
-        res.status(200).json(users);
+        sendSerialized(res, 200, serializeUsers, users);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+router.post('/users/bulk', bulkHandler('users'));
+
 router.put('/users/:id', async (req, res) => {
     try {
         const user = await User.findByPk(req.params.id);
@@ -180,10 +315,7 @@ router.put('/users/:id', async (req, res) => {
 
         await user.update(updateData);
 
-        const userResponse = user.toJSON();
-        delete userResponse.password_hash;
-
-        res.status(200).json(userResponse);
+        sendSerialized(res, 200, serializeUser, user);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
@@ -202,25 +334,176 @@ router.delete('/users/:id', async (req, res) => {
     }
 });
 
+// ============ BULK EXPORT / IMPORT ============
+const BULK_FORMATS = {
+    ndjson: 'application/x-ndjson',
+    csv: 'text/csv; charset=utf-8'
+};
+
+/**
+ * Write a chunk, waiting for the client to drain the socket buffer
+ */
+const writeChunk = async (req, res, chunk) => {
+    if (!res.write(chunk)) {
+        await once(res, 'drain', { signal: req.signal });
+    }
+};
+
+/**
+ * Stream a whole table
+ * GET /api/v1/admin/export/recipes?format=csv
+ */
+router.get('/export/:entity', async (req, res) => {
+    const { entity } = req.params;
+    const format = req.query.format || 'ndjson';
+    if (!ENTITIES[entity] || !BULK_FORMATS[format]) {
+        return res.status(400).json({ message: 'Unknown entity or format (ndjson, csv)' });
+    }
+
+    const { columns } = ENTITIES[entity];
+    res.status(200).set({
+        'Content-Type': BULK_FORMATS[format],
+        'Content-Disposition': `attachment; filename="${entity}.${format}"`
+    });
+
+    try {
+        if (format === 'csv') {
+            await writeChunk(req, res, formatCsvRow(columns));
+        }
+        for await (const rows of exportBatches(entity)) {
+            const chunk = format === 'csv'
+                ? rows.map(row => formatCsvRow(columns.map(column => row[column]))).join('')
+                : rows.map(row => `${JSON.stringify(row)}\n`).join('');
+            await writeChunk(req, res, chunk);
+        }
+        res.end();
+    } catch (error) {
+        if (req.signal.aborted) {
+            return;
+        }
+        if (!res.headersSent) {
+            return res.status(500).json({ error: error.message });
+        }
+        // A cut connection tells the client the file is incomplete
+        res.destroy(error);
+    }
+});
+
+/**
+ * Load an NDJSON or CSV upload; rows with an id (a name for categories)
+ * replace the existing record, others are inserted. The response is an
+ * NDJSON report: progress lines, one line per rejected row, then a summary.
+ * POST /api/v1/admin/import/recipes  (Content-Type: text/csv or application/x-ndjson)
+ */
+router.post('/import/:entity', async (req, res) => {
+    const { entity } = req.params;
+    if (!ENTITIES[entity]) {
+        return res.status(400).json({ message: 'Unknown entity' });
+    }
+    const format = req.is('text/csv') ? 'csv' : req.is('application/x-ndjson') ? 'ndjson' : null;
+    if (!format) {
+        return res.status(415).json({ message: 'Upload NDJSON (application/x-ndjson) or CSV (text/csv)' });
+    }
+
+    res.status(200).set('Content-Type', BULK_FORMATS.ndjson);
+    const send = (event) => {
+        if (!res.writableEnded) {
+            res.write(`${JSON.stringify(event)}\n`);
+        }
+    };
+
+    try {
+        const summary = await importRows(entity, req, {
+            format,
+            userId: req.user.id,
+            onProgress: progress => send({ type: 'progress', ...progress }),
+            onRowError: rowError => send({ type: 'row_error', ...rowError })
+        });
+        if (entity !== 'recipes') {
+            await invalidateReferenceData(entity);
+        }
+        // Possibly thousands of rows: clients reload the list
+        publishChange(FEED_ENTITIES[entity], 'refreshed');
+        send({ type: 'summary', ...summary });
+    } catch (error) {
+        send({ type: 'error', error: error.message });
+    }
+    res.end();
+});
+
 // ============ DASHBOARD STATS ============
-router.get('/stats', async (req, res) => {
-    try {
-        const [recipesCount, usersCount, categoriesCount, mediaCount] = await Promise.all([
-            Recipe.count(),
-            User.count(),
-            Category.count(),
-            Media.count()
-        ]);
-
-        res.status(200).json({
-            recipes: recipesCount,
-            users: usersCount,
-            categories: categoriesCount,
-            media: mediaCount
+/**
+ * Dashboard statistics from the trigger-maintained counters
+ * GET /api/v1/admin/stats?days=90&bucket=week
+ */
+router.get('/stats', [
+    query('days').optional().isInt({ min: 1, max: MAX_SERIES_DAYS }).toInt(),
+    query('bucket').optional().isIn(Object.keys(SERIES_BUCKETS))
+], validate, async (req, res) => {
+    try {
+        const stats = await getDashboardStats({
+            days: req.query.days ?? 30,
+            bucket: req.query.bucket ?? 'day'
         });
+        res.status(200).json(stats);
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+router.post('/stats/rebuild', async (req, res) => {
+    try {
+        res.status(200).json(await rebuildStats());
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// ============ SIMILAR RECIPES ============
+router.get('/similarity', async (req, res) => {
+    try {
+        res.status(200).json(await getSimilarityStats());
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+/**
+ * Recompute every recipe vector and neighbour list in the background;
+ * progress and timings are reported by GET /similarity
+ * POST /api/v1/admin/similarity/rebuild
+ */
+router.post('/similarity/rebuild', async (req, res) => {
+    try {
+        // Covers rebuilds running in other workers and replicas
+        if ((await getSimilarityStats()).rebuilding) {
+            return res.status(409).json({ message: 'A similarity rebuild is already running' });
+        }
+        rebuildSimilarity().catch(error => console.error('Similarity rebuild failed:', error.message));
+        res.status(202).json(await getSimilarityStats());
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// ============ CACHES ============
+router.get('/cache', (req, res) => {
+    res.status(200).json(getCacheStats());
+});
+
+// ============ CHANGE FEED ============
+router.get('/events', (req, res) => {
+    res.status(200).json(getChangeFeedStats());
+});
+
+// ============ DATABASE POOL ============
+router.get('/pool', (req, res) => {
+    res.status(200).json(getPoolStats(db.sequelize));
+});
+
+// ============ UPSTREAM APIS ============
+router.get('/upstreams', (req, res) => {
+    res.status(200).json(getHttpClientStats());
+});
+
 export default router;
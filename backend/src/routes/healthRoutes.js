@@ -0,0 +1,50 @@
+import { Router } from 'express';
+import db from '../models/index.js';
+import { registry } from '../services/metrics.js';
+import { getPoolStats } from '../services/dbPool.js';
+import { CONTENT_TYPE } from '../utils/metrics.js';
+
+const READINESS_TIMEOUT_MS = Number.parseInt(process.env.READINESS_TIMEOUT_MS, 10) || 2000;
+
+const router = Router();
+
+const withTimeout = (promise, ms) => {
+    let timeoutId;
+    const timeout = new Promise((resolve, reject) => {
+        timeoutId = setTimeout(() => reject(new Error(`No database connection within ${ms}ms`)), ms);
+    });
+    return Promise.race([promise, timeout]).finally(() => clearTimeout(timeoutId));
+};
+
+// Liveness: the process is up and its event loop answers
+const live = (req, res) => {
+    res.status(200).json({ status: 'OK', message: 'CinéDélices API is running' });
+};
+
+router.get('/health', live);
+router.get('/health/live', live);
+
+// Readiness: a pooled connection can be checked out and used
+router.get('/health/ready', async (req, res) => {
+    if (req.app.locals.draining) {
+        return res.status(503).json({ status: 'DRAINING' });
+    }
+    try {
+        await withTimeout(db.sequelize.query('SELECT 1'), READINESS_TIMEOUT_MS);
+        res.status(200).json({ status: 'OK', pool: getPoolStats(db.sequelize) });
+    } catch (error) {
+        res.status(503).json({ status: 'UNAVAILABLE', error: error.message });
+    }
+});
+
+// Optional bearer token so the endpoint can stay reachable from outside the cluster
+router.get('/metrics', (req, res) => {
+    const token = process.env.METRICS_TOKEN;
+    if (token && req.headers.authorization !== `Bearer ${token}`) {
+        return res.status(401).json({ message: 'Unauthorized' });
+    }
+    res.set('Content-Type', CONTENT_TYPE);
+    res.status(200).send(registry.render());
+});
+
+export default router;
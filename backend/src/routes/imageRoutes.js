@@ -0,0 +1,65 @@
+import { Router } from 'express';
+import { open } from 'fs/promises';
+import { pipeline } from 'stream/promises';
+import { getImageVariant } from '../services/imageProxy.js';
+
+const router = Router();
+
+/**
+ * Answer when no variant can be served: TMDB posters fall back to the
+ * origin (the browser may still reach it); anything else is not redirected
+ * so /img cannot be used as an open redirect
+ */
+const sendFallback = (res, url, status) => {
+    if (new URL(url).hostname === 'image.tmdb.org') {
+        return res.redirect(302, url);
+    }
+    res.status(status).json({ message: 'Image unavailable' });
+};
+
+/**
+ * Resized, cached variant of a remote image
+ * GET /img?url=https%3A%2F%2Fimage.tmdb.org%2Ft%2Fp%2Fw500%2Fx.jpg&w=320
+ */
+router.get('/img', async (req, res) => {
+    const { url, w } = req.query;
+    if (typeof url !== 'string' || url === '') {
+        return res.status(400).json({ message: 'url is required' });
+    }
+
+    let image;
+    let file;
+    try {
+        image = await getImageVariant(url, {
+            width: Number.parseInt(w, 10) || 320,
+            accept: req.get('accept') || ''
+        });
+        file = await open(image.file);
+    } catch (error) {
+        // Bad URL, or a host outside the allow-list
+        if (error.status === 400 || error.status === 403) {
+            return res.status(error.status).json({ message: error.message });
+        }
+        console.warn(`[img] ${url}: ${error.message}`);
+        return sendFallback(res, url, error.status === 404 ? 404 : 502);
+    }
+
+    // Variants never change for a given URL, width and Accept
+    res.set({
+        'Content-Type': image.contentType,
+        'Cache-Control': 'public, max-age=31536000, immutable',
+        'Cross-Origin-Resource-Policy': 'cross-origin',
+        ETag: `"${image.etag}"`,
+        Vary: 'Accept'
+    });
+    if (req.fresh) {
+        await file.close();
+        return res.status(304).end();
+    }
+
+    res.set('Content-Length', String(image.size));
+    // The open handle keeps the file readable even if it is evicted meanwhile
+    await pipeline(file.createReadStream(), res).catch(() => {});
+});
+
+export default router;
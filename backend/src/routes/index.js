@@ -2,23 +2,29 @@ import { Router } from 'express';
 import recipeRoutes from './recipeRoutes.js';
 import authRoutes from './authRoutes.js';
 import userRoutes from './userRoutes.js';
-import adminRoutes from './adminRoutes.js';
 import tmdbRoutes from './tmdbRoutes.js';
 import * as metadataController from '../controllers/metadataController.js';
+import * as eventController from '../controllers/eventController.js';
 import { isAuthenticated } from '../middlewares/auth.js';
+import { conditionalGet, METADATA_CACHE_CONTROL } from '../middlewares/httpCache.js';
+import { lazyRouter } from '../utils/lazy.js';
 
 const router = Router();
 
 router.use('/recipes', recipeRoutes);
 router.use('/auth', authRoutes);
 router.use('/users', userRoutes);
-router.use('/admin', adminRoutes);
+// Back office (bulk transfer, stats, TMDB sync) is imported on first use
+router.use('/admin', lazyRouter(() => import('./adminRoutes.js')));
 router.use('/tmdb', tmdbRoutes);
 
 // Metadata routes
-router.get('/categories', metadataController.getAllCategories);
-router.get('/media', metadataController.getAllMedia);
+router.get('/categories', conditionalGet(['categories'], METADATA_CACHE_CONTROL), metadataController.getAllCategories);
+router.get('/media', conditionalGet(['media'], METADATA_CACHE_CONTROL), metadataController.getAllMedia);
 router.post('/media', isAuthenticated, metadataController.createMedia);
 
+// Live changes as server-sent events
+router.get('/events', eventController.streamEvents);
+
 export default router;
 
@@ -1,18 +1,36 @@
 import { Router } from 'express';
 import * as recipeController from '../controllers/recipeController.js';
-import { createRecipeSchema, updateRecipeSchema } from '../validations/recipeSchema.js';
+import {
+    createRecipeSchema,
+    updateRecipeSchema,
+    deleteRecipeSchema,
+    listRecipesSchema,
+    searchRecipesSchema,
+    similarRecipesSchema
+} from '../validations/recipeSchema.js';
 import { validate } from '../middlewares/validator.js';
 import { isAuthenticated } from '../middlewares/auth.js';
+import { conditionalGet, conditionalRecipeGet, RECIPE_CACHE_CONTROL } from '../middlewares/httpCache.js';
 
 const router = Router();
 
+// Recipe payloads embed author, category and media
+const recipeCache = conditionalGet(['recipes', 'users', 'categories', 'media'], RECIPE_CACHE_CONTROL);
+// Detail ETags start with the recipe version, for If-Match on PUT/DELETE
+const recipeDetailCache = conditionalRecipeGet(['users', 'categories', 'media'], RECIPE_CACHE_CONTROL);
+const similarCache = conditionalGet(['recipe_neighbors', 'recipes', 'users', 'categories', 'media'], RECIPE_CACHE_CONTROL);
+
 // Recipe CRUD
-router.get('/', recipeController.getAllRecipes);
-router.get('/:id', recipeController.getRecipeById);
+router.get('/', listRecipesSchema, validate, recipeCache, recipeController.getAllRecipes);
+router.get('/search', searchRecipesSchema, validate, recipeCache, recipeController.searchRecipes);
+router.get('/:id', recipeDetailCache, recipeController.getRecipeById);
+router.get('/:id/similar', similarRecipesSchema, validate, similarCache, recipeController.getSimilarRecipes);
 router.post('/generate', isAuthenticated, recipeController.generateRecipe);
+router.get('/generate/:jobId', isAuthenticated, recipeController.getGenerationJob);
+router.get('/generate/:jobId/events', isAuthenticated, recipeController.streamGenerationJob);
 router.post('/', isAuthenticated, createRecipeSchema, validate, recipeController.createRecipe);
 router.put('/:id', isAuthenticated, updateRecipeSchema, validate, recipeController.updateRecipe);
-router.delete('/:id', isAuthenticated, recipeController.deleteRecipe);
+router.delete('/:id', isAuthenticated, deleteRecipeSchema, validate, recipeController.deleteRecipe);
 
 export default router;
 
@@ -3,6 +3,20 @@ import { searchMedia, getMediaDetails } from '../services/tmdbService.js';
 
 const router = express.Router();
 
+/**
+ * Answer a failed TMDB call: 503 while the upstream is unavailable
+ */
+const sendTmdbError = (req, res, error) => {
+    if (req.signal?.aborted) {
+        return;
+    }
+    if (error.name === 'CircuitOpenError') {
+        res.set('Retry-After', String(Math.ceil(error.retryAfterMs / 1000)));
+        return res.status(503).json({ error: 'TMDB is temporarily unavailable' });
+    }
+    res.status(error.name === 'TimeoutError' ? 504 : 500).json({ error: error.message });
+};
+
 /**
  * Search for movies/series on TMDB
  * GET /api/v1/tmdb/search?query=Ratatouille&type=movie
@@ -17,11 +31,11 @@ router.get('/search', async (req, res) => {
             });
         }
 
-        const results = await searchMedia(query.trim(), type);
+        const results = await searchMedia(query.trim(), type, { signal: req.signal });
         res.json({ results });
     } catch (error) {
         console.error('TMDB search error:', error.message);
-        res.status(500).json({ error: error.message });
+        sendTmdbError(req, res, error);
     }
 });
 
@@ -34,11 +48,11 @@ router.get('/:id', async (req, res) => {
         const { id } = req.params;
         const { type = 'movie' } = req.query;
 
-        const details = await getMediaDetails(parseInt(id, 10), type);
+        const details = await getMediaDetails(parseInt(id, 10), type, { signal: req.signal });
         res.json(details);
     } catch (error) {
         console.error('TMDB details error:', error.message);
-        res.status(500).json({ error: error.message });
+        sendTmdbError(req, res, error);
     }
 });
 
@@ -0,0 +1,107 @@
+/**
+ * Response schemas for the hot API responses, compiled once at load.
+ * Each lists every property a response may carry: anything else on the
+ * row (password_hash, search_vector, internal flags) is never written.
+ */
+
+import { compileSerializer } from '../utils/serializer.js';
+
+const integer = { type: 'integer' };
+const number = { type: 'number' };
+const string = { type: 'string' };
+const dateTime = { type: 'string', format: 'date-time' };
+
+const object = properties => ({ type: 'object', properties });
+const arrayOf = items => ({ type: 'array', items });
+
+const timestamps = { created_at: dateTime, updated_at: dateTime };
+
+export const categorySchema = object({
+    id: integer,
+    name: string,
+    description: string,
+    ...timestamps
+});
+
+export const mediaSchema = object({
+    id: integer,
+    title: string,
+    type: string,
+    image_url: string,
+    release_year: integer,
+    tmdb_id: integer,
+    tmdb_synced_at: dateTime,
+    ...timestamps
+});
+
+// Public account fields; password_hash is deliberately absent
+export const userSchema = object({
+    id: integer,
+    username: string,
+    email: string,
+    role: string,
+    avatar_url: string,
+    bio: string,
+    ...timestamps
+});
+
+export const userProfileSchema = object({
+    ...userSchema.properties,
+    recipes: arrayOf(object({ id: integer, title: string, image_url: string })),
+    recipe_count: integer
+});
+
+const recipeColumns = {
+    id: integer,
+    title: string,
+    description: string,
+    ingredients: string,
+    instructions: string,
+    anecdote: string,
+    difficulty: string,
+    prep_time: integer,
+    cook_time: integer,
+    image_url: string,
+    user_id: integer,
+    category_id: integer,
+    media_id: integer,
+    version: integer,
+    ...timestamps
+};
+
+// Recipe with author, category and media, as hydrateRecipes() leaves it
+export const recipeSchema = object({
+    ...recipeColumns,
+    author: object({ id: integer, username: string }),
+    category: categorySchema,
+    media: mediaSchema
+});
+
+// List entries also carry what ranked them: search, ingredients, similarity
+const recipeListItemSchema = object({
+    ...recipeSchema.properties,
+    rank: number,
+    snippet: string,
+    matched_ingredients: integer,
+    coverage: integer,
+    score: number
+});
+
+// { data, next_cursor } pages, { mode, data } search results, { data } lists
+export const recipeListSchema = object({
+    mode: string,
+    data: arrayOf(recipeListItemSchema),
+    next_cursor: string
+});
+
+export const serializeRecipe = compileSerializer(recipeSchema);
+export const serializeRecipes = compileSerializer(arrayOf(recipeSchema));
+export const serializeRecipeList = compileSerializer(recipeListSchema);
+export const serializeUser = compileSerializer(userSchema);
+export const serializeUsers = compileSerializer(arrayOf(userSchema));
+export const serializeUserProfile = compileSerializer(userProfileSchema);
+export const serializeAuth = compileSerializer(object({ user: userSchema, token: string }));
+export const serializeCategory = compileSerializer(categorySchema);
+export const serializeCategories = compileSerializer(arrayOf(categorySchema));
+export const serializeMedia = compileSerializer(mediaSchema);
+export const serializeMediaList = compileSerializer(arrayOf(mediaSchema));
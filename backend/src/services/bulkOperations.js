@@ -0,0 +1,151 @@
+/**
+ * Bulk Operations - Set-based admin actions on many rows at once
+ *
+ * Each request becomes a single UPDATE or DELETE ... WHERE id = ANY($1)
+ * run in one transaction, instead of a findByPk + update/destroy round
+ * trip pair per row.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+/**
+ * Per table: operations and the columns each one may change
+ * (null for delete). protectSelf keeps admins from deleting or demoting
+ * their own account.
+ */
+export const BULK_ENTITIES = {
+    recipes: {
+        table: 'recipes',
+        operations: {
+            delete: null,
+            reassign: ['category_id', 'media_id'],
+            patch: ['difficulty', 'prep_time', 'cook_time', 'image_url']
+        }
+    },
+    media: {
+        table: 'media',
+        operations: {
+            delete: null,
+            patch: ['type', 'release_year', 'image_url']
+        }
+    },
+    categories: {
+        table: 'categories',
+        operations: {
+            delete: null,
+            patch: ['description']
+        }
+    },
+    users: {
+        table: 'users',
+        operations: {
+            delete: null,
+            role: ['role'],
+            patch: ['bio']
+        },
+        protectSelf: true
+    }
+};
+
+export class BulkOperationError extends Error {
+    constructor(message) {
+        super(message);
+        this.name = 'BulkOperationError';
+        this.status = 400;
+    }
+}
+
+/**
+ * Build the statement for a bulk operation
+ * @returns {{ sql: string, bind: Array }}
+ */
+export function buildBulkStatement(entity, { ids, operation, changes = {} }, { actorId } = {}) {
+    const config = BULK_ENTITIES[entity];
+    if (!config || !Object.hasOwn(config.operations, operation)) {
+        throw new BulkOperationError(`Unsupported operation for ${entity}: ${operation}`);
+    }
+
+    const bind = [[...new Set(ids.map(Number))]];
+    let where = 'id = ANY($1::integer[])';
+    if (config.protectSelf) {
+        bind.push(actorId);
+        where += ` AND id <> $${bind.length}`;
+    }
+
+    if (operation === 'delete') {
+        return { sql: `DELETE FROM "${config.table}" WHERE ${where} RETURNING id`, bind };
+    }
+
+    const allowed = config.operations[operation];
+    const columns = Object.keys(changes);
+    const rejected = columns.filter(column => !allowed.includes(column));
+    if (rejected.length > 0) {
+        throw new BulkOperationError(`${operation} cannot change ${rejected.join(', ')}`);
+    }
+    if (columns.length === 0) {
+        throw new BulkOperationError(`${operation} needs at least one of ${allowed.join(', ')}`);
+    }
+
+    const assignments = columns.map((column) => {
+        bind.push(changes[column] === '' ? null : changes[column]);
+        return `"${column}" = $${bind.length}`;
+    });
+    return {
+        sql: `UPDATE "${config.table}" SET ${assignments.join(', ')}, updated_at = NOW() WHERE ${where} RETURNING id`,
+        bind
+    };
+}
+
+/**
+ * Explain a foreign key violation: a delete trips over rows that still
+ * reference the selection, any other operation names a missing row
+ * @param {string} operation
+ * @param {Error} error - SequelizeForeignKeyConstraintError
+ * @returns {string}
+ */
+function foreignKeyMessage(operation, error) {
+    const detail = error.parent?.detail ?? '';
+    if (operation === 'delete') {
+        const table = /referenced from table "([^"]+)"/.exec(detail)?.[1];
+        return table
+            ? `Selected rows are still referenced from ${table}`
+            : 'Selected rows are still referenced by other rows';
+    }
+    return 'Referenced row does not exist';
+}
+
+/**
+ * Run a bulk operation
+ * @param {string} entity - Key of BULK_ENTITIES
+ * @param {Object} request - { ids, operation, changes }
+ * @param {Object} context - { actorId }
+ * @returns {Promise<Object>} - { operation, requested, affected, ids }
+ */
+export async function runBulkOperation(entity, request, context) {
+    const { sql, bind } = buildBulkStatement(entity, request, context);
+
+    try {
+        const rows = await db.sequelize.transaction(transaction => db.sequelize.query(sql, {
+            bind,
+            type: QueryTypes.SELECT,
+            transaction
+        }));
+        return {
+            operation: request.operation,
+            requested: bind[0].length,
+            affected: rows.length,
+            ids: rows.map(row => row.id)
+        };
+    } catch (error) {
+        if (error.name === 'SequelizeForeignKeyConstraintError') {
+            throw new BulkOperationError(foreignKeyMessage(request.operation, error));
+        }
+        throw error;
+    }
+}
+
+export default {
+    BULK_ENTITIES,
+    runBulkOperation
+};
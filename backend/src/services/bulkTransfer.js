@@ -0,0 +1,340 @@
+/**
+ * Bulk Transfer - Streaming export and staged bulk import for the back-office
+ *
+ * Exports walk the table in primary-key order, one batch at a time, and are
+ * written with backpressure, so memory stays constant whatever the table
+ * size. Imports parse the upload as it arrives, validate rows in batches
+ * with the same rules as the single-row endpoints, stage valid rows in
+ * import_rows, check foreign keys with set-based queries and finish with
+ * a single INSERT ... ON CONFLICT upsert per table.
+ */
+
+import { randomUUID } from 'crypto';
+import { QueryTypes } from 'sequelize';
+import { validationResult } from 'express-validator';
+import db from '../models/index.js';
+import { READ_REPLICA } from '../utils/replica.js';
+import { readLines, parseCsvObjects } from '../utils/csv.js';
+import { RECIPE_FIELDS } from '../validations/recipeSchema.js';
+import { importRecipeSchema, importMediaSchema, importCategorySchema } from '../validations/importSchema.js';
+
+const EXPORT_BATCH_SIZE = 1000;
+const IMPORT_BATCH_SIZE = 1000;
+const IMPORT_MAX_ROWS = Number.parseInt(process.env.IMPORT_MAX_ROWS, 10) || 100000;
+// The final upsert may legitimately outlast the API statement timeout
+const IMPORT_STATEMENT_TIMEOUT_MS = Number.parseInt(process.env.IMPORT_STATEMENT_TIMEOUT_MS, 10) || 5 * 60 * 1000;
+
+/**
+ * Per table: exported columns, writable columns, upsert key, row rules and
+ * the foreign keys checked before the upsert
+ */
+export const ENTITIES = {
+    recipes: {
+        table: 'recipes',
+        columns: RECIPE_FIELDS,
+        writable: [
+            'title', 'description', 'ingredients', 'instructions', 'anecdote',
+            'difficulty', 'prep_time', 'cook_time', 'image_url',
+            'user_id', 'category_id', 'media_id'
+        ],
+        key: 'id',
+        schema: importRecipeSchema,
+        references: { user_id: 'users', category_id: 'categories', media_id: 'media' }
+    },
+    media: {
+        table: 'media',
+        columns: ['id', 'title', 'type', 'image_url', 'release_year', 'created_at', 'updated_at'],
+        writable: ['title', 'type', 'image_url', 'release_year'],
+        key: 'id',
+        schema: importMediaSchema,
+        references: {}
+    },
+    categories: {
+        table: 'categories',
+        columns: ['id', 'name', 'description', 'created_at', 'updated_at'],
+        writable: ['name', 'description'],
+        // Names are unique; ids from another database would not line up
+        key: 'name',
+        schema: importCategorySchema,
+        references: {}
+    }
+};
+
+// ============ EXPORT ============
+
+/**
+ * Yield batches of rows in primary-key order
+ * @param {string} entity - Key of ENTITIES
+ * @param {Object} [options]
+ * @param {number} [options.batchSize]
+ */
+export async function* exportBatches(entity, { batchSize = EXPORT_BATCH_SIZE } = {}) {
+    const { table, columns } = ENTITIES[entity];
+    const select = columns.map(column => `"${column}"`).join(', ');
+    let lastId = 0;
+
+    for (;;) {
+        const rows = await db.sequelize.query(
+            `SELECT ${select} FROM "${table}" WHERE id > :lastId ORDER BY id LIMIT :limit`,
+            { ...READ_REPLICA, replacements: { lastId, limit: batchSize }, type: QueryTypes.SELECT }
+        );
+        if (rows.length === 0) {
+            return;
+        }
+        yield rows;
+        if (rows.length < batchSize) {
+            return;
+        }
+        lastId = rows.at(-1).id;
+    }
+}
+
+// ============ IMPORT ============
+
+/**
+ * Yield { row, data } or { row, error } for each record of an upload
+ * @param {AsyncIterable<Buffer>} source
+ * @param {string} format - 'ndjson' or 'csv'
+ */
+export async function* readImportRows(source, format) {
+    let row = 0;
+    if (format === 'csv') {
+        for await (const data of parseCsvObjects(source)) {
+            yield { row: ++row, data };
+        }
+        return;
+    }
+
+    for await (const line of readLines(source)) {
+        if (line.trim() === '') {
+            continue;
+        }
+        row++;
+        try {
+            const data = JSON.parse(line);
+            if (data === null || typeof data !== 'object' || Array.isArray(data)) {
+                yield { row, error: 'Expected a JSON object' };
+            } else {
+                yield { row, data };
+            }
+        } catch (error) {
+            yield { row, error: `Invalid JSON: ${error.message}` };
+        }
+    }
+}
+
+/**
+ * Validate a batch of rows with the entity's express-validator chains
+ * @param {Array<Object>} items - { row, data }
+ * @param {Array} schema - Validation chains
+ * @returns {Promise<Array<Object>>} - { row, errors: [{ field, message }] } for invalid rows
+ */
+export async function validateBatch(items, schema) {
+    const results = await Promise.all(items.map(async ({ row, data }) => {
+        const req = { body: data };
+        for (const chain of schema) {
+            await chain.run(req);
+        }
+        const errors = validationResult(req).array();
+        return errors.length === 0
+            ? null
+            : { row, errors: errors.map(error => ({ field: error.path, message: error.msg })) };
+    }));
+    return results.filter(Boolean);
+}
+
+/**
+ * Keep only the columns an import may write; blanks become NULL
+ */
+const pickWritable = ({ key, writable }, data) => {
+    const picked = {};
+    for (const column of key === 'id' ? ['id', ...writable] : writable) {
+        if (data[column] !== undefined) {
+            picked[column] = data[column] === '' ? null : data[column];
+        }
+    }
+    return picked;
+};
+
+async function stageBatch(importId, items) {
+    await db.sequelize.query(
+        `INSERT INTO import_rows (import_id, row_num, data)
+         SELECT :importId, item.row_num, item.data
+         FROM jsonb_to_recordset(CAST(:items AS jsonb)) AS item(row_num integer, data jsonb)`,
+        { replacements: { importId, items: JSON.stringify(items) } }
+    );
+}
+
+/**
+ * Report and unstage rows whose foreign keys do not exist
+ * @returns {Promise<Array<Object>>} - Row errors
+ */
+async function checkReferences(importId, { references }) {
+    const checks = Object.entries(references).map(([column, table]) => `
+        SELECT s.row_num, '${column}' AS field
+        FROM import_rows s
+        WHERE s.import_id = :importId
+          AND jsonb_typeof(s.data -> '${column}') <> 'null'
+          AND NOT EXISTS (SELECT 1 FROM "${table}" t WHERE t.id = (s.data ->> '${column}')::integer)`);
+    if (checks.length === 0) {
+        return [];
+    }
+
+    const missing = await db.sequelize.query(`${checks.join(' UNION ALL ')} ORDER BY row_num`, {
+        replacements: { importId },
+        type: QueryTypes.SELECT
+    });
+    if (missing.length === 0) {
+        return [];
+    }
+
+    await db.sequelize.query('DELETE FROM import_rows WHERE import_id = :importId AND row_num IN (:rows)', {
+        replacements: { importId, rows: [...new Set(missing.map(item => item.row_num))] }
+    });
+
+    const byRow = new Map();
+    for (const { row_num: row, field } of missing) {
+        if (!byRow.has(row)) {
+            byRow.set(row, { row, errors: [] });
+        }
+        byRow.get(row).errors.push({ field, message: `Referenced ${references[field]} row does not exist` });
+    }
+    return [...byRow.values()];
+}
+
+/**
+ * Set-based upsert of the staged rows; later rows win over earlier
+ * duplicates of the same key
+ * @returns {Promise<{ inserted: number, updated: number }>}
+ */
+async function upsertStaged(importId, { table, writable, key }, userId) {
+    const updates = writable.map(column => `"${column}" = EXCLUDED."${column}"`);
+
+    const upsert = (keyed) => {
+        // A row updating an existing one keeps its author when it names none;
+        // only new rows default to the importing user
+        const keepsAuthor = keyed && writable.includes('user_id');
+        const values = writable.map(column => (column === 'user_id'
+            ? `COALESCE(r.user_id, ${keepsAuthor ? 'existing.user_id, ' : ''}:userId)`
+            : column === 'difficulty' ? "COALESCE(r.difficulty, 'moyen')" : `r."${column}"`));
+        const withId = keyed && key === 'id';
+        const columns = withId ? ['id', ...writable] : writable;
+        const selected = withId ? ['r.id', ...values] : values;
+        const existing = keepsAuthor ? `LEFT JOIN "${table}" existing ON existing."${key}" = r."${key}"` : '';
+        const distinct = keyed ? `DISTINCT ON (r."${key}")` : '';
+        const order = keyed ? `ORDER BY r."${key}", s.row_num DESC` : '';
+        const conflict = keyed
+            ? `ON CONFLICT ("${key}") DO UPDATE SET ${updates.join(', ')}, updated_at = NOW()`
+            : '';
+        return `
+            INSERT INTO "${table}" (${columns.map(column => `"${column}"`).join(', ')}, created_at, updated_at)
+            SELECT ${distinct} ${selected.join(', ')}, NOW(), NOW()
+            FROM import_rows s
+            CROSS JOIN LATERAL jsonb_populate_record(NULL::"${table}", s.data) r
+            ${existing}
+            WHERE s.import_id = :importId AND r."${key}" IS ${keyed ? 'NOT NULL' : 'NULL'}
+            ${order}
+            ${conflict}
+            RETURNING (xmax = 0) AS inserted`;
+    };
+
+    return db.sequelize.transaction(async (transaction) => {
+        await db.sequelize.query(`SET LOCAL statement_timeout = ${IMPORT_STATEMENT_TIMEOUT_MS}`, { transaction });
+        const statements = key === 'id' ? [upsert(true), upsert(false)] : [upsert(true)];
+        const totals = { inserted: 0, updated: 0 };
+        for (const statement of statements) {
+            const [result] = await db.sequelize.query(
+                `WITH upserted AS (${statement})
+                 SELECT count(*) FILTER (WHERE inserted) AS inserted, count(*) FILTER (WHERE NOT inserted) AS updated
+                 FROM upserted`,
+                { replacements: { importId, userId }, type: QueryTypes.SELECT, transaction }
+            );
+            totals.inserted += Number(result.inserted);
+            totals.updated += Number(result.updated);
+        }
+
+        // Explicit ids bypass the sequence; move it past them
+        if (key === 'id') {
+            await db.sequelize.query(
+                `SELECT setval(pg_get_serial_sequence('${table}', 'id'), GREATEST((SELECT MAX(id) FROM "${table}"), 1))`,
+                { transaction }
+            );
+        }
+        return totals;
+    });
+}
+
+/**
+ * Import an upload into an entity table
+ * @param {string} entity - Key of ENTITIES
+ * @param {AsyncIterable<Buffer>} source - Request body
+ * @param {Object} options
+ * @param {string} options.format - 'ndjson' or 'csv'
+ * @param {number} options.userId - Author of recipes without user_id
+ * @param {Function} [options.onProgress] - ({ phase, rows }) after each batch
+ * @param {Function} [options.onRowError] - ({ row, errors }) per rejected row
+ * @returns {Promise<Object>} - { rows, inserted, updated, rejected }
+ */
+export async function importRows(entity, source, { format, userId, onProgress = () => {}, onRowError = () => {} }) {
+    const config = ENTITIES[entity];
+    const importId = randomUUID();
+    let rows = 0;
+    let rejected = 0;
+    let batch = [];
+
+    const reject = (rowError) => {
+        rejected++;
+        onRowError(rowError);
+    };
+
+    const flush = async () => {
+        const invalid = await validateBatch(batch, config.schema);
+        invalid.forEach(reject);
+        const invalidRows = new Set(invalid.map(item => item.row));
+        const valid = batch
+            .filter(item => !invalidRows.has(item.row))
+            .map(({ row, data }) => ({ row, data: pickWritable(config, data) }));
+        if (valid.length > 0) {
+            await stageBatch(importId, valid.map(({ row, data }) => ({ row_num: row, data })));
+        }
+        batch = [];
+        onProgress({ phase: 'staging', rows });
+    };
+
+    // Rows left behind by an interrupted import
+    await db.sequelize.query("DELETE FROM import_rows WHERE created_at < NOW() - INTERVAL '1 day'");
+
+    try {
+        for await (const item of readImportRows(source, format)) {
+            rows++;
+            if (rows > IMPORT_MAX_ROWS) {
+                throw Object.assign(new Error(`Imports are limited to ${IMPORT_MAX_ROWS} rows`), { status: 413 });
+            }
+            if (item.error) {
+                reject({ row: item.row, errors: [{ field: null, message: item.error }] });
+                continue;
+            }
+            batch.push(item);
+            if (batch.length >= IMPORT_BATCH_SIZE) {
+                await flush();
+            }
+        }
+        await flush();
+
+        (await checkReferences(importId, config)).forEach(reject);
+        onProgress({ phase: 'upserting', rows });
+        const totals = await upsertStaged(importId, config, userId);
+
+        return { rows, ...totals, rejected };
+    } finally {
+        await db.sequelize.query('DELETE FROM import_rows WHERE import_id = :importId', {
+            replacements: { importId }
+        }).catch(error => console.warn(`[import:${entity}] staging cleanup failed: ${error.message}`));
+    }
+}
+
+export default {
+    ENTITIES,
+    exportBatches,
+    importRows
+};
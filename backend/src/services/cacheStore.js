@@ -0,0 +1,56 @@
+/**
+ * Cache Store - Shared cache tier backed by the cache_entries table
+ *
+ * Lets every replica reuse upstream responses fetched by the others.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+const PURGE_INTERVAL_MS = 10 * 60 * 1000;
+
+/**
+ * Create a Postgres-backed store for utils/cache.js
+ * @param {string} namespace - Key prefix isolating one cache from another
+ * @returns {Object} - Store with get/set
+ */
+export function createPostgresStore(namespace) {
+    const purgeTimer = setInterval(() => {
+        db.sequelize.query('DELETE FROM cache_entries WHERE expires_at < NOW()')
+            .catch(error => console.warn(`[cache:${namespace}] purge failed: ${error.message}`));
+    }, PURGE_INTERVAL_MS);
+    purgeTimer.unref();
+
+    return {
+        async get(key) {
+            const [row] = await db.sequelize.query(
+                'SELECT value, expires_at FROM cache_entries WHERE key = :key AND expires_at > NOW()',
+                {
+                    replacements: { key: `${namespace}:${key}` },
+                    type: QueryTypes.SELECT
+                }
+            );
+            return row ? { value: row.value, expiresAt: new Date(row.expires_at).getTime() } : undefined;
+        },
+
+        async set(key, value, expiresAt) {
+            await db.sequelize.query(
+                `INSERT INTO cache_entries (key, value, expires_at)
+                 VALUES (:key, :value, :expiresAt)
+                 ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at`,
+                {
+                    replacements: {
+                        key: `${namespace}:${key}`,
+                        value: JSON.stringify(value),
+                        expiresAt: new Date(expiresAt)
+                    },
+                    type: QueryTypes.INSERT
+                }
+            );
+        }
+    };
+}
+
+export default {
+    createPostgresStore
+};
@@ -0,0 +1,296 @@
+/**
+ * Change Feed - Recipe, media and category changes for GET /api/v1/events
+ *
+ * Writers call publishChange() once their write went through. The event
+ * is sent with NOTIFY, so every replica, this one included, receives it on
+ * the change_feed channel and writes it to its own server-sent events
+ * clients. Event ids come from a sequence taken in the NOTIFY statement
+ * and PostgreSQL delivers notifications in commit order, so every replica
+ * keeps the same replay buffer and Last-Event-ID resumes on any of them.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { listen } from './pgNotifier.js';
+
+const CHANNEL = 'change_feed';
+
+export const MAX_CLIENTS = Number.parseInt(process.env.CHANGE_FEED_MAX_CLIENTS, 10) || 1000;
+const REPLAY_SIZE = Number.parseInt(process.env.CHANGE_FEED_REPLAY, 10) || 500;
+const HEARTBEAT_MS = Number.parseInt(process.env.CHANGE_FEED_HEARTBEAT_MS, 10) || 25000;
+// Frames held for a client whose socket buffer is full before it is dropped
+const MAX_QUEUED = Number.parseInt(process.env.CHANGE_FEED_MAX_QUEUED, 10) || 100;
+// pg_notify refuses payloads of 8000 bytes or more
+const MAX_PAYLOAD_BYTES = 7900;
+const RETRY_MS = 3000;
+
+const SSE_HEADERS = {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    Connection: 'keep-alive',
+    'X-Accel-Buffering': 'no'
+};
+const RESET_FRAME = 'event: reset\ndata: {}\n\n';
+const HEARTBEAT_FRAME = ': ping\n\n';
+
+// Columns an event carries: what lists show, never the long texts
+export const FEED_FIELDS = {
+    recipe: [
+        'title', 'description', 'difficulty', 'prep_time', 'cook_time', 'image_url',
+        'user_id', 'category_id', 'media_id', 'created_at', 'updated_at', 'version'
+    ],
+    media: ['title', 'type', 'release_year', 'image_url', 'tmdb_id'],
+    category: ['name', 'description']
+};
+
+const clients = new Set();
+const replay = [];
+let heartbeat = null;
+
+const stats = {
+    published: 0,
+    received: 0,
+    dropped: 0,
+    rejected: 0
+};
+
+/**
+ * The feed columns of a row; with `keys` (the fields a request sent) only
+ * those, plus version and updated_at so clients can order what they hold
+ * @param {string} entity - Key of FEED_FIELDS
+ * @param {Object} row - Plain row or model instance
+ * @param {string[]} [keys]
+ * @returns {Object}
+ */
+export function changedFields(entity, row, keys = null) {
+    const plain = typeof row?.get === 'function' ? row.get({ plain: true }) : row;
+    return Object.fromEntries(FEED_FIELDS[entity]
+        .filter(field => plain[field] !== undefined
+            && (!keys || keys.includes(field) || field === 'version' || field === 'updated_at'))
+        .map(field => [field, plain[field]]));
+}
+
+/**
+ * changedFields() of a recipe, with { id, username } as author when
+ * user_id is among them: list rows show it and a client reading the
+ * recipe back could hit a replica that does not have it yet. Without
+ * the author (lookup failed) clients fetch the row as before.
+ * @param {Object} row - Plain row or model instance
+ * @param {string[]} [keys]
+ * @returns {Promise<Object>}
+ */
+export async function recipeChangedFields(row, keys = null) {
+    const data = changedFields('recipe', row, keys);
+    if (data.user_id === undefined) {
+        return data;
+    }
+    try {
+        const [author] = await db.sequelize.query('SELECT id, username FROM users WHERE id = :id', {
+            replacements: { id: data.user_id },
+            type: QueryTypes.SELECT
+        });
+        data.author = author ?? null;
+    } catch (error) {
+        console.warn(`[change-feed] author of recipe ${row.id} not loaded: ${error.message}`);
+    }
+    return data;
+}
+
+/**
+ * Event payload within the NOTIFY limit: without data when the diff is too
+ * big (clients fetch the rows), as a list reload when even the ids are
+ */
+function encodeChange(entity, action, ids, data) {
+    const fits = payload => Buffer.byteLength(payload) <= MAX_PAYLOAD_BYTES;
+    const full = JSON.stringify({ entity, action, ids, data });
+    if (fits(full)) {
+        return full;
+    }
+    const bare = JSON.stringify({ entity, action, ids });
+    return fits(bare) ? bare : JSON.stringify({ entity, action: 'refreshed', ids: [] });
+}
+
+/**
+ * Announce a change to the /events clients of every replica. Never
+ * throws: a lost event leaves clients stale until their next load.
+ * @param {string} entity - 'recipe', 'media' or 'category'
+ * @param {string} action - 'created', 'updated', 'deleted', or 'refreshed'
+ *                          when too many rows changed to list (reload)
+ * @param {number[]} [ids]
+ * @param {Object} [data] - changedFields() shared by those rows
+ */
+export async function publishChange(entity, action, ids = [], data = undefined) {
+    try {
+        await db.sequelize.query(`SELECT pg_notify('${CHANNEL}', nextval('change_feed_seq')::text || ' ' || :payload)`, {
+            replacements: { payload: encodeChange(entity, action, ids, data) }
+        });
+        stats.published++;
+    } catch (error) {
+        console.warn(`[change-feed] ${entity} ${action} not published: ${error.message}`);
+    }
+}
+
+/**
+ * publishChange() for handlers that already answered: nothing is awaited
+ * and nothing thrown back into them, where a catch would try to send a
+ * second response. buildData runs here, failures are logged.
+ * @param {string} entity
+ * @param {string} action
+ * @param {number[]} ids
+ * @param {Function} [buildData] - () => data, or a promise of it
+ */
+export function publishInBackground(entity, action, ids, buildData = null) {
+    Promise.resolve()
+        .then(() => buildData?.())
+        .then(data => publishChange(entity, action, ids, data))
+        .catch(error => console.warn(`[change-feed] ${entity} ${action} not published: ${error.message}`));
+}
+
+function removeClient(client) {
+    clients.delete(client);
+    if (clients.size === 0 && heartbeat) {
+        clearInterval(heartbeat);
+        heartbeat = null;
+    }
+}
+
+// A client that cannot keep up is disconnected rather than buffered
+// without bound; it reconnects and catches up from the replay buffer
+function drop(client) {
+    removeClient(client);
+    stats.dropped++;
+    client.res.destroy();
+}
+
+function flush(client) {
+    const queued = client.queue;
+    client.queue = null;
+    for (const [index, frame] of queued.entries()) {
+        if (!client.res.write(frame)) {
+            client.queue = queued.slice(index + 1);
+            client.res.once('drain', () => flush(client));
+            return;
+        }
+    }
+}
+
+function send(client, frame) {
+    if (client.queue) {
+        client.queue.push(frame);
+        if (client.queue.length > MAX_QUEUED) {
+            drop(client);
+        }
+        return;
+    }
+    // The frame is buffered either way; wait for drain before writing more
+    if (!client.res.write(frame)) {
+        client.queue = [];
+        client.res.once('drain', () => flush(client));
+    }
+}
+
+function broadcast(frame) {
+    for (const client of clients) {
+        send(client, frame);
+    }
+}
+
+function receive(payload) {
+    // Listener reconnected: what was sent meanwhile is lost, so is resuming
+    if (payload === null) {
+        replay.length = 0;
+        broadcast(RESET_FRAME);
+        return;
+    }
+    const space = payload.indexOf(' ');
+    const id = payload.slice(0, space);
+    const frame = `id: ${id}\nevent: change\ndata: ${payload.slice(space + 1)}\n\n`;
+    stats.received++;
+    replay.push({ id, frame });
+    if (replay.length > REPLAY_SIZE) {
+        replay.shift();
+    }
+    broadcast(frame);
+}
+
+/**
+ * Start streaming to a response: sends the headers, then what was missed
+ * after lastEventId, or a `reset` event when that id is no longer buffered
+ * @param {import('express').Response} res
+ * @param {string} [lastEventId]
+ * @returns {Object|null} - The client, or null at MAX_CLIENTS (nothing sent)
+ */
+export function openEventStream(res, lastEventId = null) {
+    if (clients.size >= MAX_CLIENTS) {
+        stats.rejected++;
+        return null;
+    }
+
+    res.status(200).set(SSE_HEADERS);
+    res.flushHeaders();
+
+    const client = { res, queue: null };
+    clients.add(client);
+    send(client, `retry: ${RETRY_MS}\n\n`);
+
+    if (lastEventId) {
+        const index = replay.findIndex(event => event.id === String(lastEventId));
+        if (index === -1) {
+            send(client, RESET_FRAME);
+        } else {
+            replay.slice(index + 1).forEach(event => send(client, event.frame));
+        }
+    }
+
+    // Comments keep proxies from closing idle streams and expose dead sockets
+    heartbeat ??= setInterval(() => broadcast(HEARTBEAT_FRAME), HEARTBEAT_MS);
+    heartbeat.unref?.();
+    return client;
+}
+
+/**
+ * Forget a client whose connection closed
+ * @param {Object} client - From openEventStream
+ */
+export function closeEventStream(client) {
+    removeClient(client);
+}
+
+/**
+ * Subscribe this process to the change_feed channel
+ */
+export async function startChangeFeed() {
+    await listen(CHANNEL, receive);
+}
+
+/**
+ * End every stream (shutdown); clients reconnect elsewhere with Last-Event-ID
+ */
+export function stopChangeFeed() {
+    for (const client of clients) {
+        removeClient(client);
+        client.res.end();
+    }
+}
+
+export function getChangeFeedStats() {
+    return {
+        clients: clients.size,
+        max_clients: MAX_CLIENTS,
+        buffered: replay.length,
+        last_event_id: replay.at(-1)?.id ?? null,
+        ...stats
+    };
+}
+
+export default {
+    publishChange,
+    publishInBackground,
+    changedFields,
+    recipeChangedFields,
+    openEventStream,
+    closeEventStream,
+    startChangeFeed,
+    stopChangeFeed,
+    getChangeFeedStats
+};
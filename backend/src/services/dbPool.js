@@ -0,0 +1,136 @@
+/**
+ * DB Pool - Connection pool saturation and acquire wait-time metrics
+ *
+ * Wraps the Sequelize connection manager so every connection checkout is
+ * timed, labelled with the pool it came from (primary or replica), and
+ * exports the same numbers to /metrics.
+ */
+
+import { performance } from 'perf_hooks';
+import { QueryTypes } from 'sequelize';
+import { registry } from './metrics.js';
+
+const emptyTimings = () => ({
+    acquired: 0,
+    timeouts: 0,
+    waited: 0,
+    wait_ms_total: 0,
+    wait_ms_max: 0
+});
+
+const timings = {
+    primary: emptyTimings(),
+    replica: emptyTimings()
+};
+
+let instrumented = null;
+
+const acquireDuration = registry.histogram({
+    name: 'db_pool_acquire_duration_seconds',
+    help: 'Time spent waiting for a pooled database connection',
+    labelNames: ['pool'],
+    buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10]
+});
+
+const acquireTimeouts = registry.counter({
+    name: 'db_pool_acquire_timeouts_total',
+    help: 'Connection checkouts that hit the pool acquire timeout',
+    labelNames: ['pool']
+});
+
+// Checkouts slower than this counted as having waited for a free connection
+const WAIT_THRESHOLD_MS = 1;
+
+const poolFor = (sequelize, options = {}) => {
+    const usesReplica = Boolean(sequelize.options.replication)
+        && options.type === QueryTypes.SELECT
+        && !options.useMaster;
+    return usesReplica ? 'replica' : 'primary';
+};
+
+/**
+ * Start timing connection checkouts of a Sequelize instance
+ * @param {Object} sequelize
+ */
+export function instrumentPool(sequelize) {
+    if (instrumented === sequelize) {
+        return;
+    }
+    instrumented = sequelize;
+
+    if (!registry.get('db_pool_connections')) {
+        registry.gauge({
+            name: 'db_pool_connections',
+            help: 'Pooled database connections by state',
+            labelNames: ['pool', 'state'],
+            collect(gauge) {
+                for (const [pool, stats] of Object.entries(getPoolStats(instrumented))) {
+                    gauge.set({ pool, state: 'in_use' }, stats.in_use);
+                    gauge.set({ pool, state: 'idle' }, stats.idle);
+                    gauge.set({ pool, state: 'waiting' }, stats.waiting);
+                    gauge.set({ pool, state: 'max' }, stats.max);
+                }
+            }
+        });
+    }
+
+    const connectionManager = sequelize.connectionManager;
+    const getConnection = connectionManager.getConnection.bind(connectionManager);
+
+    connectionManager.getConnection = async (options) => {
+        const pool = poolFor(sequelize, options);
+        const stats = timings[pool];
+        const start = performance.now();
+        try {
+            const connection = await getConnection(options);
+            const elapsed = performance.now() - start;
+            acquireDuration.observe({ pool }, elapsed / 1000);
+            stats.acquired++;
+            stats.wait_ms_total += elapsed;
+            stats.wait_ms_max = Math.max(stats.wait_ms_max, elapsed);
+            if (elapsed >= WAIT_THRESHOLD_MS) {
+                stats.waited++;
+            }
+            return connection;
+        } catch (error) {
+            if (error.name === 'SequelizeConnectionAcquireTimeoutError') {
+                stats.timeouts++;
+                acquireTimeouts.inc({ pool });
+            }
+            throw error;
+        }
+    };
+}
+
+const describePool = (pool, stats) => ({
+    max: pool.maxSize,
+    min: pool.minSize,
+    size: pool.size,
+    in_use: pool.using,
+    idle: pool.available,
+    waiting: pool.waiting,
+    saturation: pool.maxSize ? pool.using / pool.maxSize : 0,
+    ...stats,
+    wait_ms_avg: stats.acquired === 0 ? 0 : stats.wait_ms_total / stats.acquired
+});
+
+/**
+ * Current pool occupancy and cumulative checkout timings
+ * @param {Object} sequelize
+ * @returns {Object} - { primary, replica? }
+ */
+export function getPoolStats(sequelize) {
+    const pool = sequelize.connectionManager.pool;
+    if (!pool.read) {
+        return { primary: describePool(pool, timings.primary) };
+    }
+    return {
+        primary: describePool(pool.write, timings.primary),
+        replica: describePool(pool.read, timings.replica)
+    };
+}
+
+export default {
+    instrumentPool,
+    getPoolStats
+};
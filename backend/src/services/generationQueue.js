@@ -0,0 +1,217 @@
+/**
+ * Generation Queue - Background AI recipe generation backed by generation_jobs
+ *
+ * Workers claim jobs with FOR UPDATE SKIP LOCKED, so every replica can run
+ * a worker against the same table without an external broker.
+ */
+
+import os from 'os';
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { generateRecipeFromMovie } from './mistralService.js';
+import { TokenBucket } from '../utils/tokenBucket.js';
+import { backoffDelay, isRetryableError } from '../utils/retry.js';
+
+const { GenerationJob } = db;
+
+const CONCURRENCY = Number.parseInt(process.env.GENERATION_CONCURRENCY, 10) || 2;
+const RATE_PER_MINUTE = Number.parseInt(process.env.GENERATION_RATE_PER_MINUTE, 10) || 20;
+const MAX_ATTEMPTS = Number.parseInt(process.env.GENERATION_MAX_ATTEMPTS, 10) || 5;
+const TIMEOUT_MS = Number.parseInt(process.env.GENERATION_TIMEOUT_MS, 10) || 60 * 1000;
+const POLL_INTERVAL_MS = 1000;
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+
+// Running jobs whose worker died (lock older than 5 minutes) are picked up again
+const CLAIM_JOB = `
+    UPDATE generation_jobs
+    SET status = 'running', attempts = attempts + 1,
+        locked_at = NOW(), locked_by = :workerId, updated_at = NOW()
+    WHERE id = (
+        SELECT id FROM generation_jobs
+        WHERE (status = 'queued' AND run_at <= NOW())
+           OR (status = 'running' AND locked_at < NOW() - INTERVAL '5 minutes')
+        ORDER BY run_at, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, payload, attempts, max_attempts`;
+
+const bucket = new TokenBucket({ capacity: CONCURRENCY, refillPerSecond: RATE_PER_MINUTE / 60 });
+
+let running = false;
+let filling = false;
+let active = 0;
+let timer = null;
+
+/**
+ * Shape of a job as returned by the API
+ * @param {Object} job - GenerationJob instance
+ * @returns {Object}
+ */
+export function toJobStatus(job) {
+    return {
+        id: job.id,
+        status: job.status,
+        attempts: job.attempts,
+        max_attempts: job.max_attempts,
+        run_at: job.run_at,
+        result: job.result,
+        error: job.error,
+        created_at: job.created_at,
+        updated_at: job.updated_at
+    };
+}
+
+/**
+ * Queue a recipe generation for a movie
+ * @param {number} userId - Requesting user
+ * @param {Object} movie - { title, year, type, overview, tmdb_id }
+ * @returns {Promise<Object>} - Created GenerationJob
+ */
+export async function enqueueGeneration(userId, movie) {
+    const job = await GenerationJob.create({
+        user_id: userId,
+        payload: { movie },
+        max_attempts: MAX_ATTEMPTS
+    });
+    schedule(0);
+    return job;
+}
+
+function withTimeout(promise, ms) {
+    let timeoutId;
+    const timeout = new Promise((resolve, reject) => {
+        timeoutId = setTimeout(() => {
+            const error = new Error(`Generation timed out after ${ms}ms`);
+            error.name = 'TimeoutError';
+            reject(error);
+        }, ms);
+    });
+    return Promise.race([promise, timeout]).finally(() => clearTimeout(timeoutId));
+}
+
+async function claimJob() {
+    const [job] = await db.sequelize.query(CLAIM_JOB, {
+        replacements: { workerId: WORKER_ID },
+        type: QueryTypes.SELECT
+    });
+    return job;
+}
+
+/**
+ * Save the outcome of a claim while this worker still holds it: past the
+ * 5 minute lock another worker may have claimed the job again, and its
+ * attempt (attempts counts claims) owns the row from then on
+ * @returns {Promise<boolean>} - false when the claim was lost
+ */
+async function finishJob(job, update) {
+    const [updated] = await GenerationJob.update(
+        { ...update, locked_at: null, locked_by: null },
+        { where: { id: job.id, status: 'running', locked_by: WORKER_ID, attempts: job.attempts } }
+    );
+    if (updated === 0) {
+        console.warn(`Generation job ${job.id}: claim lost, attempt ${job.attempts} discarded`);
+    }
+    return updated > 0;
+}
+
+async function runJob(job) {
+    // The Mistral call itself is shared with identical generations and
+    // runs on; bounded by the client's own timeouts
+    try {
+        const result = await withTimeout(generateRecipeFromMovie(job.payload.movie), TIMEOUT_MS);
+        await finishJob(job, { status: 'succeeded', result, error: null });
+    } catch (error) {
+        const update = { error: error.message };
+        if (isRetryableError(error) && job.attempts < job.max_attempts) {
+            update.status = 'queued';
+            update.run_at = new Date(Date.now() + backoffDelay(job.attempts, { baseMs: 2000 }));
+        } else {
+            update.status = 'failed';
+        }
+        await finishJob(job, update);
+    }
+}
+
+/**
+ * Claim jobs while below the concurrency cap and the rate limit allows
+ */
+async function fill() {
+    if (filling) {
+        return;
+    }
+    filling = true;
+    try {
+        while (running && active < CONCURRENCY && bucket.waitTime() === 0) {
+            const job = await claimJob();
+            if (!job) {
+                break;
+            }
+            bucket.tryTake();
+            active++;
+            runJob(job)
+                .catch(error => console.error(`Generation job ${job.id} could not be saved:`, error.message))
+                .finally(() => {
+                    active--;
+                    schedule(0);
+                });
+        }
+    } finally {
+        filling = false;
+    }
+}
+
+function schedule(delay) {
+    if (!running) {
+        return;
+    }
+    clearTimeout(timer);
+    timer = setTimeout(tick, Math.max(delay, bucket.waitTime()));
+    timer.unref();
+}
+
+async function tick() {
+    try {
+        await fill();
+    } catch (error) {
+        console.error('Generation worker error:', error.message);
+    }
+    schedule(POLL_INTERVAL_MS);
+}
+
+/**
+ * Start consuming the queue in this process
+ */
+export function startGenerationWorker() {
+    running = true;
+    schedule(0);
+}
+
+/**
+ * Stop claiming new jobs; jobs already running finish on their own
+ */
+export function stopGenerationWorker() {
+    running = false;
+    clearTimeout(timer);
+}
+
+/**
+ * Worker state for monitoring
+ */
+export function getGenerationWorkerStats() {
+    return {
+        worker_id: WORKER_ID,
+        running,
+        active,
+        concurrency: CONCURRENCY,
+        rate_per_minute: RATE_PER_MINUTE
+    };
+}
+
+export default {
+    enqueueGeneration,
+    startGenerationWorker,
+    stopGenerationWorker,
+    getGenerationWorkerStats,
+    toJobStatus
+};
@@ -0,0 +1,329 @@
+/**
+ * HTTP Client - Shared outbound client for upstream APIs (TMDB, Mistral)
+ *
+ * Each client keeps a keep-alive socket pool per origin, enforces connect,
+ * headers and body (idle) timeouts, follows the caller's AbortSignal,
+ * retries idempotent calls with jittered backoff and trips a circuit
+ * breaker when the upstream keeps failing.
+ *
+ * Responses expose the subset of the fetch Response API the services use:
+ * status, ok, headers, json(), text() and an async-iterable body.
+ */
+
+import http from 'http';
+import https from 'https';
+import { CircuitBreaker } from '../utils/circuitBreaker.js';
+import { backoffDelay, isRetryableError } from '../utils/retry.js';
+import { registry, outboundRequestDuration } from './metrics.js';
+
+const clients = new Map();
+
+const retriesTotal = registry.counter({
+    name: 'outbound_retries_total',
+    help: 'Retried outbound calls',
+    labelNames: ['service']
+});
+
+const CIRCUIT_STATES = { closed: 0, half_open: 1, open: 2 };
+
+registry.gauge({
+    name: 'outbound_circuit_state',
+    help: 'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)',
+    labelNames: ['service'],
+    collect(gauge) {
+        for (const client of clients.values()) {
+            gauge.set({ service: client.name }, CIRCUIT_STATES[client.breaker.state]);
+        }
+    }
+});
+
+registry.gauge({
+    name: 'outbound_sockets',
+    help: 'Outbound keep-alive sockets per upstream',
+    labelNames: ['service', 'state'],
+    collect(gauge) {
+        for (const client of clients.values()) {
+            const totals = client.poolTotals();
+            gauge.set({ service: client.name, state: 'active' }, totals.active);
+            gauge.set({ service: client.name, state: 'idle' }, totals.idle);
+            gauge.set({ service: client.name, state: 'pending' }, totals.pending);
+        }
+    }
+});
+
+const timeoutError = (phase, ms) => {
+    const error = new Error(`Upstream ${phase} timeout after ${ms}ms`);
+    error.name = 'TimeoutError';
+    error.phase = phase;
+    return error;
+};
+
+const sleep = (ms, signal) => new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener('abort', () => {
+        clearTimeout(timer);
+        reject(signal.reason);
+    }, { once: true });
+});
+
+const countEntries = (group) => Object.values(group).reduce((sum, list) => sum + list.length, 0);
+
+/**
+ * Settle with promise, or reject as soon as signal aborts. The underlying
+ * work keeps running, so loads shared through a cache are not cancelled
+ * by one caller going away.
+ * @param {Promise} promise
+ * @param {AbortSignal} [signal]
+ * @returns {Promise}
+ */
+export function withSignal(promise, signal) {
+    if (!signal) {
+        return promise;
+    }
+    if (signal.aborted) {
+        return Promise.reject(signal.reason);
+    }
+    return new Promise((resolve, reject) => {
+        const onAbort = () => reject(signal.reason);
+        signal.addEventListener('abort', onAbort, { once: true });
+        promise.then(resolve, reject).finally(() => signal.removeEventListener('abort', onAbort));
+    });
+}
+
+class HttpResponse {
+    constructor(message) {
+        this.status = message.statusCode;
+        this.ok = this.status >= 200 && this.status < 300;
+        this.headers = message.headers;
+        this.body = message;
+    }
+
+    async text() {
+        const chunks = [];
+        for await (const chunk of this.body) {
+            chunks.push(chunk);
+        }
+        return Buffer.concat(chunks).toString('utf8');
+    }
+
+    async json() {
+        return JSON.parse(await this.text());
+    }
+
+    // Free the socket when the body is not needed
+    discard() {
+        this.body.resume();
+    }
+}
+
+export class HttpClient {
+    /**
+     * @param {Object} options
+     * @param {string} options.name - Upstream name (metrics label)
+     * @param {number} [options.maxSockets] - Concurrent sockets per origin
+     * @param {number} [options.idleSocketMs] - Idle keep-alive sockets are closed after this
+     * @param {number} [options.connectTimeoutMs]
+     * @param {number} [options.headersTimeoutMs] - Until the response status line
+     * @param {number} [options.bodyTimeoutMs] - Longest silence while reading the body
+     * @param {number} [options.retries] - Extra attempts for idempotent calls
+     * @param {number} [options.retryBaseMs] - Backoff scale
+     * @param {Object} [options.breaker] - CircuitBreaker options
+     * @param {Function} [options.lookup] - DNS lookup for new sockets (dns.lookup signature)
+     */
+    constructor({
+        name,
+        maxSockets = 16,
+        idleSocketMs = 30 * 1000,
+        connectTimeoutMs = 3000,
+        headersTimeoutMs = 10 * 1000,
+        bodyTimeoutMs = 30 * 1000,
+        retries = 2,
+        retryBaseMs = 200,
+        breaker = {},
+        lookup
+    }) {
+        this.name = name;
+        this.maxSockets = maxSockets;
+        this.idleSocketMs = idleSocketMs;
+        this.connectTimeoutMs = connectTimeoutMs;
+        this.headersTimeoutMs = headersTimeoutMs;
+        this.bodyTimeoutMs = bodyTimeoutMs;
+        this.retries = retries;
+        this.retryBaseMs = retryBaseMs;
+        this.breaker = new CircuitBreaker({ name, ...breaker });
+        this.lookup = lookup;
+        this.agents = new Map();
+        this.counters = { requests: 0, retries: 0, timeouts: 0, errors: 0 };
+        clients.set(name, this);
+    }
+
+    agentFor(url) {
+        let agent = this.agents.get(url.origin);
+        if (!agent) {
+            const Agent = url.protocol === 'https:' ? https.Agent : http.Agent;
+            agent = new Agent({
+                keepAlive: true,
+                maxSockets: this.maxSockets,
+                maxFreeSockets: this.maxSockets,
+                timeout: this.idleSocketMs,
+                scheduling: 'lifo',
+                ...(this.lookup ? { lookup: this.lookup } : {})
+            });
+            this.agents.set(url.origin, agent);
+        }
+        return agent;
+    }
+
+    /**
+     * Perform a request
+     * @param {string|URL} url
+     * @param {Object} [options]
+     * @param {string} [options.method]
+     * @param {Object} [options.headers]
+     * @param {string|Buffer} [options.body]
+     * @param {AbortSignal} [options.signal] - Caller cancellation
+     * @param {string} [options.operation] - Metrics label
+     * @param {boolean} [options.idempotent] - Retry on failure (defaults to GET/HEAD)
+     * @returns {Promise<HttpResponse>} - Non-2xx responses resolve, like fetch
+     */
+    async request(url, {
+        method = 'GET',
+        headers = {},
+        body,
+        signal,
+        operation = 'request',
+        idempotent = method === 'GET' || method === 'HEAD'
+    } = {}) {
+        const target = new URL(url);
+        const attempts = idempotent ? this.retries + 1 : 1;
+
+        for (let attempt = 1; ; attempt++) {
+            this.breaker.assertClosed();
+            this.counters.requests++;
+            const end = outboundRequestDuration.startTimer({ service: this.name, operation });
+
+            let response;
+            try {
+                response = await this.send(target, { method, headers, body, signal });
+            } catch (error) {
+                if (signal?.aborted) {
+                    end({ status_code: 'aborted' });
+                    this.breaker.release();
+                    // Surface the caller's reason (e.g. TimeoutError from AbortSignal.timeout)
+                    throw signal.reason ?? error;
+                }
+                const timedOut = error.name === 'TimeoutError';
+                this.counters[timedOut ? 'timeouts' : 'errors']++;
+                end({ status_code: timedOut ? 'timeout' : 'error' });
+                this.breaker.onFailure();
+                if (attempt < attempts && isRetryableError(error)) {
+                    await this.pause(attempt, null, signal);
+                    continue;
+                }
+                throw error;
+            }
+
+            end({ status_code: response.status });
+            if (response.status >= 500) {
+                this.breaker.onFailure();
+            } else {
+                this.breaker.onSuccess();
+            }
+
+            if (attempt < attempts && isRetryableError({ status: response.status })) {
+                response.discard();
+                await this.pause(attempt, response, signal);
+                continue;
+            }
+            return response;
+        }
+    }
+
+    async pause(attempt, response, signal) {
+        this.counters.retries++;
+        retriesTotal.inc({ service: this.name });
+        // Honour a short Retry-After (seconds) from 429/503 answers
+        const retryAfter = Number.parseInt(response?.headers['retry-after'], 10);
+        const delay = retryAfter > 0 && retryAfter <= 10
+            ? retryAfter * 1000
+            : backoffDelay(attempt, { baseMs: this.retryBaseMs, maxMs: 5000 });
+        await sleep(delay, signal);
+    }
+
+    send(url, { method, headers, body, signal }) {
+        const transport = url.protocol === 'https:' ? https : http;
+
+        return new Promise((resolve, reject) => {
+            const req = transport.request(url, {
+                method,
+                headers,
+                agent: this.agentFor(url),
+                signal
+            });
+
+            const headersTimer = setTimeout(() => {
+                req.destroy(timeoutError('headers', this.headersTimeoutMs));
+            }, this.headersTimeoutMs);
+
+            // Reused keep-alive sockets are already connected
+            req.once('socket', (socket) => {
+                if (!socket.connecting) {
+                    return;
+                }
+                const connectTimer = setTimeout(() => {
+                    req.destroy(timeoutError('connect', this.connectTimeoutMs));
+                }, this.connectTimeoutMs);
+                socket.once('connect', () => clearTimeout(connectTimer));
+                req.once('close', () => clearTimeout(connectTimer));
+            });
+
+            req.once('response', (message) => {
+                clearTimeout(headersTimer);
+                message.setTimeout(this.bodyTimeoutMs, () => {
+                    message.destroy(timeoutError('body', this.bodyTimeoutMs));
+                });
+                resolve(new HttpResponse(message));
+            });
+
+            req.once('error', (error) => {
+                clearTimeout(headersTimer);
+                reject(error);
+            });
+
+            req.end(body);
+        });
+    }
+
+    poolTotals() {
+        let active = 0;
+        let idle = 0;
+        let pending = 0;
+        for (const agent of this.agents.values()) {
+            active += countEntries(agent.sockets);
+            idle += countEntries(agent.freeSockets);
+            pending += countEntries(agent.requests);
+        }
+        return { active, idle, pending };
+    }
+
+    stats() {
+        return {
+            name: this.name,
+            breaker: this.breaker.stats(),
+            pool: {
+                origins: [...this.agents.keys()],
+                max_sockets_per_origin: this.maxSockets,
+                ...this.poolTotals()
+            },
+            ...this.counters
+        };
+    }
+}
+
+/**
+ * Breaker and pool state of every outbound client
+ * @returns {Array<Object>}
+ */
+export const getHttpClientStats = () => [...clients.values()].map(client => client.stats());
+
+export default HttpClient;
@@ -0,0 +1,308 @@
+/**
+ * Image Proxy - Resized, cached variants of poster and recipe images
+ *
+ * GET /img?url=...&w=320 answers a variant of a remote image at one of a
+ * few fixed widths, in the best format the browser accepts (AVIF, then
+ * WebP). Variants live in a size-bounded disk cache keyed by source URL,
+ * width and format; concurrent misses for a variant share one render and
+ * concurrent renders of the same source share one download.
+ *
+ * Transcoding uses `sharp` when it is installed. Without it the proxy
+ * caches and serves the original bytes once per source URL, whatever the
+ * width, and TMDB posters are requested at the nearest TMDB size instead
+ * of w500.
+ *
+ * The proxy is not an open fetcher: sources must be on the TMDB image
+ * host, a host listed in IMAGE_PROXY_HOSTS or a host recipe and media
+ * image_url values already point to. Names resolving to loopback,
+ * private, link-local, multicast or reserved addresses are refused.
+ */
+
+import dns from 'dns';
+import net from 'net';
+import path from 'path';
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { Cache } from '../utils/cache.js';
+import { DiskCache, cacheKey } from '../utils/diskCache.js';
+import { READ_REPLICA } from '../utils/replica.js';
+import { HttpClient } from './httpClient.js';
+
+export const IMAGE_WIDTHS = [160, 320, 480, 640, 960];
+const TMDB_SIZES = [92, 154, 185, 342, 500, 780];
+const TMDB_IMAGE_HOST = 'image.tmdb.org';
+const TMDB_IMAGE_PATH = /^\/t\/p\/(w\d+|original)\//;
+
+const MAX_SOURCE_BYTES = Number.parseInt(process.env.IMAGE_PROXY_MAX_SOURCE_BYTES, 10) || 10 * 1024 * 1024;
+const CACHE_DIR = process.env.IMAGE_CACHE_DIR || path.resolve('.cache', 'images');
+const CACHE_MAX_BYTES = (Number.parseInt(process.env.IMAGE_CACHE_MAX_MB, 10) || 512) * 1024 * 1024;
+const EXTRA_HOSTS = new Set((process.env.IMAGE_PROXY_HOSTS || '')
+    .split(',')
+    .map(host => host.trim().toLowerCase())
+    .filter(Boolean));
+
+const ENCODERS = {
+    avif: image => image.avif({ quality: 50, effort: 4 }),
+    webp: image => image.webp({ quality: 75 })
+};
+
+const SOURCE_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+    'image/avif': 'avif',
+    'image/gif': 'gif'
+};
+const EXTENSION_TYPES = Object.fromEntries(Object.entries(SOURCE_TYPES).map(([type, ext]) => [ext, type]));
+
+const blockedAddresses = new net.BlockList();
+for (const [network, prefix] of [
+    ['0.0.0.0', 8], ['10.0.0.0', 8], ['100.64.0.0', 10], ['127.0.0.0', 8],
+    ['169.254.0.0', 16], ['172.16.0.0', 12], ['192.168.0.0', 16], ['198.18.0.0', 15],
+    ['224.0.0.0', 4], ['240.0.0.0', 4]
+]) {
+    blockedAddresses.addSubnet(network, prefix, 'ipv4');
+}
+// IPv4-mapped addresses (::ffff:a.b.c.d) are checked against the IPv4
+// subnets above; listing ::ffff:0:0/96 would block every IPv4 address.
+// NAT64 and 6to4 prefixes embed an IPv4 address, possibly a private one.
+for (const [network, prefix] of [
+    ['::', 128], ['::1', 128], ['64:ff9b::', 96], ['2002::', 16], ['fc00::', 7], ['fe80::', 10]
+]) {
+    blockedAddresses.addSubnet(network, prefix, 'ipv6');
+}
+
+const isBlocked = (address, family) => blockedAddresses.check(address, family === 6 || family === 'IPv6' ? 'ipv6' : 'ipv4');
+
+/**
+ * dns.lookup that refuses private destinations
+ */
+function publicLookup(hostname, options, callback) {
+    dns.lookup(hostname, options, (error, address, family) => {
+        if (error) {
+            return callback(error);
+        }
+        const addresses = Array.isArray(address) ? address : [{ address, family }];
+        if (addresses.some(entry => isBlocked(entry.address, entry.family))) {
+            return callback(new ImageProxyError(`${hostname} resolves to a private address`, 400));
+        }
+        callback(null, address, family);
+    });
+}
+
+const clientOptions = {
+    maxSockets: 8,
+    connectTimeoutMs: 3000,
+    headersTimeoutMs: 5000,
+    bodyTimeoutMs: 10 * 1000,
+    retries: 1,
+    lookup: publicLookup
+};
+
+// TMDB gets its own breaker; recipe images come from any host, where one
+// dead site must not trip the breaker for every other
+const tmdbImageClient = new HttpClient({ name: 'tmdb_images', ...clientOptions });
+const imageClient = new HttpClient({
+    name: 'images',
+    ...clientOptions,
+    breaker: { failureThreshold: Number.MAX_SAFE_INTEGER }
+});
+
+// Downloaded originals, kept briefly so the variants of one source
+// rendered in the same page load share a single download; at most
+// 8 x IMAGE_PROXY_MAX_SOURCE_BYTES of buffers, used only when transcoding
+const sources = new Cache({ name: 'image_sources', maxEntries: 8, ttlMs: 60 * 1000 });
+const variants = new DiskCache({ dir: CACHE_DIR, maxBytes: CACHE_MAX_BYTES });
+
+// Hosts of the stored image URLs, reloaded in the background every few
+// minutes: a recipe with an image on a new host gets proxied after that
+const imageHosts = new Cache({ name: 'image_hosts', maxEntries: 1, ttlMs: 5 * 60 * 1000, staleMs: 60 * 60 * 1000 });
+
+let sharpModule;
+
+export class ImageProxyError extends Error {
+    constructor(message, status = 502) {
+        super(message);
+        this.name = 'ImageProxyError';
+        this.status = status;
+    }
+}
+
+async function loadSharp() {
+    if (sharpModule === undefined) {
+        try {
+            sharpModule = (await import('sharp')).default;
+        } catch {
+            console.warn('[img] sharp is not installed: serving original images without resizing');
+            sharpModule = null;
+        }
+    }
+    return sharpModule;
+}
+
+/**
+ * Smallest supported width covering the request
+ * @param {number} width
+ * @returns {number}
+ */
+export function pickWidth(width) {
+    return IMAGE_WIDTHS.find(candidate => candidate >= width) ?? IMAGE_WIDTHS.at(-1);
+}
+
+/**
+ * Output format from the Accept header
+ * @param {string} accept
+ * @returns {string} - 'avif' or 'webp'
+ */
+export function negotiateFormat(accept = '') {
+    return /image\/avif/.test(accept) ? 'avif' : 'webp';
+}
+
+/**
+ * Parse and check the url parameter
+ * @param {string} raw
+ * @returns {URL}
+ */
+export function parseSourceUrl(raw) {
+    let url;
+    try {
+        url = new URL(raw);
+    } catch {
+        throw new ImageProxyError('url must be an absolute http(s) URL', 400);
+    }
+    if (url.protocol !== 'http:' && url.protocol !== 'https:') {
+        throw new ImageProxyError('url must be an absolute http(s) URL', 400);
+    }
+    if (net.isIP(url.hostname.replace(/^\[|\]$/g, ''))) {
+        const address = url.hostname.replace(/^\[|\]$/g, '');
+        if (isBlocked(address, net.isIP(address))) {
+            throw new ImageProxyError('url points to a private address', 400);
+        }
+    }
+    return url;
+}
+
+async function loadImageHosts() {
+    const rows = await db.sequelize.query(`
+        SELECT DISTINCT lower(substring(image_url FROM '^https?://([^/:?#]+)')) AS host
+        FROM (SELECT image_url FROM recipes UNION SELECT image_url FROM media) AS images
+        WHERE image_url ~* '^https?://'
+    `, { ...READ_REPLICA, type: QueryTypes.SELECT });
+    return new Set(rows.map(row => row.host));
+}
+
+/**
+ * Whether images may be fetched from this host
+ * @param {string} hostname
+ * @returns {Promise<boolean>}
+ */
+export async function isAllowedHost(hostname) {
+    const host = hostname.toLowerCase();
+    if (host === TMDB_IMAGE_HOST || EXTRA_HOSTS.has(host)) {
+        return true;
+    }
+    return (await imageHosts.wrap('hosts', loadImageHosts)).has(host);
+}
+
+/**
+ * Ask TMDB for the smallest poster size covering the width instead of
+ * downloading w500 or the original
+ * @param {URL} url
+ * @param {number} width
+ * @returns {URL}
+ */
+export function sourceForWidth(url, width) {
+    if (url.hostname !== TMDB_IMAGE_HOST || !TMDB_IMAGE_PATH.test(url.pathname)) {
+        return url;
+    }
+    const size = TMDB_SIZES.find(candidate => candidate >= width) ?? 'original';
+    const resized = new URL(url);
+    resized.pathname = url.pathname.replace(TMDB_IMAGE_PATH, `/t/p/${size === 'original' ? size : `w${size}`}/`);
+    return resized;
+}
+
+async function download(url) {
+    const client = url.hostname === TMDB_IMAGE_HOST ? tmdbImageClient : imageClient;
+    const response = await client.request(url, { operation: 'image' });
+    if (!response.ok) {
+        response.discard();
+        throw new ImageProxyError(`Origin answered ${response.status}`, response.status === 404 ? 404 : 502);
+    }
+
+    const type = String(response.headers['content-type'] || '').split(';')[0].trim().toLowerCase();
+    if (!SOURCE_TYPES[type]) {
+        response.discard();
+        throw new ImageProxyError(`Unsupported content type ${type || 'none'}`);
+    }
+    if (Number(response.headers['content-length']) > MAX_SOURCE_BYTES) {
+        response.discard();
+        throw new ImageProxyError('Image too large', 413);
+    }
+
+    const chunks = [];
+    let size = 0;
+    for await (const chunk of response.body) {
+        size += chunk.length;
+        if (size > MAX_SOURCE_BYTES) {
+            response.body.destroy();
+            throw new ImageProxyError('Image too large', 413);
+        }
+        chunks.push(chunk);
+    }
+    return { data: Buffer.concat(chunks), ext: SOURCE_TYPES[type] };
+}
+
+/**
+ * Cached variant of a remote image
+ * @param {string} rawUrl - Source image URL
+ * @param {Object} [options]
+ * @param {number} [options.width] - Requested CSS pixel width
+ * @param {string} [options.accept] - Request Accept header
+ * @returns {Promise<{ file: string, etag: string, size: number, contentType: string }>}
+ */
+export async function getImageVariant(rawUrl, { width = 320, accept = '' } = {}) {
+    const url = parseSourceUrl(rawUrl);
+    if (!(await isAllowedHost(url.hostname))) {
+        throw new ImageProxyError(`${url.hostname} is not an image source`, 403);
+    }
+    const sharp = await loadSharp();
+    const variantWidth = pickWidth(width);
+    const format = sharp ? negotiateFormat(accept) : 'original';
+    const source = sourceForWidth(url, variantWidth);
+
+    // Renders run to completion even if the requesting client leaves: the
+    // variant is cached for the next one. Without sharp the bytes depend on
+    // the source alone (TMDB sizes differ, other hosts have one)
+    const key = sharp ? `${url.href}|${variantWidth}|${format}` : source.href;
+    const entry = await variants.wrap(cacheKey(key), async () => {
+        if (!sharp) {
+            return download(source);
+        }
+        const original = await sources.wrap(source.href, () => download(source));
+        const image = sharp(original.data, { failOn: 'error' })
+            .rotate()
+            .resize({ width: variantWidth, withoutEnlargement: true });
+        return { data: await ENCODERS[format](image).toBuffer(), ext: format };
+    });
+
+    return {
+        file: entry.file,
+        etag: entry.etag,
+        size: entry.size,
+        contentType: EXTENSION_TYPES[entry.ext] || 'application/octet-stream'
+    };
+}
+
+/**
+ * Disk cache counters for monitoring
+ */
+export const getImageProxyStats = () => ({
+    transcoding: sharpModule === undefined ? 'not loaded' : Boolean(sharpModule),
+    widths: IMAGE_WIDTHS,
+    cache: variants.stats()
+});
+
+export default {
+    getImageVariant,
+    getImageProxyStats
+};
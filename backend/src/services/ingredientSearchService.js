@@ -0,0 +1,149 @@
+/**
+ * Ingredient Search Service - Recipes containing given ingredients
+ *
+ * Relies on the `ingredients` / `recipe_ingredients` tables maintained by
+ * the triggers of the m-create-recipe-ingredients migration: every line of
+ * `recipes.ingredients` is parsed into quantity, unit and a normalized
+ * ingredient name ("2 Tomatoes" -> 2, null, "tomato").
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+export const MAX_INGREDIENT_TERMS = 10;
+
+// A term matches the ingredients containing it as whole words, so
+// "tomato" finds "cherry tomato" but not "tomatillo". Terms are normalized
+// by the same function as ingredient names, leaving only [a-z0-9 ].
+const COVERAGE_QUERY = (columns, filters) => `
+    WITH terms AS (
+        SELECT DISTINCT normalize_ingredient(term) AS term
+        FROM unnest(ARRAY[:terms]::text[]) AS term
+    ),
+    hits AS (
+        SELECT t.term, i.id AS ingredient_id
+        FROM terms t
+        JOIN ingredients i ON i.name ~ ('\\m' || t.term || '\\M')
+        WHERE t.term <> ''
+    ),
+    ranked AS (
+        SELECT ri.recipe_id,
+               count(DISTINCT h.term)::int AS matched,
+               count(DISTINCT ri.position)::int AS covered
+        FROM hits h
+        JOIN recipe_ingredients ri ON ri.ingredient_id = h.ingredient_id
+        GROUP BY ri.recipe_id
+        HAVING count(DISTINCT h.term) >= CASE WHEN :matchAll THEN (SELECT count(*) FROM terms WHERE term <> '') ELSE 1 END
+    )
+    SELECT * FROM (
+        SELECT ${columns},
+               ranked.matched AS matched_ingredients,
+               (1000 * ranked.covered / total.lines)::int AS coverage
+        FROM ranked
+        JOIN recipes r ON r.id = ranked.recipe_id
+        CROSS JOIN LATERAL (SELECT count(*) AS lines FROM recipe_ingredients WHERE recipe_id = r.id) total
+        WHERE ${filters}
+    ) ranked_recipes
+    WHERE :after::int IS NULL OR (matched_ingredients, coverage, id) < (:afterMatched, :afterCoverage, :after)
+    ORDER BY matched_ingredients DESC, coverage DESC, id DESC
+    LIMIT :limit`;
+
+const TOTAL_TIME = 'COALESCE(r.prep_time, 0) + COALESCE(r.cook_time, 0)';
+
+/**
+ * Split the `ingredients` query parameter ("tomato, basil,,garlic")
+ * @param {string} value
+ * @returns {string[]}
+ */
+export const parseIngredientTerms = (value) => [...new Set(
+    String(value).split(',').map(term => term.trim().toLowerCase()).filter(Boolean)
+)];
+
+/**
+ * Ingredient lists arrive either as text (one ingredient per line) or, from
+ * generated recipes, as an array of strings: arrays become one "- " line
+ * per item so each item maps to exactly one structured row
+ * @param {string|string[]} value
+ * @returns {string}
+ */
+export const toIngredientText = (value) => {
+    if (!Array.isArray(value)) {
+        return value;
+    }
+    return value
+        .map(item => String(item ?? '').trim())
+        .filter(Boolean)
+        .map(item => `- ${item.replace(/^[-*•]\s*/, '')}`)
+        .join('\n');
+};
+
+/**
+ * Cursors for coverage-ranked pages wrap `(matched, coverage, id)`
+ */
+export const encodeCoverageCursor = (row) =>
+    Buffer.from(JSON.stringify([row.matched_ingredients, row.coverage, row.id])).toString('base64url');
+
+export const decodeCoverageCursor = (cursor) => {
+    try {
+        const key = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+        if (!Array.isArray(key) || key.length !== 3 || !key.every(Number.isInteger)) {
+            return null;
+        }
+        return { matched: key[0], coverage: key[1], id: key[2] };
+    } catch {
+        return null;
+    }
+};
+
+/**
+ * Recipes using the given ingredients, best coverage first: most requested
+ * ingredients found, then largest share of the recipe's own ingredient
+ * list covered by them (`coverage`, in thousandths)
+ * @param {string[]} terms - Ingredient names, as typed
+ * @param {Object} options
+ * @param {string} [options.match] - 'all' (every term required) or 'any'
+ * @param {string[]} options.fields - Recipe columns to return
+ * @param {Object} [options.filters] - category_id, media_id, user_id, difficulty, min/max_total_time
+ * @param {Object} [options.after] - Decoded cursor
+ * @param {number} options.limit
+ * @returns {Promise<Array<Object>>} - Up to limit rows, with matched_ingredients and coverage
+ */
+export async function findRecipesByIngredients(terms, { match = 'all', fields, filters = {}, after = null, limit }) {
+    const conditions = ['TRUE'];
+    const replacements = {
+        terms,
+        matchAll: match !== 'any',
+        after: after?.id ?? null,
+        afterMatched: after?.matched ?? null,
+        afterCoverage: after?.coverage ?? null,
+        limit
+    };
+
+    for (const key of ['category_id', 'media_id', 'user_id', 'difficulty']) {
+        if (filters[key] !== undefined) {
+            conditions.push(`r.${key} = :${key}`);
+            replacements[key] = filters[key];
+        }
+    }
+    if (filters.min_total_time !== undefined) {
+        conditions.push(`${TOTAL_TIME} >= :min_total_time`);
+        replacements.min_total_time = Number(filters.min_total_time);
+    }
+    if (filters.max_total_time !== undefined) {
+        conditions.push(`${TOTAL_TIME} <= :max_total_time`);
+        replacements.max_total_time = Number(filters.max_total_time);
+    }
+
+    // fields are checked against RECIPE_FIELDS by the caller
+    const columns = fields.map(field => `r.${field}`).join(', ');
+
+    // On the primary, where the route's ETag versions are read
+    return db.sequelize.query(COVERAGE_QUERY(columns, conditions.join(' AND ')), {
+        replacements,
+        type: QueryTypes.SELECT
+    });
+}
+
+export default {
+    findRecipesByIngredients
+};
@@ -0,0 +1,96 @@
+/**
+ * Loaders - Request-scoped batch loaders for related rows
+ *
+ * Replaces Sequelize `include` joins: related rows are fetched with one
+ * `WHERE id IN (...)` query per table and request, categories and media
+ * come from the in-memory reference data.
+ */
+
+import db from '../models/index.js';
+import { BatchLoader } from '../utils/batchLoader.js';
+import { getCategoryMap, getMediaMap } from './referenceData.js';
+
+const { User, Recipe } = db;
+
+export const RECIPE_SUMMARY_FIELDS = ['id', 'title', 'image_url'];
+
+const byKey = (rows, key = 'id') => new Map(rows.map(row => [row[key], row]));
+
+const pick = (map, keys) => new Map(keys.map(key => [key, map.get(key)]));
+
+/**
+ * Build a fresh set of loaders, one per request
+ * @returns {Object}
+ */
+export function createLoaders() {
+    return {
+        users: new BatchLoader(async (ids) => byKey(await User.findAll({
+            where: { id: ids },
+            attributes: { exclude: ['password_hash'] },
+            raw: true
+        }))),
+
+        categories: new BatchLoader(async (ids) => pick(await getCategoryMap(), ids)),
+
+        media: new BatchLoader(async (ids) => pick(await getMediaMap(), ids)),
+
+        // Newest first, only the columns needed for recipe cards
+        recipeSummaries: new BatchLoader(async (userIds) => {
+            const recipes = await Recipe.findAll({
+                where: { user_id: userIds },
+                attributes: [...RECIPE_SUMMARY_FIELDS, 'user_id'],
+                order: [['created_at', 'DESC'], ['id', 'DESC']],
+                raw: true
+            });
+            const grouped = new Map(userIds.map(id => [id, []]));
+            for (const { user_id, ...summary } of recipes) {
+                grouped.get(user_id).push(summary);
+            }
+            return grouped;
+        })
+    };
+}
+
+/**
+ * Attach author, category and media to plain recipe rows
+ * @param {Array<Object>} recipes - Rows with user_id, category_id and media_id
+ * @param {Object} loaders - From createLoaders()
+ * @returns {Promise<Array<Object>>}
+ */
+export async function hydrateRecipes(recipes, loaders) {
+    const [authors, categories, media] = await Promise.all([
+        loaders.users.loadMany(recipes.map(recipe => recipe.user_id)),
+        loaders.categories.loadMany(recipes.map(recipe => recipe.category_id)),
+        loaders.media.loadMany(recipes.map(recipe => recipe.media_id))
+    ]);
+
+    return recipes.map((recipe, index) => ({
+        ...recipe,
+        author: authors[index] ? { id: authors[index].id, username: authors[index].username } : null,
+        category: categories[index],
+        media: media[index]
+    }));
+}
+
+/**
+ * Public profile with recipe summaries and their count
+ * @param {number} userId
+ * @param {Object} loaders - From createLoaders()
+ * @returns {Promise<Object|null>}
+ */
+export async function loadUserProfile(userId, loaders) {
+    const [user, recipes] = await Promise.all([
+        loaders.users.load(userId),
+        loaders.recipeSummaries.load(userId)
+    ]);
+    if (!user) {
+        return null;
+    }
+    return { ...user, recipes, recipe_count: recipes.length };
+}
+
+export default {
+    createLoaders,
+    hydrateRecipes,
+    loadUserProfile
+};
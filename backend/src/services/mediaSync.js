@@ -0,0 +1,396 @@
+/**
+ * Media Sync - Background TMDB enrichment of the media table
+ *
+ * Walks media rows that were never synced or whose last sync is older
+ * than the revalidation window, in id order and in batches. Each row is
+ * matched to a TMDB id (stored id, else a search on title and year), its
+ * details are fetched through tmdbService (cached, retried, circuit
+ * broken) with bounded concurrency and a request rate cap, and image_url,
+ * release_year and tmdb_id are updated when they differ.
+ *
+ * Progress is checkpointed in sync_checkpoints after every batch, so an
+ * interrupted pass resumes where it stopped. The checkpoint row doubles as
+ * a lease: only one replica syncs at a time. A dry run reads the same rows
+ * and reports the changes it would make without writing anything.
+ */
+
+import os from 'os';
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { searchMedia, getMediaDetails } from './tmdbService.js';
+import { invalidateReferenceData } from './referenceData.js';
+import { publishChange } from './changeFeed.js';
+import { TokenBucket } from '../utils/tokenBucket.js';
+
+const { Media } = db;
+
+const CHECKPOINT = 'media_tmdb';
+const BATCH_SIZE = 50;
+const CONCURRENCY = Number.parseInt(process.env.MEDIA_SYNC_CONCURRENCY, 10) || 4;
+const RATE_PER_SECOND = Number.parseInt(process.env.MEDIA_SYNC_RATE_PER_SECOND, 10) || 10;
+const REVALIDATE_DAYS = Number.parseInt(process.env.MEDIA_SYNC_REVALIDATE_DAYS, 10) || 30;
+const INTERVAL_MS = (Number.parseInt(process.env.MEDIA_SYNC_INTERVAL_MINUTES, 10) || 360) * 60 * 1000;
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+
+// A lease not renewed for this long belongs to a dead process
+const LEASE_EXPIRY = "INTERVAL '10 minutes'";
+
+const TMDB_TYPES = { film: 'movie', serie: 'tv' };
+
+const bucket = new TokenBucket({ capacity: CONCURRENCY, refillPerSecond: RATE_PER_SECOND });
+
+let timer = null;
+let controller = null;
+let lastRun = null;
+
+export class SyncLockedError extends Error {
+    constructor() {
+        super('Media sync is already running');
+        this.name = 'SyncLockedError';
+        this.status = 409;
+    }
+}
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Wait for a rate-limit token before each TMDB call
+ */
+async function takeToken(signal) {
+    while (!bucket.tryTake()) {
+        signal?.throwIfAborted();
+        await sleep(bucket.waitTime());
+    }
+}
+
+const normalizeTitle = (title) => title
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim();
+
+/**
+ * Pick the search result describing a media row: same title, preferring
+ * the same year; failing that, the top result when its year matches
+ * (titles are searched in French, rows are often stored in English)
+ * @param {Object} media - { title, release_year }
+ * @param {Array<Object>} results - tmdbService.searchMedia results
+ * @returns {Object|null} - { tmdb_id, match }
+ */
+export function pickMatch(media, results) {
+    const title = normalizeTitle(media.title);
+    const sameTitle = results.filter(result => normalizeTitle(result.title) === title);
+    const sameYear = (result) => media.release_year && result.year === media.release_year;
+
+    const exact = sameTitle.find(sameYear);
+    if (exact) {
+        return { tmdb_id: exact.tmdb_id, match: 'title_year' };
+    }
+    if (sameTitle.length === 1) {
+        return { tmdb_id: sameTitle[0].tmdb_id, match: 'title' };
+    }
+    if (results.length > 0 && sameYear(results[0])) {
+        return { tmdb_id: results[0].tmdb_id, match: 'year' };
+    }
+    return null;
+}
+
+/**
+ * Columns of a media row that differ from its TMDB details
+ * @returns {Object} - { column: { from, to } }
+ */
+export function diffMedia(media, details) {
+    const target = {
+        tmdb_id: details.tmdb_id,
+        image_url: details.poster_url,
+        release_year: details.year
+    };
+    const changes = {};
+    for (const [column, value] of Object.entries(target)) {
+        // TMDB without a poster or date never erases ours
+        if (value !== null && value !== undefined && value !== media[column]) {
+            changes[column] = { from: media[column], to: value };
+        }
+    }
+    return changes;
+}
+
+async function markSynced(id) {
+    await db.sequelize.query('UPDATE media SET tmdb_synced_at = NOW() WHERE id = :id', {
+        replacements: { id }
+    });
+}
+
+/**
+ * Sync one media row
+ * @returns {Promise<Object>} - { id, title, status, changes?, match?, error? }
+ */
+async function syncOne(media, { dryRun, signal }) {
+    const item = { id: media.id, title: media.title };
+    const type = TMDB_TYPES[media.type] || 'movie';
+
+    let tmdbId = media.tmdb_id;
+    if (!tmdbId) {
+        await takeToken(signal);
+        const match = pickMatch(media, await searchMedia(media.title, type, { signal }));
+        if (!match) {
+            if (!dryRun) {
+                await markSynced(media.id);
+            }
+            return { ...item, status: 'no_match' };
+        }
+        tmdbId = match.tmdb_id;
+        item.match = match.match;
+    }
+
+    await takeToken(signal);
+    const changes = diffMedia(media, await getMediaDetails(tmdbId, type, { signal }));
+    if (Object.keys(changes).length === 0) {
+        if (!dryRun) {
+            await markSynced(media.id);
+        }
+        return { ...item, status: 'unchanged' };
+    }
+
+    if (changes.tmdb_id) {
+        const [owner] = await db.sequelize.query(
+            'SELECT id FROM media WHERE type = :type AND tmdb_id = :tmdbId AND id <> :id',
+            { replacements: { type: media.type, tmdbId, id: media.id }, type: QueryTypes.SELECT }
+        );
+        if (owner) {
+            if (!dryRun) {
+                await markSynced(media.id);
+            }
+            return { ...item, status: 'conflict', duplicate_of: owner.id, tmdb_id: tmdbId };
+        }
+    }
+
+    if (!dryRun) {
+        const values = Object.fromEntries(Object.entries(changes).map(([column, { to }]) => [column, to]));
+        try {
+            await Media.update({ ...values, tmdb_synced_at: new Date() }, { where: { id: media.id } });
+        } catch (error) {
+            // Another row of the same batch claimed the id first
+            if (error.name !== 'SequelizeUniqueConstraintError') {
+                throw error;
+            }
+            await markSynced(media.id);
+            return { ...item, status: 'conflict', tmdb_id: tmdbId };
+        }
+    }
+    return { ...item, status: 'updated', changes };
+}
+
+/**
+ * Map with at most `limit` calls in flight
+ */
+async function mapConcurrent(items, limit, fn) {
+    const results = new Array(items.length);
+    let next = 0;
+    const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index]);
+        }
+    });
+    await Promise.all(workers);
+    return results;
+}
+
+async function acquireLease() {
+    await db.sequelize.query(
+        'INSERT INTO sync_checkpoints (name) VALUES (:name) ON CONFLICT (name) DO NOTHING',
+        { replacements: { name: CHECKPOINT } }
+    );
+    const [checkpoint] = await db.sequelize.query(
+        `UPDATE sync_checkpoints
+         SET locked_by = :workerId, locked_at = NOW(), updated_at = NOW(),
+             started_at = CASE WHEN last_id = 0 THEN NOW() ELSE started_at END
+         WHERE name = :name AND (locked_by IS NULL OR locked_at < NOW() - ${LEASE_EXPIRY})
+         RETURNING last_id`,
+        { replacements: { name: CHECKPOINT, workerId: WORKER_ID }, type: QueryTypes.SELECT }
+    );
+    if (!checkpoint) {
+        throw new SyncLockedError();
+    }
+    return checkpoint.last_id;
+}
+
+async function saveCheckpoint(lastId, stats, { completed = false } = {}) {
+    await db.sequelize.query(
+        `UPDATE sync_checkpoints
+         SET last_id = :lastId, stats = CAST(:stats AS jsonb), locked_at = NOW(), updated_at = NOW()
+             ${completed ? ', completed_at = NOW()' : ''}
+         WHERE name = :name AND locked_by = :workerId`,
+        { replacements: { name: CHECKPOINT, workerId: WORKER_ID, lastId, stats: JSON.stringify(stats) } }
+    );
+}
+
+async function releaseLease() {
+    await db.sequelize.query(
+        'UPDATE sync_checkpoints SET locked_by = NULL, locked_at = NULL, updated_at = NOW() WHERE name = :name AND locked_by = :workerId',
+        { replacements: { name: CHECKPOINT, workerId: WORKER_ID } }
+    );
+}
+
+/**
+ * Current checkpoint
+ * @returns {Promise<Object|null>}
+ */
+export async function getSyncCheckpoint() {
+    const [checkpoint] = await db.sequelize.query(
+        'SELECT last_id, locked_by, locked_at, started_at, completed_at, stats, updated_at FROM sync_checkpoints WHERE name = :name',
+        { replacements: { name: CHECKPOINT }, type: QueryTypes.SELECT }
+    );
+    return checkpoint || null;
+}
+
+/**
+ * Sync media rows from the checkpoint on
+ * @param {Object} [options]
+ * @param {boolean} [options.dryRun] - Report changes without writing (no lease, no checkpoint)
+ * @param {number} [options.limit] - Stop after this many rows; the next run resumes
+ * @param {AbortSignal} [options.signal]
+ * @returns {Promise<Object>} - { dry_run, from_id, last_id, completed, counts, items }
+ *   where items lists every row that was not unchanged
+ */
+export async function runMediaSync({ dryRun = false, limit = Infinity, signal } = {}) {
+    const fromId = dryRun ? (await getSyncCheckpoint())?.last_id ?? 0 : await acquireLease();
+    const counts = { updated: 0, unchanged: 0, no_match: 0, conflict: 0, error: 0 };
+    const items = [];
+    let lastId = fromId;
+    let seen = 0;
+    let completed = false;
+
+    try {
+        while (seen < limit) {
+            signal?.throwIfAborted();
+            const rows = await db.sequelize.query(
+                `SELECT id, title, type, release_year, image_url, tmdb_id FROM media
+                 WHERE id > :lastId
+                   AND (tmdb_synced_at IS NULL OR tmdb_synced_at < NOW() - make_interval(days => :days))
+                 ORDER BY id
+                 LIMIT :batchSize`,
+                {
+                    replacements: { lastId, days: REVALIDATE_DAYS, batchSize: Math.min(BATCH_SIZE, limit - seen) },
+                    type: QueryTypes.SELECT
+                }
+            );
+            if (rows.length === 0) {
+                completed = true;
+                break;
+            }
+
+            const results = await mapConcurrent(rows, CONCURRENCY, media => syncOne(media, { dryRun, signal })
+                .catch((error) => {
+                    if (signal?.aborted) {
+                        throw error;
+                    }
+                    return { id: media.id, title: media.title, status: 'error', error: error.message, name: error.name };
+                }));
+
+            for (const result of results) {
+                counts[result.status]++;
+                if (result.status !== 'unchanged') {
+                    items.push(result);
+                }
+            }
+            seen += rows.length;
+            lastId = rows.at(-1).id;
+            if (!dryRun) {
+                await saveCheckpoint(lastId, counts);
+            }
+            // TMDB is down: stop here, the rows in error are retried next pass
+            if (results.some(result => result.name === 'CircuitOpenError')) {
+                break;
+            }
+        }
+
+        if (completed && !dryRun) {
+            await saveCheckpoint(0, counts, { completed: true });
+        }
+    } finally {
+        if (!dryRun) {
+            await releaseLease().catch(error => console.warn('[media-sync] lease release failed:', error.message));
+        }
+    }
+
+    if (counts.updated > 0 && !dryRun) {
+        await invalidateReferenceData('media');
+        await publishChange('media', 'refreshed');
+    }
+
+    return {
+        dry_run: dryRun,
+        from_id: fromId,
+        last_id: completed ? 0 : lastId,
+        completed,
+        counts,
+        items: items.map(({ name, ...item }) => item)
+    };
+}
+
+async function tick() {
+    controller = new AbortController();
+    try {
+        lastRun = { started_at: new Date(), ...(await runMediaSync({ signal: controller.signal })) };
+        const { counts } = lastRun;
+        console.log(`[media-sync] ${counts.updated} updated, ${counts.no_match} unmatched, ${counts.error} errors`);
+    } catch (error) {
+        if (error.name !== 'SyncLockedError' && !controller.signal.aborted) {
+            console.error('[media-sync] run failed:', error.message);
+        }
+    } finally {
+        controller = null;
+    }
+    if (timer) {
+        timer = setTimeout(tick, INTERVAL_MS);
+        timer.unref();
+    }
+}
+
+/**
+ * Run the sync every MEDIA_SYNC_INTERVAL_MINUTES in this process; replicas
+ * share the lease so only one of them syncs at a time
+ */
+export function startMediaSyncWorker() {
+    if (timer) {
+        return;
+    }
+    timer = setTimeout(tick, 60 * 1000);
+    timer.unref();
+}
+
+/**
+ * Stop scheduling and abort a run in progress (its checkpoint is kept)
+ */
+export function stopMediaSyncWorker() {
+    clearTimeout(timer);
+    timer = null;
+    controller?.abort();
+}
+
+/**
+ * Worker state for monitoring
+ */
+export function getMediaSyncStats() {
+    return {
+        worker_id: WORKER_ID,
+        scheduled: timer !== null,
+        running: controller !== null,
+        interval_minutes: INTERVAL_MS / 60000,
+        revalidate_days: REVALIDATE_DAYS,
+        concurrency: CONCURRENCY,
+        rate_per_second: RATE_PER_SECOND,
+        last_run: lastRun
+    };
+}
+
+export default {
+    runMediaSync,
+    getSyncCheckpoint,
+    startMediaSyncWorker,
+    stopMediaSyncWorker,
+    getMediaSyncStats
+};
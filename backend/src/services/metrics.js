@@ -0,0 +1,150 @@
+/**
+ * Metrics - Application metrics exposed on GET /metrics
+ *
+ * HTTP, database and outbound-call latencies are recorded as histograms;
+ * runtime health (event-loop delay, GC pauses, memory) is sampled when
+ * startRuntimeMetrics() is called from server.js.
+ */
+
+import { monitorEventLoopDelay, PerformanceObserver, constants } from 'perf_hooks';
+import { Registry } from '../utils/metrics.js';
+
+export const registry = new Registry();
+
+export const httpRequestDuration = registry.histogram({
+    name: 'http_request_duration_seconds',
+    help: 'HTTP request duration by route template, method and status',
+    labelNames: ['method', 'route', 'status_code']
+});
+
+export const dbQueryDuration = registry.histogram({
+    name: 'db_query_duration_seconds',
+    help: 'Sequelize query duration by statement type and table',
+    labelNames: ['operation', 'table'],
+    buckets: [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5]
+});
+
+export const outboundRequestDuration = registry.histogram({
+    name: 'outbound_request_duration_seconds',
+    help: 'Duration of calls to external APIs until response headers, per attempt',
+    labelNames: ['service', 'operation', 'status_code'],
+    buckets: [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+});
+
+export const rateLimitRejections = registry.counter({
+    name: 'rate_limit_rejections_total',
+    help: 'Requests rejected by a rate limiter',
+    labelNames: ['limiter']
+});
+
+// ============ DATABASE ============
+
+/**
+ * Statement type and first table of a logged Sequelize query
+ * @param {string} sql - e.g. 'Executed (default): SELECT ... FROM "recipes" ...'
+ * @returns {{ operation: string, table: string }}
+ */
+export function describeQuery(sql) {
+    const statement = sql.replace(/^Execut(?:ed|ing) \([^)]*\):\s*/, '').trimStart();
+    const operation = (statement.match(/^[a-z]+/i)?.[0] || 'other').toUpperCase();
+    const table = statement.match(/\b(?:FROM|INTO|UPDATE|JOIN)\s+"?([a-z_][a-z0-9_]*)"?/i)?.[1] || 'none';
+    return { operation, table };
+}
+
+/**
+ * Sequelize `logging` callback, used with `benchmark: true`
+ * @param {string} sql
+ * @param {number} durationMs
+ */
+export function observeQuery(sql, durationMs) {
+    if (typeof durationMs !== 'number') {
+        return;
+    }
+    dbQueryDuration.observe(describeQuery(sql), durationMs / 1000);
+}
+
+// ============ RUNTIME ============
+
+const GC_KINDS = {
+    [constants.NODE_PERFORMANCE_GC_MAJOR]: 'major',
+    [constants.NODE_PERFORMANCE_GC_MINOR]: 'minor',
+    [constants.NODE_PERFORMANCE_GC_INCREMENTAL]: 'incremental',
+    [constants.NODE_PERFORMANCE_GC_WEAKCB]: 'weakcb'
+};
+
+const EVENT_LOOP_RESOLUTION_MS = 10;
+
+let eventLoopDelay = null;
+let gcObserver = null;
+
+/**
+ * Start sampling event-loop delay and GC pauses
+ */
+export function startRuntimeMetrics() {
+    if (eventLoopDelay) {
+        return;
+    }
+
+    eventLoopDelay = monitorEventLoopDelay({ resolution: EVENT_LOOP_RESOLUTION_MS });
+    eventLoopDelay.enable();
+
+    // Sampled delays include the sampling interval itself, report only the lag beyond it
+    const lagSeconds = (nanoseconds) => Math.max(0, nanoseconds / 1e6 - EVENT_LOOP_RESOLUTION_MS) / 1000;
+
+    // Values cover the interval since the previous scrape
+    registry.gauge({
+        name: 'nodejs_eventloop_lag_seconds',
+        help: 'Event-loop lag since the previous scrape',
+        labelNames: ['quantile'],
+        collect(gauge) {
+            if (eventLoopDelay.count === 0) {
+                return;
+            }
+            gauge.set({ quantile: '0.5' }, lagSeconds(eventLoopDelay.percentile(50)));
+            gauge.set({ quantile: '0.99' }, lagSeconds(eventLoopDelay.percentile(99)));
+            gauge.set({ quantile: '1' }, lagSeconds(eventLoopDelay.max));
+            eventLoopDelay.reset();
+        }
+    });
+
+    const gcDuration = registry.histogram({
+        name: 'nodejs_gc_duration_seconds',
+        help: 'Garbage collection pauses by kind',
+        labelNames: ['kind'],
+        buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5]
+    });
+    gcObserver = new PerformanceObserver((list) => {
+        for (const entry of list.getEntries()) {
+            gcDuration.observe({ kind: GC_KINDS[entry.detail?.kind] || 'other' }, entry.duration / 1000);
+        }
+    });
+    gcObserver.observe({ entryTypes: ['gc'] });
+
+    registry.gauge({
+        name: 'process_memory_bytes',
+        help: 'Process memory usage',
+        labelNames: ['type'],
+        collect(gauge) {
+            const { rss, heapTotal, heapUsed, external } = process.memoryUsage();
+            gauge.set({ type: 'rss' }, rss);
+            gauge.set({ type: 'heap_total' }, heapTotal);
+            gauge.set({ type: 'heap_used' }, heapUsed);
+            gauge.set({ type: 'external' }, external);
+        }
+    });
+}
+
+/**
+ * Stop the runtime samplers (tests, graceful shutdown)
+ */
+export function stopRuntimeMetrics() {
+    eventLoopDelay?.disable();
+    gcObserver?.disconnect();
+}
+
+export default {
+    registry,
+    observeQuery,
+    startRuntimeMetrics,
+    stopRuntimeMetrics
+};
@@ -1,6 +1,32 @@
+import { Cache } from '../utils/cache.js';
+import { HttpClient, withSignal } from './httpClient.js';
+
 const MISTRAL_API_URL = process.env.MISTRAL_API_URL || 'https://api.mistral.ai/v1/chat/completions';
 const MISTRAL_MODEL = process.env.MISTRAL_MODEL || 'mistral-small-latest';
 
+// Completions are POSTs and never retried here; the generation queue retries jobs
+const mistralClient = new HttpClient({
+    name: 'mistral',
+    maxSockets: 8,
+    connectTimeoutMs: 3000,
+    headersTimeoutMs: Number.parseInt(process.env.MISTRAL_TIMEOUT_MS, 10) || 60 * 1000,
+    bodyTimeoutMs: 30 * 1000,
+    retries: 0
+});
+
+// Bump whenever buildPrompt changes so cached generations are not reused
+const PROMPT_VERSION = 1;
+
+const generationCache = new Cache({
+    name: 'mistral_recipes',
+    maxEntries: Number.parseInt(process.env.MISTRAL_CACHE_MAX_ENTRIES, 10) || 200,
+    ttlMs: (Number.parseInt(process.env.MISTRAL_CACHE_TTL_SECONDS, 10) || 3600) * 1000
+});
+
+// Streamed generations by movie key: callers joining one in flight get the
+// text generated so far, then every following token
+const tokenStreams = new Map();
+
 function buildPrompt(movie) {
     const title = movie.title?.trim();
     const year = movie.year ? ` (${movie.year})` : '';
@@ -38,17 +64,29 @@ function extractJson(text) {
     return JSON.parse(jsonText);
 }
 
-export async function generateRecipeFromMovie(movie) {
+/**
+ * Cache key identifying a movie: its TMDB id when known, else title + year
+ */
+function movieKey(movie) {
+    const identity = movie.tmdb_id
+        ? `tmdb:${movie.type || 'film'}:${movie.tmdb_id}`
+        : `title:${movie.title.trim().toLowerCase()}:${movie.year || ''}`;
+    return `v${PROMPT_VERSION}:${MISTRAL_MODEL}:${identity}`;
+}
+
+async function requestCompletion(movie, stream) {
     const apiKey = process.env.MISTRAL_API_KEY;
     if (!apiKey) {
         throw new Error('MISTRAL_API_KEY is not configured');
     }
 
-    const response = await fetch(MISTRAL_API_URL, {
+    const response = await mistralClient.request(MISTRAL_API_URL, {
         method: 'POST',
+        operation: stream ? 'stream' : 'complete',
         headers: {
             Authorization: `Bearer ${apiKey}`,
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            Accept: stream ? 'text/event-stream' : 'application/json'
         },
         body: JSON.stringify({
             model: MISTRAL_MODEL,
@@ -62,15 +100,47 @@ export async function generateRecipeFromMovie(movie) {
                     content: buildPrompt(movie)
                 }
             ],
-            temperature: 0.7
+            temperature: 0.7,
+            stream
         })
     });
 
     if (!response.ok) {
         const errorText = await response.text();
-        throw new Error(`Mistral API error: ${response.status} ${errorText}`);
+        const error = new Error(`Mistral API error: ${response.status} ${errorText}`);
+        error.status = response.status;
+        throw error;
     }
 
+    return response;
+}
+
+/**
+ * Yield the `data:` payloads of a server-sent events body
+ * @param {AsyncIterable<Buffer>} body
+ */
+async function* readEventData(body) {
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    for await (const chunk of body) {
+        buffer += decoder.decode(chunk, { stream: true }).replace(/\r\n/g, '\n');
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const event = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            for (const line of event.split('\n')) {
+                if (line.startsWith('data:')) {
+                    yield line.slice(5).trim();
+                }
+            }
+        }
+    }
+}
+
+async function completeRecipe(movie) {
+    const response = await requestCompletion(movie, false);
     const data = await response.json();
     const content = data?.choices?.[0]?.message?.content;
     if (!content) {
@@ -79,3 +149,91 @@ export async function generateRecipeFromMovie(movie) {
 
     return extractJson(content);
 }
+
+async function streamRecipe(movie, onToken) {
+    const response = await requestCompletion(movie, true);
+    let content = '';
+
+    for await (const data of readEventData(response.body)) {
+        if (data === '[DONE]') {
+            break;
+        }
+        const token = JSON.parse(data)?.choices?.[0]?.delta?.content;
+        if (token) {
+            content += token;
+            onToken(token);
+        }
+    }
+
+    if (!content) {
+        throw new Error('Mistral API response missing content');
+    }
+
+    return extractJson(content);
+}
+
+function tokenStream(key) {
+    let stream = tokenStreams.get(key);
+    if (!stream) {
+        stream = { text: '', listeners: new Set(), loading: false };
+        tokenStreams.set(key, stream);
+    }
+    return stream;
+}
+
+async function streamShared(movie, key) {
+    const stream = tokenStream(key);
+    stream.loading = true;
+    try {
+        return await streamRecipe(movie, (token) => {
+            stream.text += token;
+            stream.listeners.forEach(listener => listener(token));
+        });
+    } finally {
+        // The next generation of this movie starts from an empty text
+        stream.loading = false;
+        tokenStreams.delete(key);
+    }
+}
+
+/**
+ * Generate a recipe inspired by a movie or TV show
+ * Results are cached per movie and prompt version; concurrent requests
+ * for the same movie share a single Mistral call, which runs to the end
+ * whichever of them goes away.
+ * @param {Object} movie - { title, year, type, overview, tmdb_id }
+ * @param {Object} [options]
+ * @param {AbortSignal} [options.signal] - Stops this caller's wait
+ * @returns {Promise<Object>} - Recipe fields parsed from the completion
+ */
+export async function generateRecipeFromMovie(movie, { signal } = {}) {
+    return withSignal(generationCache.wrap(movieKey(movie), () => completeRecipe(movie)), signal);
+}
+
+/**
+ * Same as generateRecipeFromMovie, relaying completion tokens as they arrive.
+ * Callers joining a streamed generation in flight first get the text so
+ * far; onToken is not called when the recipe is served from cache or
+ * joins a non-streamed generation.
+ * @param {Object} movie - { title, year, type, overview, tmdb_id }
+ * @param {Function} onToken - Called with each text fragment
+ * @param {Object} [options]
+ * @param {AbortSignal} [options.signal] - Stops this caller's wait (client disconnected)
+ * @returns {Promise<Object>} - Recipe fields parsed from the completion
+ */
+export async function streamRecipeFromMovie(movie, onToken, { signal } = {}) {
+    const key = movieKey(movie);
+    const stream = tokenStream(key);
+    if (stream.text) {
+        onToken(stream.text);
+    }
+    stream.listeners.add(onToken);
+    try {
+        return await withSignal(generationCache.wrap(key, () => streamShared(movie, key)), signal);
+    } finally {
+        stream.listeners.delete(onToken);
+        if (!stream.loading && stream.listeners.size === 0 && tokenStreams.get(key) === stream) {
+            tokenStreams.delete(key);
+        }
+    }
+}
@@ -0,0 +1,247 @@
+/**
+ * Password Hasher - argon2 hashing behind a bounded pool with admission control
+ *
+ * argon2 runs on the libuv threadpool, which also serves DNS lookups and
+ * file I/O. At most HASH_POOL_SIZE hashes run at once (the
+ * config/threadpool.cjs preload enlarges the threadpool so the remaining
+ * threads stay free); further requests wait
+ * in a bounded queue and are shed with HashingOverloadedError (503 +
+ * Retry-After) once the queue is full or the wait gets too long.
+ *
+ * The argon2 native binding is imported on first use rather than at boot,
+ * keeping it off the cold-start path.
+ */
+
+import { registry } from './metrics.js';
+import { lazyModule } from '../utils/lazy.js';
+
+// argon2.argon2id, a constant of the argon2 format
+const ARGON2ID = 2;
+
+let argon2 = null;
+const loadArgon2 = lazyModule(async () => {
+    argon2 = (await import('argon2')).default;
+    return argon2;
+});
+
+// Cost per environment; OWASP minimum for argon2id in production, cheap in tests
+const COSTS = {
+    development: { memoryCost: 19456, timeCost: 2, parallelism: 1 },
+    test: { memoryCost: 1024, timeCost: 1, parallelism: 1 },
+    production: { memoryCost: 19456, timeCost: 2, parallelism: 1 }
+};
+
+const readInt = (name, fallback) => {
+    const value = Number.parseInt(process.env[name], 10);
+    return Number.isNaN(value) ? fallback : value;
+};
+
+/**
+ * argon2 options for the current environment, overridable with ARGON2_*
+ * @returns {Object}
+ */
+export function buildHashOptions(env = process.env.NODE_ENV || 'development') {
+    const defaults = COSTS[env] || COSTS.development;
+    return {
+        type: ARGON2ID,
+        memoryCost: readInt('ARGON2_MEMORY_COST', defaults.memoryCost),
+        timeCost: readInt('ARGON2_TIME_COST', defaults.timeCost),
+        parallelism: readInt('ARGON2_PARALLELISM', defaults.parallelism)
+    };
+}
+
+const queueWait = registry.histogram({
+    name: 'password_hash_queue_wait_seconds',
+    help: 'Time password operations waited for a hashing slot',
+    labelNames: ['operation'],
+    buckets: [0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+});
+
+const hashDuration = registry.histogram({
+    name: 'password_hash_duration_seconds',
+    help: 'Duration of argon2 hash and verify calls',
+    labelNames: ['operation'],
+    buckets: [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+});
+
+const rejections = registry.counter({
+    name: 'password_hash_rejections_total',
+    help: 'Password operations shed because the hashing queue was full or too slow',
+    labelNames: ['reason']
+});
+
+export class HashingOverloadedError extends Error {
+    /**
+     * @param {string} reason - 'queue_full' or 'queue_timeout'
+     * @param {number} retryAfter - Seconds to advertise in Retry-After
+     */
+    constructor(reason, retryAfter) {
+        super('Too many password operations in progress, please retry shortly');
+        this.name = 'HashingOverloadedError';
+        this.status = 503;
+        this.reason = reason;
+        this.retryAfter = retryAfter;
+    }
+}
+
+export class PasswordHasher {
+    /**
+     * @param {Object} options
+     * @param {number} [options.poolSize] - Concurrent argon2 operations
+     * @param {number} [options.maxQueue] - Waiting operations before shedding load
+     * @param {number} [options.queueTimeoutMs] - Longest wait for a slot
+     * @param {Object} [options.hashOptions] - argon2 cost parameters
+     * @param {Object} [options.argon] - argon2 implementation (tests); loaded on first use by default
+     */
+    constructor({
+        poolSize = 2,
+        maxQueue = 64,
+        queueTimeoutMs = 5000,
+        hashOptions = buildHashOptions(),
+        argon = null
+    } = {}) {
+        this.poolSize = poolSize;
+        this.maxQueue = maxQueue;
+        this.queueTimeoutMs = queueTimeoutMs;
+        this.hashOptions = hashOptions;
+        this.argon = argon;
+        this.active = 0;
+        this.queue = [];
+        // Moving average of operation time, used for Retry-After
+        this.averageSeconds = 0.1;
+        this.counters = { completed: 0, rejected: 0 };
+    }
+
+    /**
+     * Hash a password with the configured cost
+     * @param {string} password
+     * @returns {Promise<string>}
+     */
+    hash(password) {
+        return this.run('hash', async () => (await this.loadArgon()).hash(password, this.hashOptions));
+    }
+
+    /**
+     * @param {string} digest - Stored hash
+     * @param {string} password
+     * @returns {Promise<boolean>}
+     */
+    verify(digest, password) {
+        return this.run('verify', async () => (await this.loadArgon()).verify(digest, password));
+    }
+
+    async loadArgon() {
+        this.argon ??= await loadArgon2();
+        return this.argon;
+    }
+
+    /**
+     * Whether a stored hash was made with other parameters than the current ones
+     * @param {string} digest
+     * @returns {boolean}
+     */
+    needsRehash(digest) {
+        try {
+            // Asked after a verify, so argon2 is loaded by then
+            return (this.argon ?? argon2).needsRehash(digest, this.hashOptions);
+        } catch {
+            return true;
+        }
+    }
+
+    run(operation, task) {
+        const enqueuedAt = process.hrtime.bigint();
+        if (this.active < this.poolSize) {
+            return this.execute(operation, task, enqueuedAt);
+        }
+        if (this.queue.length >= this.maxQueue) {
+            return Promise.reject(this.reject('queue_full'));
+        }
+
+        return new Promise((resolve, reject) => {
+            const item = { operation, task, enqueuedAt, resolve, reject };
+            item.timer = setTimeout(() => {
+                this.queue.splice(this.queue.indexOf(item), 1);
+                reject(this.reject('queue_timeout'));
+            }, this.queueTimeoutMs);
+            this.queue.push(item);
+        });
+    }
+
+    async execute(operation, task, enqueuedAt) {
+        this.active++;
+        queueWait.observe({ operation }, Number(process.hrtime.bigint() - enqueuedAt) / 1e9);
+        const end = hashDuration.startTimer({ operation });
+        try {
+            return await task();
+        } finally {
+            const seconds = end();
+            this.averageSeconds = this.averageSeconds * 0.9 + seconds * 0.1;
+            this.counters.completed++;
+            this.active--;
+            this.drain();
+        }
+    }
+
+    drain() {
+        while (this.active < this.poolSize && this.queue.length > 0) {
+            const item = this.queue.shift();
+            clearTimeout(item.timer);
+            this.execute(item.operation, item.task, item.enqueuedAt).then(item.resolve, item.reject);
+        }
+    }
+
+    reject(reason) {
+        this.counters.rejected++;
+        rejections.inc({ reason });
+        return new HashingOverloadedError(reason, this.retryAfter());
+    }
+
+    /**
+     * Seconds until the current backlog should have cleared
+     * @returns {number}
+     */
+    retryAfter() {
+        const backlog = this.queue.length + this.active;
+        return Math.max(1, Math.ceil((backlog / this.poolSize) * this.averageSeconds));
+    }
+
+    stats() {
+        return {
+            pool_size: this.poolSize,
+            active: this.active,
+            queued: this.queue.length,
+            max_queue: this.maxQueue,
+            average_ms: Math.round(this.averageSeconds * 1000),
+            ...this.counters
+        };
+    }
+}
+
+export const HASH_POOL_SIZE = readInt('HASH_POOL_SIZE', 2);
+
+const passwordHasher = new PasswordHasher({
+    poolSize: HASH_POOL_SIZE,
+    maxQueue: readInt('HASH_QUEUE_MAX', 64),
+    queueTimeoutMs: readInt('HASH_QUEUE_TIMEOUT_MS', 5000)
+});
+
+registry.gauge({
+    name: 'password_hash_pool',
+    help: 'Password hashing slots in use and operations waiting',
+    labelNames: ['state'],
+    collect(gauge) {
+        gauge.set({ state: 'active' }, passwordHasher.active);
+        gauge.set({ state: 'queued' }, passwordHasher.queue.length);
+    }
+});
+
+export const hashPassword = (password) => passwordHasher.hash(password);
+
+export const verifyPassword = (digest, password) => passwordHasher.verify(digest, password);
+
+export const needsRehash = (digest) => passwordHasher.needsRehash(digest);
+
+export const getPasswordHasherStats = () => passwordHasher.stats();
+
+export default passwordHasher;
@@ -0,0 +1,145 @@
+/**
+ * PG Notifier - Cross-replica messages over PostgreSQL LISTEN/NOTIFY
+ *
+ * Listening needs a connection of its own (the Sequelize pool hands
+ * connections back and forth), so one dedicated pg client per process
+ * carries every channel. Notifications are sent through the pool.
+ */
+
+import pg from 'pg';
+import config from '../config/config.js';
+import db from '../models/index.js';
+
+const env = process.env.NODE_ENV || 'development';
+const dbConfig = config[env];
+const RECONNECT_DELAY_MS = 5000;
+
+const handlers = new Map();
+let client = null;
+let connecting = null;
+let reconnectTimer = null;
+let hasConnected = false;
+
+function assertChannel(channel) {
+    if (!/^[a-z_][a-z0-9_]*$/.test(channel)) {
+        throw new Error(`Invalid notification channel: ${channel}`);
+    }
+}
+
+function dispatch(channel, payload) {
+    for (const handler of handlers.get(channel) || []) {
+        try {
+            handler(payload);
+        } catch (error) {
+            console.error(`[notify:${channel}] handler failed:`, error.message);
+        }
+    }
+}
+
+function scheduleReconnect() {
+    client = null;
+    if (reconnectTimer || handlers.size === 0) {
+        return;
+    }
+    reconnectTimer = setTimeout(() => {
+        reconnectTimer = null;
+        connect().catch(error => {
+            console.warn('[notify] reconnect failed:', error.message);
+            scheduleReconnect();
+        });
+    }, RECONNECT_DELAY_MS);
+    reconnectTimer.unref();
+}
+
+async function connect() {
+    if (connecting) {
+        return connecting;
+    }
+
+    connecting = (async () => {
+        const listener = new pg.Client({
+            connectionString: dbConfig.url,
+            ssl: dbConfig.dialectOptions?.ssl
+        });
+        listener.on('notification', ({ channel, payload }) => dispatch(channel, payload));
+        listener.on('error', (error) => {
+            console.warn('[notify] listener connection lost:', error.message);
+            listener.end().catch(() => {});
+            scheduleReconnect();
+        });
+
+        await listener.connect();
+        for (const channel of handlers.keys()) {
+            await listener.query(`LISTEN ${channel}`);
+        }
+
+        const reconnected = hasConnected;
+        hasConnected = true;
+        client = listener;
+
+        // Notifications sent while disconnected are lost: tell handlers to resync
+        if (reconnected) {
+            for (const channel of handlers.keys()) {
+                dispatch(channel, null);
+            }
+        }
+        return listener;
+    })().finally(() => {
+        connecting = null;
+    });
+
+    return connecting;
+}
+
+/**
+ * Subscribe to a channel. The handler receives the payload string, or
+ * null after a reconnect, when messages may have been missed.
+ * @param {string} channel
+ * @param {Function} handler
+ */
+export async function listen(channel, handler) {
+    assertChannel(channel);
+    const isNew = !handlers.has(channel);
+    if (isNew) {
+        handlers.set(channel, new Set());
+    }
+    handlers.get(channel).add(handler);
+
+    const listener = client || await connect();
+    if (isNew) {
+        // Repeating LISTEN is a no-op, this covers a connect already in progress
+        await listener.query(`LISTEN ${channel}`);
+    }
+}
+
+/**
+ * Publish a payload to every listening process, this one included
+ * @param {string} channel
+ * @param {string} payload - At most ~8000 bytes
+ */
+export async function notify(channel, payload) {
+    assertChannel(channel);
+    await db.sequelize.query('SELECT pg_notify(:channel, :payload)', {
+        replacements: { channel, payload }
+    });
+}
+
+/**
+ * Close the listener connection
+ */
+export async function closeListener() {
+    handlers.clear();
+    clearTimeout(reconnectTimer);
+    reconnectTimer = null;
+    if (client) {
+        const listener = client;
+        client = null;
+        await listener.end();
+    }
+}
+
+export default {
+    listen,
+    notify,
+    closeListener
+};
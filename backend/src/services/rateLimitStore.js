@@ -0,0 +1,92 @@
+/**
+ * Rate Limit Store - express-rate-limit store backed by rate_limit_hits
+ *
+ * Counters live in PostgreSQL so limits hold across cluster workers and
+ * replicas. Windows are computed from the database clock, and the count is
+ * a sliding-window estimate: the current window's hits plus the previous
+ * window's hits weighted by how much of it still overlaps.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+const INCREMENT = `
+    WITH win AS (
+        SELECT now_ms, now_ms - (now_ms % :windowMs) AS start_ms
+        FROM (SELECT floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint AS now_ms) clock
+    ), hit AS (
+        INSERT INTO rate_limit_hits (key, window_start, hits)
+        SELECT :key, start_ms, 1 FROM win
+        ON CONFLICT (key, window_start) DO UPDATE SET hits = rate_limit_hits.hits + 1
+        RETURNING hits
+    )
+    SELECT hit.hits AS current, COALESCE(previous.hits, 0) AS previous, win.now_ms, win.start_ms
+    FROM hit
+    CROSS JOIN win
+    LEFT JOIN rate_limit_hits previous
+        ON previous.key = :key AND previous.window_start = win.start_ms - :windowMs`;
+
+const CURRENT_WINDOW = `floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint
+    - (floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint % :windowMs)`;
+
+/**
+ * Sliding-window hit count from two fixed windows
+ * @param {Object} row - { current, previous, now_ms, start_ms }
+ * @param {number} windowMs
+ * @returns {number}
+ */
+export function slidingWindowHits({ current, previous, now_ms: nowMs, start_ms: startMs }, windowMs) {
+    const elapsed = (Number(nowMs) - Number(startMs)) / windowMs;
+    return Number(current) + Math.floor(Number(previous) * (1 - elapsed));
+}
+
+export class PostgresRateLimitStore {
+    /**
+     * @param {Object} options
+     * @param {string} options.prefix - Separates limiters sharing the table
+     */
+    constructor({ prefix }) {
+        this.prefix = `${prefix}:`;
+        // Counters are shared, express-rate-limit must not assume they are local
+        this.localKeys = false;
+        this.windowMs = 60 * 1000;
+    }
+
+    init(options) {
+        this.windowMs = options.windowMs;
+        const purgeTimer = setInterval(() => {
+            db.sequelize.query(
+                `DELETE FROM rate_limit_hits WHERE key LIKE :pattern AND window_start < ${CURRENT_WINDOW} - :windowMs`,
+                { replacements: { pattern: `${this.prefix}%`, windowMs: this.windowMs } }
+            ).catch(error => console.warn(`[rate-limit:${this.prefix}] purge failed: ${error.message}`));
+        }, this.windowMs);
+        purgeTimer.unref();
+    }
+
+    async increment(key) {
+        const [row] = await db.sequelize.query(INCREMENT, {
+            replacements: { key: this.prefix + key, windowMs: this.windowMs },
+            type: QueryTypes.SELECT
+        });
+        return {
+            totalHits: slidingWindowHits(row, this.windowMs),
+            resetTime: new Date(Number(row.start_ms) + this.windowMs)
+        };
+    }
+
+    async decrement(key) {
+        await db.sequelize.query(
+            `UPDATE rate_limit_hits SET hits = GREATEST(hits - 1, 0)
+             WHERE key = :key AND window_start = ${CURRENT_WINDOW}`,
+            { replacements: { key: this.prefix + key, windowMs: this.windowMs } }
+        );
+    }
+
+    async resetKey(key) {
+        await db.sequelize.query('DELETE FROM rate_limit_hits WHERE key = :key', {
+            replacements: { key: this.prefix + key }
+        });
+    }
+}
+
+export default PostgresRateLimitStore;
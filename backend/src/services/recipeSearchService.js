@@ -0,0 +1,73 @@
+/**
+ * Recipe Search Service - Full-text search over local recipes
+ *
+ * Relies on the `search_vector` column, `french_unaccent` configuration and
+ * trigram index created by the e-add-recipe-search migration.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+
+const SELECT_RESULT = `
+    SELECT r.id, r.title, r.description, r.image_url, r.difficulty,
+           r.prep_time, r.cook_time, r.user_id, r.category_id, r.media_id, r.created_at,
+           json_build_object('id', u.id, 'username', u.username) AS author,
+           CASE WHEN c.id IS NULL THEN NULL ELSE json_build_object('id', c.id, 'name', c.name) END AS category,
+           CASE WHEN m.id IS NULL THEN NULL
+                ELSE json_build_object('id', m.id, 'title', m.title, 'type', m.type, 'image_url', m.image_url) END AS media`;
+
+const JOINS = `
+    JOIN users u ON u.id = r.user_id
+    LEFT JOIN categories c ON c.id = r.category_id
+    LEFT JOIN media m ON m.id = r.media_id`;
+
+const FULLTEXT_QUERY = `
+    WITH q AS (SELECT websearch_to_tsquery('french_unaccent', :query) AS query)
+    ${SELECT_RESULT},
+           ts_rank_cd(r.search_vector, q.query) AS rank,
+           ts_headline('french_unaccent', concat_ws(' ', r.description, r.ingredients), q.query,
+                       'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+    FROM recipes r
+    CROSS JOIN q
+    ${JOINS}
+    WHERE r.search_vector @@ q.query
+    ORDER BY rank DESC, r.id DESC
+    LIMIT :limit`;
+
+const FUZZY_QUERY = `
+    ${SELECT_RESULT},
+           similarity(immutable_unaccent(lower(r.title)), immutable_unaccent(lower(:query))) AS rank,
+           NULL AS snippet
+    FROM recipes r
+    ${JOINS}
+    WHERE immutable_unaccent(lower(r.title)) % immutable_unaccent(lower(:query))
+    ORDER BY rank DESC, r.id DESC
+    LIMIT :limit`;
+
+/**
+ * Search recipes by title, description, ingredients and media title
+ * Falls back to trigram similarity on the title when no document matches,
+ * so typos like "ratatouile" still find results.
+ * @param {string} query - Search terms (websearch syntax: quotes, OR, -)
+ * @param {number} limit - Maximum number of results
+ * @returns {Promise<{ mode: string, data: Array }>} - Ranked results
+ */
+export async function searchRecipes(query, limit = 20) {
+    // On the primary, where the route's ETag versions are read
+    const options = {
+        replacements: { query, limit },
+        type: QueryTypes.SELECT
+    };
+
+    const matches = await db.sequelize.query(FULLTEXT_QUERY, options);
+    if (matches.length > 0) {
+        return { mode: 'fulltext', data: matches };
+    }
+
+    const similar = await db.sequelize.query(FUZZY_QUERY, options);
+    return { mode: 'fuzzy', data: similar };
+}
+
+export default {
+    searchRecipes
+};
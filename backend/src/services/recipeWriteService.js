@@ -0,0 +1,178 @@
+/**
+ * Recipe Write Service - Ownership-checked, optimistically locked writes
+ *
+ * An update or delete is one statement: the ownership check and the
+ * expected version (from If-Match) are part of its WHERE clause, and when
+ * no row is written the same statement returns the row as it stands so
+ * the caller can tell 404, 403 and 412 apart without reading it first.
+ * `recipes.version` is bumped by a trigger on every change to an editable
+ * column (o-add-recipe-version migration), whichever path writes it.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { RECIPE_FIELDS } from '../validations/recipeSchema.js';
+
+// Columns a PUT may change; admins may also reassign the author
+export const EDITABLE_FIELDS = [
+    'title', 'description', 'ingredients', 'instructions', 'anecdote',
+    'difficulty', 'prep_time', 'cook_time', 'image_url', 'category_id', 'media_id'
+];
+const ADMIN_EDITABLE_FIELDS = [...EDITABLE_FIELDS, 'user_id'];
+
+const COLUMNS = RECIPE_FIELDS.map(field => `"${field}"`).join(', ');
+
+// "3" or "3-<hash>" (the detail ETag); weak tags never match an If-Match
+const IF_MATCH_VERSION = /^"(\d+)(?:-[\w-]*)?"$/;
+
+export class RecipeWriteError extends Error {
+    /**
+     * @param {number} status - 404, 403, 412, or 400 for an unknown category, media or author
+     * @param {string} message
+     * @param {Object} [current] - The row as it stands (412)
+     */
+    constructor(status, message, current = null) {
+        super(message);
+        this.name = 'RecipeWriteError';
+        this.status = status;
+        this.current = current;
+    }
+}
+
+/**
+ * Strong ETag of a recipe version
+ * @param {number} version
+ * @returns {string}
+ */
+export const versionEtag = (version) => `"${version}"`;
+
+/**
+ * Version an If-Match header asks for: null when absent or "*" (any
+ * version), NaN when it can never match
+ * @param {string} [header]
+ * @returns {number|null}
+ */
+export function parseIfMatch(header) {
+    if (!header || header.trim() === '*') {
+        return null;
+    }
+    const versions = header.split(',').map(tag => IF_MATCH_VERSION.exec(tag.trim())?.[1]).filter(Boolean);
+    // Several tags: any of them may match, the statement takes the first
+    return versions.length > 0 ? Number(versions[0]) : Number.NaN;
+}
+
+/**
+ * Turn the row returned instead of a write into the reason it was refused
+ */
+function refusal(row, { user, expectedVersion }, action) {
+    if (!row) {
+        return new RecipeWriteError(404, 'Recipe not found');
+    }
+    if (row.user_id !== user.id && user.role !== 'admin') {
+        return new RecipeWriteError(403, `Not authorized to ${action} this recipe`);
+    }
+    return new RecipeWriteError(
+        412,
+        Number.isNaN(expectedVersion)
+            ? 'If-Match does not name a version of this recipe'
+            : 'This recipe was changed since you loaded it',
+        row
+    );
+}
+
+const writeReplacements = (id, { user, expectedVersion }) => ({
+    id,
+    userId: user.id,
+    isAdmin: user.role === 'admin',
+    // NaN (unmatchable tag) becomes a version no row has
+    expected: Number.isNaN(expectedVersion) ? -1 : expectedVersion
+});
+
+/**
+ * UPDATE ... RETURNING for the editable columns present in changes
+ * @param {number} id
+ * @param {Object} changes - Request body
+ * @param {Object} options
+ * @param {Object} options.user - { id, role }
+ * @param {number|null} [options.expectedVersion] - From parseIfMatch
+ * @returns {Promise<Object>} - The updated row
+ * @throws {RecipeWriteError}
+ */
+export async function updateRecipeChecked(id, changes, { user, expectedVersion = null }) {
+    const fields = (user.role === 'admin' ? ADMIN_EDITABLE_FIELDS : EDITABLE_FIELDS)
+        .filter(field => changes[field] !== undefined);
+    const replacements = writeReplacements(id, { user, expectedVersion });
+    fields.forEach((field) => {
+        replacements[`set_${field}`] = changes[field] === '' && field.endsWith('_id') ? null : changes[field];
+    });
+    const assignments = [...fields.map(field => `"${field}" = :set_${field}`), 'updated_at = now()'].join(', ');
+
+    let row;
+    try {
+        [row] = await db.sequelize.query(`
+        WITH updated AS (
+            UPDATE recipes SET ${assignments}
+            WHERE id = :id
+              AND (user_id = :userId OR :isAdmin)
+              AND (:expected::int IS NULL OR version = :expected)
+            RETURNING ${COLUMNS}
+        )
+        SELECT *, TRUE AS written FROM updated
+        UNION ALL
+        SELECT ${COLUMNS}, FALSE FROM recipes
+        WHERE id = :id AND NOT EXISTS (SELECT 1 FROM updated)`, {
+            replacements,
+            type: QueryTypes.SELECT
+        });
+    } catch (error) {
+        // foreign_key_violation: validated ids can still name a deleted row
+        if ((error.parent ?? error).code === '23503') {
+            const field = /Key \((\w+)\)/.exec(error.parent?.detail ?? '')?.[1];
+            throw new RecipeWriteError(400, field ? `Unknown ${field}` : 'Unknown category, media or author');
+        }
+        throw error;
+    }
+
+    if (!row?.written) {
+        throw refusal(row, { user, expectedVersion }, 'update');
+    }
+    delete row.written;
+    return row;
+}
+
+/**
+ * DELETE ... RETURNING
+ * @param {number} id
+ * @param {Object} options - As for updateRecipeChecked
+ * @returns {Promise<{ id: number }>}
+ * @throws {RecipeWriteError}
+ */
+export async function deleteRecipeChecked(id, { user, expectedVersion = null }) {
+    const [row] = await db.sequelize.query(`
+        WITH deleted AS (
+            DELETE FROM recipes
+            WHERE id = :id
+              AND (user_id = :userId OR :isAdmin)
+              AND (:expected::int IS NULL OR version = :expected)
+            RETURNING ${COLUMNS}
+        )
+        SELECT *, TRUE AS written FROM deleted
+        UNION ALL
+        SELECT ${COLUMNS}, FALSE FROM recipes
+        WHERE id = :id AND NOT EXISTS (SELECT 1 FROM deleted)`, {
+        replacements: writeReplacements(id, { user, expectedVersion }),
+        type: QueryTypes.SELECT
+    });
+
+    if (!row?.written) {
+        throw refusal(row, { user, expectedVersion }, 'delete');
+    }
+    return { id: row.id };
+}
+
+export default {
+    updateRecipeChecked,
+    deleteRecipeChecked,
+    parseIfMatch,
+    versionEtag
+};
@@ -0,0 +1,97 @@
+/**
+ * Reference Data - In-memory copy of the categories and media tables
+ *
+ * Both tables are tiny and read on nearly every page, but only change
+ * through the back-office and media creation. Writers call
+ * invalidateReferenceData(), which drops the local copy and notifies the
+ * other replicas over LISTEN/NOTIFY.
+ */
+
+import db from '../models/index.js';
+import { Cache } from '../utils/cache.js';
+import { listen, notify } from './pgNotifier.js';
+
+const { Category, Media } = db;
+
+const CHANNEL = 'reference_data';
+
+const loaders = {
+    categories: () => Category.findAll({ order: [['id', 'ASC']], raw: true }),
+    media: () => Media.findAll({ order: [['id', 'ASC']], raw: true })
+};
+
+// Invalidation is explicit; the TTL only bounds staleness if a notification is lost
+const cache = new Cache({ name: 'reference_data', maxEntries: 10, ttlMs: 10 * 60 * 1000 });
+
+const load = (kind) => cache.wrap(kind, async () => {
+    const rows = await loaders[kind]();
+    return { list: rows, byId: new Map(rows.map(row => [row.id, row])) };
+});
+
+/**
+ * All categories, ordered by id
+ * @returns {Promise<Array<Object>>}
+ */
+export async function getCategories() {
+    return (await load('categories')).list;
+}
+
+/**
+ * All media, ordered by id
+ * @returns {Promise<Array<Object>>}
+ */
+export async function getMedia() {
+    return (await load('media')).list;
+}
+
+/**
+ * Categories keyed by id
+ * @returns {Promise<Map<number, Object>>}
+ */
+export async function getCategoryMap() {
+    return (await load('categories')).byId;
+}
+
+/**
+ * Media keyed by id
+ * @returns {Promise<Map<number, Object>>}
+ */
+export async function getMediaMap() {
+    return (await load('media')).byId;
+}
+
+/**
+ * Drop cached rows after a write, here and on every other replica
+ * @param {string} kind - 'categories' or 'media'
+ */
+export async function invalidateReferenceData(kind) {
+    cache.delete(kind);
+    try {
+        await notify(CHANNEL, kind);
+    } catch (error) {
+        console.warn(`Reference data invalidation not broadcast: ${error.message}`);
+    }
+}
+
+/**
+ * Warm the cache and subscribe to invalidations from other replicas
+ */
+export async function startReferenceData() {
+    await Promise.all([load('categories'), load('media')]);
+    await listen(CHANNEL, (kind) => {
+        if (loaders[kind]) {
+            cache.delete(kind);
+        } else {
+            cache.clear();
+        }
+    });
+}
+
+export default {
+    getCategories,
+    getMedia,
+    getCategoryMap,
+    getMediaMap,
+    invalidateReferenceData,
+    startReferenceData
+};
@@ -0,0 +1,398 @@
+/**
+ * Similarity Service - Precomputed "more like this" lists
+ *
+ * Every recipe has a TF-IDF vector (recipe_features) and a list of its K
+ * most similar recipes by cosine similarity (recipe_neighbors), both built
+ * by the SQL functions of the n-create-recipe-similarity migration. Reads
+ * are one index range scan of K rows.
+ *
+ * Writes keep the lists current incrementally. Triggers on recipes (the
+ * q-create-similarity-queue migration) queue every change, whatever wrote
+ * it: a created or edited recipe gets its vector and list refreshed and is
+ * inserted into the lists it now belongs to; after a delete, the lists
+ * that contained it are recomputed. The queue is a table, so work survives
+ * restarts, and one worker of the cluster applies it at a time, off the
+ * request path, woken by NOTIFY. A rebuild recomputes everything,
+ * including the norms that drift as document frequencies change.
+ */
+
+import pg from 'pg';
+import { QueryTypes } from 'sequelize';
+import config from '../config/config.js';
+import db from '../models/index.js';
+import { listen } from './pgNotifier.js';
+
+export const SIMILAR_K = Number.parseInt(process.env.SIMILAR_RECIPES_K, 10) || 12;
+const INCREMENTAL = process.env.SIMILARITY_UPDATES !== 'false';
+
+const env = process.env.NODE_ENV || 'development';
+const dbConfig = config[env];
+
+const CHANNEL = 'similarity_queue';
+const FEATURE_BATCH = 5000;
+const NEIGHBOR_BATCH = 200;
+const REBUILD_CONCURRENCY = Number.parseInt(process.env.SIMILARITY_REBUILD_CONCURRENCY, 10) || 2;
+// Entries failing this often stay queued, untouched, until the next rebuild
+const MAX_ATTEMPTS = 5;
+// Check the queue again after finding it locked by another worker or a rebuild
+const RETRY_MS = 5000;
+// How long a rebuild waits for a batch of queued updates to finish
+const REBUILD_LOCK_TIMEOUT = '30s';
+// Per-statement limit for rebuild batches, above the pool's DB_STATEMENT_TIMEOUT_MS
+const REBUILD_STATEMENT_TIMEOUT_MS = Number.parseInt(process.env.SIMILARITY_REBUILD_STATEMENT_TIMEOUT_MS, 10)
+    || 10 * 60 * 1000;
+
+// Advisory lock keys (pg_locks classid, objid). A rebuild holds REBUILD
+// exclusively for its whole run; each batch of queued updates holds it
+// shared, and DRAIN exclusively, for its transaction.
+const LOCK_SPACE = 2021;
+const REBUILD_LOCK = 1;
+const DRAIN_LOCK = 2;
+
+let draining = null;
+let retryTimer = null;
+let stopped = false;
+let rebuilding = null;
+let lastRebuild = null;
+const counts = { refreshed: 0, recomputed: 0, failed: 0 };
+
+export class RebuildRunningError extends Error {
+    constructor() {
+        super('A similarity rebuild is already running');
+        this.name = 'RebuildRunningError';
+        this.status = 409;
+    }
+}
+
+async function mapConcurrent(items, limit, fn) {
+    let next = 0;
+    const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+        while (next < items.length) {
+            await fn(items[next++]);
+        }
+    });
+    await Promise.all(workers);
+}
+
+const chunk = (items, size) => Array.from(
+    { length: Math.ceil(items.length / size) },
+    (_, index) => items.slice(index * size, (index + 1) * size)
+);
+
+/**
+ * The most similar recipes, best first
+ * @param {number} id
+ * @param {Object} options
+ * @param {string[]} options.fields - Recipe columns to return
+ * @param {number} [options.limit]
+ * @returns {Promise<Array<Object>>} - Recipe rows with their `score`
+ */
+export async function getSimilarRecipes(id, { fields, limit = SIMILAR_K }) {
+    // fields are checked against RECIPE_FIELDS by the caller
+    const columns = fields.map(field => `r.${field}`).join(', ');
+    return db.sequelize.query(`
+        SELECT ${columns}, n.score
+        FROM recipe_neighbors n
+        JOIN recipes r ON r.id = n.neighbor_id
+        WHERE n.recipe_id = :id
+        ORDER BY n.score DESC, n.neighbor_id
+        LIMIT :limit`, {
+        // On the primary, where the route's ETag versions are read
+        replacements: { id, limit },
+        type: QueryTypes.SELECT
+    });
+}
+
+/**
+ * Take queued entries of one action, oldest first
+ * @returns {Promise<number[]>}
+ */
+async function claim(transaction, action, limit) {
+    const rows = await db.sequelize.query(`
+        DELETE FROM similarity_queue
+        WHERE recipe_id IN (
+            SELECT recipe_id FROM similarity_queue
+            WHERE action = :action AND attempts < :maxAttempts
+            ORDER BY queued_at
+            LIMIT :limit
+        )
+        RETURNING recipe_id`, {
+        replacements: { action, limit, maxAttempts: MAX_ATTEMPTS },
+        type: QueryTypes.SELECT,
+        transaction
+    });
+    return rows.map(row => row.recipe_id);
+}
+
+/**
+ * Apply one batch in a transaction: recomputes first, NEIGHBOR_BATCH
+ * lists per statement, then refreshes one at a time. Failed work is
+ * rolled back into the queue.
+ * @param {Function} onClaim - Receives the claimed recipe ids
+ * @returns {Promise<boolean|null>} - false once the queue is empty, null
+ *   when another worker or a rebuild holds the lock
+ */
+function applyBatch(onClaim) {
+    return db.sequelize.transaction(async (transaction) => {
+        const [{ locked }] = await db.sequelize.query(`
+            SELECT pg_try_advisory_xact_lock_shared(:space, :rebuild)
+               AND pg_try_advisory_xact_lock(:space, :drain) AS locked`, {
+            replacements: { space: LOCK_SPACE, rebuild: REBUILD_LOCK, drain: DRAIN_LOCK },
+            type: QueryTypes.SELECT,
+            transaction
+        });
+        if (!locked) {
+            return null;
+        }
+
+        const recompute = await claim(transaction, 'recompute', NEIGHBOR_BATCH);
+        if (recompute.length > 0) {
+            onClaim(recompute);
+            await db.sequelize.query('SELECT recompute_recipe_neighbors(ARRAY[:ids]::int[], :k)', {
+                replacements: { ids: recompute, k: SIMILAR_K },
+                transaction
+            });
+            counts.recomputed += recompute.length;
+            return true;
+        }
+
+        const [id] = await claim(transaction, 'refresh', 1);
+        if (id === undefined) {
+            return false;
+        }
+        onClaim([id]);
+        // A no-op for a recipe deleted in the meantime
+        await db.sequelize.query(
+            'SELECT refresh_recipe_neighbors(id, :k) FROM recipes WHERE id = :id',
+            { replacements: { id, k: SIMILAR_K }, transaction }
+        );
+        counts.refreshed++;
+        return true;
+    });
+}
+
+function retryLater() {
+    if (retryTimer || stopped) {
+        return;
+    }
+    retryTimer = setTimeout(() => {
+        retryTimer = null;
+        kick();
+    }, RETRY_MS);
+    retryTimer.unref?.();
+}
+
+async function drain() {
+    while (!stopped && !rebuilding) {
+        let claimed = [];
+        try {
+            const applied = await applyBatch((ids) => {
+                claimed = ids;
+            });
+            if (applied === null) {
+                retryLater();
+            }
+            if (!applied) {
+                return;
+            }
+        } catch (error) {
+            counts.failed++;
+            console.warn(`[similar] update of ${claimed.length || 'queued'} recipes failed:`, error.message);
+            if (claimed.length === 0) {
+                retryLater();
+                return;
+            }
+            // Back of the queue; given up on after MAX_ATTEMPTS
+            await db.sequelize.query(`
+                UPDATE similarity_queue SET attempts = attempts + 1, queued_at = now()
+                WHERE recipe_id IN (:ids)`, {
+                replacements: { ids: claimed }
+            }).catch(() => {});
+        }
+    }
+}
+
+function kick() {
+    if (!INCREMENTAL || stopped || draining || rebuilding) {
+        return;
+    }
+    draining = drain().finally(() => {
+        draining = null;
+    });
+}
+
+/**
+ * Apply queued updates now and whenever a write queues more (NOTIFY from
+ * the queue triggers, in any process)
+ */
+export async function startSimilarityUpdates() {
+    stopped = false;
+    if (!INCREMENTAL) {
+        return;
+    }
+    // A null payload follows a listener reconnect: check the queue anyway
+    await listen(CHANNEL, () => kick());
+    kick();
+}
+
+/**
+ * Stop taking queued work; resolves once the batch in progress is done
+ */
+export async function stopSimilarityUpdates() {
+    stopped = true;
+    clearTimeout(retryTimer);
+    retryTimer = null;
+    await flushSimilarityUpdates();
+}
+
+/**
+ * Resolves once the queue drain in progress, if any, is done
+ */
+export async function flushSimilarityUpdates() {
+    while (draining) {
+        await draining;
+    }
+}
+
+async function timed(timings, phase, fn) {
+    const started = performance.now();
+    await fn();
+    timings[phase] = Math.round(performance.now() - started);
+}
+
+// One rebuild statement in a transaction of its own, with the rebuild's timeout
+const rebuildQuery = (sql, options = {}) => db.sequelize.transaction(async transaction => {
+    await db.sequelize.query(`SET LOCAL statement_timeout = ${REBUILD_STATEMENT_TIMEOUT_MS}`, { transaction });
+    return db.sequelize.query(sql, { ...options, transaction });
+});
+
+async function runRebuild({ concurrency }) {
+    const timings = {};
+    // Everything is recomputed: earlier queued work is moot, later writes queue again
+    await rebuildQuery('DELETE FROM similarity_queue');
+    const ids = (await rebuildQuery('SELECT id FROM recipes ORDER BY id', { type: QueryTypes.SELECT }))
+        .map(row => row.id);
+
+    // Norms need every document frequency, so all features come first
+    await timed(timings, 'features_ms', async () => {
+        await rebuildQuery('TRUNCATE recipe_features');
+        await rebuildQuery('TRUNCATE feature_stats');
+        for (const batch of chunk(ids, FEATURE_BATCH)) {
+            await rebuildQuery('SELECT refresh_recipe_features(ARRAY[:batch]::int[])', {
+                replacements: { batch }
+            });
+        }
+    });
+    await timed(timings, 'norms_ms', async () => {
+        for (const batch of chunk(ids, FEATURE_BATCH)) {
+            await rebuildQuery('SELECT refresh_recipe_norms(ARRAY[:batch]::int[])', {
+                replacements: { batch }
+            });
+        }
+        await rebuildQuery('ANALYZE recipe_features, feature_stats, recipe_vectors');
+    });
+    // Each batch replaces its own lists, so reads keep being served
+    await timed(timings, 'neighbors_ms', async () => {
+        await mapConcurrent(chunk(ids, NEIGHBOR_BATCH), concurrency, batch =>
+            rebuildQuery('SELECT recompute_recipe_neighbors(ARRAY[:batch]::int[], :k)', {
+                replacements: { batch, k: SIMILAR_K }
+            }));
+    });
+
+    timings.total_ms = timings.features_ms + timings.norms_ms + timings.neighbors_ms;
+    return { recipes: ids.length, k: SIMILAR_K, ...timings };
+}
+
+/**
+ * Run fn holding the rebuild lock, on a connection of its own: ending it
+ * releases the lock even if this process dies mid-rebuild
+ */
+async function withRebuildLock(fn) {
+    const client = new pg.Client({
+        connectionString: dbConfig.url,
+        ssl: dbConfig.dialectOptions?.ssl
+    });
+    await client.connect();
+    try {
+        await client.query(`SET lock_timeout = '${REBUILD_LOCK_TIMEOUT}'`);
+        try {
+            await client.query('SELECT pg_advisory_lock($1, $2)', [LOCK_SPACE, REBUILD_LOCK]);
+        } catch (error) {
+            // lock_not_available: another worker or replica is rebuilding
+            throw error.code === '55P03' ? new RebuildRunningError() : error;
+        }
+        return await fn();
+    } finally {
+        await client.end().catch(() => {});
+    }
+}
+
+/**
+ * Recompute every vector and list, in this process. Queued updates wait
+ * meanwhile, in every process, and run once the rebuild is done.
+ * @param {Object} [options]
+ * @param {number} [options.concurrency] - Neighbour batches in flight
+ * @returns {Promise<Object>} - Recipe count and per-phase timings
+ * @throws {RebuildRunningError}
+ */
+export async function rebuildSimilarity({ concurrency = REBUILD_CONCURRENCY } = {}) {
+    if (rebuilding) {
+        throw new RebuildRunningError();
+    }
+    const startedAt = new Date().toISOString();
+    rebuilding = (async () => {
+        await flushSimilarityUpdates();
+        return withRebuildLock(() => runRebuild({ concurrency }));
+    })();
+
+    try {
+        const result = await rebuilding;
+        lastRebuild = { started_at: startedAt, status: 'done', ...result };
+        return result;
+    } catch (error) {
+        lastRebuild = { started_at: startedAt, status: 'error', error: error.message };
+        throw error;
+    } finally {
+        rebuilding = null;
+        // Other workers wait for RETRY_MS otherwise
+        db.sequelize.query('SELECT pg_notify(:channel, \'\')', { replacements: { channel: CHANNEL } })
+            .catch(() => {});
+        kick();
+    }
+}
+
+/**
+ * Update queue and rebuild state for monitoring. The queue and whether a
+ * rebuild is running are read from the database, so they cover every
+ * worker; the counters are this process's.
+ */
+export async function getSimilarityStats() {
+    const [state] = await db.sequelize.query(`
+        SELECT (SELECT count(*) FROM similarity_queue)::int AS pending,
+               (SELECT count(*) FROM similarity_queue WHERE attempts >= :maxAttempts)::int AS stuck,
+               EXISTS (
+                   SELECT 1 FROM pg_locks
+                   WHERE locktype = 'advisory' AND classid = :space AND objid = :rebuild
+                     AND objsubid = 2 AND mode = 'ExclusiveLock' AND granted
+               ) AS rebuilding`, {
+        replacements: { maxAttempts: MAX_ATTEMPTS, space: LOCK_SPACE, rebuild: REBUILD_LOCK },
+        type: QueryTypes.SELECT
+    });
+    return {
+        k: SIMILAR_K,
+        incremental: INCREMENTAL,
+        rebuilding: rebuilding !== null || Boolean(state?.rebuilding),
+        pending: state?.pending ?? 0,
+        stuck: state?.stuck ?? 0,
+        ...counts,
+        last_rebuild: lastRebuild
+    };
+}
+
+export default {
+    getSimilarRecipes,
+    startSimilarityUpdates,
+    stopSimilarityUpdates,
+    rebuildSimilarity,
+    getSimilarityStats
+};
@@ -0,0 +1,163 @@
+/**
+ * Stats Service - Back-office dashboard aggregates
+ *
+ * Everything is read from stat_counters and stat_daily, which statement
+ * triggers keep in step with recipes, users, categories and media (see the
+ * k-create-stat-counters migration). Reads touch a handful of counter rows
+ * and one row per day of the requested window, never the source tables, so
+ * the dashboard costs the same at a hundred recipes or ten million.
+ */
+
+import { QueryTypes } from 'sequelize';
+import db from '../models/index.js';
+import { READ_REPLICA } from '../utils/replica.js';
+
+export const SERIES_BUCKETS = {
+    day: '1 day',
+    week: '1 week',
+    month: '1 month'
+};
+export const MAX_SERIES_DAYS = 366;
+const TOP_LIMIT = 10;
+// A rebuild scans every source table, past the pool's DB_STATEMENT_TIMEOUT_MS
+const REBUILD_STATEMENT_TIMEOUT_MS = Number.parseInt(process.env.STATS_REBUILD_STATEMENT_TIMEOUT_MS, 10)
+    || 5 * 60 * 1000;
+
+const TOTALS = ['recipes', 'users', 'categories', 'media'];
+const BREAKDOWNS = {
+    difficulty: 'recipes_by_difficulty',
+    roles: 'users_by_role',
+    media_types: 'media_by_type'
+};
+
+// Top-N per dimension, joined to the row it counts once the N are picked
+const RANKINGS = {
+    categories: { metric: 'recipes_by_category', table: 'categories', label: 'name' },
+    media: { metric: 'recipes_by_media', table: 'media', label: 'title' },
+    authors: { metric: 'recipes_by_author', table: 'users', label: 'username' }
+};
+
+const select = (sql, replacements, source = READ_REPLICA) => db.sequelize.query(sql, {
+    ...source,
+    replacements,
+    type: QueryTypes.SELECT
+});
+
+async function readCounters(source) {
+    const metrics = [...TOTALS, ...Object.values(BREAKDOWNS)];
+    const rows = await select(
+        'SELECT metric, dimension, value FROM stat_counters WHERE metric IN (:metrics) AND value <> 0',
+        { metrics },
+        source
+    );
+
+    const totals = Object.fromEntries(TOTALS.map(metric => [metric, 0]));
+    const breakdown = Object.fromEntries(Object.keys(BREAKDOWNS).map(name => [name, {}]));
+    const names = Object.fromEntries(Object.entries(BREAKDOWNS).map(([name, metric]) => [metric, name]));
+
+    for (const { metric, dimension, value } of rows) {
+        if (names[metric]) {
+            breakdown[names[metric]][dimension] = Number(value);
+        } else {
+            totals[metric] = Number(value);
+        }
+    }
+    return { totals, breakdown };
+}
+
+async function readRanking({ metric, table, label }, limit, source) {
+    // 'none' (recipes without a category or media) has no row to join
+    const rows = await select(
+        `WITH top AS (
+            SELECT dimension, value FROM stat_counters
+            WHERE metric = :metric AND value > 0
+            ORDER BY value DESC, dimension
+            LIMIT :limit
+         )
+         SELECT t.id, t."${label}" AS label, top.value
+         FROM top LEFT JOIN "${table}" t ON t.id = NULLIF(top.dimension, 'none')::integer
+         ORDER BY top.value DESC, top.dimension`,
+        { metric, limit },
+        source
+    );
+    return rows.map(row => ({ id: row.id, [label]: row.label, count: Number(row.value) }));
+}
+
+/**
+ * New recipes and users per bucket over the last `days` days; empty
+ * buckets are included as zeros
+ * @param {Object} options
+ * @param {number} options.days
+ * @param {string} options.bucket - Key of SERIES_BUCKETS
+ * @param {Object} [source] - Query options picking the connection, the replica by default
+ * @returns {Promise<Array<{ date: string, recipes: number, users: number }>>}
+ */
+export async function readSeries({ days, bucket }, source) {
+    const rows = await select(
+        `WITH window_bounds AS (
+            SELECT CURRENT_DATE - CAST(:days AS integer) + 1 AS first_day, CURRENT_DATE AS last_day
+         )
+         SELECT to_char(b.bucket, 'YYYY-MM-DD') AS date,
+                COALESCE(SUM(d.value) FILTER (WHERE d.metric = 'recipes_created'), 0) AS recipes,
+                COALESCE(SUM(d.value) FILTER (WHERE d.metric = 'users_created'), 0) AS users
+         FROM window_bounds w
+         CROSS JOIN generate_series(
+            date_trunc(:bucket, w.first_day::timestamp),
+            date_trunc(:bucket, w.last_day::timestamp),
+            CAST(:step AS interval)
+         ) AS b(bucket)
+         LEFT JOIN stat_daily d
+            ON d.metric IN ('recipes_created', 'users_created')
+           AND d.day BETWEEN w.first_day AND w.last_day
+           AND d.day >= b.bucket AND d.day < b.bucket + CAST(:step AS interval)
+         GROUP BY b.bucket
+         ORDER BY b.bucket`,
+        { days, bucket, step: SERIES_BUCKETS[bucket] },
+        source
+    );
+    return rows.map(row => ({ date: row.date, recipes: Number(row.recipes), users: Number(row.users) }));
+}
+
+/**
+ * Dashboard statistics
+ * @param {Object} [options]
+ * @param {number} [options.days] - Series window
+ * @param {string} [options.bucket] - 'day', 'week' or 'month'
+ * @param {Object} [source] - Query options picking the connection, the replica by default
+ * @returns {Promise<Object>} - Totals (recipes, users, categories, media),
+ *   breakdown, top lists and series
+ */
+export async function getDashboardStats({ days = 30, bucket = 'day' } = {}, source = READ_REPLICA) {
+    const rankings = Object.entries(RANKINGS);
+    const [{ totals, breakdown }, points, ...ranked] = await Promise.all([
+        readCounters(source),
+        readSeries({ days, bucket }, source),
+        ...rankings.map(([, ranking]) => readRanking(ranking, TOP_LIMIT, source))
+    ]);
+
+    return {
+        ...totals,
+        breakdown,
+        top: Object.fromEntries(rankings.map(([name], index) => [name, ranked[index]])),
+        series: { bucket, days, points }
+    };
+}
+
+/**
+ * Recompute the counters from the source tables (repairs drift after
+ * manual SQL with triggers disabled, restores, ...)
+ * @returns {Promise<Object>} - Dashboard statistics, read back from the
+ *   primary so a lagging replica cannot answer with the old counters
+ */
+export async function rebuildStats() {
+    await db.sequelize.transaction(async transaction => {
+        await db.sequelize.query(`SET LOCAL statement_timeout = ${REBUILD_STATEMENT_TIMEOUT_MS}`, { transaction });
+        await db.sequelize.query('SELECT rebuild_stat_counters()', { transaction });
+    });
+    return getDashboardStats({}, { useMaster: true });
+}
+
+export default {
+    getDashboardStats,
+    rebuildStats
+};
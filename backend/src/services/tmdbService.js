@@ -2,32 +2,101 @@
  * TMDB Service - Handles communication with The Movie Database API
  */
 
-const TMDB_BASE_URL = 'https://api.themoviedb.org/3';
+import { Cache } from '../utils/cache.js';
+import { createPostgresStore } from './cacheStore.js';
+import { HttpClient, withSignal } from './httpClient.js';
+
+const TMDB_BASE_URL = process.env.TMDB_API_URL || 'https://api.themoviedb.org/3';
 const TMDB_IMAGE_BASE = 'https://image.tmdb.org/t/p/w500';
+const TMDB_LANGUAGE = 'fr-FR';
+
+const CACHE_TTL_MS = (Number.parseInt(process.env.TMDB_CACHE_TTL_SECONDS, 10) || 3600) * 1000;
+const CACHE_MAX_ENTRIES = Number.parseInt(process.env.TMDB_CACHE_MAX_ENTRIES, 10) || 1000;
+const useSharedStore = process.env.TMDB_CACHE_STORE === 'postgres';
+// While TMDB is failing, expired entries keep being served for up to a day
+const STALE_IF_ERROR_MS = 24 * 60 * 60 * 1000;
+
+const tmdbClient = new HttpClient({
+    name: 'tmdb',
+    connectTimeoutMs: 3000,
+    headersTimeoutMs: Number.parseInt(process.env.TMDB_TIMEOUT_MS, 10) || 5000,
+    bodyTimeoutMs: 10 * 1000,
+    retries: 2
+});
+
+const searchCache = new Cache({
+    name: 'tmdb_search',
+    maxEntries: CACHE_MAX_ENTRIES,
+    ttlMs: CACHE_TTL_MS,
+    staleMs: CACHE_TTL_MS,
+    staleIfErrorMs: STALE_IF_ERROR_MS,
+    store: useSharedStore ? createPostgresStore('tmdb_search') : null
+});
+
+// Details change rarely, keep them four times longer than search results
+const detailsCache = new Cache({
+    name: 'tmdb_details',
+    maxEntries: CACHE_MAX_ENTRIES,
+    ttlMs: CACHE_TTL_MS * 4,
+    staleMs: CACHE_TTL_MS * 4,
+    staleIfErrorMs: STALE_IF_ERROR_MS,
+    store: useSharedStore ? createPostgresStore('tmdb_details') : null
+});
+
+/**
+ * Normalise a search term so equivalent queries share a cache entry
+ * @param {string} query
+ * @returns {string}
+ */
+function normalizeQuery(query) {
+    return query.normalize('NFKC').trim().toLowerCase().replace(/\s+/g, ' ');
+}
+
+/**
+ * GET a TMDB endpoint and parse the JSON body
+ * @param {string} url
+ * @param {string} operation - Metrics label
+ * @returns {Promise<Object>}
+ */
+async function fetchJson(url, operation) {
+    const response = await tmdbClient.request(url, { operation });
+
+    if (!response.ok) {
+        response.discard();
+        const error = new Error(`TMDB API error: ${response.status}`);
+        error.status = response.status;
+        throw error;
+    }
+
+    return response.json();
+}
 
 /**
  * Search for movies/series on TMDB
  * @param {string} query - Search term
  * @param {string} type - 'movie' or 'tv' (default: 'movie')
+ * @param {Object} [options]
+ * @param {AbortSignal} [options.signal] - Stop waiting when the client goes away
  * @returns {Promise<Array>} - Array of search results
  */
-export async function searchMedia(query, type = 'movie') {
+export async function searchMedia(query, type = 'movie', { signal } = {}) {
     const apiKey = process.env.TMDB_API_KEY;
 
     if (!apiKey) {
         throw new Error('TMDB_API_KEY is not configured');
     }
 
-    const endpoint = type === 'tv' ? 'search/tv' : 'search/movie';
-    const url = `${TMDB_BASE_URL}/${endpoint}?api_key=${apiKey}&query=${encodeURIComponent(query)}&language=fr-FR`;
-
-    const response = await fetch(url);
+    const normalized = normalizeQuery(query);
+    const key = `${type}:${TMDB_LANGUAGE}:${normalized}`;
+    // The shared load is not cancelled: other callers and the cache still want it
+    return withSignal(searchCache.wrap(key, () => fetchSearch(normalized, type, apiKey)), signal);
+}
 
-    if (!response.ok) {
-        throw new Error(`TMDB API error: ${response.status}`);
-    }
+async function fetchSearch(query, type, apiKey) {
+    const endpoint = type === 'tv' ? 'search/tv' : 'search/movie';
+    const url = `${TMDB_BASE_URL}/${endpoint}?api_key=${apiKey}&query=${encodeURIComponent(query)}&language=${TMDB_LANGUAGE}`;
 
-    const data = await response.json();
+    const data = await fetchJson(url, 'search');
 
     // Transform results to our format
     return data.results.slice(0, 12).map(item => ({
@@ -44,25 +113,26 @@ export async function searchMedia(query, type = 'movie') {
  * Get movie/series details including IMDB ID
  * @param {number} tmdbId - TMDB ID
  * @param {string} type - 'movie' or 'tv'
+ * @param {Object} [options]
+ * @param {AbortSignal} [options.signal] - Stop waiting when the client goes away
  * @returns {Promise<Object>} - Media details with IMDB ID
  */
-export async function getMediaDetails(tmdbId, type = 'movie') {
+export async function getMediaDetails(tmdbId, type = 'movie', { signal } = {}) {
     const apiKey = process.env.TMDB_API_KEY;
 
     if (!apiKey) {
         throw new Error('TMDB_API_KEY is not configured');
     }
 
-    const endpoint = type === 'tv' ? `tv/${tmdbId}` : `movie/${tmdbId}`;
-    const url = `${TMDB_BASE_URL}/${endpoint}?api_key=${apiKey}&language=fr-FR&append_to_response=external_ids`;
-
-    const response = await fetch(url);
+    const key = `${type}:${tmdbId}:${TMDB_LANGUAGE}`;
+    return withSignal(detailsCache.wrap(key, () => fetchDetails(tmdbId, type, apiKey)), signal);
+}
 
-    if (!response.ok) {
-        throw new Error(`TMDB API error: ${response.status}`);
-    }
+async function fetchDetails(tmdbId, type, apiKey) {
+    const endpoint = type === 'tv' ? `tv/${tmdbId}` : `movie/${tmdbId}`;
+    const url = `${TMDB_BASE_URL}/${endpoint}?api_key=${apiKey}&language=${TMDB_LANGUAGE}&append_to_response=external_ids`;
 
-    const item = await response.json();
+    const item = await fetchJson(url, 'details');
 
     return {
         tmdb_id: item.id,
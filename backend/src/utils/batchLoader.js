@@ -0,0 +1,64 @@
+/**
+ * Request-scoped batch loader (DataLoader-style)
+ *
+ * Every load() issued during the same tick is collected and resolved by a
+ * single call to the batch function, e.g. one `WHERE id IN (...)` query.
+ * Results are memoized for the lifetime of the loader (one request).
+ */
+export class BatchLoader {
+    /**
+     * @param {Function} batchFn - async (keys) => Map of key -> value
+     */
+    constructor(batchFn) {
+        this.batchFn = batchFn;
+        this.cache = new Map();
+        this.queue = [];
+    }
+
+    /**
+     * @param {*} key
+     * @returns {Promise<*>} - Value for key, or null when missing
+     */
+    load(key) {
+        if (key === null || key === undefined) {
+            return Promise.resolve(null);
+        }
+        if (this.cache.has(key)) {
+            return this.cache.get(key);
+        }
+
+        const promise = new Promise((resolve, reject) => {
+            this.queue.push({ key, resolve, reject });
+            if (this.queue.length === 1) {
+                process.nextTick(() => this.dispatch());
+            }
+        });
+        this.cache.set(key, promise);
+        return promise;
+    }
+
+    /**
+     * @param {Array} keys
+     * @returns {Promise<Array>} - Values in the order of keys
+     */
+    loadMany(keys) {
+        return Promise.all(keys.map(key => this.load(key)));
+    }
+
+    async dispatch() {
+        const queue = this.queue;
+        this.queue = [];
+
+        try {
+            const results = await this.batchFn(queue.map(item => item.key));
+            for (const { key, resolve } of queue) {
+                resolve(results.get(key) ?? null);
+            }
+        } catch (error) {
+            for (const { key, reject } of queue) {
+                this.cache.delete(key);
+                reject(error);
+            }
+        }
+    }
+}
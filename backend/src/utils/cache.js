@@ -0,0 +1,197 @@
+/**
+ * In-process LRU cache with TTL eviction, stale-while-revalidate,
+ * in-flight request coalescing and an optional shared store tier.
+ *
+ * A shared store is any object exposing:
+ *   get(key) -> Promise<{ value, expiresAt }|undefined>
+ *   set(key, value, expiresAt) -> Promise<void>
+ */
+
+const registry = new Map();
+
+export class Cache {
+    /**
+     * @param {Object} options
+     * @param {string} [options.name] - Registers the cache for getCacheStats()
+     * @param {number} [options.maxEntries] - LRU size bound
+     * @param {number} [options.ttlMs] - Freshness lifetime of an entry
+     * @param {number} [options.staleMs] - Extra time a stale entry may be served while refreshing
+     * @param {number} [options.staleIfErrorMs] - Extra time an expired entry may be served when its reload fails
+     * @param {Object} [options.store] - Optional shared tier
+     */
+    constructor({ name, maxEntries = 500, ttlMs = 60 * 1000, staleMs = 0, staleIfErrorMs = 0, store = null } = {}) {
+        this.name = name;
+        this.maxEntries = maxEntries;
+        this.ttlMs = ttlMs;
+        this.staleMs = staleMs;
+        this.staleIfErrorMs = staleIfErrorMs;
+        this.store = store;
+        this.entries = new Map();
+        this.inflight = new Map();
+        // Bumped on delete/clear so loads started earlier do not store stale values
+        this.generation = 0;
+        this.counters = {
+            hits: 0,
+            misses: 0,
+            stale: 0,
+            shared_hits: 0,
+            coalesced: 0,
+            stale_if_error: 0,
+            evictions: 0,
+            errors: 0
+        };
+
+        if (name) {
+            registry.set(name, this);
+        }
+    }
+
+    /**
+     * Store a value, evicting the least recently used entries past maxEntries
+     */
+    set(key, value, expiresAt = Date.now() + this.ttlMs) {
+        this.entries.delete(key);
+        this.entries.set(key, { value, expiresAt });
+
+        while (this.entries.size > this.maxEntries) {
+            const oldest = this.entries.keys().next().value;
+            this.entries.delete(oldest);
+            this.counters.evictions++;
+        }
+    }
+
+    delete(key) {
+        this.entries.delete(key);
+        this.inflight.delete(key);
+        this.generation++;
+    }
+
+    clear() {
+        this.entries.clear();
+        this.inflight.clear();
+        this.generation++;
+    }
+
+    /**
+     * Return the cached value for key, calling loader on a miss.
+     * Concurrent misses for the same key share a single loader call.
+     * @param {string} key
+     * @param {Function} loader - async () => value
+     * @returns {Promise<*>}
+     */
+    async wrap(key, loader) {
+        const now = Date.now();
+        const entry = this.entries.get(key);
+
+        if (entry && entry.expiresAt > now) {
+            this.counters.hits++;
+            this.set(key, entry.value, entry.expiresAt);
+            return entry.value;
+        }
+
+        if (entry && entry.expiresAt + this.staleMs > now) {
+            this.counters.stale++;
+            this.load(key, loader, false).catch(() => {
+                this.counters.errors++;
+            });
+            return entry.value;
+        }
+
+        this.counters.misses++;
+        if (entry && entry.expiresAt + this.staleIfErrorMs > now) {
+            // Keep the expired value around as a fallback while the upstream is failing
+            try {
+                return await this.load(key, loader, true);
+            } catch (error) {
+                if (this.entries.get(key) !== entry) {
+                    throw error;
+                }
+                this.counters.stale_if_error++;
+                return entry.value;
+            }
+        }
+
+        if (entry) {
+            this.entries.delete(key);
+        }
+        return this.load(key, loader, true);
+    }
+
+    load(key, loader, checkStore) {
+        const pending = this.inflight.get(key);
+        if (pending) {
+            this.counters.coalesced++;
+            return pending;
+        }
+
+        const generation = this.generation;
+        const promise = (async () => {
+            if (checkStore && this.store) {
+                const shared = await this.readStore(key);
+                if (shared) {
+                    this.counters.shared_hits++;
+                    this.set(key, shared.value, shared.expiresAt);
+                    return shared.value;
+                }
+            }
+
+            const value = await loader();
+            if (generation === this.generation) {
+                const expiresAt = Date.now() + this.ttlMs;
+                this.set(key, value, expiresAt);
+                this.writeStore(key, value, expiresAt);
+            }
+            return value;
+        })().finally(() => {
+            if (this.inflight.get(key) === promise) {
+                this.inflight.delete(key);
+            }
+        });
+
+        this.inflight.set(key, promise);
+        return promise;
+    }
+
+    async readStore(key) {
+        try {
+            const shared = await this.store.get(key);
+            return shared && shared.expiresAt > Date.now() ? shared : undefined;
+        } catch (error) {
+            this.counters.errors++;
+            console.warn(`[cache:${this.name}] shared store read failed: ${error.message}`);
+            return undefined;
+        }
+    }
+
+    writeStore(key, value, expiresAt) {
+        if (!this.store) {
+            return;
+        }
+        // Shared writes never delay the response
+        Promise.resolve()
+            .then(() => this.store.set(key, value, expiresAt))
+            .catch((error) => {
+                this.counters.errors++;
+                console.warn(`[cache:${this.name}] shared store write failed: ${error.message}`);
+            });
+    }
+
+    stats() {
+        const lookups = this.counters.hits + this.counters.stale + this.counters.misses;
+        return {
+            name: this.name,
+            size: this.entries.size,
+            max_entries: this.maxEntries,
+            inflight: this.inflight.size,
+            shared_store: Boolean(this.store),
+            ...this.counters,
+            hit_ratio: lookups === 0 ? 0 : (this.counters.hits + this.counters.stale) / lookups
+        };
+    }
+}
+
+/**
+ * Stats for every named cache
+ * @returns {Array<Object>}
+ */
+export const getCacheStats = () => [...registry.values()].map(cache => cache.stats());
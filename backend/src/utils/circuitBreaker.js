@@ -0,0 +1,114 @@
+/**
+ * Circuit breaker for calls to an upstream service.
+ *
+ * closed    -> calls pass; `failureThreshold` consecutive failures open it
+ * open      -> calls fail fast with CircuitOpenError for `resetTimeoutMs`
+ * half_open -> one trial call; success closes, failure re-opens
+ */
+
+export class CircuitOpenError extends Error {
+    constructor(name, retryAfterMs) {
+        super(`${name} is unavailable (circuit open)`);
+        this.name = 'CircuitOpenError';
+        this.status = 503;
+        this.retryAfterMs = retryAfterMs;
+    }
+}
+
+export class CircuitBreaker {
+    /**
+     * @param {Object} options
+     * @param {string} options.name - Upstream name used in errors and stats
+     * @param {number} [options.failureThreshold] - Consecutive failures before opening
+     * @param {number} [options.resetTimeoutMs] - Time spent open before a trial call
+     */
+    constructor({ name, failureThreshold = 5, resetTimeoutMs = 30 * 1000 }) {
+        this.name = name;
+        this.failureThreshold = failureThreshold;
+        this.resetTimeoutMs = resetTimeoutMs;
+        this.state = 'closed';
+        this.failures = 0;
+        this.openedAt = 0;
+        this.trialInFlight = false;
+        this.counters = { successes: 0, failures: 0, rejected: 0, opened: 0 };
+    }
+
+    /**
+     * Throw CircuitOpenError unless a call may go through now
+     */
+    assertClosed() {
+        if (this.state === 'open') {
+            const remaining = this.openedAt + this.resetTimeoutMs - Date.now();
+            if (remaining > 0) {
+                this.counters.rejected++;
+                throw new CircuitOpenError(this.name, remaining);
+            }
+            this.state = 'half_open';
+        }
+        if (this.state === 'half_open') {
+            if (this.trialInFlight) {
+                this.counters.rejected++;
+                throw new CircuitOpenError(this.name, this.resetTimeoutMs);
+            }
+            this.trialInFlight = true;
+        }
+    }
+
+    onSuccess() {
+        this.counters.successes++;
+        this.failures = 0;
+        this.trialInFlight = false;
+        this.state = 'closed';
+    }
+
+    /**
+     * Give back a trial slot without an outcome (e.g. the caller aborted)
+     */
+    release() {
+        this.trialInFlight = false;
+    }
+
+    onFailure() {
+        this.counters.failures++;
+        this.failures++;
+        this.trialInFlight = false;
+        if (this.state === 'half_open' || this.failures >= this.failureThreshold) {
+            if (this.state !== 'open') {
+                this.counters.opened++;
+            }
+            this.state = 'open';
+            this.openedAt = Date.now();
+        }
+    }
+
+    /**
+     * Run fn under the breaker; isFailure decides which errors count
+     * @param {Function} fn - async () => result
+     * @param {Function} [isFailure] - (error) => boolean
+     */
+    async call(fn, isFailure = () => true) {
+        this.assertClosed();
+        try {
+            const result = await fn();
+            this.onSuccess();
+            return result;
+        } catch (error) {
+            if (isFailure(error)) {
+                this.onFailure();
+            } else {
+                this.onSuccess();
+            }
+            throw error;
+        }
+    }
+
+    stats() {
+        return {
+            name: this.name,
+            state: this.state,
+            consecutive_failures: this.failures,
+            opened_at: this.openedAt ? new Date(this.openedAt).toISOString() : null,
+            ...this.counters
+        };
+    }
+}
@@ -0,0 +1,118 @@
+/**
+ * Streaming CSV (RFC 4180) helpers for bulk export and import
+ *
+ * Parsers consume any async iterable of Buffer/string chunks (an incoming
+ * request, a file stream) and yield one record at a time, so memory stays
+ * bounded by the longest record rather than the upload size.
+ */
+
+/**
+ * Quote a value for CSV when it contains a delimiter, quote or newline
+ * @param {*} value
+ * @returns {string}
+ */
+export function formatCsvValue(value) {
+    if (value === null || value === undefined) {
+        return '';
+    }
+    const text = value instanceof Date ? value.toISOString() : String(value);
+    return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+/**
+ * @param {Array} values
+ * @returns {string} - One CSV line, CRLF terminated
+ */
+export const formatCsvRow = (values) => `${values.map(formatCsvValue).join(',')}\r\n`;
+
+/**
+ * Yield complete lines from a chunked text stream
+ * @param {AsyncIterable<Buffer|string>} source
+ */
+export async function* readLines(source) {
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    for await (const chunk of source) {
+        buffer += typeof chunk === 'string' ? chunk : decoder.decode(chunk, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            yield buffer.slice(0, newline).replace(/\r$/, '');
+            buffer = buffer.slice(newline + 1);
+        }
+    }
+
+    buffer += decoder.decode();
+    if (buffer.length > 0) {
+        yield buffer.replace(/\r$/, '');
+    }
+}
+
+/**
+ * Yield CSV records as arrays of strings; quoted fields may span lines
+ * @param {AsyncIterable<Buffer|string>} source
+ */
+export async function* parseCsv(source) {
+    let record = [];
+    let field = '';
+    let quoted = false;
+
+    for await (const line of readLines(source)) {
+        for (let i = 0; i < line.length; i++) {
+            const char = line[i];
+            if (quoted) {
+                if (char === '"' && line[i + 1] === '"') {
+                    field += '"';
+                    i++;
+                } else if (char === '"') {
+                    quoted = false;
+                } else {
+                    field += char;
+                }
+            } else if (char === '"' && field === '') {
+                quoted = true;
+            } else if (char === ',') {
+                record.push(field);
+                field = '';
+            } else {
+                field += char;
+            }
+        }
+
+        if (quoted) {
+            field += '\n';
+            continue;
+        }
+        record.push(field);
+        if (record.length > 1 || record[0] !== '') {
+            yield record;
+        }
+        record = [];
+        field = '';
+    }
+
+    if (quoted) {
+        throw new Error('Unterminated quoted field at end of CSV');
+    }
+}
+
+/**
+ * Yield CSV rows as objects keyed by the header line; empty cells are omitted
+ * @param {AsyncIterable<Buffer|string>} source
+ */
+export async function* parseCsvObjects(source) {
+    let header = null;
+    for await (const record of parseCsv(source)) {
+        if (!header) {
+            header = record.map(name => name.trim());
+            continue;
+        }
+        const row = {};
+        header.forEach((name, index) => {
+            if (record[index] !== undefined && record[index] !== '') {
+                row[name] = record[index];
+            }
+        });
+        yield row;
+    }
+}
@@ -0,0 +1,189 @@
+/**
+ * Size-bounded LRU cache of files on disk, with in-flight coalescing.
+ *
+ * Each entry is one file named <key>.<etag>.<ext> under a two-character
+ * fan-out directory, where etag is a hash of the file contents. The index
+ * lives in memory and is rebuilt from the directory listing (oldest access
+ * first) the first time the cache is used, so entries survive restarts.
+ * Files are written to a temporary name and renamed into place, so readers
+ * never see a partial file.
+ *
+ * Several processes may share a directory: each keeps its own index and a
+ * file evicted by a sibling is treated as a miss.
+ */
+
+import { createHash, randomUUID } from 'crypto';
+import fs from 'fs/promises';
+import path from 'path';
+
+const ENTRY_NAME = /^([0-9a-f]{64})\.([0-9a-f]{16})\.([a-z0-9]+)$/;
+
+/**
+ * @param {Buffer} data
+ * @returns {string} - Hex digest used as a strong ETag
+ */
+export const contentHash = (data) => createHash('sha256').update(data).digest('hex').slice(0, 16);
+
+/**
+ * @param {string} value
+ * @returns {string} - 64 hex characters, the entry key
+ */
+export const cacheKey = (value) => createHash('sha256').update(value).digest('hex');
+
+export class DiskCache {
+    /**
+     * @param {Object} options
+     * @param {string} options.dir - Cache directory, created on first use
+     * @param {number} [options.maxBytes] - Total size bound
+     */
+    constructor({ dir, maxBytes = 512 * 1024 * 1024 }) {
+        this.dir = dir;
+        this.maxBytes = maxBytes;
+        this.entries = new Map();
+        this.inflight = new Map();
+        this.bytes = 0;
+        this.ready = null;
+        this.counters = { hits: 0, misses: 0, coalesced: 0, evictions: 0, errors: 0 };
+    }
+
+    init() {
+        this.ready ??= this.scan().catch((error) => {
+            this.ready = null;
+            throw error;
+        });
+        return this.ready;
+    }
+
+    async scan() {
+        await fs.mkdir(this.dir, { recursive: true });
+        const found = [];
+        for (const shard of await fs.readdir(this.dir)) {
+            const shardDir = path.join(this.dir, shard);
+            let names;
+            try {
+                names = await fs.readdir(shardDir);
+            } catch {
+                continue;
+            }
+            for (const name of names) {
+                const file = path.join(shardDir, name);
+                const match = ENTRY_NAME.exec(name);
+                const stat = await fs.stat(file).catch(() => null);
+                if (!match) {
+                    // Temporary files left by an interrupted write (recent ones may
+                    // belong to a sibling process writing right now)
+                    if (stat && stat.mtimeMs < Date.now() - 60 * 1000) {
+                        await fs.rm(file, { force: true });
+                    }
+                    continue;
+                }
+                if (stat) {
+                    found.push({ key: match[1], etag: match[2], ext: match[3], file, size: stat.size, atime: stat.atimeMs });
+                }
+            }
+        }
+
+        found.sort((a, b) => a.atime - b.atime);
+        for (const { atime, ...entry } of found) {
+            this.add(entry);
+        }
+        await this.evict();
+    }
+
+    add(entry) {
+        const previous = this.entries.get(entry.key);
+        if (previous) {
+            this.bytes -= previous.size;
+            this.entries.delete(entry.key);
+            if (previous.file !== entry.file) {
+                fs.rm(previous.file, { force: true }).catch(() => {});
+            }
+        }
+        this.entries.set(entry.key, entry);
+        this.bytes += entry.size;
+    }
+
+    async evict() {
+        while (this.bytes > this.maxBytes && this.entries.size > 0) {
+            const [key, entry] = this.entries.entries().next().value;
+            this.entries.delete(key);
+            this.bytes -= entry.size;
+            this.counters.evictions++;
+            await fs.rm(entry.file, { force: true });
+        }
+    }
+
+    /**
+     * Return the cached file for key, calling producer on a miss.
+     * Concurrent misses for the same key share one producer call.
+     * @param {string} key - 64 hex characters (see cacheKey)
+     * @param {Function} producer - async () => { data: Buffer, ext: string }
+     * @returns {Promise<{ file: string, etag: string, ext: string, size: number }>}
+     */
+    async wrap(key, producer) {
+        await this.init();
+
+        const entry = this.entries.get(key);
+        if (entry) {
+            try {
+                await fs.access(entry.file);
+                // Refresh LRU position
+                this.entries.delete(key);
+                this.entries.set(key, entry);
+                this.counters.hits++;
+                return entry;
+            } catch {
+                // Evicted by another process sharing the directory
+                this.entries.delete(key);
+                this.bytes -= entry.size;
+            }
+        }
+
+        if (this.inflight.has(key)) {
+            this.counters.coalesced++;
+            return this.inflight.get(key);
+        }
+
+        this.counters.misses++;
+        const promise = this.store(key, producer).finally(() => this.inflight.delete(key));
+        this.inflight.set(key, promise);
+        return promise;
+    }
+
+    async store(key, producer) {
+        let data;
+        let ext;
+        try {
+            ({ data, ext } = await producer());
+        } catch (error) {
+            this.counters.errors++;
+            throw error;
+        }
+
+        const etag = contentHash(data);
+        const shardDir = path.join(this.dir, key.slice(0, 2));
+        const file = path.join(shardDir, `${key}.${etag}.${ext}`);
+        const temp = path.join(shardDir, `${randomUUID()}.tmp`);
+
+        await fs.mkdir(shardDir, { recursive: true });
+        await fs.writeFile(temp, data);
+        await fs.rename(temp, file);
+
+        const entry = { key, etag, ext, file, size: data.length };
+        this.add(entry);
+        await this.evict();
+        return entry;
+    }
+
+    stats() {
+        return {
+            dir: this.dir,
+            entries: this.entries.size,
+            bytes: this.bytes,
+            max_bytes: this.maxBytes,
+            ...this.counters
+        };
+    }
+}
+
+export default DiskCache;
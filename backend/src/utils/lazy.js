@@ -0,0 +1,47 @@
+/**
+ * Deferred imports for subsystems a cold start does not need: admin
+ * routes, AI generation, password hashing. Each loads on first use, and
+ * preloadLazyModules() warms them all once the server is listening, so
+ * the first request to use one rarely waits for it either.
+ */
+
+const loaders = [];
+
+/**
+ * Memoized dynamic import; a failed import is retried on the next call
+ * @param {Function} load - () => import('...')
+ * @returns {Function} - () => Promise<module>
+ */
+export function lazyModule(load) {
+    let promise = null;
+    const get = () => {
+        promise ??= load().catch((error) => {
+            promise = null;
+            throw error;
+        });
+        return promise;
+    };
+    loaders.push(get);
+    return get;
+}
+
+/**
+ * Express middleware mounting the router a module exports by default,
+ * imported on the first request that reaches it
+ * @param {Function} load - () => import('./someRoutes.js')
+ * @returns {Function}
+ */
+export function lazyRouter(load) {
+    const get = lazyModule(load);
+    return (req, res, next) => {
+        get().then(module => module.default(req, res, next), next);
+    };
+}
+
+/**
+ * Import every lazy module now
+ * @returns {Promise<void>}
+ */
+export async function preloadLazyModules() {
+    await Promise.all(loaders.map(get => get()));
+}
@@ -0,0 +1,208 @@
+/**
+ * Minimal Prometheus client: counters, gauges and histograms rendered in
+ * the text exposition format (version 0.0.4).
+ *
+ * Label values are kept per metric in a Map keyed by the serialized label
+ * set, so callers must keep label cardinality bounded (route templates,
+ * not raw URLs).
+ */
+
+export const CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+// Seconds; covers cache hits (~1ms) up to slow upstream calls
+export const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+const escapeLabel = (value) => String(value)
+    .replace(/\\/g, '\\\\')
+    .replace(/\n/g, '\\n')
+    .replace(/"/g, '\\"');
+
+const formatLabels = (labels) => {
+    const entries = Object.entries(labels);
+    if (entries.length === 0) {
+        return '';
+    }
+    return `{${entries.map(([name, value]) => `${name}="${escapeLabel(value)}"`).join(',')}}`;
+};
+
+const formatValue = (value) => {
+    if (value === Infinity) return '+Inf';
+    if (value === -Infinity) return '-Inf';
+    return String(value);
+};
+
+class Metric {
+    constructor(type, { name, help, labelNames = [] }) {
+        this.type = type;
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.values = new Map();
+    }
+
+    key(labels = {}) {
+        return JSON.stringify(this.labelNames.map(name => labels[name] ?? ''));
+    }
+
+    labelsFor(key) {
+        const values = JSON.parse(key);
+        return Object.fromEntries(this.labelNames.map((name, index) => [name, values[index]]));
+    }
+
+    reset() {
+        this.values.clear();
+    }
+
+    header() {
+        return `# HELP ${this.name} ${this.help}\n# TYPE ${this.name} ${this.type}`;
+    }
+}
+
+export class Counter extends Metric {
+    constructor(options) {
+        super('counter', options);
+    }
+
+    inc(labels = {}, amount = 1) {
+        const key = this.key(labels);
+        this.values.set(key, (this.values.get(key) || 0) + amount);
+    }
+
+    get(labels = {}) {
+        return this.values.get(this.key(labels)) || 0;
+    }
+
+    render() {
+        const lines = [this.header()];
+        for (const [key, value] of this.values) {
+            lines.push(`${this.name}${formatLabels(this.labelsFor(key))} ${formatValue(value)}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+export class Gauge extends Metric {
+    /**
+     * @param {Object} options
+     * @param {Function} [options.collect] - Called before rendering to refresh values
+     */
+    constructor({ collect, ...options }) {
+        super('gauge', options);
+        this.collect = collect;
+    }
+
+    set(labels, value) {
+        if (typeof labels === 'number') {
+            [labels, value] = [{}, labels];
+        }
+        this.values.set(this.key(labels), value);
+    }
+
+    get(labels = {}) {
+        return this.values.get(this.key(labels));
+    }
+
+    render() {
+        if (this.collect) {
+            this.collect(this);
+        }
+        const lines = [this.header()];
+        for (const [key, value] of this.values) {
+            lines.push(`${this.name}${formatLabels(this.labelsFor(key))} ${formatValue(value)}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+export class Histogram extends Metric {
+    constructor({ buckets = DEFAULT_BUCKETS, ...options }) {
+        super('histogram', options);
+        this.buckets = [...buckets].sort((a, b) => a - b);
+    }
+
+    observe(labels, value) {
+        const key = this.key(labels);
+        let series = this.values.get(key);
+        if (!series) {
+            series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+            this.values.set(key, series);
+        }
+        const index = this.buckets.findIndex(bound => value <= bound);
+        if (index !== -1) {
+            series.counts[index]++;
+        }
+        series.sum += value;
+        series.count++;
+    }
+
+    /**
+     * Start a timer; call the returned function with the final labels
+     * @param {Object} [labels]
+     * @returns {Function} - (extraLabels) => seconds elapsed
+     */
+    startTimer(labels = {}) {
+        const start = process.hrtime.bigint();
+        return (extraLabels = {}) => {
+            const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+            this.observe({ ...labels, ...extraLabels }, seconds);
+            return seconds;
+        };
+    }
+
+    get(labels = {}) {
+        return this.values.get(this.key(labels));
+    }
+
+    render() {
+        const lines = [this.header()];
+        for (const [key, series] of this.values) {
+            const labels = this.labelsFor(key);
+            let cumulative = 0;
+            this.buckets.forEach((bound, index) => {
+                cumulative += series.counts[index];
+                lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: formatValue(bound) })} ${cumulative}`);
+            });
+            lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: '+Inf' })} ${series.count}`);
+            lines.push(`${this.name}_sum${formatLabels(labels)} ${series.sum}`);
+            lines.push(`${this.name}_count${formatLabels(labels)} ${series.count}`);
+        }
+        return lines.join('\n');
+    }
+}
+
+export class Registry {
+    constructor() {
+        this.metrics = new Map();
+    }
+
+    register(metric) {
+        if (this.metrics.has(metric.name)) {
+            throw new Error(`Metric ${metric.name} is already registered`);
+        }
+        this.metrics.set(metric.name, metric);
+        return metric;
+    }
+
+    counter(options) {
+        return this.register(new Counter(options));
+    }
+
+    gauge(options) {
+        return this.register(new Gauge(options));
+    }
+
+    histogram(options) {
+        return this.register(new Histogram(options));
+    }
+
+    get(name) {
+        return this.metrics.get(name);
+    }
+
+    /**
+     * @returns {string} - Every metric in the text exposition format
+     */
+    render() {
+        return `${[...this.metrics.values()].map(metric => metric.render()).join('\n')}\n`;
+    }
+}
@@ -0,0 +1,81 @@
+/**
+ * Keyset (cursor) pagination helpers
+ *
+ * Cursors are opaque base64url strings wrapping the sort key of the last
+ * row of a page, here `(created_at, id)`. created_at is kept to the
+ * microsecond: a Date only holds milliseconds, and a cursor cut to them
+ * would skip the rows sharing the last row's millisecond (bulk imports
+ * insert many in one transaction).
+ */
+
+export const DEFAULT_PAGE_SIZE = 20;
+export const MAX_PAGE_SIZE = 100;
+
+// Column alias of the exact timestamp selected with cursorTimestamp()
+export const CURSOR_TIMESTAMP = 'cursor_created_at';
+
+const TIMESTAMP = /^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?Z$/;
+
+/**
+ * SQL rendering a timestamptz column as UTC ISO 8601 with microseconds
+ * @param {string} column
+ * @returns {string}
+ */
+export const cursorTimestamp = column =>
+    `to_char(${column} AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"')`;
+
+/**
+ * Encode the sort key of a row into a cursor
+ * @param {Object} row - Row with id and created_at, or the exact
+ *                       timestamp as CURSOR_TIMESTAMP
+ * @returns {string} cursor
+ */
+export const encodeCursor = (row) => {
+    const createdAt = row[CURSOR_TIMESTAMP] ?? new Date(row.created_at).toISOString();
+    return Buffer.from(JSON.stringify([createdAt, row.id])).toString('base64url');
+};
+
+/**
+ * Decode a cursor produced by encodeCursor
+ * @param {string} cursor
+ * @returns {{ created_at: string, id: number }|null} sort key, created_at
+ *          as ISO 8601 text to compare as timestamptz; null when malformed
+ */
+export const decodeCursor = (cursor) => {
+    try {
+        const [createdAt, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+        if (!TIMESTAMP.test(createdAt) || Number.isNaN(Date.parse(createdAt)) || !Number.isInteger(id)) {
+            return null;
+        }
+        return { created_at: createdAt, id };
+    } catch {
+        return null;
+    }
+};
+
+/**
+ * Clamp a requested page size
+ * @param {string|number} limit
+ * @returns {number}
+ */
+export const parseLimit = (limit) => {
+    const value = Number.parseInt(limit, 10);
+    if (Number.isNaN(value) || value < 1) {
+        return DEFAULT_PAGE_SIZE;
+    }
+    return Math.min(value, MAX_PAGE_SIZE);
+};
+
+/**
+ * Build a page from rows fetched with `limit + 1`
+ * @param {Array} rows
+ * @param {number} limit
+ * @returns {{ data: Array, next_cursor: string|null }}
+ */
+export const buildPage = (rows, limit) => {
+    const hasMore = rows.length > limit;
+    const data = hasMore ? rows.slice(0, limit) : rows;
+    const nextCursor = hasMore ? encodeCursor(data[data.length - 1]) : null;
+    data.forEach(row => delete row[CURSOR_TIMESTAMP]);
+    return { data, next_cursor: nextCursor };
+};
@@ -0,0 +1,9 @@
+/**
+ * Query options sending a read to a replica when DATABASE_READ_URLS is set.
+ *
+ * Every query defaults to the primary (config `query.useMaster`), so only
+ * reads that tolerate a little replication lag opt in:
+ *   Recipe.findAll({ ...READ_REPLICA, where })
+ * Without replicas configured the option is a no-op.
+ */
+export const READ_REPLICA = Object.freeze({ useMaster: false });
@@ -0,0 +1,36 @@
+/**
+ * Retry helpers shared by background jobs and outbound calls
+ */
+
+/**
+ * Exponential backoff with full jitter
+ * @param {number} attempt - 1 for the first retry
+ * @param {Object} options
+ * @param {number} [options.baseMs] - Delay scale of the first retry
+ * @param {number} [options.maxMs] - Upper bound of any delay
+ * @returns {number} delay in milliseconds
+ */
+export const backoffDelay = (attempt, { baseMs = 1000, maxMs = 60 * 1000 } = {}) => {
+    const ceiling = Math.min(maxMs, baseMs * 2 ** Math.max(0, attempt - 1));
+    return Math.round(Math.random() * ceiling);
+};
+
+// Transport failures that a fresh connection usually gets past
+const RETRYABLE_CODES = new Set(['ECONNRESET', 'ECONNREFUSED', 'EPIPE', 'ETIMEDOUT', 'EAI_AGAIN']);
+
+/**
+ * Whether an upstream failure is worth retrying (rate limited, server side,
+ * timed out, dropped connection or circuit open)
+ * @param {Error} error - Error carrying an optional HTTP `status` or socket `code`
+ * @returns {boolean}
+ */
+export const isRetryableError = (error) => {
+    if (error?.name === 'TimeoutError' || error?.name === 'AbortError' || error?.name === 'CircuitOpenError') {
+        return true;
+    }
+    if (RETRYABLE_CODES.has(error?.code)) {
+        return true;
+    }
+    const status = error?.status;
+    return status === 429 || (status >= 500 && status < 600);
+};
@@ -0,0 +1,121 @@
+/**
+ * Schema-compiled JSON serializers
+ *
+ * compileSerializer() turns a small JSON-schema subset (object with
+ * properties, array with items, string, date-time string, integer,
+ * number, boolean) into a function that writes exactly those properties,
+ * in schema order. Only listed properties are ever written, so a column
+ * missing from the schema (password_hash) cannot end up in a response,
+ * and each property's type is known upfront instead of being inspected by
+ * JSON.stringify on every row. Properties that are undefined are left
+ * out, null is written as null. Sequelize instances serialize directly
+ * through their attribute getters, without toJSON() copies.
+ */
+
+// Characters JSON.stringify would escape
+const NEEDS_ESCAPE = /["\\\u0000-\u001f\ud800-\udfff]/;
+
+const helpers = {
+    string(value) {
+        const text = typeof value === 'string' ? value : String(value);
+        return text.length < 5000 && !NEEDS_ESCAPE.test(text) ? `"${text}"` : JSON.stringify(text);
+    },
+    date(value) {
+        if (value instanceof Date) {
+            return Number.isNaN(value.getTime()) ? 'null' : `"${value.toISOString()}"`;
+        }
+        return helpers.string(value);
+    },
+    number(value) {
+        const number = typeof value === 'number' ? value : Number(value);
+        return Number.isFinite(number) ? `${number}` : 'null';
+    }
+};
+
+/**
+ * Expression serializing `v` (known not to be null or undefined)
+ * @param {Object} schema
+ * @param {Array<Function>} nested - Receives compiled object/array serializers
+ * @returns {string}
+ */
+function valueExpression(schema, nested) {
+    switch (schema.type) {
+        case 'object':
+        case 'array':
+            nested.push(compileNode(schema));
+            return `n[${nested.length - 1}](v)`;
+        case 'string':
+            return schema.format === 'date-time' ? 'h.date(v)' : 'h.string(v)';
+        case 'integer':
+        case 'number':
+            return 'h.number(v)';
+        case 'boolean':
+            return "(v ? 'true' : 'false')";
+        default:
+            throw new Error(`Unsupported schema type: ${schema.type}`);
+    }
+}
+
+function compileObject(schema) {
+    const nested = [];
+    const writes = Object.entries(schema.properties).map(([key, property]) => `
+        v = obj[${JSON.stringify(key)}];
+        if (v !== undefined) {
+            out += (out.length > 1 ? ',' : '') + ${JSON.stringify(`${JSON.stringify(key)}:`)}
+                + (v === null ? 'null' : ${valueExpression(property, nested)});
+        }`);
+    return new Function('h', 'n', `return function serializeObject(obj) {
+        let out = '{', v;${writes.join('')}
+        return out + '}';
+    };`)(helpers, nested);
+}
+
+function compileArray(schema) {
+    const nested = [];
+    const item = valueExpression(schema.items, nested);
+    return new Function('h', 'n', `return function serializeArray(items) {
+        let out = '[';
+        for (let i = 0; i < items.length; i++) {
+            const v = items[i];
+            out += (i > 0 ? ',' : '') + (v === null || v === undefined ? 'null' : ${item});
+        }
+        return out + ']';
+    };`)(helpers, nested);
+}
+
+function compileNode(schema) {
+    if (schema.type === 'object') {
+        return compileObject(schema);
+    }
+    if (schema.type === 'array') {
+        return compileArray(schema);
+    }
+    const nested = [];
+    return new Function('h', 'n', `return v => ${valueExpression(schema, nested)};`)(helpers, nested);
+}
+
+/**
+ * Compile a schema once, at module load
+ * @param {Object} schema
+ * @returns {Function} - value => JSON string
+ */
+export function compileSerializer(schema) {
+    const serialize = compileNode(schema);
+    return value => (value === null || value === undefined ? 'null' : serialize(value));
+}
+
+/**
+ * res.status(status).json(body), through a compiled serializer
+ * @param {import('express').Response} res
+ * @param {number} status
+ * @param {Function} serialize - From compileSerializer()
+ * @param {*} body
+ */
+export function sendSerialized(res, status, serialize, body) {
+    return res.status(status).type('json').send(serialize(body));
+}
+
+export default {
+    compileSerializer,
+    sendSerialized
+};
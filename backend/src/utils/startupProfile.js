@@ -0,0 +1,44 @@
+/**
+ * Startup phase timings, measured from process start (performance.now()
+ * counts from the process time origin).
+ *
+ * Modules call markStartup('models') once their phase is done; with
+ * `node server.js --startup-report` (or STARTUP_REPORT=true) the server
+ * prints the phases when it starts listening and again once lazily loaded
+ * modules are warm.
+ */
+
+import { performance } from 'perf_hooks';
+
+const marks = [];
+
+export const STARTUP_REPORT = process.argv.includes('--startup-report') || process.env.STARTUP_REPORT === 'true';
+
+/**
+ * Record the end of a startup phase
+ * @param {string} phase
+ */
+export function markStartup(phase) {
+    marks.push({ phase, at: performance.now() });
+}
+
+/**
+ * Phases in the order they ended, with their own duration and the time
+ * since process start
+ * @returns {Array<{ phase: string, ms: number, since_start_ms: number }>}
+ */
+export function getStartupReport() {
+    return marks.map(({ phase, at }, index) => ({
+        phase,
+        ms: Math.round(at - (index > 0 ? marks[index - 1].at : 0)),
+        since_start_ms: Math.round(at)
+    }));
+}
+
+export function printStartupReport(label) {
+    if (!STARTUP_REPORT) {
+        return;
+    }
+    console.log(`${label} startup phases:`);
+    console.table(getStartupReport());
+}
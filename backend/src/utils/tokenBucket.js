@@ -0,0 +1,42 @@
+/**
+ * Token bucket rate limiter
+ *
+ * Holds up to `capacity` tokens, refilled continuously at `refillPerSecond`.
+ */
+export class TokenBucket {
+    constructor({ capacity, refillPerSecond }) {
+        this.capacity = capacity;
+        this.refillPerSecond = refillPerSecond;
+        this.tokens = capacity;
+        this.updatedAt = Date.now();
+    }
+
+    refill() {
+        const now = Date.now();
+        const elapsed = (now - this.updatedAt) / 1000;
+        this.tokens = Math.min(this.capacity, this.tokens + elapsed * this.refillPerSecond);
+        this.updatedAt = now;
+    }
+
+    /**
+     * Take one token if available
+     * @returns {boolean}
+     */
+    tryTake() {
+        this.refill();
+        if (this.tokens < 1) {
+            return false;
+        }
+        this.tokens -= 1;
+        return true;
+    }
+
+    /**
+     * Milliseconds until the next token is available
+     * @returns {number}
+     */
+    waitTime() {
+        this.refill();
+        return this.tokens >= 1 ? 0 : Math.ceil(((1 - this.tokens) / this.refillPerSecond) * 1000);
+    }
+}
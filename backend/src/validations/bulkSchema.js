@@ -0,0 +1,23 @@
+import { body } from 'express-validator';
+
+export const BULK_MAX_IDS = 1000;
+
+// Body of POST /admin/:entity/bulk; which changes an operation accepts is
+// checked by services/bulkOperations.js
+export const bulkOperationSchema = [
+    body('ids').isArray({ min: 1, max: BULK_MAX_IDS }).withMessage(`ids must list 1 to ${BULK_MAX_IDS} ids`),
+    body('ids.*').isInt({ min: 1 }).toInt(),
+    body('operation').isString().notEmpty().withMessage('Operation is required'),
+    body('changes').optional().isObject(),
+    body('changes.category_id').optional({ values: 'null' }).isInt({ min: 1 }).toInt(),
+    body('changes.media_id').optional({ values: 'null' }).isInt({ min: 1 }).toInt(),
+    body('changes.difficulty').optional().isIn(['facile', 'moyen', 'difficile']),
+    body('changes.prep_time').optional({ values: 'null' }).isInt({ min: 0 }).toInt(),
+    body('changes.cook_time').optional({ values: 'null' }).isInt({ min: 0 }).toInt(),
+    body('changes.image_url').optional({ values: 'falsy' }).isURL().withMessage('Invalid URL format'),
+    body('changes.type').optional().isIn(['film', 'serie']).withMessage('Type must be film or serie'),
+    body('changes.release_year').optional({ values: 'null' }).isInt({ min: 1900, max: 2100 }).toInt(),
+    body('changes.description').optional({ values: 'null' }).isString(),
+    body('changes.role').optional().isIn(['user', 'admin']),
+    body('changes.bio').optional({ values: 'null' }).isString()
+];
@@ -0,0 +1,24 @@
+import { body } from 'express-validator';
+import { createRecipeSchema } from './recipeSchema.js';
+
+// Rules applied to each imported row (run against { body: row })
+
+export const importRecipeSchema = [
+    body('id').optional().isInt({ min: 1 }),
+    ...createRecipeSchema,
+    body('category_id').optional().isInt({ min: 1 }),
+    body('media_id').optional().isInt({ min: 1 })
+];
+
+export const importMediaSchema = [
+    body('id').optional().isInt({ min: 1 }),
+    body('title').notEmpty().withMessage('Media title is required').isString().isLength({ max: 255 }),
+    body('type').isIn(['film', 'serie']).withMessage('Type must be film or serie'),
+    body('image_url').optional({ values: 'falsy' }).isURL().withMessage('Invalid URL format'),
+    body('release_year').optional().isInt({ min: 1900, max: 2100 })
+];
+
+export const importCategorySchema = [
+    body('name').notEmpty().withMessage('Category name is required').isString().isLength({ max: 100 }),
+    body('description').optional().isString()
+];
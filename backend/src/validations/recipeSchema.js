@@ -1,10 +1,36 @@
-import { body } from 'express-validator';
+import { body, param, query } from 'express-validator';
+import { MAX_INGREDIENT_TERMS, parseIngredientTerms, toIngredientText } from '../services/ingredientSearchService.js';
+
+export const RECIPE_FIELDS = [
+    'id', 'title', 'description', 'ingredients', 'instructions', 'anecdote',
+    'difficulty', 'prep_time', 'cook_time', 'image_url',
+    'user_id', 'category_id', 'media_id', 'created_at', 'updated_at', 'version'
+];
+
+const checkFields = (value) => {
+    const unknown = value.split(',').filter(field => !RECIPE_FIELDS.includes(field.trim()));
+    if (unknown.length > 0) {
+        throw new Error(`Unknown fields: ${unknown.join(', ')}`);
+    }
+    return true;
+};
+
+const recipeIdParam = () => param('id').isInt({ min: 1 }).withMessage('Recipe id must be a positive integer');
+
+// Empty clears the reference
+const optionalReference = field => body(field)
+    .optional({ values: 'falsy' })
+    .isInt({ min: 1 })
+    .withMessage(`${field} must be a positive integer`);
 
 export const createRecipeSchema = [
     body('title').notEmpty().withMessage('Title is required').isString().isLength({ max: 255 }),
-    body('ingredients').notEmpty().withMessage('Ingredients are required'),
+    // Generated recipes send an array of ingredients
+    body('ingredients').customSanitizer(toIngredientText).notEmpty().withMessage('Ingredients are required'),
     body('instructions').notEmpty().withMessage('Instructions are required'),
     body('user_id').optional().isInt(),
+    optionalReference('category_id'),
+    optionalReference('media_id'),
     body('difficulty').optional().isIn(['facile', 'moyen', 'difficile']),
     body('prep_time').optional().isInt({ min: 0 }),
     body('cook_time').optional().isInt({ min: 0 }),
@@ -12,11 +38,52 @@ export const createRecipeSchema = [
 ];
 
 export const updateRecipeSchema = [
+    recipeIdParam(),
     body('title').optional().isString().isLength({ max: 255 }),
-    body('ingredients').optional(),
+    body('ingredients').optional().customSanitizer(toIngredientText),
     body('instructions').optional(),
+    optionalReference('category_id'),
+    optionalReference('media_id'),
+    // Only applied for admins
+    body('user_id').optional().isInt({ min: 1 }).withMessage('user_id must be a positive integer'),
     body('difficulty').optional().isIn(['facile', 'moyen', 'difficile']),
     body('prep_time').optional().isInt({ min: 0 }),
     body('cook_time').optional().isInt({ min: 0 }),
     body('image_url').optional({ values: 'falsy' }).isURL().withMessage('Invalid URL format')
 ];
+
+export const listRecipesSchema = [
+    query('limit').optional().isInt({ min: 1, max: 100 }).withMessage('Limit must be between 1 and 100'),
+    query('cursor').optional().isString(),
+    query('category_id').optional().isInt(),
+    query('media_id').optional().isInt(),
+    query('user_id').optional().isInt(),
+    query('difficulty').optional().isIn(['facile', 'moyen', 'difficile']),
+    query('min_total_time').optional().isInt({ min: 0 }),
+    query('max_total_time').optional().isInt({ min: 0 }),
+    query('ingredients').optional().isString().custom((value) => {
+        const terms = parseIngredientTerms(value);
+        if (terms.length === 0 || terms.length > MAX_INGREDIENT_TERMS) {
+            throw new Error(`Between 1 and ${MAX_INGREDIENT_TERMS} ingredients are required`);
+        }
+        if (terms.some(term => term.length > 50)) {
+            throw new Error('Ingredient names are limited to 50 characters');
+        }
+        return true;
+    }),
+    query('match').optional().isIn(['all', 'any']).withMessage('match must be all or any'),
+    query('fields').optional().isString().custom(checkFields)
+];
+
+export const searchRecipesSchema = [
+    query('q').isString().trim().isLength({ min: 2, max: 200 }).withMessage('Search query must be between 2 and 200 characters'),
+    query('limit').optional().isInt({ min: 1, max: 50 }).withMessage('Limit must be between 1 and 50')
+];
+
+export const deleteRecipeSchema = [recipeIdParam()];
+
+export const similarRecipesSchema = [
+    recipeIdParam(),
+    query('limit').optional().isInt({ min: 1, max: 50 }).withMessage('Limit must be between 1 and 50'),
+    query('fields').optional().isString().custom(checkFields)
+];
@@ -0,0 +1,48 @@
+import http from 'http';
+
+/**
+ * Minimal stand-in for the Mistral chat completions API.
+ * Point MISTRAL_API_URL at `server.url` before importing mistralService.
+ * @param {Object} recipe - Recipe returned as the completion content
+ * @param {Object} options
+ * @param {number} [options.chunkSize] - Characters per streamed token
+ * @param {number} [options.delayMs] - Delay before answering
+ */
+export async function startFakeMistralServer(recipe, { chunkSize = 8, delayMs = 0 } = {}) {
+    const requests = [];
+
+    const server = http.createServer((req, res) => {
+        let raw = '';
+        req.on('data', chunk => { raw += chunk; });
+        req.on('end', () => {
+            const body = JSON.parse(raw);
+            requests.push({ headers: req.headers, body });
+
+            setTimeout(() => {
+                const content = `Voici la recette :\n${JSON.stringify(recipe)}`;
+
+                if (!body.stream) {
+                    res.writeHead(200, { 'Content-Type': 'application/json' });
+                    res.end(JSON.stringify({ choices: [{ message: { role: 'assistant', content } }] }));
+                    return;
+                }
+
+                res.writeHead(200, { 'Content-Type': 'text/event-stream' });
+                for (let i = 0; i < content.length; i += chunkSize) {
+                    const delta = { choices: [{ delta: { content: content.slice(i, i + chunkSize) } }] };
+                    res.write(`data: ${JSON.stringify(delta)}\n\n`);
+                }
+                res.end('data: [DONE]\n\n');
+            }, delayMs);
+        });
+    });
+
+    await new Promise(resolve => server.listen(0, '127.0.0.1', resolve));
+    const { port } = server.address();
+
+    return {
+        url: `http://127.0.0.1:${port}/v1/chat/completions`,
+        requests,
+        close: () => new Promise(resolve => server.close(resolve))
+    };
+}
@@ -0,0 +1,39 @@
+import { expect } from '@jest/globals';
+
+/**
+ * Record every SQL statement sent through a Sequelize instance while fn runs.
+ * Works with a real connection or any object exposing query().
+ * @param {Object} sequelize - Sequelize instance (e.g. db.sequelize)
+ * @param {Function} fn - async () => result
+ * @returns {Promise<{ result: *, queries: Array<string>, count: number }>}
+ */
+export async function countQueries(sequelize, fn) {
+    const queries = [];
+    const original = sequelize.query;
+
+    sequelize.query = function (sql, ...args) {
+        queries.push(typeof sql === 'string' ? sql : sql.query);
+        return original.call(this, sql, ...args);
+    };
+
+    try {
+        const result = await fn();
+        return { result, queries, count: queries.length };
+    } finally {
+        sequelize.query = original;
+    }
+}
+
+/**
+ * Fail the test unless fn issues exactly `expected` queries.
+ * The failure message lists the statements that were run.
+ * @param {Object} sequelize
+ * @param {number} expected
+ * @param {Function} fn
+ * @returns {Promise<*>} - fn's result
+ */
+export async function expectQueryCount(sequelize, expected, fn) {
+    const { result, queries } = await countQueries(sequelize, fn);
+    expect(queries).toHaveLength(expected);
+    return result;
+}
@@ -0,0 +1,62 @@
+import request from 'supertest';
+import { describe, test, expect, afterEach, jest } from '@jest/globals';
+
+jest.unstable_mockModule('../../src/services/tmdbService.js', () => ({
+    searchMedia: jest.fn(),
+    getMediaDetails: jest.fn().mockResolvedValue({ tmdb_id: 99, title: 'Ratatouille' })
+}));
+
+const { default: app } = await import('../../src/app.js');
+const { default: db } = await import('../../src/models/index.js');
+
+describe('health and metrics routes', () => {
+    afterEach(() => {
+        jest.restoreAllMocks();
+        delete process.env.METRICS_TOKEN;
+    });
+
+    test('liveness does not touch the database', async () => {
+        const query = jest.spyOn(db.sequelize, 'query');
+
+        const res = await request(app).get('/health/live');
+
+        expect(res.status).toBe(200);
+        expect(query).not.toHaveBeenCalled();
+    });
+
+    test('readiness reports the pool when the database answers', async () => {
+        jest.spyOn(db.sequelize, 'query').mockResolvedValue([[{ '?column?': 1 }]]);
+
+        const res = await request(app).get('/health/ready');
+
+        expect(res.status).toBe(200);
+        expect(res.body.pool).toHaveProperty('primary');
+    });
+
+    test('readiness fails when the database is unreachable', async () => {
+        jest.spyOn(db.sequelize, 'query').mockRejectedValue(new Error('connect ECONNREFUSED'));
+
+        const res = await request(app).get('/health/ready');
+
+        expect(res.status).toBe(503);
+        expect(res.body.status).toBe('UNAVAILABLE');
+    });
+
+    test('exposes request durations labelled by route template', async () => {
+        await request(app).get('/api/v1/tmdb/99').query({ type: 'movie' });
+
+        const res = await request(app).get('/metrics');
+
+        expect(res.status).toBe(200);
+        expect(res.headers['content-type']).toMatch(/^text\/plain; version=0.0.4/);
+        expect(res.text).toContain('http_request_duration_seconds_count{method="GET",route="/api/v1/tmdb/:id",status_code="200"} 1');
+        expect(res.text).not.toContain('route="/api/v1/tmdb/99"');
+    });
+
+    test('requires the bearer token when METRICS_TOKEN is set', async () => {
+        process.env.METRICS_TOKEN = 'secret';
+
+        expect((await request(app).get('/metrics')).status).toBe(401);
+        expect((await request(app).get('/metrics').set('Authorization', 'Bearer secret')).status).toBe(200);
+    });
+});
@@ -0,0 +1,95 @@
+import http from 'http';
+import { describe, test, expect, beforeAll, afterAll } from '@jest/globals';
+import { HttpClient, getHttpClientStats } from '../../src/services/httpClient.js';
+
+let server;
+let baseUrl;
+const hits = {};
+
+beforeAll(async () => {
+    server = http.createServer((req, res) => {
+        hits[req.url] = (hits[req.url] || 0) + 1;
+        if (req.url === '/flaky' && hits[req.url] < 3) {
+            res.writeHead(503).end();
+            return;
+        }
+        if (req.url === '/down') {
+            res.writeHead(500).end();
+            return;
+        }
+        if (req.url === '/slow') {
+            setTimeout(() => res.end('late'), 500);
+            return;
+        }
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify({ path: req.url }));
+    });
+    await new Promise(resolve => server.listen(0, '127.0.0.1', resolve));
+    baseUrl = `http://127.0.0.1:${server.address().port}`;
+});
+
+afterAll(async () => {
+    await new Promise(resolve => server.close(resolve));
+});
+
+describe('HttpClient', () => {
+    test('reuses keep-alive sockets', async () => {
+        const client = new HttpClient({ name: 'test_keepalive' });
+
+        for (let i = 0; i < 3; i++) {
+            const response = await client.request(`${baseUrl}/ok`);
+            await expect(response.json()).resolves.toEqual({ path: '/ok' });
+        }
+
+        expect(client.stats().pool).toMatchObject({ active: 0, idle: 1 });
+    });
+
+    test('retries idempotent calls on 5xx', async () => {
+        const client = new HttpClient({ name: 'test_retry', retries: 2, retryBaseMs: 1 });
+
+        const response = await client.request(`${baseUrl}/flaky`);
+
+        expect(response.status).toBe(200);
+        expect(hits['/flaky']).toBe(3);
+        expect(client.stats().retries).toBe(2);
+    });
+
+    test('does not retry POST requests', async () => {
+        const client = new HttpClient({ name: 'test_post', retries: 2, retryBaseMs: 1 });
+        const before = hits['/down'] || 0;
+
+        const response = await client.request(`${baseUrl}/down`, { method: 'POST', body: '{}' });
+        response.discard();
+
+        expect(response.status).toBe(500);
+        expect(hits['/down'] - before).toBe(1);
+    });
+
+    test('times out waiting for response headers', async () => {
+        const client = new HttpClient({ name: 'test_timeout', headersTimeoutMs: 50, retries: 0 });
+
+        await expect(client.request(`${baseUrl}/slow`)).rejects.toMatchObject({ name: 'TimeoutError', phase: 'headers' });
+        expect(client.stats().timeouts).toBe(1);
+    });
+
+    test('stops on the caller signal without counting a failure', async () => {
+        const client = new HttpClient({ name: 'test_abort', retries: 2 });
+
+        await expect(client.request(`${baseUrl}/slow`, { signal: AbortSignal.timeout(20) }))
+            .rejects.toMatchObject({ name: 'TimeoutError' });
+        expect(client.stats().breaker).toMatchObject({ failures: 0, state: 'closed' });
+    });
+
+    test('fails fast once the circuit opens', async () => {
+        const client = new HttpClient({ name: 'test_breaker', retries: 0, breaker: { failureThreshold: 2 } });
+        const before = hits['/down'] || 0;
+
+        for (let i = 0; i < 2; i++) {
+            (await client.request(`${baseUrl}/down`)).discard();
+        }
+        await expect(client.request(`${baseUrl}/down`)).rejects.toMatchObject({ name: 'CircuitOpenError', status: 503 });
+
+        expect(hits['/down'] - before).toBe(2);
+        expect(getHttpClientStats().find(stats => stats.name === 'test_breaker').breaker.state).toBe('open');
+    });
+});
@@ -0,0 +1,34 @@
+import request from 'supertest';
+import { describe, test, expect, beforeEach, jest } from '@jest/globals';
+
+jest.unstable_mockModule('../../src/services/imageProxy.js', () => ({
+    getImageVariant: jest.fn()
+}));
+
+const { getImageVariant } = await import('../../src/services/imageProxy.js');
+const { default: app } = await import('../../src/app.js');
+
+const refusal = (status, message) => Object.assign(new Error(message), { status });
+
+describe('image routes', () => {
+    beforeEach(() => {
+        jest.clearAllMocks();
+    });
+
+    test('answers 403 for a host outside the allow-list', async () => {
+        getImageVariant.mockRejectedValue(refusal(403, 'attacker.example.net is not an image source'));
+
+        const res = await request(app).get('/img').query({ url: 'https://attacker.example.net/x.jpg' });
+
+        expect(res.status).toBe(403);
+        expect(res.body).toEqual({ message: 'attacker.example.net is not an image source' });
+    });
+
+    test('answers 400 for an invalid source URL', async () => {
+        getImageVariant.mockRejectedValue(refusal(400, 'url must be an absolute http(s) URL'));
+
+        const res = await request(app).get('/img').query({ url: 'ftp://example.com/x.jpg' });
+
+        expect(res.status).toBe(400);
+    });
+});
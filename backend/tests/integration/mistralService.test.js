@@ -0,0 +1,75 @@
+import { describe, test, expect, beforeAll, afterAll } from '@jest/globals';
+import { startFakeMistralServer } from '../helpers/fakeMistralServer.js';
+
+const recipe = {
+    title: 'Ratatouille de Rémy',
+    description: 'Confit byaldi',
+    ingredients: ['aubergine', 'courgette'],
+    instructions: ['Trancher', 'Cuire'],
+    difficulty: 'moyen',
+    prep_time: 30,
+    cook_time: 45
+};
+
+let fakeMistral;
+let generateRecipeFromMovie;
+let streamRecipeFromMovie;
+
+beforeAll(async () => {
+    fakeMistral = await startFakeMistralServer(recipe, { delayMs: 20 });
+    process.env.MISTRAL_API_URL = fakeMistral.url;
+    process.env.MISTRAL_API_KEY = 'test-key';
+    ({ generateRecipeFromMovie, streamRecipeFromMovie } = await import('../../src/services/mistralService.js'));
+});
+
+afterAll(async () => {
+    await fakeMistral.close();
+});
+
+describe('mistralService', () => {
+    test('parses the recipe and memoizes it per movie', async () => {
+        const movie = { title: 'Ratatouille', year: 2007, tmdb_id: 2062 };
+
+        await expect(generateRecipeFromMovie(movie)).resolves.toEqual(recipe);
+        await expect(generateRecipeFromMovie({ ...movie, title: 'ratatouille ' })).resolves.toEqual(recipe);
+
+        expect(fakeMistral.requests).toHaveLength(1);
+        expect(fakeMistral.requests[0].headers.authorization).toBe('Bearer test-key');
+    });
+
+    test('shares one upstream call between concurrent identical requests', async () => {
+        const before = fakeMistral.requests.length;
+        const movie = { title: 'Chocolat', year: 2000 };
+
+        const results = await Promise.all([1, 2, 3].map(() => generateRecipeFromMovie(movie)));
+
+        expect(results).toEqual([recipe, recipe, recipe]);
+        expect(fakeMistral.requests.length - before).toBe(1);
+    });
+
+    test('relays streamed tokens before returning the recipe', async () => {
+        const tokens = [];
+
+        const result = await streamRecipeFromMovie({ title: 'Big Night', year: 1996 }, text => tokens.push(text));
+
+        expect(result).toEqual(recipe);
+        expect(tokens.length).toBeGreaterThan(1);
+        expect(tokens.join('')).toContain('"title":"Ratatouille de Rémy"');
+        expect(fakeMistral.requests.at(-1).body.stream).toBe(true);
+    });
+
+    test('relays tokens to every caller sharing a stream, whoever aborts', async () => {
+        const before = fakeMistral.requests.length;
+        const movie = { title: 'Tampopo', year: 1985 };
+        const first = new AbortController();
+        const tokens = [];
+
+        const aborted = streamRecipeFromMovie(movie, () => first.abort(), { signal: first.signal });
+        const joined = streamRecipeFromMovie(movie, text => tokens.push(text));
+
+        await expect(aborted).rejects.toThrow();
+        await expect(joined).resolves.toEqual(recipe);
+        expect(tokens.join('')).toContain('"title":"Ratatouille de Rémy"');
+        expect(fakeMistral.requests.length - before).toBe(1);
+    });
+});
@@ -0,0 +1,69 @@
+import { spawn } from 'child_process';
+import net from 'net';
+import { fileURLToPath } from 'url';
+import { describe, test, expect, afterAll } from '@jest/globals';
+
+const SERVER = fileURLToPath(new URL('../../server.js', import.meta.url));
+// Generous for shared CI runners; a local cold start takes a fraction of it
+const BUDGET_MS = Number.parseInt(process.env.STARTUP_BUDGET_MS, 10) || 5000;
+
+const freePort = () => new Promise((resolve, reject) => {
+    const probe = net.createServer().listen(0, '127.0.0.1', () => {
+        const { port } = probe.address();
+        probe.close(() => resolve(port));
+    }).on('error', reject);
+});
+
+const waitForOk = async (url, deadline) => {
+    while (Date.now() < deadline) {
+        try {
+            const response = await fetch(url);
+            if (response.status === 200) {
+                return true;
+            }
+        } catch {
+            // Not listening yet
+        }
+        await new Promise(resolve => setTimeout(resolve, 10));
+    }
+    return false;
+};
+
+describe('cold start', () => {
+    let child;
+
+    afterAll(() => {
+        child?.kill('SIGKILL');
+    });
+
+    test('answers /health within the startup budget and reports its phases', async () => {
+        const port = await freePort();
+        let output = '';
+
+        const startedAt = Date.now();
+        child = spawn(process.execPath, [SERVER, '--startup-report'], {
+            env: {
+                ...process.env,
+                NODE_OPTIONS: '',
+                NODE_ENV: 'test',
+                PORT: String(port),
+                CLUSTER_WORKERS: '1',
+                GENERATION_WORKER: 'false',
+                MEDIA_SYNC_WORKER: 'false'
+            },
+            stdio: ['ignore', 'pipe', 'pipe']
+        });
+        child.stdout.on('data', (chunk) => {
+            output += chunk;
+        });
+
+        const ready = await waitForOk(`http://127.0.0.1:${port}/health`, startedAt + BUDGET_MS);
+        const elapsed = Date.now() - startedAt;
+
+        expect(ready).toBe(true);
+        expect(elapsed).toBeLessThan(BUDGET_MS);
+        for (const phase of ['bootstrap', 'models', 'app', 'listen']) {
+            expect(output).toContain(phase);
+        }
+    }, BUDGET_MS + 5000);
+});
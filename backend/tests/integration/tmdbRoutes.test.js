@@ -31,7 +31,7 @@ describe('TMDB routes', () => {
 
         expect(res.status).toBe(200);
         expect(res.body).toEqual({ results: mockResults });
-        expect(searchMedia).toHaveBeenCalledWith('rat', 'movie');
+        expect(searchMedia).toHaveBeenCalledWith('rat', 'movie', { signal: expect.any(AbortSignal) });
     });
 
     test('returns media details', async () => {
@@ -44,6 +44,6 @@ describe('TMDB routes', () => {
 
         expect(res.status).toBe(200);
         expect(res.body).toEqual(details);
-        expect(getMediaDetails).toHaveBeenCalledWith(99, 'movie');
+        expect(getMediaDetails).toHaveBeenCalledWith(99, 'movie', { signal: expect.any(AbortSignal) });
     });
 });
@@ -0,0 +1,40 @@
+import { describe, test, expect, jest } from '@jest/globals';
+import { BatchLoader } from '../../src/utils/batchLoader.js';
+
+describe('BatchLoader', () => {
+    test('collects loads from the same tick into one batch', async () => {
+        const batchFn = jest.fn(async (keys) => new Map(keys.map(key => [key, { id: key }])));
+        const loader = new BatchLoader(batchFn);
+
+        const results = await Promise.all([loader.load(1), loader.load(2), loader.load(1)]);
+
+        expect(results).toEqual([{ id: 1 }, { id: 2 }, { id: 1 }]);
+        expect(batchFn).toHaveBeenCalledTimes(1);
+        expect(batchFn).toHaveBeenCalledWith([1, 2]);
+    });
+
+    test('memoizes keys and skips null ones', async () => {
+        const batchFn = jest.fn(async (keys) => new Map(keys.map(key => [key, key * 10])));
+        const loader = new BatchLoader(batchFn);
+
+        await loader.loadMany([1, 2]);
+        await expect(loader.loadMany([2, 3, null])).resolves.toEqual([20, 30, null]);
+
+        expect(batchFn.mock.calls).toEqual([[[1, 2]], [[3]]]);
+    });
+
+    test('resolves missing keys to null', async () => {
+        const loader = new BatchLoader(async () => new Map());
+        await expect(loader.load(42)).resolves.toBeNull();
+    });
+
+    test('forgets keys of a failed batch so they can be retried', async () => {
+        const batchFn = jest.fn()
+            .mockRejectedValueOnce(new Error('connection reset'))
+            .mockResolvedValueOnce(new Map([[1, 'ok']]));
+        const loader = new BatchLoader(batchFn);
+
+        await expect(loader.load(1)).rejects.toThrow('connection reset');
+        await expect(loader.load(1)).resolves.toBe('ok');
+    });
+});
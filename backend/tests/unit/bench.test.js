@@ -0,0 +1,77 @@
+import { describe, test, expect, beforeAll, afterAll } from '@jest/globals';
+import { percentile, summarize, compareToBaseline } from '../../bench/lib.js';
+import { startStubs } from '../../bench/stubs.js';
+
+const summary = (overrides = {}) => ({
+    rps: 100,
+    errors: 0,
+    latency_ms: { p50: 10, p95: 20, p99: 40, max: 50 },
+    db_queries_per_request: 2,
+    ...overrides
+});
+
+describe('bench summaries', () => {
+    test('uses nearest-rank percentiles', () => {
+        const sorted = Array.from({ length: 100 }, (_, index) => index + 1);
+        expect(percentile(sorted, 50)).toBe(50);
+        expect(percentile(sorted, 99)).toBe(99);
+        expect(percentile([], 95)).toBe(0);
+    });
+
+    test('summarizes throughput, latency and queries per request', () => {
+        const result = summarize({ latencies: [30, 10, 20, 40], durationMs: 2000, errors: 1, statuses: { 200: 4 }, dbQueries: 6 });
+
+        expect(result).toMatchObject({ requests: 4, rps: 2, errors: 1, db_queries_per_request: 1.5 });
+        expect(result.latency_ms).toEqual({ p50: 20, p95: 40, p99: 40, max: 40 });
+    });
+
+    test('flags metrics worse than the baseline beyond the tolerance', () => {
+        const baseline = { scenarios: { browse: summary(), login: summary() } };
+        const current = {
+            scenarios: {
+                browse: summary({ rps: 95, latency_ms: { p50: 10.5, p95: 30, p99: 40, max: 60 } }),
+                login: summary({ db_queries_per_request: 3, errors: 2 }),
+                detail: summary()
+            }
+        };
+
+        const { regressions } = compareToBaseline(current, baseline, 0.1);
+        expect(regressions.map(row => `${row.scenario} ${row.metric}`)).toEqual([
+            'browse latency_ms.p95',
+            'login db_queries_per_request',
+            'login errors'
+        ]);
+    });
+});
+
+describe('bench stubs', () => {
+    let stubs;
+
+    beforeAll(async () => {
+        stubs = await startStubs({ tokenDelayMs: 0 });
+    });
+
+    afterAll(() => stubs.close());
+
+    test('answers TMDB searches and details', async () => {
+        const search = await (await fetch(`${stubs.url}/tmdb/3/search/tv?query=Chef`)).json();
+        expect(search.results).toHaveLength(12);
+        expect(search.results[0]).toHaveProperty('name');
+
+        const details = await (await fetch(`${stubs.url}/tmdb/3/movie/42`)).json();
+        expect(details).toMatchObject({ id: 42, imdb_id: 'tt0000042' });
+        expect(stubs.counts.tmdb).toBe(2);
+    });
+
+    test('streams a Mistral completion as server-sent events', async () => {
+        const response = await fetch(`${stubs.url}/mistral/v1/chat/completions`, {
+            method: 'POST',
+            body: JSON.stringify({ stream: true })
+        });
+        const events = (await response.text()).trim().split('\n\n').map(event => event.slice('data: '.length));
+
+        expect(events.at(-1)).toBe('[DONE]');
+        const content = events.slice(0, -1).map(data => JSON.parse(data).choices[0].delta.content).join('');
+        expect(JSON.parse(content)).toHaveProperty('ingredients');
+    });
+});
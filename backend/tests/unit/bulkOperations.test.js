@@ -0,0 +1,79 @@
+import { describe, test, expect, jest } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: {
+            query: mockQuery,
+            transaction: async (work) => work({})
+        }
+    }
+}));
+
+const { buildBulkStatement, runBulkOperation, BulkOperationError } = await import('../../src/services/bulkOperations.js');
+
+describe('bulk operations', () => {
+    test('deletes with a single ANY statement', () => {
+        const { sql, bind } = buildBulkStatement('recipes', { ids: [3, 1, 3], operation: 'delete' });
+
+        expect(sql).toBe('DELETE FROM "recipes" WHERE id = ANY($1::integer[]) RETURNING id');
+        expect(bind).toEqual([[3, 1]]);
+    });
+
+    test('reassigns recipes, allowing a category to be cleared', () => {
+        const { sql, bind } = buildBulkStatement('recipes', {
+            ids: [1, 2],
+            operation: 'reassign',
+            changes: { category_id: null, media_id: 7 }
+        });
+
+        expect(sql).toBe('UPDATE "recipes" SET "category_id" = $2, "media_id" = $3, updated_at = NOW() '
+            + 'WHERE id = ANY($1::integer[]) RETURNING id');
+        expect(bind).toEqual([[1, 2], null, 7]);
+    });
+
+    test('never touches the acting admin when changing users', () => {
+        const { sql, bind } = buildBulkStatement('users', {
+            ids: [1, 2],
+            operation: 'role',
+            changes: { role: 'user' }
+        }, { actorId: 1 });
+
+        expect(sql).toContain('WHERE id = ANY($1::integer[]) AND id <> $2');
+        expect(bind).toEqual([[1, 2], 1, 'user']);
+    });
+
+    test('rejects unknown operations and columns outside the operation', () => {
+        expect(() => buildBulkStatement('media', { ids: [1], operation: 'reassign' })).toThrow(BulkOperationError);
+        expect(() => buildBulkStatement('users', { ids: [1], operation: 'role', changes: { email: 'x@y.z' } }))
+            .toThrow('role cannot change email');
+        expect(() => buildBulkStatement('recipes', { ids: [1], operation: 'patch', changes: {} }))
+            .toThrow('needs at least one');
+    });
+
+    test('reports affected ids', async () => {
+        mockQuery.mockResolvedValueOnce([{ id: 1 }, { id: 2 }]);
+
+        const result = await runBulkOperation('categories', { ids: [1, 2, 99], operation: 'delete' }, { actorId: 1 });
+
+        expect(result).toEqual({ operation: 'delete', requested: 3, affected: 2, ids: [1, 2] });
+        expect(mockQuery.mock.calls[0][1].bind).toEqual([[1, 2, 99]]);
+    });
+
+    test('tells a delete blocked by references from a missing reference', async () => {
+        const violation = (detail) => Object.assign(new Error('violates foreign key constraint'), {
+            name: 'SequelizeForeignKeyConstraintError',
+            parent: { detail }
+        });
+
+        mockQuery.mockRejectedValueOnce(violation('Key (id)=(4) is still referenced from table "recipes".'));
+        await expect(runBulkOperation('categories', { ids: [4], operation: 'delete' }, { actorId: 1 }))
+            .rejects.toThrow('Selected rows are still referenced from recipes');
+
+        mockQuery.mockRejectedValueOnce(violation('Key (category_id)=(99) is not present in table "categories".'));
+        const reassign = runBulkOperation('recipes', { ids: [1], operation: 'reassign', changes: { category_id: 99 } }, { actorId: 1 });
+        await expect(reassign).rejects.toBeInstanceOf(BulkOperationError);
+        await expect(reassign).rejects.toThrow('Referenced row does not exist');
+    });
+});
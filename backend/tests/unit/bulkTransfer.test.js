@@ -0,0 +1,109 @@
+import { describe, test, expect, jest, beforeEach } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: {
+            query: mockQuery,
+            transaction: async (work) => work({})
+        }
+    }
+}));
+
+const { exportBatches, importRows, readImportRows, validateBatch } = await import('../../src/services/bulkTransfer.js');
+const { importRecipeSchema } = await import('../../src/validations/importSchema.js');
+
+const source = (text) => (async function* () {
+    yield Buffer.from(text);
+})();
+
+const collect = async (iterable) => {
+    const items = [];
+    for await (const item of iterable) {
+        items.push(item);
+    }
+    return items;
+};
+
+describe('bulkTransfer', () => {
+    beforeEach(() => {
+        mockQuery.mockReset();
+    });
+
+    test('pages exports by primary key', async () => {
+        mockQuery
+            .mockResolvedValueOnce([{ id: 1 }, { id: 2 }])
+            .mockResolvedValueOnce([{ id: 3 }]);
+
+        const batches = await collect(exportBatches('media', { batchSize: 2 }));
+
+        expect(batches).toEqual([[{ id: 1 }, { id: 2 }], [{ id: 3 }]]);
+        expect(mockQuery.mock.calls[1][1].replacements).toEqual({ lastId: 2, limit: 2 });
+        expect(mockQuery.mock.calls[1][1].useMaster).toBe(false);
+    });
+
+    test('numbers NDJSON rows and reports malformed lines', async () => {
+        const rows = await collect(readImportRows(source('{"title":"A"}\n\nnot json\n[1]\n'), 'ndjson'));
+
+        expect(rows).toEqual([
+            { row: 1, data: { title: 'A' } },
+            { row: 2, error: expect.stringContaining('Invalid JSON') },
+            { row: 3, error: 'Expected a JSON object' }
+        ]);
+    });
+
+    test('validates rows with the recipe rules', async () => {
+        const invalid = await validateBatch([
+            { row: 1, data: { title: 'Soupe', ingredients: 'eau', instructions: 'bouillir' } },
+            { row: 2, data: { title: 'Tarte', ingredients: 'pommes', instructions: 'cuire', difficulty: 'extreme' } }
+        ], importRecipeSchema);
+
+        expect(invalid).toEqual([{ row: 2, errors: [{ field: 'difficulty', message: 'Invalid value' }] }]);
+    });
+
+    test('stages valid rows, reports rejected ones and upserts', async () => {
+        mockQuery.mockImplementation(async (sql) => {
+            if (sql.includes('WITH upserted')) {
+                return [{ inserted: '1', updated: '0' }];
+            }
+            return [[], 0];
+        });
+        const rowErrors = [];
+
+        const summary = await importRows('categories', source('name,description\nDesserts,Sucré\n,Sans nom\n'), {
+            format: 'csv',
+            userId: 1,
+            onRowError: rowError => rowErrors.push(rowError)
+        });
+
+        expect(summary).toEqual({ rows: 2, inserted: 1, updated: 0, rejected: 1 });
+        expect(rowErrors).toEqual([{
+            row: 2,
+            errors: expect.arrayContaining([{ field: 'name', message: 'Category name is required' }])
+        }]);
+        const staged = mockQuery.mock.calls.find(([sql]) => sql.includes('INSERT INTO import_rows'));
+        expect(JSON.parse(staged[1].replacements.items)).toEqual([
+            { row_num: 1, data: { name: 'Desserts', description: 'Sucré' } }
+        ]);
+        expect(mockQuery.mock.calls.at(-1)[0]).toContain('DELETE FROM import_rows WHERE import_id');
+    });
+
+    test('keeps the author of updated recipes when an import row has no user_id', async () => {
+        mockQuery.mockImplementation(async (sql, options = {}) => {
+            if (sql.includes('WITH upserted')) {
+                return [{ inserted: '0', updated: '1' }];
+            }
+            return options.type === 'SELECT' ? [] : [[], 0];
+        });
+        const row = { id: 5, title: 'Tarte', ingredients: 'Pommes', instructions: 'Cuire' };
+
+        await importRows('recipes', source(`${JSON.stringify(row)}\n`), { format: 'ndjson', userId: 1 });
+
+        const [keyed, unkeyed] = mockQuery.mock.calls.map(([sql]) => sql).filter(sql => sql.includes('WITH upserted'));
+        expect(keyed).toContain('COALESCE(r.user_id, existing.user_id, :userId)');
+        expect(keyed).toContain('LEFT JOIN "recipes" existing ON existing."id" = r."id"');
+        expect(unkeyed).toContain('COALESCE(r.user_id, :userId)');
+        expect(unkeyed).not.toContain('existing');
+    });
+});
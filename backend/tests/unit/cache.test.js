@@ -0,0 +1,97 @@
+import { describe, test, expect, jest, afterEach } from '@jest/globals';
+import { Cache, getCacheStats } from '../../src/utils/cache.js';
+
+describe('Cache', () => {
+    afterEach(() => {
+        jest.restoreAllMocks();
+    });
+
+    test('returns cached values until the ttl expires', async () => {
+        const cache = new Cache({ ttlMs: 1000 });
+        const loader = jest.fn().mockResolvedValue('value');
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+
+        await cache.wrap('key', loader);
+        await cache.wrap('key', loader);
+        expect(loader).toHaveBeenCalledTimes(1);
+
+        now.mockReturnValue(1500);
+        await cache.wrap('key', loader);
+        expect(loader).toHaveBeenCalledTimes(2);
+        expect(cache.stats()).toMatchObject({ hits: 1, misses: 2 });
+    });
+
+    test('evicts the least recently used entry', async () => {
+        const cache = new Cache({ maxEntries: 2 });
+
+        await cache.wrap('a', async () => 1);
+        await cache.wrap('b', async () => 2);
+        await cache.wrap('a', async () => 1);
+        await cache.wrap('c', async () => 3);
+
+        expect([...cache.entries.keys()]).toEqual(['a', 'c']);
+        expect(cache.stats().evictions).toBe(1);
+    });
+
+    test('coalesces concurrent misses into one loader call', async () => {
+        const cache = new Cache();
+        let resolve;
+        const loader = jest.fn(() => new Promise((r) => { resolve = r; }));
+
+        const pending = Promise.all([1, 2, 3].map(() => cache.wrap('key', loader)));
+        resolve('value');
+
+        await expect(pending).resolves.toEqual(['value', 'value', 'value']);
+        expect(loader).toHaveBeenCalledTimes(1);
+        expect(cache.stats().coalesced).toBe(2);
+    });
+
+    test('serves stale values while refreshing in the background', async () => {
+        const cache = new Cache({ ttlMs: 1000, staleMs: 1000 });
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+        await cache.wrap('key', async () => 'old');
+
+        now.mockReturnValue(1500);
+        const loader = jest.fn().mockResolvedValue('new');
+
+        await expect(cache.wrap('key', loader)).resolves.toBe('old');
+        await cache.inflight.get('key');
+        await expect(cache.wrap('key', loader)).resolves.toBe('new');
+        expect(loader).toHaveBeenCalledTimes(1);
+    });
+
+    test('falls back to an expired value when the reload fails', async () => {
+        const cache = new Cache({ ttlMs: 1000, staleIfErrorMs: 5000 });
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+        await cache.wrap('key', async () => 'old');
+
+        now.mockReturnValue(3000);
+        await expect(cache.wrap('key', async () => { throw new Error('down'); })).resolves.toBe('old');
+        expect(cache.stats().stale_if_error).toBe(1);
+
+        now.mockReturnValue(7000);
+        await expect(cache.wrap('key', async () => { throw new Error('down'); })).rejects.toThrow('down');
+    });
+
+    test('does not cache loader failures', async () => {
+        const cache = new Cache();
+
+        await expect(cache.wrap('key', async () => { throw new Error('boom'); })).rejects.toThrow('boom');
+        await expect(cache.wrap('key', async () => 'ok')).resolves.toBe('ok');
+    });
+
+    test('reads through the shared store before calling the loader', async () => {
+        const store = {
+            get: jest.fn().mockResolvedValue({ value: 'shared', expiresAt: Date.now() + 1000 }),
+            set: jest.fn()
+        };
+        const cache = new Cache({ name: 'shared_test', store });
+        const loader = jest.fn();
+
+        await expect(cache.wrap('key', loader)).resolves.toBe('shared');
+        expect(loader).not.toHaveBeenCalled();
+        expect(getCacheStats()).toEqual(expect.arrayContaining([
+            expect.objectContaining({ name: 'shared_test', shared_hits: 1 })
+        ]));
+    });
+});
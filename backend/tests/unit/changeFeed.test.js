@@ -0,0 +1,161 @@
+import { describe, test, expect, jest, beforeEach } from '@jest/globals';
+import { EventEmitter } from 'events';
+
+const mockQuery = jest.fn();
+const mockListen = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: { query: mockQuery }
+    }
+}));
+
+jest.unstable_mockModule('../../src/services/pgNotifier.js', () => ({
+    listen: mockListen
+}));
+
+const {
+    publishChange,
+    publishInBackground,
+    changedFields,
+    recipeChangedFields,
+    openEventStream,
+    closeEventStream,
+    startChangeFeed,
+    stopChangeFeed,
+    getChangeFeedStats,
+    MAX_CLIENTS
+} = await import('../../src/services/changeFeed.js');
+
+await startChangeFeed();
+const [[channel, receive]] = mockListen.mock.calls;
+
+// Response whose socket accepts `capacity` writes before asking for drain
+const buildRes = (capacity = Infinity) => {
+    const res = new EventEmitter();
+    res.frames = [];
+    res.status = jest.fn().mockReturnValue(res);
+    res.set = jest.fn().mockReturnValue(res);
+    res.flushHeaders = jest.fn();
+    res.write = jest.fn((frame) => {
+        res.frames.push(frame);
+        return res.frames.length < capacity;
+    });
+    res.end = jest.fn();
+    res.destroy = jest.fn();
+    return res;
+};
+
+const changes = res => res.frames.filter(frame => frame.includes('event: change'));
+
+describe('change feed', () => {
+    beforeEach(() => {
+        mockQuery.mockReset();
+        mockQuery.mockResolvedValue([]);
+        stopChangeFeed();
+    });
+
+    test('numbers events in the NOTIFY statement', async () => {
+        await publishChange('recipe', 'updated', [3], { title: 'Tarte' });
+
+        const [sql, { replacements }] = mockQuery.mock.calls[0];
+        expect(channel).toBe('change_feed');
+        expect(sql).toContain("pg_notify('change_feed', nextval('change_feed_seq')::text");
+        expect(JSON.parse(replacements.payload)).toEqual({
+            entity: 'recipe', action: 'updated', ids: [3], data: { title: 'Tarte' }
+        });
+    });
+
+    test('publishes in the background without throwing into the caller', async () => {
+        const warn = jest.spyOn(console, 'warn').mockImplementation(() => {});
+
+        expect(() => publishInBackground('recipe', 'updated', [3], () => {
+            throw new Error('no row');
+        })).not.toThrow();
+        publishInBackground('recipe', 'updated', [4], async () => ({ title: 'Tarte' }));
+        await new Promise(resolve => setImmediate(resolve));
+
+        expect(warn).toHaveBeenCalledWith('[change-feed] recipe updated not published: no row');
+        expect(mockQuery).toHaveBeenCalledTimes(1);
+        expect(JSON.parse(mockQuery.mock.calls[0][1].replacements.payload)).toMatchObject({ ids: [4], data: { title: 'Tarte' } });
+        warn.mockRestore();
+    });
+
+    test('sends a list reload instead of a payload NOTIFY would refuse', async () => {
+        await publishChange('recipe', 'deleted', Array.from({ length: 5000 }, (_, id) => id));
+
+        expect(JSON.parse(mockQuery.mock.calls[0][1].replacements.payload))
+            .toEqual({ entity: 'recipe', action: 'refreshed', ids: [] });
+    });
+
+    test('keeps the columns a request changed, with the version', () => {
+        const row = { id: 3, title: 'Tarte', instructions: 'Bake', user_id: 1, version: 4 };
+        expect(changedFields('recipe', row, ['title', 'instructions'])).toEqual({ title: 'Tarte', version: 4 });
+        expect(changedFields('recipe', row)).toEqual({ title: 'Tarte', user_id: 1, version: 4 });
+    });
+
+    test('adds the author to recipe changes that carry user_id', async () => {
+        const row = { id: 3, title: 'Tarte', user_id: 1, version: 4 };
+        mockQuery.mockResolvedValue([{ id: 1, username: 'remy' }]);
+
+        expect(await recipeChangedFields(row, ['title'])).toEqual({ title: 'Tarte', version: 4 });
+        expect(mockQuery).not.toHaveBeenCalled();
+        expect(await recipeChangedFields(row)).toEqual({
+            title: 'Tarte', user_id: 1, version: 4, author: { id: 1, username: 'remy' }
+        });
+
+        mockQuery.mockRejectedValue(new Error('connection lost'));
+        expect(await recipeChangedFields(row)).toEqual({ title: 'Tarte', user_id: 1, version: 4 });
+    });
+
+    test('fans out to clients and replays what a reconnecting one missed', () => {
+        const live = buildRes();
+        openEventStream(live);
+        receive('41 {"entity":"recipe","action":"created","ids":[1]}');
+        receive('42 {"entity":"recipe","action":"deleted","ids":[1]}');
+
+        expect(live.frames[0]).toBe('retry: 3000\n\n');
+        expect(changes(live)).toEqual([
+            'id: 41\nevent: change\ndata: {"entity":"recipe","action":"created","ids":[1]}\n\n',
+            'id: 42\nevent: change\ndata: {"entity":"recipe","action":"deleted","ids":[1]}\n\n'
+        ]);
+
+        const resumed = buildRes();
+        openEventStream(resumed, '41');
+        expect(changes(resumed)).toEqual([changes(live)[1]]);
+
+        const unknown = buildRes();
+        openEventStream(unknown, '7');
+        expect(unknown.frames).toContain('event: reset\ndata: {}\n\n');
+    });
+
+    test('holds frames until drain, drops a client that never catches up', () => {
+        const slow = buildRes(2);
+        const client = openEventStream(slow);
+        receive('50 {}');
+        receive('51 {}');
+        expect(slow.write).toHaveBeenCalledTimes(2);
+
+        slow.write.mockReturnValue(true);
+        slow.emit('drain');
+        expect(changes(slow).map(frame => frame.split('\n')[0])).toEqual(['id: 50', 'id: 51']);
+
+        slow.write.mockReturnValue(false);
+        for (let id = 52; id < 200; id++) {
+            receive(`${id} {}`);
+        }
+        expect(slow.destroy).toHaveBeenCalled();
+        expect(getChangeFeedStats()).toMatchObject({ clients: 0, dropped: 1 });
+        closeEventStream(client);
+    });
+
+    test('refuses streams past the connection limit', () => {
+        for (let index = 0; index < MAX_CLIENTS; index++) {
+            openEventStream(buildRes());
+        }
+        const refused = buildRes();
+        expect(openEventStream(refused)).toBeNull();
+        expect(refused.flushHeaders).not.toHaveBeenCalled();
+        expect(getChangeFeedStats().rejected).toBe(1);
+    });
+});
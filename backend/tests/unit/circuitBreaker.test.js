@@ -0,0 +1,56 @@
+import { describe, test, expect, jest, afterEach } from '@jest/globals';
+import { CircuitBreaker, CircuitOpenError } from '../../src/utils/circuitBreaker.js';
+
+const fail = async () => { throw new Error('down'); };
+
+describe('CircuitBreaker', () => {
+    afterEach(() => {
+        jest.restoreAllMocks();
+    });
+
+    test('opens after consecutive failures and fails fast', async () => {
+        const breaker = new CircuitBreaker({ name: 'tmdb', failureThreshold: 2, resetTimeoutMs: 1000 });
+        const fn = jest.fn(fail);
+
+        await expect(breaker.call(fn)).rejects.toThrow('down');
+        await expect(breaker.call(fn)).rejects.toThrow('down');
+        await expect(breaker.call(fn)).rejects.toBeInstanceOf(CircuitOpenError);
+
+        expect(fn).toHaveBeenCalledTimes(2);
+        expect(breaker.stats()).toMatchObject({ state: 'open', opened: 1, rejected: 1 });
+    });
+
+    test('lets a single trial through after the reset timeout', async () => {
+        const breaker = new CircuitBreaker({ name: 'tmdb', failureThreshold: 1, resetTimeoutMs: 1000 });
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+        await expect(breaker.call(fail)).rejects.toThrow('down');
+
+        now.mockReturnValue(1500);
+        breaker.assertClosed();
+        expect(breaker.state).toBe('half_open');
+        expect(() => breaker.assertClosed()).toThrow(CircuitOpenError);
+
+        breaker.onSuccess();
+        expect(breaker.state).toBe('closed');
+    });
+
+    test('re-opens when the trial fails', async () => {
+        const breaker = new CircuitBreaker({ name: 'tmdb', failureThreshold: 3, resetTimeoutMs: 1000 });
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+        for (let i = 0; i < 3; i++) {
+            await expect(breaker.call(fail)).rejects.toThrow('down');
+        }
+
+        now.mockReturnValue(1500);
+        await expect(breaker.call(fail)).rejects.toThrow('down');
+        expect(breaker.state).toBe('open');
+        expect(() => breaker.assertClosed()).toThrow(CircuitOpenError);
+    });
+
+    test('ignores errors that isFailure rejects', async () => {
+        const breaker = new CircuitBreaker({ name: 'tmdb', failureThreshold: 1 });
+
+        await expect(breaker.call(fail, () => false)).rejects.toThrow('down');
+        expect(breaker.state).toBe('closed');
+    });
+});
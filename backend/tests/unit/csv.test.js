@@ -0,0 +1,49 @@
+import { describe, test, expect } from '@jest/globals';
+import { formatCsvRow, parseCsv, parseCsvObjects, readLines } from '../../src/utils/csv.js';
+
+const collect = async (iterable) => {
+    const items = [];
+    for await (const item of iterable) {
+        items.push(item);
+    }
+    return items;
+};
+
+// Chunk boundaries deliberately fall inside lines and quoted fields
+const chunks = (text, size = 5) => (async function* () {
+    for (let i = 0; i < text.length; i += size) {
+        yield Buffer.from(text.slice(i, i + size));
+    }
+})();
+
+describe('csv', () => {
+    test('quotes values containing delimiters, quotes or newlines', () => {
+        expect(formatCsvRow([1, 'plain', 'a,b', 'say "hi"', 'two\nlines', null]))
+            .toBe('1,plain,"a,b","say ""hi""","two\nlines",\r\n');
+        expect(formatCsvRow([new Date('2024-01-02T03:04:05Z')])).toBe('2024-01-02T03:04:05.000Z\r\n');
+    });
+
+    test('splits lines across chunk boundaries', async () => {
+        await expect(collect(readLines(chunks('one\r\ntwo\nthree')))).resolves.toEqual(['one', 'two', 'three']);
+    });
+
+    test('round-trips quoted fields spanning lines', async () => {
+        const rows = [['id', 'title'], ['1', 'Ratatouille, "Rémy"\nstyle'], ['2', '']];
+        const text = rows.map(formatCsvRow).join('');
+
+        await expect(collect(parseCsv(chunks(text)))).resolves.toEqual(rows);
+    });
+
+    test('maps records to objects by header and drops empty cells', async () => {
+        const text = 'title,prep_time,anecdote\nSoupe,10,\n\nTarte,,"Vue dans ""Amélie"""\n';
+
+        await expect(collect(parseCsvObjects(chunks(text)))).resolves.toEqual([
+            { title: 'Soupe', prep_time: '10' },
+            { title: 'Tarte', anecdote: 'Vue dans "Amélie"' }
+        ]);
+    });
+
+    test('rejects an unterminated quoted field', async () => {
+        await expect(collect(parseCsv(chunks('a,"open\n')))).rejects.toThrow('Unterminated');
+    });
+});
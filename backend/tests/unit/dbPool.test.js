@@ -0,0 +1,50 @@
+import { describe, test, expect } from '@jest/globals';
+import { QueryTypes } from 'sequelize';
+import { instrumentPool, getPoolStats } from '../../src/services/dbPool.js';
+
+const fakePool = (overrides = {}) => ({
+    maxSize: 4,
+    minSize: 0,
+    size: 2,
+    using: 2,
+    available: 0,
+    waiting: 1,
+    ...overrides
+});
+
+const fakeSequelize = () => {
+    const read = fakePool({ using: 1, available: 1 });
+    const write = fakePool();
+    return {
+        options: { replication: { read: [{}], write: {} } },
+        connectionManager: {
+            pool: { read, write },
+            getConnection: async (options) => {
+                if (options.fail) {
+                    const error = new Error('timeout');
+                    error.name = 'SequelizeConnectionAcquireTimeoutError';
+                    throw error;
+                }
+                return { options };
+            }
+        }
+    };
+};
+
+describe('dbPool', () => {
+    test('times checkouts per pool and reports saturation', async () => {
+        const sequelize = fakeSequelize();
+        instrumentPool(sequelize);
+
+        await sequelize.connectionManager.getConnection({ type: QueryTypes.SELECT, useMaster: false });
+        await sequelize.connectionManager.getConnection({ type: QueryTypes.SELECT, useMaster: true });
+        await sequelize.connectionManager.getConnection({ type: QueryTypes.INSERT });
+        await expect(sequelize.connectionManager.getConnection({ type: QueryTypes.INSERT, fail: true }))
+            .rejects.toThrow('timeout');
+
+        const stats = getPoolStats(sequelize);
+        expect(stats.replica).toMatchObject({ acquired: 1, in_use: 1, saturation: 0.25 });
+        expect(stats.primary).toMatchObject({ acquired: 2, timeouts: 1, waiting: 1, saturation: 0.5 });
+        expect(stats.primary.wait_ms_avg).toBeGreaterThanOrEqual(0);
+    });
+});
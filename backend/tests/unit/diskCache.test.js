@@ -0,0 +1,86 @@
+import { describe, test, expect, jest, beforeEach, afterEach } from '@jest/globals';
+import fs from 'fs/promises';
+import os from 'os';
+import path from 'path';
+import { DiskCache, cacheKey } from '../../src/utils/diskCache.js';
+import { parseSourceUrl, pickWidth, negotiateFormat, sourceForWidth } from '../../src/services/imageProxy.js';
+
+const produce = (text, ext = 'webp') => async () => ({ data: Buffer.from(text), ext });
+
+describe('DiskCache', () => {
+    let dir;
+
+    beforeEach(async () => {
+        dir = await fs.mkdtemp(path.join(os.tmpdir(), 'disk-cache-'));
+    });
+
+    afterEach(async () => {
+        await fs.rm(dir, { recursive: true, force: true });
+    });
+
+    test('stores files named by key and content hash', async () => {
+        const cache = new DiskCache({ dir });
+        const entry = await cache.wrap(cacheKey('a'), produce('hello'));
+
+        expect(path.basename(entry.file)).toBe(`${cacheKey('a')}.${entry.etag}.webp`);
+        await expect(fs.readFile(entry.file, 'utf8')).resolves.toBe('hello');
+
+        const producer = jest.fn(produce('other'));
+        await expect(cache.wrap(cacheKey('a'), producer)).resolves.toEqual(entry);
+        expect(producer).not.toHaveBeenCalled();
+    });
+
+    test('evicts least recently used files past maxBytes', async () => {
+        const cache = new DiskCache({ dir, maxBytes: 10 });
+        const a = await cache.wrap(cacheKey('a'), produce('aaaa'));
+        await cache.wrap(cacheKey('b'), produce('bbbb'));
+        await cache.wrap(cacheKey('a'), produce('aaaa'));
+        await cache.wrap(cacheKey('c'), produce('cccc'));
+
+        expect([...cache.entries.keys()]).toEqual([cacheKey('a'), cacheKey('c')]);
+        expect(cache.stats()).toMatchObject({ bytes: 8, evictions: 1 });
+        await expect(fs.access(a.file)).resolves.toBeUndefined();
+    });
+
+    test('coalesces concurrent misses and survives a restart', async () => {
+        const cache = new DiskCache({ dir });
+        const producer = jest.fn(produce('shared'));
+
+        const entries = await Promise.all([1, 2, 3].map(() => cache.wrap(cacheKey('k'), producer)));
+        expect(producer).toHaveBeenCalledTimes(1);
+        expect(new Set(entries.map(entry => entry.file)).size).toBe(1);
+
+        const restarted = new DiskCache({ dir });
+        const again = jest.fn(produce('shared'));
+        await expect(restarted.wrap(cacheKey('k'), again)).resolves.toMatchObject({ etag: entries[0].etag });
+        expect(again).not.toHaveBeenCalled();
+    });
+});
+
+describe('image proxy variants', () => {
+    test('rounds widths up to a rendered size', () => {
+        expect(pickWidth(100)).toBe(160);
+        expect(pickWidth(321)).toBe(480);
+        expect(pickWidth(5000)).toBe(960);
+    });
+
+    test('prefers AVIF when accepted', () => {
+        expect(negotiateFormat('image/avif,image/webp,*/*')).toBe('avif');
+        expect(negotiateFormat('image/webp,*/*')).toBe('webp');
+    });
+
+    test('downloads TMDB posters at the nearest TMDB size', () => {
+        const url = new URL('https://image.tmdb.org/t/p/w500/poster.jpg');
+
+        expect(sourceForWidth(url, 320).href).toBe('https://image.tmdb.org/t/p/w342/poster.jpg');
+        expect(sourceForWidth(url, 960).href).toBe('https://image.tmdb.org/t/p/original/poster.jpg');
+        expect(sourceForWidth(new URL('https://example.com/t/p/w500/a.jpg'), 320).pathname).toBe('/t/p/w500/a.jpg');
+    });
+
+    test('refuses non-http and private addresses', () => {
+        expect(() => parseSourceUrl('file:///etc/passwd')).toThrow('absolute http(s)');
+        expect(() => parseSourceUrl('http://127.0.0.1/a.png')).toThrow('private address');
+        expect(() => parseSourceUrl('http://[::1]/a.png')).toThrow('private address');
+        expect(parseSourceUrl('https://image.tmdb.org/t/p/w500/a.jpg').hostname).toBe('image.tmdb.org');
+    });
+});
@@ -0,0 +1,107 @@
+import { describe, test, expect, beforeEach, jest } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: { query: mockQuery }
+    }
+}));
+
+const { conditionalGet, matchesEtag } = await import('../../src/middlewares/httpCache.js');
+
+const buildRes = () => {
+    const headers = {};
+    const res = {
+        headers,
+        statusCode: 200,
+        set: jest.fn((name, value) => { headers[name] = value; }),
+        setHeader: jest.fn((name, value) => { headers[name] = value; }),
+        removeHeader: jest.fn((name) => { delete headers[name]; }),
+        writeHead: jest.fn(),
+        status: jest.fn().mockReturnThis(),
+        end: jest.fn()
+    };
+    return res;
+};
+
+describe('conditionalGet', () => {
+    const middleware = conditionalGet(['categories'], 'public, max-age=60');
+
+    beforeEach(() => {
+        jest.clearAllMocks();
+        mockQuery.mockResolvedValue([{ table_name: 'categories', version: '3' }]);
+    });
+
+    test('sets validators and continues on a first request', async () => {
+        const req = { originalUrl: '/api/v1/categories', headers: {} };
+        const res = buildRes();
+        const next = jest.fn();
+
+        await middleware(req, res, next);
+
+        expect(next).toHaveBeenCalled();
+        expect(res.headers.ETag).toMatch(/^"[\w-]+"$/);
+        expect(res.headers['Cache-Control']).toBe('public, max-age=60');
+    });
+
+    test('answers 304 without calling the handler when the ETag matches', async () => {
+        const first = buildRes();
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, first, jest.fn());
+
+        const req = { originalUrl: '/api/v1/categories', headers: { 'if-none-match': first.headers.ETag } };
+        const res = buildRes();
+        const next = jest.fn();
+
+        await middleware(req, res, next);
+
+        expect(next).not.toHaveBeenCalled();
+        expect(res.status).toHaveBeenCalledWith(304);
+    });
+
+    test('changes the ETag when the table version changes', async () => {
+        const before = buildRes();
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, before, jest.fn());
+
+        mockQuery.mockResolvedValue([{ table_name: 'categories', version: '4' }]);
+        const after = buildRes();
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, after, jest.fn());
+
+        expect(after.headers.ETag).not.toBe(before.headers.ETag);
+    });
+
+    test('keeps validators on success only', async () => {
+        const ok = buildRes();
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, ok, jest.fn());
+        ok.writeHead(200);
+        expect(ok.headers.ETag).toBeDefined();
+        expect(ok.headers['Cache-Control']).toBe('public, max-age=60');
+
+        const failed = buildRes();
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, failed, jest.fn());
+        failed.writeHead(404);
+        expect(failed.headers.ETag).toBeUndefined();
+        expect(failed.headers['Cache-Control']).toBe('no-store');
+    });
+
+    test('serves the request uncached when versions cannot be read', async () => {
+        mockQuery.mockRejectedValue(new Error('relation "table_versions" does not exist'));
+        const res = buildRes();
+        const next = jest.fn();
+
+        await middleware({ originalUrl: '/api/v1/categories', headers: {} }, res, next);
+
+        expect(next).toHaveBeenCalled();
+        expect(res.set).not.toHaveBeenCalled();
+    });
+});
+
+describe('matchesEtag', () => {
+    test('handles lists, weak tags and wildcards', () => {
+        expect(matchesEtag('"a", "b"', '"b"')).toBe(true);
+        expect(matchesEtag('W/"a"', '"a"')).toBe(true);
+        expect(matchesEtag('*', '"a"')).toBe(true);
+        expect(matchesEtag('"c"', '"a"')).toBe(false);
+        expect(matchesEtag(undefined, '"a"')).toBe(false);
+    });
+});
@@ -0,0 +1,37 @@
+import { describe, test, expect, jest } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: { sequelize: { query: mockQuery } }
+}));
+
+const { parseSourceUrl, isAllowedHost } = await import('../../src/services/imageProxy.js');
+
+describe('image proxy sources', () => {
+    test.each([
+        'http://127.0.0.1/x.jpg',
+        'http://198.19.0.1/x.jpg',
+        'http://239.1.1.1/x.jpg',
+        'http://255.255.255.255/x.jpg',
+        'http://[64:ff9b::a00:1]/x.jpg',
+        'http://[2002:a00:1::]/x.jpg',
+        'http://[::ffff:10.0.0.1]/x.jpg'
+    ])('refuses the private or reserved address in %s', (url) => {
+        expect(() => parseSourceUrl(url)).toThrow('private address');
+    });
+
+    test('accepts public addresses', () => {
+        expect(parseSourceUrl('http://93.184.216.34/x.jpg').hostname).toBe('93.184.216.34');
+        expect(parseSourceUrl('http://[2606:2800:220:1::]/x.jpg').hostname).toBe('[2606:2800:220:1::]');
+    });
+
+    test('allows TMDB and the hosts stored image URLs use, loading them once', async () => {
+        mockQuery.mockResolvedValue([{ host: 'images.example.com' }]);
+
+        expect(await isAllowedHost('image.tmdb.org')).toBe(true);
+        expect(await isAllowedHost('Images.Example.com')).toBe(true);
+        expect(await isAllowedHost('attacker.example.net')).toBe(false);
+        expect(mockQuery).toHaveBeenCalledTimes(1);
+    });
+});
@@ -0,0 +1,42 @@
+import { describe, test, expect, jest } from '@jest/globals';
+import { lazyModule, lazyRouter, preloadLazyModules } from '../../src/utils/lazy.js';
+import { listModelFiles, renderModelRegistry, REGISTRY_FILE } from '../../scripts/generateModelRegistry.js';
+import { readFileSync } from 'fs';
+
+describe('lazy modules', () => {
+    test('imports once and retries after a failure', async () => {
+        const load = jest.fn()
+            .mockRejectedValueOnce(new Error('ENOENT'))
+            .mockResolvedValue({ value: 42 });
+        const get = lazyModule(load);
+
+        await expect(get()).rejects.toThrow('ENOENT');
+        await expect(get()).resolves.toEqual({ value: 42 });
+        await get();
+        expect(load).toHaveBeenCalledTimes(2);
+    });
+
+    test('mounts a router on its first request', async () => {
+        const router = jest.fn((req, res, next) => next());
+        const load = jest.fn().mockResolvedValue({ default: router });
+        const middleware = lazyRouter(load);
+        expect(load).not.toHaveBeenCalled();
+
+        const next = jest.fn();
+        await new Promise((resolve) => {
+            middleware({}, {}, () => {
+                next();
+                resolve();
+            });
+        });
+        expect(router).toHaveBeenCalledTimes(1);
+        expect(next).toHaveBeenCalledTimes(1);
+
+        await preloadLazyModules();
+        expect(load).toHaveBeenCalledTimes(1);
+    });
+
+    test('the model registry lists every model file', () => {
+        expect(readFileSync(REGISTRY_FILE, 'utf8')).toBe(renderModelRegistry(listModelFiles()));
+    });
+});
@@ -0,0 +1,80 @@
+import { describe, test, expect, jest } from '@jest/globals';
+import { expectQueryCount } from '../helpers/queryCounter.js';
+
+// Stand-in for db.sequelize: model finders go through query() like the real ones
+const mockSequelize = { query: jest.fn(async () => []) };
+const mockUsers = [
+    { id: 1, username: 'remy', email: 'remy@example.com' },
+    { id: 2, username: 'linguini', email: 'linguini@example.com' }
+];
+const mockRecipes = [
+    { id: 12, title: 'Ratatouille', image_url: null, user_id: 1 },
+    { id: 10, title: 'Soupe', image_url: null, user_id: 1 }
+];
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: mockSequelize,
+        User: {
+            findAll: jest.fn(async ({ where }) => {
+                await mockSequelize.query('SELECT * FROM users WHERE id IN (...)');
+                return mockUsers.filter(user => where.id.includes(user.id));
+            })
+        },
+        Recipe: {
+            findAll: jest.fn(async ({ where }) => {
+                await mockSequelize.query('SELECT * FROM recipes WHERE user_id IN (...)');
+                return mockRecipes.filter(recipe => where.user_id.includes(recipe.user_id));
+            })
+        }
+    }
+}));
+
+jest.unstable_mockModule('../../src/services/referenceData.js', () => ({
+    getCategoryMap: jest.fn(async () => new Map([[1, { id: 1, name: 'Plat' }]])),
+    getMediaMap: jest.fn(async () => new Map([[7, { id: 7, title: 'Ratatouille' }]]))
+}));
+
+const { createLoaders, hydrateRecipes, loadUserProfile } = await import('../../src/services/loaders.js');
+
+describe('loaders', () => {
+    test('hydrates a page of recipes with a single users query', async () => {
+        const recipes = [
+            { id: 1, user_id: 1, category_id: 1, media_id: 7 },
+            { id: 2, user_id: 2, category_id: null, media_id: 7 },
+            { id: 3, user_id: 1, category_id: 1, media_id: 99 }
+        ];
+
+        const hydrated = await expectQueryCount(mockSequelize, 1,
+            () => hydrateRecipes(recipes, createLoaders()));
+
+        expect(hydrated[0]).toMatchObject({
+            author: { id: 1, username: 'remy' },
+            category: { id: 1, name: 'Plat' },
+            media: { id: 7, title: 'Ratatouille' }
+        });
+        expect(hydrated[1].category).toBeNull();
+        expect(hydrated[2].media).toBeNull();
+        expect(hydrated[0].author).not.toHaveProperty('email');
+    });
+
+    test('builds profiles with recipe summaries and counts', async () => {
+        const loaders = createLoaders();
+
+        const [remy, linguini] = await expectQueryCount(mockSequelize, 2, () => Promise.all([
+            loadUserProfile(1, loaders),
+            loadUserProfile(2, loaders)
+        ]));
+
+        expect(remy.recipe_count).toBe(2);
+        expect(remy.recipes).toEqual([
+            { id: 12, title: 'Ratatouille', image_url: null },
+            { id: 10, title: 'Soupe', image_url: null }
+        ]);
+        expect(linguini).toMatchObject({ recipes: [], recipe_count: 0 });
+    });
+
+    test('returns null for an unknown user', async () => {
+        await expect(loadUserProfile(404, createLoaders())).resolves.toBeNull();
+    });
+});
@@ -0,0 +1,102 @@
+import { describe, test, expect, jest, beforeEach } from '@jest/globals';
+
+const mockQuery = jest.fn();
+const mockUpdate = jest.fn();
+const mockSearch = jest.fn();
+const mockDetails = jest.fn();
+const mockInvalidate = jest.fn();
+const mockPublishChange = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: { query: mockQuery },
+        Media: { update: mockUpdate }
+    }
+}));
+
+jest.unstable_mockModule('../../src/services/tmdbService.js', () => ({
+    searchMedia: mockSearch,
+    getMediaDetails: mockDetails
+}));
+
+jest.unstable_mockModule('../../src/services/referenceData.js', () => ({
+    invalidateReferenceData: mockInvalidate
+}));
+
+jest.unstable_mockModule('../../src/services/changeFeed.js', () => ({
+    publishChange: mockPublishChange
+}));
+
+const { pickMatch, diffMedia, runMediaSync, SyncLockedError } = await import('../../src/services/mediaSync.js');
+
+const ROWS = [
+    { id: 1, title: 'Ratatouille', type: 'film', release_year: 2007, image_url: null, tmdb_id: null },
+    { id: 2, title: 'Unknown Film', type: 'film', release_year: 1999, image_url: null, tmdb_id: null }
+];
+
+describe('media sync', () => {
+    beforeEach(() => {
+        jest.clearAllMocks();
+    });
+
+    test('matches on title and year, ignoring accents and punctuation', () => {
+        const results = [
+            { tmdb_id: 10, title: 'Chocolat', year: 1988 },
+            { tmdb_id: 11, title: 'Chocolat', year: 2000 }
+        ];
+
+        expect(pickMatch({ title: 'chocolat!', release_year: 2000 }, results)).toEqual({ tmdb_id: 11, match: 'title_year' });
+        expect(pickMatch({ title: 'Chocolat', release_year: 1950 }, results)).toBeNull();
+        expect(pickMatch({ title: "Babette's Feast", release_year: 1987 }, [{ tmdb_id: 5, title: 'Le Festin de Babette', year: 1987 }]))
+            .toEqual({ tmdb_id: 5, match: 'year' });
+        expect(pickMatch({ title: 'Crème brûlée', release_year: null }, [{ tmdb_id: 7, title: 'Creme Brulee', year: 2004 }]))
+            .toEqual({ tmdb_id: 7, match: 'title' });
+    });
+
+    test('never erases a poster or year TMDB does not have', () => {
+        const media = { tmdb_id: 3, image_url: 'https://img/a.jpg', release_year: 2001 };
+
+        expect(diffMedia(media, { tmdb_id: 3, poster_url: null, year: 2002 }))
+            .toEqual({ release_year: { from: 2001, to: 2002 } });
+    });
+
+    test('a dry run reports changes without writing or taking the lease', async () => {
+        mockQuery.mockImplementation(async (sql, { replacements }) => {
+            if (sql.includes('FROM sync_checkpoints')) {
+                return [{ last_id: 0 }];
+            }
+            if (sql.includes('FROM media')) {
+                return replacements.lastId === 0 ? ROWS : [];
+            }
+            return [];
+        });
+        mockSearch.mockImplementation(async title => (title === 'Ratatouille'
+            ? [{ tmdb_id: 2062, title: 'Ratatouille', year: 2007 }]
+            : []));
+        mockDetails.mockResolvedValue({ tmdb_id: 2062, poster_url: 'https://image.tmdb.org/t/p/w500/r.jpg', year: 2007 });
+
+        const report = await runMediaSync({ dryRun: true });
+
+        expect(report).toMatchObject({ dry_run: true, completed: true, counts: { updated: 1, no_match: 1 } });
+        expect(report.items[0]).toEqual({
+            id: 1,
+            title: 'Ratatouille',
+            match: 'title_year',
+            status: 'updated',
+            changes: {
+                tmdb_id: { from: null, to: 2062 },
+                image_url: { from: null, to: 'https://image.tmdb.org/t/p/w500/r.jpg' }
+            }
+        });
+        expect(mockUpdate).not.toHaveBeenCalled();
+        for (const [sql] of mockQuery.mock.calls) {
+            expect(sql).not.toMatch(/^\s*(UPDATE|INSERT)/);
+        }
+    });
+
+    test('refuses to run while another process holds the lease', async () => {
+        mockQuery.mockResolvedValue([]);
+
+        await expect(runMediaSync()).rejects.toBeInstanceOf(SyncLockedError);
+    });
+});
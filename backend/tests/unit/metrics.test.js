@@ -0,0 +1,56 @@
+import { describe, test, expect } from '@jest/globals';
+import { Registry } from '../../src/utils/metrics.js';
+import { describeQuery } from '../../src/services/metrics.js';
+
+describe('metrics registry', () => {
+    test('renders cumulative histogram buckets', () => {
+        const registry = new Registry();
+        const histogram = registry.histogram({
+            name: 'test_duration_seconds',
+            help: 'Test durations',
+            labelNames: ['route'],
+            buckets: [0.1, 1]
+        });
+
+        histogram.observe({ route: '/a' }, 0.05);
+        histogram.observe({ route: '/a' }, 0.5);
+        histogram.observe({ route: '/a' }, 3);
+
+        const text = registry.render();
+        expect(text).toContain('# TYPE test_duration_seconds histogram');
+        expect(text).toContain('test_duration_seconds_bucket{route="/a",le="0.1"} 1');
+        expect(text).toContain('test_duration_seconds_bucket{route="/a",le="1"} 2');
+        expect(text).toContain('test_duration_seconds_bucket{route="/a",le="+Inf"} 3');
+        expect(text).toContain('test_duration_seconds_sum{route="/a"} 3.55');
+    });
+
+    test('escapes label values and refreshes gauges on render', () => {
+        const registry = new Registry();
+        registry.counter({ name: 'test_total', help: 'Test', labelNames: ['name'] }).inc({ name: 'say "hi"' });
+        let calls = 0;
+        registry.gauge({ name: 'test_gauge', help: 'Test', collect: (gauge) => gauge.set(++calls) });
+
+        registry.render();
+        const text = registry.render();
+
+        expect(text).toContain('test_total{name="say \\"hi\\""} 1');
+        expect(text).toContain('test_gauge 2');
+    });
+
+    test('rejects duplicate metric names', () => {
+        const registry = new Registry();
+        registry.counter({ name: 'test_total', help: 'Test' });
+        expect(() => registry.counter({ name: 'test_total', help: 'Test' })).toThrow('already registered');
+    });
+});
+
+describe('describeQuery', () => {
+    test.each([
+        ['Executed (default): SELECT "id" FROM "recipes" AS "Recipe" LIMIT 21;', 'SELECT', 'recipes'],
+        ['Executed (default): INSERT INTO "users" ("id") VALUES (DEFAULT);', 'INSERT', 'users'],
+        ['Executed (a1b2): UPDATE generation_jobs SET status = $1', 'UPDATE', 'generation_jobs'],
+        ['Executed (default): SELECT 1', 'SELECT', 'none']
+    ])('%s', (sql, operation, table) => {
+        expect(describeQuery(sql)).toEqual({ operation, table });
+    });
+});
@@ -0,0 +1,47 @@
+import { describe, test, expect } from '@jest/globals';
+import {
+    encodeCursor,
+    decodeCursor,
+    parseLimit,
+    buildPage,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE
+} from '../../src/utils/pagination.js';
+
+describe('pagination utilities', () => {
+    test('round-trips a cursor', () => {
+        const row = { id: 7, created_at: new Date('2024-05-01T12:30:00.123Z') };
+
+        expect(decodeCursor(encodeCursor(row))).toEqual({ id: 7, created_at: '2024-05-01T12:30:00.123Z' });
+    });
+
+    test('keeps microseconds so rows sharing a millisecond are not skipped', () => {
+        const rows = [
+            { id: 9, created_at: new Date('2024-05-01T12:30:00.123Z'), cursor_created_at: '2024-05-01T12:30:00.123789Z' },
+            { id: 8, created_at: new Date('2024-05-01T12:30:00.123Z'), cursor_created_at: '2024-05-01T12:30:00.123456Z' }
+        ];
+
+        const page = buildPage(rows, 1);
+
+        expect(decodeCursor(page.next_cursor)).toEqual({ id: 9, created_at: '2024-05-01T12:30:00.123789Z' });
+        expect(page.data).toEqual([{ id: 9, created_at: rows[0].created_at }]);
+    });
+
+    test('returns null for malformed cursors', () => {
+        expect(decodeCursor('garbage')).toBeNull();
+        expect(decodeCursor(Buffer.from('["nope", "x"]').toString('base64url'))).toBeNull();
+    });
+
+    test('clamps the page size', () => {
+        expect(parseLimit(undefined)).toBe(DEFAULT_PAGE_SIZE);
+        expect(parseLimit('0')).toBe(DEFAULT_PAGE_SIZE);
+        expect(parseLimit('5')).toBe(5);
+        expect(parseLimit('5000')).toBe(MAX_PAGE_SIZE);
+    });
+
+    test('builds the last page without a cursor', () => {
+        const rows = [{ id: 1, created_at: new Date() }];
+
+        expect(buildPage(rows, 2)).toEqual({ data: rows, next_cursor: null });
+    });
+});
@@ -0,0 +1,80 @@
+import { describe, test, expect, jest } from '@jest/globals';
+import { PasswordHasher, HashingOverloadedError } from '../../src/services/passwordHasher.js';
+
+// argon2 stand-in whose calls complete only when released
+const controlledArgon = () => {
+    const pending = [];
+    return {
+        pending,
+        hash: jest.fn(() => new Promise(resolve => pending.push(() => resolve('$argon2id$hash')))),
+        verify: jest.fn(() => new Promise(resolve => pending.push(() => resolve(true)))),
+        needsRehash: jest.fn((digest, options) => !digest.includes(`m=${options.memoryCost}`)),
+        releaseNext() {
+            pending.shift()();
+        }
+    };
+};
+
+const flush = () => new Promise(resolve => setImmediate(resolve));
+
+describe('PasswordHasher', () => {
+    test('runs at most poolSize operations at once', async () => {
+        const argon = controlledArgon();
+        const hasher = new PasswordHasher({ poolSize: 2, maxQueue: 10, argon });
+
+        const results = [hasher.verify('a', 'p'), hasher.verify('b', 'p'), hasher.verify('c', 'p')];
+        await flush();
+        expect(argon.verify).toHaveBeenCalledTimes(2);
+        expect(hasher.stats()).toMatchObject({ active: 2, queued: 1 });
+
+        argon.releaseNext();
+        await flush();
+        expect(argon.verify).toHaveBeenCalledTimes(3);
+
+        argon.releaseNext();
+        argon.releaseNext();
+        await expect(Promise.all(results)).resolves.toEqual([true, true, true]);
+        expect(hasher.stats()).toMatchObject({ active: 0, queued: 0, completed: 3 });
+    });
+
+    test('sheds load with a retry hint once the queue is full', async () => {
+        const argon = controlledArgon();
+        const hasher = new PasswordHasher({ poolSize: 1, maxQueue: 1, argon });
+
+        hasher.hash('one');
+        hasher.hash('two');
+        const rejected = hasher.hash('three');
+
+        await expect(rejected).rejects.toBeInstanceOf(HashingOverloadedError);
+        await rejected.catch(error => {
+            expect(error.status).toBe(503);
+            expect(error.reason).toBe('queue_full');
+            expect(error.retryAfter).toBeGreaterThanOrEqual(1);
+        });
+    });
+
+    test('gives up on operations that wait too long', async () => {
+        jest.useFakeTimers();
+        try {
+            const argon = controlledArgon();
+            const hasher = new PasswordHasher({ poolSize: 1, maxQueue: 5, queueTimeoutMs: 100, argon });
+
+            hasher.hash('one');
+            const waiting = hasher.hash('two');
+            jest.advanceTimersByTime(100);
+
+            await expect(waiting).rejects.toMatchObject({ reason: 'queue_timeout' });
+            expect(hasher.stats().queued).toBe(0);
+        } finally {
+            jest.useRealTimers();
+        }
+    });
+
+    test('flags hashes made with other cost parameters', () => {
+        const argon = controlledArgon();
+        const hasher = new PasswordHasher({ argon, hashOptions: { memoryCost: 19456, timeCost: 2 } });
+
+        expect(hasher.needsRehash('$argon2id$v=19$m=65536,t=3,p=4$salt$hash')).toBe(true);
+        expect(hasher.needsRehash('$argon2id$v=19$m=19456,t=2,p=1$salt$hash')).toBe(false);
+    });
+});
@@ -0,0 +1,29 @@
+import { describe, test, expect, jest } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: { sequelize: { query: mockQuery } }
+}));
+
+const { PostgresRateLimitStore, slidingWindowHits } = await import('../../src/services/rateLimitStore.js');
+
+describe('PostgresRateLimitStore', () => {
+    test('weights the previous window by its remaining overlap', () => {
+        // 25% into the current window: 75% of the previous window still counts
+        const row = { current: 3, previous: 8, now_ms: '1250', start_ms: '1000' };
+        expect(slidingWindowHits(row, 1000)).toBe(3 + 6);
+    });
+
+    test('increments a prefixed key and reports the window end', async () => {
+        mockQuery.mockResolvedValue([{ current: 1, previous: 0, now_ms: '60500', start_ms: '60000' }]);
+        const store = new PostgresRateLimitStore({ prefix: 'api' });
+        store.windowMs = 60000;
+
+        const result = await store.increment('127.0.0.1');
+
+        expect(result).toEqual({ totalHits: 1, resetTime: new Date(120000) });
+        expect(mockQuery.mock.calls[0][1].replacements).toEqual({ key: 'api:127.0.0.1', windowMs: 60000 });
+        expect(store.localKeys).toBe(false);
+    });
+});
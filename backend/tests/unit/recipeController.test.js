@@ -1,33 +1,60 @@
 import { describe, test, expect, beforeEach, jest } from '@jest/globals';
+import { inspect } from 'util';
 
 const mockRecipe = {
     findByPk: jest.fn(),
     findAll: jest.fn()
 };
-
-const mockUser = {};
-const mockCategory = {};
-const mockMedia = {};
+const mockQuery = jest.fn();
 
 jest.unstable_mockModule('../../src/models/index.js', () => ({
     default: {
         Recipe: mockRecipe,
-        User: mockUser,
-        Category: mockCategory,
-        Media: mockMedia
+        sequelize: { query: mockQuery, escape: value => `'${value}'` }
     }
 }));
 
-const { getRecipeById, getAllRecipes } = await import('../../src/controllers/recipeController.js');
+const mockSearchRecipes = jest.fn();
+const mockHydrateRecipes = jest.fn(async (recipes) => recipes.map(recipe => ({
+    ...recipe,
+    author: null,
+    category: null,
+    media: null
+})));
+
+jest.unstable_mockModule('../../src/services/loaders.js', () => ({
+    hydrateRecipes: mockHydrateRecipes
+}));
+
+jest.unstable_mockModule('../../src/services/recipeSearchService.js', () => ({
+    searchRecipes: mockSearchRecipes
+}));
+
+const {
+    getRecipeById,
+    getAllRecipes,
+    searchRecipes,
+    getSimilarRecipes,
+    updateRecipe
+} = await import('../../src/controllers/recipeController.js');
+const { parseIfMatch } = await import('../../src/services/recipeWriteService.js');
+const { decodeCursor } = await import('../../src/utils/pagination.js');
+const { decodeCoverageCursor, toIngredientText } = await import('../../src/services/ingredientSearchService.js');
 
 const buildRes = () => {
     const res = {
         status: jest.fn().mockReturnThis(),
-        json: jest.fn()
+        set: jest.fn().mockReturnThis(),
+        type: jest.fn().mockReturnThis(),
+        json: jest.fn(),
+        send: jest.fn()
     };
     return res;
 };
 
+// Body written by a compiled serializer
+const sentBody = res => JSON.parse(res.send.mock.calls[0][0]);
+
 describe('recipeController', () => {
     beforeEach(() => {
         jest.clearAllMocks();
@@ -44,22 +71,202 @@ describe('recipeController', () => {
         expect(res.json).toHaveBeenCalledWith({ message: 'Recipe not found' });
     });
 
+    test('reads a recipe again from the primary when the replica is behind its ETag', async () => {
+        mockRecipe.findByPk
+            .mockResolvedValueOnce({ id: 3, title: 'Tarte', version: 4 })
+            .mockResolvedValueOnce({ id: 3, title: 'Tarte fine', version: 5 });
+        const res = { ...buildRes(), locals: { recipeVersion: 5 } };
+
+        await getRecipeById({ params: { id: '3' } }, res);
+
+        expect(mockRecipe.findByPk.mock.calls[0][1].useMaster).toBe(false);
+        expect(mockRecipe.findByPk.mock.calls[1][1].useMaster).toBeUndefined();
+        expect(sentBody(res)).toMatchObject({ title: 'Tarte fine', version: 5 });
+    });
+
     test('returns recipes with related data', async () => {
         const recipes = [{ id: 1, title: 'Ratatouille' }];
         mockRecipe.findAll.mockResolvedValue(recipes);
-        const req = {};
+        const req = { query: {}, loaders: {} };
+        const res = buildRes();
+
+        await getAllRecipes(req, res);
+
+        expect(mockHydrateRecipes).toHaveBeenCalledWith(recipes, req.loaders);
+        expect(res.status).toHaveBeenCalledWith(200);
+        expect(sentBody(res)).toEqual({
+            data: [{ id: 1, title: 'Ratatouille', author: null, category: null, media: null }],
+            next_cursor: null
+        });
+        expect(mockRecipe.findAll.mock.calls[0][0]).not.toHaveProperty('include');
+        expect(mockRecipe.findAll).toHaveBeenCalledWith(expect.objectContaining({
+            order: [['created_at', 'DESC'], ['id', 'DESC']],
+            limit: 21,
+            raw: true
+        }));
+    });
+
+    test('returns a next cursor when more recipes are available', async () => {
+        const recipes = [
+            { id: 3, created_at: new Date('2024-01-03T00:00:00Z') },
+            { id: 2, created_at: new Date('2024-01-02T00:00:00Z') },
+            { id: 1, created_at: new Date('2024-01-01T00:00:00Z') }
+        ];
+        mockRecipe.findAll.mockResolvedValue(recipes);
+        const req = { query: { limit: '2', fields: 'title,image_url' } };
+        const res = buildRes();
+
+        await getAllRecipes(req, res);
+
+        const page = sentBody(res);
+        expect(page.data).toHaveLength(2);
+        expect(decodeCursor(page.next_cursor)).toEqual({ id: 2, created_at: '2024-01-02T00:00:00.000Z' });
+        expect(mockRecipe.findAll.mock.calls[0][0]).toMatchObject({
+            attributes: [
+                'id', 'title', 'image_url', 'user_id', 'category_id', 'media_id', 'created_at',
+                [expect.anything(), 'cursor_created_at']
+            ],
+            limit: 3
+        });
+    });
+
+    test('compares the cursor timestamp in SQL, microseconds included', async () => {
+        mockRecipe.findAll.mockResolvedValue([]);
+        const cursor = Buffer.from(JSON.stringify(['2024-01-02T00:00:00.123456Z', 2])).toString('base64url');
+
+        await getAllRecipes({ query: { cursor } }, buildRes());
+
+        const { where } = mockRecipe.findAll.mock.calls[0][0];
+        expect(inspect(where, { depth: null })).toContain("'2024-01-02T00:00:00.123456Z'::timestamptz");
+    });
+
+    test('rejects a malformed cursor', async () => {
+        const req = { query: { cursor: 'not-a-cursor' } };
+        const res = buildRes();
+
+        await getAllRecipes(req, res);
+
+        expect(res.status).toHaveBeenCalledWith(400);
+        expect(mockRecipe.findAll).not.toHaveBeenCalled();
+    });
+
+    test('searches recipes with the trimmed query', async () => {
+        const results = { mode: 'fulltext', data: [{ id: 1, title: 'Ratatouille', rank: 0.5 }] };
+        mockSearchRecipes.mockResolvedValue(results);
+        const req = { query: { q: '  ratatouille ', limit: '5' } };
+        const res = buildRes();
+
+        await searchRecipes(req, res);
+
+        expect(mockSearchRecipes).toHaveBeenCalledWith('ratatouille', 5);
+        expect(res.status).toHaveBeenCalledWith(200);
+        expect(sentBody(res)).toEqual(results);
+    });
+
+    test('ranks recipes by ingredient coverage', async () => {
+        const rows = [
+            { id: 7, title: 'Bruschetta', matched_ingredients: 2, coverage: 667 },
+            { id: 4, title: 'Caprese', matched_ingredients: 2, coverage: 500 },
+            { id: 9, title: 'Pesto', matched_ingredients: 1, coverage: 250 }
+        ];
+        mockQuery.mockResolvedValue(rows);
+        const req = { query: { ingredients: 'Tomato, basil,,tomato', match: 'any', limit: '2', difficulty: 'facile' } };
         const res = buildRes();
 
         await getAllRecipes(req, res);
 
+        const [sql, options] = mockQuery.mock.calls[0];
+        expect(sql).toContain('ORDER BY matched_ingredients DESC, coverage DESC, id DESC');
+        expect(sql).toContain('r.difficulty = :difficulty');
+        expect(options.replacements).toMatchObject({ terms: ['tomato', 'basil'], matchAll: false, limit: 3, after: null });
+        expect(mockRecipe.findAll).not.toHaveBeenCalled();
+
+        const page = sentBody(res);
+        expect(page.data.map(recipe => recipe.id)).toEqual([7, 4]);
+        expect(decodeCoverageCursor(page.next_cursor)).toEqual({ matched: 2, coverage: 500, id: 4 });
+    });
+
+    test('answers precomputed similar recipes, 404 for an unknown recipe', async () => {
+        mockQuery.mockResolvedValueOnce([{ id: 8, title: 'Gratin', score: 0.72 }]);
+        const req = { params: { id: '3' }, query: { limit: '100' }, loaders: {} };
+        const res = buildRes();
+
+        await getSimilarRecipes(req, res);
+
+        expect(mockQuery.mock.calls[0][1].replacements).toEqual({ id: 3, limit: 12 });
         expect(res.status).toHaveBeenCalledWith(200);
-        expect(res.json).toHaveBeenCalledWith(recipes);
-        expect(mockRecipe.findAll).toHaveBeenCalledWith({
-            include: [
-                { model: mockUser, as: 'author', attributes: ['id', 'username'] },
-                { model: mockCategory, as: 'category' },
-                { model: mockMedia, as: 'media' }
-            ]
+        expect(sentBody(res).data).toEqual([
+            { id: 8, title: 'Gratin', score: 0.72, author: null, category: null, media: null }
+        ]);
+
+        mockQuery.mockResolvedValueOnce([]);
+        mockRecipe.findByPk.mockResolvedValue(null);
+        const missing = buildRes();
+        await getSimilarRecipes({ params: { id: '404' }, query: {} }, missing);
+        expect(missing.status).toHaveBeenCalledWith(404);
+    });
+
+    test('updates with one statement checking owner and If-Match version', async () => {
+        mockQuery.mockResolvedValueOnce([{ id: 3, user_id: 1, title: 'Tarte', version: 5, written: true }]);
+        const req = {
+            params: { id: '3' },
+            body: { title: 'Tarte', user_id: 9, category_id: '' },
+            headers: { 'if-match': '"4"' },
+            user: { id: 1, role: 'user' }
+        };
+        const res = buildRes();
+
+        await updateRecipe(req, res);
+
+        const [sql, options] = mockQuery.mock.calls[0];
+        expect(sql).toContain('"title" = :set_title, "category_id" = :set_category_id');
+        expect(sql).not.toContain('"user_id" =');
+        expect(options.replacements).toMatchObject({ id: 3, userId: 1, isAdmin: false, expected: 4, set_category_id: null });
+        expect(res.status).toHaveBeenCalledWith(200);
+        expect(res.set).toHaveBeenCalledWith('ETag', '"5"');
+        expect(sentBody(res)).toEqual({ id: 3, user_id: 1, title: 'Tarte', version: 5 });
+
+        const [, notify] = mockQuery.mock.calls.find(([statement]) => statement.includes('pg_notify'));
+        expect(JSON.parse(notify.replacements.payload)).toEqual({
+            entity: 'recipe',
+            action: 'updated',
+            ids: [3],
+            data: { title: 'Tarte', user_id: 1, version: 5 }
         });
     });
+
+    test('tells a missing, foreign and stale recipe apart', async () => {
+        const attempt = async (row, ifMatch) => {
+            mockQuery.mockResolvedValueOnce(row ? [{ ...row, written: false }] : []);
+            const res = buildRes();
+            await updateRecipe({
+                params: { id: '3' },
+                body: { title: 'Tarte' },
+                headers: ifMatch ? { 'if-match': ifMatch } : {},
+                user: { id: 1, role: 'user' }
+            }, res);
+            return res;
+        };
+
+        expect((await attempt(null)).status).toHaveBeenCalledWith(404);
+        expect((await attempt({ id: 3, user_id: 2, version: 1 })).status).toHaveBeenCalledWith(403);
+
+        const stale = await attempt({ id: 3, user_id: 1, version: 7 }, '"6"');
+        expect(stale.status).toHaveBeenCalledWith(412);
+        expect(stale.set).toHaveBeenCalledWith('ETag', '"7"');
+    });
+
+    test('reads the version from If-Match tags', () => {
+        expect(parseIfMatch(undefined)).toBeNull();
+        expect(parseIfMatch('*')).toBeNull();
+        expect(parseIfMatch('"12"')).toBe(12);
+        expect(parseIfMatch('"12-Zm9v"')).toBe(12);
+        expect(parseIfMatch('W/"12"')).toBeNaN();
+    });
+
+    test('maps generated ingredient arrays to one line per item', () => {
+        expect(toIngredientText(['200g dark chocolate', '- 1 cup heavy cream', ' ', null]))
+            .toBe('- 200g dark chocolate\n- 1 cup heavy cream');
+        expect(toIngredientText('- flour')).toBe('- flour');
+    });
 });
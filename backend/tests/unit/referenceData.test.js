@@ -0,0 +1,71 @@
+import { describe, test, expect, beforeEach, jest } from '@jest/globals';
+
+const mockCategory = { findAll: jest.fn() };
+const mockMedia = { findAll: jest.fn() };
+const mockListen = jest.fn();
+const mockNotify = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        Category: mockCategory,
+        Media: mockMedia
+    }
+}));
+
+jest.unstable_mockModule('../../src/services/pgNotifier.js', () => ({
+    listen: mockListen,
+    notify: mockNotify
+}));
+
+const {
+    getCategories,
+    getCategoryMap,
+    getMediaMap,
+    invalidateReferenceData,
+    startReferenceData
+} = await import('../../src/services/referenceData.js');
+
+describe('referenceData', () => {
+    beforeEach(async () => {
+        jest.clearAllMocks();
+        mockCategory.findAll.mockResolvedValue([{ id: 1, name: 'Dessert' }]);
+        mockMedia.findAll.mockResolvedValue([{ id: 7, title: 'Ratatouille' }]);
+        mockNotify.mockResolvedValue();
+        await invalidateReferenceData('categories');
+        await invalidateReferenceData('media');
+        jest.clearAllMocks();
+    });
+
+    test('indexes categories and media by id', async () => {
+        const categories = await getCategoryMap();
+        const media = await getMediaMap();
+
+        expect(categories.get(1)).toEqual({ id: 1, name: 'Dessert' });
+        expect(media.get(7)).toEqual({ id: 7, title: 'Ratatouille' });
+        expect(media.get(99)).toBeUndefined();
+    });
+
+    test('loads each table once until invalidated', async () => {
+        await getCategories();
+        await getCategories();
+        expect(mockCategory.findAll).toHaveBeenCalledTimes(1);
+
+        mockCategory.findAll.mockResolvedValue([{ id: 2, name: 'Beverage' }]);
+        await invalidateReferenceData('categories');
+
+        await expect(getCategories()).resolves.toEqual([{ id: 2, name: 'Beverage' }]);
+        expect(mockNotify).toHaveBeenCalledWith('reference_data', 'categories');
+    });
+
+    test('drops its copy when another replica notifies a change', async () => {
+        await startReferenceData();
+        const [[channel, handler]] = mockListen.mock.calls;
+        expect(channel).toBe('reference_data');
+
+        handler('media');
+        await Promise.all([getCategoryMap(), getMediaMap()]);
+
+        expect(mockMedia.findAll).toHaveBeenCalledTimes(2);
+        expect(mockCategory.findAll).toHaveBeenCalledTimes(1);
+    });
+});
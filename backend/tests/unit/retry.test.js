@@ -0,0 +1,58 @@
+import { describe, test, expect, jest, afterEach } from '@jest/globals';
+import { backoffDelay, isRetryableError } from '../../src/utils/retry.js';
+import { TokenBucket } from '../../src/utils/tokenBucket.js';
+
+describe('backoffDelay', () => {
+    afterEach(() => {
+        jest.restoreAllMocks();
+    });
+
+    test('doubles the ceiling per attempt up to the maximum', () => {
+        jest.spyOn(Math, 'random').mockReturnValue(1);
+
+        expect(backoffDelay(1, { baseMs: 100, maxMs: 1000 })).toBe(100);
+        expect(backoffDelay(3, { baseMs: 100, maxMs: 1000 })).toBe(400);
+        expect(backoffDelay(10, { baseMs: 100, maxMs: 1000 })).toBe(1000);
+    });
+
+    test('applies full jitter', () => {
+        jest.spyOn(Math, 'random').mockReturnValue(0.5);
+
+        expect(backoffDelay(2, { baseMs: 100 })).toBe(100);
+    });
+});
+
+describe('isRetryableError', () => {
+    test('retries rate limits, server errors and timeouts only', () => {
+        expect(isRetryableError(Object.assign(new Error(), { status: 429 }))).toBe(true);
+        expect(isRetryableError(Object.assign(new Error(), { status: 503 }))).toBe(true);
+        expect(isRetryableError(Object.assign(new Error(), { name: 'TimeoutError' }))).toBe(true);
+        expect(isRetryableError(Object.assign(new Error(), { status: 400 }))).toBe(false);
+        expect(isRetryableError(new Error('invalid JSON'))).toBe(false);
+    });
+
+    test('retries dropped connections and open circuits', () => {
+        expect(isRetryableError(Object.assign(new Error(), { code: 'ECONNRESET' }))).toBe(true);
+        expect(isRetryableError(Object.assign(new Error(), { name: 'CircuitOpenError' }))).toBe(true);
+        expect(isRetryableError(Object.assign(new Error(), { code: 'ENOTFOUND' }))).toBe(false);
+    });
+});
+
+describe('TokenBucket', () => {
+    afterEach(() => {
+        jest.restoreAllMocks();
+    });
+
+    test('limits bursts to its capacity and refills over time', () => {
+        const now = jest.spyOn(Date, 'now').mockReturnValue(0);
+        const bucket = new TokenBucket({ capacity: 2, refillPerSecond: 1 });
+
+        expect(bucket.tryTake()).toBe(true);
+        expect(bucket.tryTake()).toBe(true);
+        expect(bucket.tryTake()).toBe(false);
+        expect(bucket.waitTime()).toBe(1000);
+
+        now.mockReturnValue(1000);
+        expect(bucket.tryTake()).toBe(true);
+    });
+});
@@ -0,0 +1,58 @@
+import { describe, test, expect } from '@jest/globals';
+import { compileSerializer } from '../../src/utils/serializer.js';
+import {
+    serializeAuth,
+    serializeRecipeList,
+    serializeUsers
+} from '../../src/serializers/schemas.js';
+
+const recipe = {
+    id: 4,
+    title: 'Crème brûlée "maison"\n',
+    difficulty: 'moyen',
+    prep_time: 20,
+    cook_time: null,
+    created_at: new Date('2024-05-01T10:00:00Z'),
+    author: { id: 2, username: 'Rémy', email: 'remy@example.com' },
+    category: null,
+    media: { id: 7, title: 'Ratatouille', type: 'film', tmdb_id: 2062 },
+    search_vector: "'creme':1"
+};
+
+describe('compiled serializers', () => {
+    test('match JSON.stringify on the properties a schema lists', () => {
+        const page = { data: [recipe], next_cursor: 'abc' };
+        const { search_vector, author, ...listed } = recipe;
+
+        expect(JSON.parse(serializeRecipeList(page))).toEqual(JSON.parse(JSON.stringify({
+            data: [{ ...listed, author: { id: author.id, username: author.username } }],
+            next_cursor: 'abc'
+        })));
+    });
+
+    test('never write a password hash, whatever the row holds', () => {
+        const user = { id: 1, username: 'admin', role: 'admin', password_hash: '$argon2id$v=19$secret' };
+        // Model instances are read through their attribute getters
+        const instance = Object.create({ get password_hash() { return 'hash'; }, get id() { return 2; } });
+
+        expect(serializeUsers([user, instance])).not.toContain('argon2');
+        expect(serializeUsers([user, instance])).not.toContain('hash');
+        expect(JSON.parse(serializeAuth({ user: instance, token: 't' }))).toEqual({ user: { id: 2 }, token: 't' });
+    });
+
+    test('coerce values to the declared type', () => {
+        const serialize = compileSerializer({
+            type: 'object',
+            properties: {
+                count: { type: 'integer' },
+                ratio: { type: 'number' },
+                live: { type: 'boolean' },
+                tags: { type: 'array', items: { type: 'string' } }
+            }
+        });
+
+        expect(serialize({ count: '12', ratio: Number.NaN, live: 1, tags: ['a', 3, null] }))
+            .toBe('{"count":12,"ratio":null,"live":true,"tags":["a","3",null]}');
+        expect(serialize(null)).toBe('null');
+    });
+});
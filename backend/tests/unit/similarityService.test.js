@@ -0,0 +1,169 @@
+import { describe, test, expect, jest, beforeEach, afterEach } from '@jest/globals';
+
+const mockQuery = jest.fn();
+const mockTransaction = jest.fn(fn => fn({}));
+const mockListen = jest.fn();
+const mockLockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: { query: mockQuery, transaction: mockTransaction }
+    }
+}));
+
+jest.unstable_mockModule('../../src/services/pgNotifier.js', () => ({
+    listen: mockListen
+}));
+
+// The rebuild lock's own connection
+jest.unstable_mockModule('pg', () => ({
+    default: {
+        Client: jest.fn(() => ({
+            connect: jest.fn(async () => {}),
+            query: mockLockQuery,
+            end: jest.fn(async () => {})
+        }))
+    }
+}));
+
+const {
+    getSimilarRecipes,
+    startSimilarityUpdates,
+    stopSimilarityUpdates,
+    flushSimilarityUpdates,
+    rebuildSimilarity,
+    getSimilarityStats,
+    SIMILAR_K
+} = await import('../../src/services/similarityService.js');
+
+const statement = sql => sql.trim().split('(')[0].replace(/\s+/g, ' ');
+
+describe('similarity service', () => {
+    beforeEach(() => {
+        mockQuery.mockReset();
+        mockQuery.mockResolvedValue([]);
+        mockQuery.failed = false;
+        mockTransaction.mockClear();
+        mockListen.mockClear();
+        mockLockQuery.mockReset();
+    });
+
+    afterEach(async () => {
+        await stopSimilarityUpdates();
+    });
+
+    test('reads a precomputed list best first', async () => {
+        mockQuery.mockResolvedValue([{ id: 8, title: 'Gratin', score: 0.8 }]);
+
+        const rows = await getSimilarRecipes(3, { fields: ['id', 'title'], limit: 5 });
+
+        const [sql, options] = mockQuery.mock.calls[0];
+        expect(sql).toContain('SELECT r.id, r.title, n.score');
+        expect(sql).toContain('ORDER BY n.score DESC');
+        expect(options.replacements).toEqual({ id: 3, limit: 5 });
+        expect(rows).toEqual([{ id: 8, title: 'Gratin', score: 0.8 }]);
+    });
+
+    test('applies the queue table, recomputes first, when notified', async () => {
+        const queue = { recompute: [5, 6], refresh: [1, 2] };
+        mockQuery.mockImplementation(async (sql, { replacements } = {}) => {
+            if (sql.includes('pg_try_advisory_xact_lock')) {
+                return [{ locked: true }];
+            }
+            if (sql.includes('DELETE FROM similarity_queue')) {
+                return queue[replacements.action].splice(0, replacements.limit).map(id => ({ recipe_id: id }));
+            }
+            return [];
+        });
+
+        await startSimilarityUpdates();
+        await flushSimilarityUpdates();
+
+        const work = mockQuery.mock.calls
+            .filter(([sql]) => sql.includes('recipe_neighbors('))
+            .map(([sql, { replacements }]) => [statement(sql), replacements]);
+        expect(work).toEqual([
+            ['SELECT recompute_recipe_neighbors', { ids: [5, 6], k: SIMILAR_K }],
+            ['SELECT refresh_recipe_neighbors', { id: 1, k: SIMILAR_K }],
+            ['SELECT refresh_recipe_neighbors', { id: 2, k: SIMILAR_K }]
+        ]);
+        expect(mockTransaction).toHaveBeenCalledTimes(4);
+
+        // Writes in any process NOTIFY the channel
+        const [channel, onNotify] = mockListen.mock.calls[0];
+        expect(channel).toBe('similarity_queue');
+        queue.refresh.push(9);
+        onNotify('');
+        await flushSimilarityUpdates();
+        expect(mockQuery.mock.calls.at(-1)[1].replacements).toEqual({ action: 'refresh', limit: 1, maxAttempts: 5 });
+        expect(queue.refresh).toEqual([]);
+    });
+
+    test('leaves the queue alone while another worker holds the lock', async () => {
+        mockQuery.mockResolvedValue([{ locked: false }]);
+
+        await startSimilarityUpdates();
+        await flushSimilarityUpdates();
+
+        expect(mockQuery.mock.calls.some(([sql]) => sql.includes('DELETE FROM similarity_queue'))).toBe(false);
+    });
+
+    test('puts failed work back at the end of the queue', async () => {
+        mockQuery.mockImplementation(async (sql, { replacements } = {}) => {
+            if (sql.includes('pg_try_advisory_xact_lock')) {
+                return [{ locked: true }];
+            }
+            if (sql.includes('DELETE FROM similarity_queue')) {
+                return replacements.action === 'refresh' && !mockQuery.failed ? [{ recipe_id: 4 }] : [];
+            }
+            if (sql.includes('refresh_recipe_neighbors')) {
+                mockQuery.failed = true;
+                throw new Error('deadlock detected');
+            }
+            return [];
+        });
+
+        await startSimilarityUpdates();
+        await flushSimilarityUpdates();
+
+        const [sql, { replacements }] = mockQuery.mock.calls.find(([text]) => text.includes('attempts + 1'));
+        expect(sql).toContain('UPDATE similarity_queue');
+        expect(replacements).toEqual({ ids: [4] });
+    });
+
+    test('rebuilds features before norms before lists, one at a time', async () => {
+        mockQuery.mockImplementation(async (sql) => (sql.startsWith('SELECT id FROM recipes') ? [{ id: 1 }, { id: 2 }] : []));
+
+        const running = rebuildSimilarity();
+        await expect(rebuildSimilarity()).rejects.toThrow('already running');
+        const result = await running;
+
+        // Held on a connection of its own for the whole rebuild
+        expect(mockLockQuery).toHaveBeenCalledWith('SELECT pg_advisory_lock($1, $2)', [2021, 1]);
+        // Each statement in its own transaction, over the pool's statement timeout
+        const statements = mockQuery.mock.calls.map(([sql]) => statement(sql))
+            .filter(sql => !sql.startsWith('SET LOCAL statement_timeout'));
+        expect(mockQuery.mock.calls[0][0]).toBe('SET LOCAL statement_timeout = 600000');
+        expect(mockQuery.mock.calls[1][1].transaction).toBe(mockQuery.mock.calls[0][1].transaction);
+        expect(statements[0]).toBe('DELETE FROM similarity_queue');
+        expect(statements.indexOf('SELECT refresh_recipe_norms'))
+            .toBeGreaterThan(statements.indexOf('SELECT refresh_recipe_features'));
+        expect(statements.findLastIndex(sql => sql.startsWith('SELECT recompute_recipe_neighbors')))
+            .toBeGreaterThan(statements.lastIndexOf('SELECT refresh_recipe_norms'));
+        expect(result).toMatchObject({ recipes: 2, k: SIMILAR_K });
+
+        mockQuery.mockResolvedValue([{ pending: 3, stuck: 0, rebuilding: false }]);
+        expect(await getSimilarityStats()).toMatchObject({ pending: 3, rebuilding: false, last_rebuild: { status: 'done' } });
+    });
+
+    test('answers 409 when another worker is rebuilding', async () => {
+        mockLockQuery.mockImplementation(async (sql) => {
+            if (sql.startsWith('SELECT pg_advisory_lock')) {
+                throw Object.assign(new Error('canceling statement due to lock timeout'), { code: '55P03' });
+            }
+        });
+
+        await expect(rebuildSimilarity()).rejects.toMatchObject({ name: 'RebuildRunningError', status: 409 });
+        expect(mockQuery).not.toHaveBeenCalledWith('DELETE FROM similarity_queue', expect.anything());
+    });
+});
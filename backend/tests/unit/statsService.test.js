@@ -0,0 +1,93 @@
+import { describe, test, expect, jest, beforeEach } from '@jest/globals';
+
+const mockQuery = jest.fn();
+
+jest.unstable_mockModule('../../src/models/index.js', () => ({
+    default: {
+        sequelize: { query: mockQuery, transaction: async (work) => work({}) }
+    }
+}));
+
+const { getDashboardStats, readSeries, rebuildStats } = await import('../../src/services/statsService.js');
+
+// Answer each query by the metric or table it reads
+const answer = (sql, { replacements }) => {
+    if (sql.includes('FROM stat_counters WHERE metric IN')) {
+        return [
+            { metric: 'recipes', dimension: 'all', value: '12' },
+            { metric: 'users', dimension: 'all', value: '3' },
+            { metric: 'recipes_by_difficulty', dimension: 'facile', value: '7' },
+            { metric: 'recipes_by_difficulty', dimension: 'moyen', value: '5' },
+            { metric: 'users_by_role', dimension: 'admin', value: '1' }
+        ];
+    }
+    if (sql.includes('stat_daily')) {
+        return [
+            { date: '2026-01-01', recipes: '2', users: '0' },
+            { date: '2026-01-02', recipes: '0', users: '1' }
+        ];
+    }
+    if (replacements.metric === 'recipes_by_category') {
+        return [{ id: 4, label: 'Desserts', value: '9' }, { id: null, label: null, value: '3' }];
+    }
+    if (replacements.metric === 'recipes_by_author') {
+        return [{ id: 2, label: 'chef', value: '12' }];
+    }
+    return [];
+};
+
+describe('stats service', () => {
+    beforeEach(() => {
+        mockQuery.mockReset();
+        mockQuery.mockImplementation(async (sql, options) => answer(sql, options));
+    });
+
+    test('serves totals, breakdowns and rankings from the counter tables', async () => {
+        const stats = await getDashboardStats();
+
+        expect(stats).toMatchObject({ recipes: 12, users: 3, categories: 0, media: 0 });
+        expect(stats.breakdown).toEqual({
+            difficulty: { facile: 7, moyen: 5 },
+            roles: { admin: 1 },
+            media_types: {}
+        });
+        expect(stats.top.categories).toEqual([
+            { id: 4, name: 'Desserts', count: 9 },
+            { id: null, name: null, count: 3 }
+        ]);
+        expect(stats.top.authors).toEqual([{ id: 2, username: 'chef', count: 12 }]);
+        expect(stats.top.media).toEqual([]);
+        expect(stats.series).toEqual({
+            bucket: 'day',
+            days: 30,
+            points: [
+                { date: '2026-01-01', recipes: 2, users: 0 },
+                { date: '2026-01-02', recipes: 0, users: 1 }
+            ]
+        });
+
+        // Never scans the source tables for counts
+        for (const [sql] of mockQuery.mock.calls) {
+            expect(sql).not.toMatch(/count\(/i);
+        }
+    });
+
+    test('buckets the series with the requested interval', async () => {
+        await readSeries({ days: 90, bucket: 'week' });
+
+        const [, options] = mockQuery.mock.calls[0];
+        expect(options.replacements).toEqual({ days: 90, bucket: 'week', step: '1 week' });
+        expect(options.useMaster).toBe(false);
+    });
+
+    test('rebuilds under a longer statement timeout and reads back from the primary', async () => {
+        const stats = await rebuildStats();
+
+        const [[timeout, { transaction }], [rebuild, rebuildOptions], ...reads] = mockQuery.mock.calls;
+        expect(timeout).toBe('SET LOCAL statement_timeout = 300000');
+        expect(rebuild).toBe('SELECT rebuild_stat_counters()');
+        expect(rebuildOptions.transaction).toBe(transaction);
+        expect(reads.every(([, options]) => options.useMaster === true)).toBe(true);
+        expect(stats).toMatchObject({ recipes: 12, users: 3 });
+    });
+});
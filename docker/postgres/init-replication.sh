@@ -0,0 +1,10 @@
+#!/bin/sh
+# Runs once on a fresh primary volume: creates the role the streaming
+# replica (docker-compose.dev.yml, profile "replica") connects with.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicator WITH REPLICATION LOGIN PASSWORD '${REPLICATION_PASSWORD:-replicator}';
+SQL
+
+echo "host replication replicator all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,17 @@
+#!/bin/sh
+# Streaming replica: clones the primary on first start, then follows it.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    echo "Cloning primary from ${PRIMARY_HOST:-db}..."
+    until PGPASSWORD="${REPLICATION_PASSWORD:-replicator}" pg_basebackup \
+        --host="${PRIMARY_HOST:-db}" --username=replicator \
+        --pgdata="$PGDATA" --wal-method=stream --write-recovery-conf --progress; do
+        echo "Primary not ready, retrying in 2s"
+        sleep 2
+    done
+    chown -R postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+fi
+
+exec su-exec postgres postgres -c hot_standby=on
@@ -1,26 +1,99 @@
 const API_BASE = '/api/v1';
 
+// Read endpoints send short max-age headers. Right after a write, force
+// revalidation (a cheap 304 when nothing changed) so edits show up at once.
+const REVALIDATE_AFTER_WRITE_MS = 60 * 1000;
+let revalidateUntil = 0;
+
+// Someone else wrote (a change event arrived): cached reads are stale too
+export function revalidateReads() {
+    revalidateUntil = Date.now() + REVALIDATE_AFTER_WRITE_MS;
+}
+
 async function request(endpoint, options = {}) {
+    const method = options.method || 'GET';
     const config = {
+        credentials: 'include',
+        ...(method === 'GET' && Date.now() < revalidateUntil ? { cache: 'no-cache' } : {}),
+        ...options,
         headers: {
             'Content-Type': 'application/json',
             ...options.headers
-        },
-        credentials: 'include',
-        ...options
+        }
     };
 
     const response = await fetch(`${API_BASE}${endpoint}`, config);
 
+    if (method !== 'GET') {
+        revalidateReads();
+    }
+
     if (!response.ok) {
-        const error = await response.json().catch(() => ({ message: 'Request failed' }));
-        throw new Error(error.message || `HTTP ${response.status}`);
+        const body = await response.json().catch(() => ({ message: 'Request failed' }));
+        const error = new Error(body.message || `HTTP ${response.status}`);
+        error.status = response.status;
+        error.body = body;
+        throw error;
     }
 
     if (response.status === 204) return null;
     return response.json();
 }
 
+// POST to a server-sent events endpoint, calling onEvent(event, data) per message
+async function streamRequest(endpoint, options, onEvent) {
+    const response = await fetch(`${API_BASE}${endpoint}`, {
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream'
+        },
+        credentials: 'include',
+        ...options
+    });
+
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({ message: 'Request failed' }));
+        throw new Error(error.message || `HTTP ${response.status}`);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = /^event: (.*)$/m.exec(message)?.[1] || 'message';
+            const data = /^data: (.*)$/m.exec(message)?.[1];
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+// Optimistic locking: writes carry the version they were based on and
+// fail with status 412 when the recipe changed since
+function ifMatch(version) {
+    return version == null ? {} : { 'If-Match': `"${version}"` };
+}
+
+function toQuery(params = {}) {
+    const search = new URLSearchParams();
+    for (const [key, value] of Object.entries(params)) {
+        if (value !== undefined && value !== null && value !== '') {
+            search.set(key, value);
+        }
+    }
+    const query = search.toString();
+    return query ? `?${query}` : '';
+}
+
+// Columns needed by recipe cards (skips the long text fields)
+export const RECIPE_LIST_FIELDS = 'id,title,description,difficulty,prep_time,cook_time,image_url,user_id,category_id,media_id,created_at';
+
 export const api = {
     // Auth
     login: (data) => request('/auth/login', { method: 'POST', body: JSON.stringify(data) }),
@@ -29,12 +102,48 @@ export const api = {
     getMe: () => request('/auth/me'),
 
     // Recipes
-    getRecipes: () => request('/recipes'),
+    getRecipesPage: (params = {}) => request(`/recipes${toQuery(params)}`),
+    getRecipes: async (params = {}) => {
+        const recipes = [];
+        let cursor;
+        do {
+            const page = await api.getRecipesPage({ ...params, cursor });
+            recipes.push(...page.data);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return recipes;
+    },
+    searchRecipes: (q, limit = 20) => request(`/recipes/search${toQuery({ q, limit })}`),
     getRecipe: (id) => request(`/recipes/${id}`),
+    getSimilarRecipes: (id, params = {}) => request(`/recipes/${id}/similar${toQuery(params)}`),
     createRecipe: (data) => request('/recipes', { method: 'POST', body: JSON.stringify(data) }),
-    generateRecipe: (movie) => request('/recipes/generate', { method: 'POST', body: JSON.stringify({ movie }) }),
-    updateRecipe: (id, data) => request(`/recipes/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
-    deleteRecipe: (id) => request(`/recipes/${id}`, { method: 'DELETE' }),
+    generateRecipe: async (movie) => {
+        let job = await request('/recipes/generate', { method: 'POST', body: JSON.stringify({ movie }) });
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+            job = await api.getGenerationJob(job.id);
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Recipe generation failed');
+        }
+        return job.result;
+    },
+    getGenerationJob: (id) => request(`/recipes/generate/${id}`),
+    generateRecipeStream: async (movie, onToken) => {
+        let recipe = null;
+        await streamRequest('/recipes/generate?stream=1', { method: 'POST', body: JSON.stringify({ movie }) }, (event, data) => {
+            if (event === 'token') onToken(data.text);
+            if (event === 'recipe') recipe = data;
+            if (event === 'error') throw new Error(data.error);
+        });
+        return recipe;
+    },
+    updateRecipe: (id, data, version) => request(`/recipes/${id}`, {
+        method: 'PUT',
+        headers: ifMatch(version),
+        body: JSON.stringify(data)
+    }),
+    deleteRecipe: (id, version) => request(`/recipes/${id}`, { method: 'DELETE', headers: ifMatch(version) }),
 
     // Users
     getUser: (id) => request(`/users/${id}`),
@@ -52,10 +161,14 @@ export const api = {
 
     // Admin
     admin: {
-        getStats: () => request('/admin/stats'),
+        getStats: (params = {}) => request(`/admin/stats${toQuery(params)}`),
         getRecipes: () => request('/admin/recipes'),
-        updateRecipe: (id, data) => request(`/admin/recipes/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
-        deleteRecipe: (id) => request(`/admin/recipes/${id}`, { method: 'DELETE' }),
+        updateRecipe: (id, data, version) => request(`/admin/recipes/${id}`, {
+            method: 'PUT',
+            headers: ifMatch(version),
+            body: JSON.stringify(data)
+        }),
+        deleteRecipe: (id, version) => request(`/admin/recipes/${id}`, { method: 'DELETE', headers: ifMatch(version) }),
         getCategories: () => request('/admin/categories'),
         createCategory: (data) => request('/admin/categories', { method: 'POST', body: JSON.stringify(data) }),
         updateCategory: (id, data) => request(`/admin/categories/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
@@ -66,6 +179,11 @@ export const api = {
         deleteMedia: (id) => request(`/admin/media/${id}`, { method: 'DELETE' }),
         getUsers: () => request('/admin/users'),
         updateUser: (id, data) => request(`/admin/users/${id}`, { method: 'PUT', body: JSON.stringify(data) }),
-        deleteUser: (id) => request(`/admin/users/${id}`, { method: 'DELETE' })
+        deleteUser: (id) => request(`/admin/users/${id}`, { method: 'DELETE' }),
+        // entity: 'recipes' | 'media' | 'categories' | 'users'
+        bulk: (entity, ids, operation, changes) => request(`/admin/${entity}/bulk`, {
+            method: 'POST',
+            body: JSON.stringify({ ids, operation, changes })
+        })
     }
 };
@@ -0,0 +1,152 @@
+// Live recipe, media and category changes from GET /api/v1/events. One
+// EventSource is shared by every page subscribed at the time.
+
+import { api, revalidateReads } from './api.js';
+
+const EVENTS_URL = '/api/v1/events';
+// EventSource retries network errors itself but gives up on an error
+// status, e.g. 503 when the server has too many streams open
+const REOPEN_AFTER_MS = 10 * 1000;
+// A recipe read right after its event may reach a replica without it yet
+const FETCH_ATTEMPTS = 3;
+const FETCH_RETRY_MS = 1000;
+
+const handlers = new Set();
+let source = null;
+let reopenTimer = null;
+let lastEventId = null;
+
+function dispatch(change) {
+    revalidateReads();
+    handlers.forEach(handler => handler(change));
+}
+
+function open() {
+    // A new EventSource does not send Last-Event-ID; the query does
+    const query = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : '';
+    source = new EventSource(`${EVENTS_URL}${query}`, { withCredentials: true });
+    source.addEventListener('change', (event) => {
+        lastEventId = event.lastEventId;
+        dispatch(JSON.parse(event.data));
+    });
+    // Changes were missed and cannot be replayed: reload from the API
+    source.addEventListener('reset', () => dispatch({ action: 'reset', ids: [] }));
+    source.onerror = () => {
+        if (source?.readyState === EventSource.CLOSED) {
+            source = null;
+            reopenTimer = setTimeout(() => {
+                reopenTimer = null;
+                open();
+            }, REOPEN_AFTER_MS);
+        }
+    };
+}
+
+function close() {
+    source?.close();
+    source = null;
+    clearTimeout(reopenTimer);
+    reopenTimer = null;
+    // The next page loads fresh data; replaying older events onto it would undo that
+    lastEventId = null;
+}
+
+/**
+ * Call handler({ entity, action, ids, data }) for every change; action is
+ * 'created', 'updated', 'deleted', 'refreshed' (reload that list) or
+ * 'reset' (reload everything). Returns the unsubscribe function.
+ */
+export function subscribeChanges(handler) {
+    handlers.add(handler);
+    if (!source && !reopenTimer) {
+        open();
+    }
+    return () => {
+        handlers.delete(handler);
+        if (handlers.size === 0) {
+            close();
+        }
+    };
+}
+
+/**
+ * Rows with a change applied by id. Rows a change carries no data for
+ * (diff too large, bulk author changes) are up to the caller.
+ */
+export function applyChange(rows, { action, ids, data }) {
+    const changed = new Set(ids);
+    switch (action) {
+        case 'deleted':
+            return rows.filter(row => !changed.has(row.id));
+        case 'updated':
+            return data ? rows.map(row => (changed.has(row.id) ? { ...row, ...data } : row)) : rows;
+        case 'created':
+            return data ? [...rows.filter(row => !changed.has(row.id)), { id: ids[0], ...data }] : rows;
+        default:
+            return rows;
+    }
+}
+
+/**
+ * Replace or add a row, new rows first or last
+ */
+export function upsertRow(rows, row, { prepend = false } = {}) {
+    if (rows.some(existing => existing.id === row.id)) {
+        return rows.map(existing => (existing.id === row.id ? row : existing));
+    }
+    return prepend ? [row, ...rows] : [...rows, row];
+}
+
+/**
+ * Point a recipe's category and media objects at the current lists;
+ * ids no longer listed were deleted, and the server cleared them too
+ */
+export function linkRecipe(recipe, categories, media) {
+    const category = categories.find(item => item.id === recipe.category_id) ?? null;
+    const medium = media.find(item => item.id === recipe.media_id) ?? null;
+    return {
+        ...recipe,
+        category_id: category ? recipe.category_id : null,
+        category,
+        media_id: medium ? recipe.media_id : null,
+        media: medium
+    };
+}
+
+/**
+ * Recipe ids a change leaves for the caller to fetch from the API: new
+ * recipes and, among those listed, ones without a diff or with a new
+ * author, unless the event carries the author
+ */
+export function recipesToFetch(recipes, { action, ids, data }) {
+    // Events with the author carry everything a list shows
+    if (data?.author !== undefined) {
+        return [];
+    }
+    if (action === 'created') {
+        return ids;
+    }
+    if (action !== 'updated' || (data && data.user_id === undefined)) {
+        return [];
+    }
+    const listed = new Set(recipes.map(recipe => recipe.id));
+    return ids.filter(id => listed.has(id));
+}
+
+/**
+ * GET a recipe from recipesToFetch(), retried while it answers 404
+ * @param {number} id
+ * @returns {Promise<Object>}
+ */
+export async function fetchChangedRecipe(id) {
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await api.getRecipe(id);
+        } catch (error) {
+            if (error.status !== 404 || attempt === FETCH_ATTEMPTS) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, attempt * FETCH_RETRY_MS));
+        }
+    }
+}
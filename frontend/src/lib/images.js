@@ -0,0 +1,42 @@
+// Widths the backend /img proxy renders (IMAGE_WIDTHS in imageProxy.js)
+const WIDTHS = [160, 320, 480, 640, 960];
+
+// The proxy only resizes images itself when the backend has sharp
+// installed (build with VITE_IMAGE_TRANSCODING=true). Otherwise TMDB
+// posters still come in several sizes, other images in one.
+const TRANSCODING = import.meta.env.VITE_IMAGE_TRANSCODING === 'true';
+
+const isRemote = (url) => typeof url === 'string' && /^https?:\/\//.test(url);
+const isResizable = (url) => TRANSCODING || url.startsWith('https://image.tmdb.org/');
+
+/**
+ * Proxied, resized URL for a remote image; local and empty URLs are
+ * returned unchanged
+ * @param {string} url
+ * @param {number} width
+ * @returns {string}
+ */
+export function imageSrc(url, width = 320) {
+    if (!isRemote(url)) {
+        return url;
+    }
+    // One URL per image when every width would be the same bytes
+    const size = isResizable(url) ? `&w=${width}` : '';
+    return `/img?url=${encodeURIComponent(url)}${size}`;
+}
+
+/**
+ * srcset covering the proxy widths up to maxWidth, when they differ
+ * @param {string} url
+ * @param {number} [maxWidth]
+ * @returns {string|undefined}
+ */
+export function imageSrcset(url, maxWidth = 960) {
+    if (!isRemote(url) || !isResizable(url)) {
+        return undefined;
+    }
+    return WIDTHS
+        .filter(width => width <= maxWidth)
+        .map(width => `${imageSrc(url, width)} ${width}w`)
+        .join(', ');
+}
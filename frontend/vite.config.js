@@ -10,6 +10,10 @@ export default defineConfig({
       '/api': {
         target: 'http://backend:3000',
         changeOrigin: true
+      },
+      '/img': {
+        target: 'http://backend:3000',
+        changeOrigin: true
       }
     }
   }